@@ -33,13 +33,17 @@ from routes.images import router as images_router
 from routes.news import router as news_router
 from routes.prospector import router as prospector_router
 from routes.blog_public import router as blog_public_router
+from routes.diagnostics import router as diagnostics_router
 from services.sequence_scheduler import sequence_scheduler
 from services.news_monitor import news_monitor
 from services.lead_prospector import lead_prospector
 from services.comms_agent import comms_agent
 from services.logging_service import logging_service, get_logger
 from orchestrator.agentic_brain import create_agentic_brain
-from middleware.logging_middleware import LoggingMiddleware, PerformanceMiddleware
+from orchestrator.event_queue import event_queue
+from services.tracing import install_instrumentation
+from services.json_file_store import flush_all as flush_json_files
+from middleware.logging_middleware import RequestContextMiddleware
 
 # Initialize centralized logging
 logger = get_logger(__name__)
@@ -52,6 +56,9 @@ async def lifespan(app: FastAPI):
     init_db()
     logger.info("Database initialized")
 
+    # Span tracing hooks (inactive unless a request is traced)
+    install_instrumentation()
+
     # Start email sequence scheduler
     logger.info("Starting email sequence scheduler...")
     sequence_scheduler.start_background_scheduler(interval_seconds=60)
@@ -65,6 +72,11 @@ async def lifespan(app: FastAPI):
         # research_agent, call_coach, lead_service, aleph_client, etc.
     )
     logger.info("AgenticBrain initialized - AI orchestration ready")
+
+    # Drain the durable event queue (webhooks and /orchestrator/event enqueue here)
+    event_queue.register_event_handler(app.state.agentic_brain.handle_event)
+    await event_queue.start()
+    logger.info("Event queue workers started")
     logger.info("CommsAgent ready - WhatsApp/Email AI responses enabled")
 
     # News Monitor is available via API endpoints
@@ -80,6 +92,9 @@ async def lifespan(app: FastAPI):
     # Stop scheduler on shutdown
     logger.info("Stopping email scheduler...")
     sequence_scheduler.stop_scheduler()
+    await event_queue.stop()
+    # Write out debounced blog edits before the process exits
+    flush_json_files()
     logger.info("Shutting down JASPER CRM")
 
 
@@ -109,9 +124,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add logging middleware
-app.add_middleware(LoggingMiddleware)
-app.add_middleware(PerformanceMiddleware, slow_threshold_ms=2000)
+# Correlation IDs, timing headers, request logging and metrics (single pure-ASGI pass)
+app.add_middleware(RequestContextMiddleware, slow_threshold_ms=2000)
 
 
 # --- Static Files & Dashboard ---
@@ -159,6 +173,7 @@ app.include_router(images_router)  # Image Curation (Pixabay, Pexels, Unsplash)
 app.include_router(news_router)  # News Monitor (DFI Announcements, Current Events SEO)
 app.include_router(prospector_router)  # Lead Prospector (Active Lead Generation)
 app.include_router(blog_public_router, prefix="/api/v1")  # Public Blog API (Search, Posts)
+app.include_router(diagnostics_router)  # Local-only traces and sampling profiler
 
 
 # --- Error Handlers ---
@@ -0,0 +1,493 @@
+"""
+JASPER CRM - Content & SEO Benchmark Suite
+
+Offline, replayable timings of the content and SEO hot paths over
+synthetic corpora (default 1k / 10k / 50k posts, plus as many keywords
+spread over sector CSVs):
+
+- blog.get_all_posts / blog.get_post_by_slug / blog.search_posts   BlogService
+- search.search                                                    SearchService
+- seo.calculate_score       one post per call, a different post each time
+- links.find_related_articles                                      LinkBuilderService
+- keywords.search                                                  KeywordService
+
+Corpora are generated from a fixed seed and cached in --data, so every
+run (and every machine) replays the same posts; each run works on a fresh
+copy, so derived files (search index, keyword catalog) are rebuilt from
+scratch.
+
+Per case and corpus size it records:
+- first_ms: the first call, including lazy work (index/graph builds, compiles)
+- median_ms / min_ms: steady-state calls, repeated for --budget seconds
+- peak_kb: peak traced (tracemalloc) allocation during one steady-state call
+- peak_rss_mb: the worker process's peak RSS (the case group's whole run)
+Each case group runs in its own process per size, stopped after
+--case-timeout seconds. Cases whose service can't be imported in this
+environment, or that time out, are reported as unavailable rather than
+failing the run (but count as regressions if the baseline measured them).
+
+Baselines:
+    python benchmarks/bench_content.py --write-baseline benchmarks/baseline.json   # record "before"
+    python benchmarks/bench_content.py --baseline benchmarks/baseline.json         # compare "after"
+
+Comparing exits 1 if any case got slower (median_ms) or hungrier (peak_kb)
+than its baseline by more than the thresholds (fractions): per-case
+overrides stored in the baseline under "thresholds" -> "cases", then
+--wall-threshold / --memory-threshold, then the baseline's own defaults
+(0.25 when written), e.g.
+    "thresholds": {"wall": 0.25, "memory": 0.25, "cases": {"seo.calculate_score": {"wall": 0.5}}}
+
+Usage:
+    python benchmarks/bench_content.py [--sizes 1000,10000,50000] [--words 400] [--budget 3]
+    python benchmarks/bench_content.py --sizes 1000 --cases blog,seo     # only these case groups
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+import itertools
+import statistics
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/jasper-bench.db")
+
+CORPUS_VERSION = 1  # Bump when the generator changes, so cached corpora are rebuilt
+DEFAULT_DATA_DIR = Path(tempfile.gettempdir()) / "jasper-bench-corpus"
+DEFAULT_THRESHOLD = 0.25
+MIN_RUNS = 3
+# Differences below these never count as regressions (timer and allocator noise)
+NOISE_MS = 0.05
+NOISE_KB = 64
+
+
+# =============================================================================
+# Synthetic corpus
+# =============================================================================
+
+CATEGORIES = ["DFI Insights", "Climate Finance", "Financial Modelling", "Project Finance", "Agribusiness"]
+TAGS = [
+    "dfi", "ifc", "afdb", "dbsa", "idc", "solar", "wind", "ipp", "water", "mining", "agriculture",
+    "blended-finance", "project-finance", "ppp", "debt", "equity", "south-africa", "kenya", "nigeria",
+]
+TOPICS = [
+    "dfi funding", "blended finance", "solar project finance", "ipp financing", "water infrastructure",
+    "agribusiness investment", "financial model", "bankable feasibility study", "green hydrogen",
+    "mining project finance", "real estate development", "healthcare infrastructure", "climate finance",
+]
+WORDS = (
+    "development finance institutions assess project cash flows debt service coverage ratios and "
+    "sponsor equity before committing capital to infrastructure in africa lenders expect bankable "
+    "models with clear assumptions sensitivity analysis tariff structures offtake agreements and "
+    "risk allocation between public and private partners while grant funding can catalyse early "
+    "stage preparation"
+).split()
+INTENTS = ["informational", "commercial", "transactional", "navigational", ""]
+# Names matched by KeywordService's FILENAME_CATEGORY_MAP
+KEYWORD_FILES = [
+    "DFI_funding", "DFI_financial_modeling", "agribusiness_investment", "solar_project",
+    "renewable_energy", "IPP_financing", "water_infrastructure", "mining_project",
+    "healthcare_infrastructure", "infrastructure_project", "real_estate", "general_finance",
+]
+
+POST_QUERIES = ["solar", "dfi funding", "blended finance", "water infrastructure", "bankable", "kenya"]
+KEYWORD_QUERIES = ["solar", "dfi", "finance", "water infrastructure", "model", "ipp"]
+
+
+def _sentences(rng: random.Random, count: int):
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+        for _ in range(count)
+    ]
+
+
+def _post(rng: random.Random, i: int, sentences, words: int, start: datetime):
+    topic = rng.choice(TOPICS)
+    title = f"{topic.title()}: {rng.choice(['A Practical Guide', 'What Lenders Expect', 'Case Study', 'Checklist'])} {i}"
+    slug = "-".join(title.lower().replace(":", "").split())
+    paragraphs = []
+    written = 0
+    section = 0
+    while written < words:
+        if written == 0 or rng.random() < 0.2:
+            section += 1
+            paragraphs.append(f"## {rng.choice(TOPICS).title()} {section}")
+        paragraph = " ".join(rng.choice(sentences) for _ in range(rng.randint(2, 5)))
+        if rng.random() < 0.3:
+            paragraph += f" See [{rng.choice(TOPICS)}](/{rng.choice(TOPICS).replace(' ', '-')})."
+        if rng.random() < 0.1:
+            paragraph += " Source: [World Bank](https://www.worldbank.org/en/topic/financialsector)."
+        if rng.random() < 0.05:
+            paragraphs.append(f"![{topic}](/images/blog/{slug}-{section}.jpg)")
+        paragraphs.append(paragraph)
+        written += len(paragraph.split())
+    published = start + timedelta(hours=rng.randint(0, 24 * 900))
+    return {
+        "id": f"post-{i}",
+        "slug": slug,
+        "title": title,
+        "excerpt": " ".join(rng.choice(sentences) for _ in range(2))[:300],
+        "content": "\n\n".join(paragraphs),
+        "category": rng.choice(CATEGORIES),
+        "tags": rng.sample(TAGS, rng.randint(1, 4)),
+        "status": "published" if rng.random() < 0.85 else "draft",
+        "author": "JASPER Research Team",
+        "heroImage": f"/images/blog/{slug}.jpg",
+        "seo": {
+            "title": title[:60],
+            "description": " ".join(rng.choice(sentences) for _ in range(2))[:160],
+            "keywords": [topic, rng.choice(TOPICS)],
+        },
+        "createdAt": published.isoformat(),
+        "publishedAt": published.isoformat(),
+        "updatedAt": published.isoformat(),
+        "version": 0,
+    }
+
+
+def generate_corpus(folder: Path, size: int, words: int):
+    """blog_posts.json and keyword CSVs for `size` posts/keywords, from a fixed seed."""
+    rng = random.Random(size)
+    sentences = _sentences(rng, 500)
+    start = datetime(2023, 1, 1)
+    posts = [_post(rng, i, sentences, words, start) for i in range(size)]
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / "blog_posts.json").write_text(json.dumps(posts, indent=2))
+
+    keywords_dir = folder / "keywords"
+    keywords_dir.mkdir(exist_ok=True)
+    vocabulary = sorted({w for topic in TOPICS for w in topic.split()} | set(WORDS))
+    per_file = -(-size // len(KEYWORD_FILES))
+    for name in KEYWORD_FILES:
+        with open(keywords_dir / f"{name}_keywords.csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["keyword", "volume", "difficulty", "intent"])
+            for _ in range(per_file):
+                phrase = " ".join(rng.sample(vocabulary, rng.randint(2, 4)))
+                writer.writerow([phrase, rng.choice([0, 10, 50, 100, 500, 2000]), rng.randint(1, 100), rng.choice(INTENTS)])
+
+
+def corpus(data_dir: Path, size: int, words: int) -> Path:
+    """Cached corpus folder for these parameters (generated on first use)."""
+    folder = data_dir / f"v{CORPUS_VERSION}-{size}-{words}w"
+    if not (folder / "blog_posts.json").exists():
+        started = time.perf_counter()
+        tmp = folder.with_name(folder.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        generate_corpus(tmp, size, words)
+        tmp.rename(folder)
+        print(f"generated {size} posts in {time.perf_counter() - started:.1f}s ({folder})")
+    return folder
+
+
+# =============================================================================
+# Cases
+# =============================================================================
+
+def _cycle(items):
+    iterator = itertools.cycle(items)
+    return lambda: next(iterator)
+
+
+def _slug_sample(posts, count=50):
+    # Spread across the file, including the last post (worst case for a scan)
+    step = max(1, len(posts) // count)
+    return [p["slug"] for p in posts[::step]] + [posts[-1]["slug"]]
+
+
+def blog_cases(run_dir: Path, posts):
+    import services.blog_service as blog_service_module
+
+    blog_service_module.BLOG_DATA_PATH = run_dir / "blog_posts.json"
+    blog_service_module.REVISION_DIR = run_dir / "blog_revisions"
+    blog_service_module.REVISION_DATA_PATH = run_dir / "blog_revisions.json"
+    service = blog_service_module.BlogService()
+    slug, query = _cycle(_slug_sample(posts)), _cycle(POST_QUERIES)
+    return {
+        "blog.get_all_posts": lambda: service.get_all_posts(status="published", limit=20),
+        "blog.get_post_by_slug": lambda: service.get_post_by_slug(slug()),
+        "blog.search_posts": lambda: service.search_posts(query()),
+    }
+
+
+def search_cases(run_dir: Path, posts):
+    from services.search_service import SearchService
+
+    service = SearchService(run_dir / "blog_posts.json", run_dir / "search_index.json")
+    query = _cycle(POST_QUERIES)
+    return {"search.search": lambda: service.search(query())}
+
+
+def seo_cases(run_dir: Path, posts):
+    from services.seo_scorer import seo_scorer
+
+    # A different post every call: results are cached by content
+    post = _cycle(posts)
+    return {"seo.calculate_score": lambda: seo_scorer.calculate_score(post())}
+
+
+def link_cases(run_dir: Path, posts):
+    from services.link_builder_service import LinkBuilderService
+
+    service = LinkBuilderService(str(run_dir / "blog_posts.json"))
+    slug = _cycle(_slug_sample(posts))
+    return {"links.find_related_articles": lambda: service.find_related_articles(slug(), max_links=5)}
+
+
+def keyword_cases(run_dir: Path, posts):
+    from services.keyword_service import KeywordService
+
+    service = KeywordService(seo_folder=run_dir / "keywords", catalog_dir=run_dir / "keyword_catalog")
+    query = _cycle(KEYWORD_QUERIES)
+    return {
+        "keywords.search": lambda: service.search(query=query(), limit=50),
+        "keywords.search_by_volume": lambda: service.search(query=query(), sort_by="volume", limit=50),
+    }
+
+
+CASE_GROUPS = {
+    "blog": (blog_cases, ["blog.get_all_posts", "blog.get_post_by_slug", "blog.search_posts"]),
+    "search": (search_cases, ["search.search"]),
+    "seo": (seo_cases, ["seo.calculate_score"]),
+    "links": (link_cases, ["links.find_related_articles"]),
+    "keywords": (keyword_cases, ["keywords.search", "keywords.search_by_volume"]),
+}
+
+
+# =============================================================================
+# Measurement
+# =============================================================================
+
+def measure(fn, budget_s: float, max_runs: int):
+    started = time.perf_counter()
+    fn()
+    first = time.perf_counter() - started
+
+    timings = []
+    deadline = time.perf_counter() + budget_s
+    while len(timings) < MIN_RUNS or (len(timings) < max_runs and time.perf_counter() < deadline):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "first_ms": round(first * 1000, 3),
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+        "runs": len(timings),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_group(run_dir: Path, group: str, budget_s: float, max_runs: int):
+    """Measure one case group; runs in its own worker process."""
+    setup, names = CASE_GROUPS[group]
+    posts = json.loads((run_dir / "blog_posts.json").read_text())
+    try:
+        cases = setup(run_dir, posts)
+    except Exception as e:
+        return {name: {"error": f"{type(e).__name__}: {e}"} for name in names}
+    results = {}
+    for name, fn in cases.items():
+        try:
+            results[name] = measure(fn, budget_s, max_runs)
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+    rss = _peak_rss_mb()
+    for result in results.values():
+        if "error" not in result:
+            result["peak_rss_mb"] = rss
+    return results
+
+
+def run_size(data_dir: Path, size: int, words: int, groups, budget_s: float, max_runs: int, timeout_s: float):
+    """
+    Each case group runs in a fresh process: first calls are really cold
+    (no caches shared between groups), peak RSS is the group's own, and a
+    group that takes longer than `timeout_s` is stopped and reported.
+    """
+    source = corpus(data_dir, size, words)
+    run_dir = Path(tempfile.mkdtemp(prefix=f"jasper-bench-{size}-"))
+    try:
+        shutil.copy(source / "blog_posts.json", run_dir / "blog_posts.json")
+        shutil.copytree(source / "keywords", run_dir / "keywords")
+
+        results = {}
+        for group in groups:
+            output = run_dir / f"{group}.result.json"
+            command = [
+                sys.executable, str(Path(__file__).resolve()), "--worker", group, "--run-dir", str(run_dir),
+                "--budget", str(budget_s), "--max-runs", str(max_runs), "--output", str(output),
+            ]
+            names = CASE_GROUPS[group][1]
+            try:
+                completed = subprocess.run(command, capture_output=True, text=True, timeout=timeout_s)
+            except subprocess.TimeoutExpired:
+                results.update({name: {"error": f"timed out after {timeout_s:.0f}s"} for name in names})
+                continue
+            if completed.returncode != 0 or not output.exists():
+                error = (completed.stderr.strip().splitlines() or [f"exit code {completed.returncode}"])[-1]
+                results.update({name: {"error": error} for name in names})
+                continue
+            results.update(json.loads(output.read_text()))
+        return {
+            "cases": results,
+            "corpus_mb": round((source / "blog_posts.json").stat().st_size / 1e6, 1),
+        }
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+# =============================================================================
+# Baselines
+# =============================================================================
+
+def compare(results, baseline, wall_threshold=None, memory_threshold=None):
+    """Regressions of `results` against `baseline`, as printable lines."""
+    thresholds = baseline.get("thresholds", {})
+    per_case = thresholds.get("cases", {})
+    regressions = []
+    for size, current in results["sizes"].items():
+        before = baseline.get("sizes", {}).get(size)
+        if not before:
+            continue
+        for name, now in current["cases"].items():
+            then = before["cases"].get(name)
+            if not then or "error" in then:
+                continue
+            if "error" in now:
+                regressions.append(f"{name} @ {size}: measured in the baseline, now {now['error']}")
+                continue
+            limits = per_case.get(name, {})
+            wall = limits.get("wall", wall_threshold or thresholds.get("wall", DEFAULT_THRESHOLD))
+            memory = limits.get("memory", memory_threshold or thresholds.get("memory", DEFAULT_THRESHOLD))
+            checks = (
+                ("median_ms", wall, NOISE_MS, "ms"),
+                ("peak_kb", memory, NOISE_KB, "KB"),
+            )
+            for field, limit, noise, unit in checks:
+                old, new = then[field], now[field]
+                if new > old * (1 + limit) and new - old > noise:
+                    ratio = new / old if old else float("inf")
+                    regressions.append(
+                        f"{name} @ {size}: {field} {old:.2f} -> {new:.2f} {unit} ({ratio:.2f}x, limit {1 + limit:.2f}x)"
+                    )
+    return regressions
+
+
+def print_results(results, baseline=None):
+    header = f"{'case':<30} {'size':>7} {'first ms':>10} {'median ms':>10} {'min ms':>9} {'peak KB':>10} {'RSS MB':>8}"
+    if baseline:
+        header += f" {'vs base':>8}"
+    print(header)
+    for size, current in results["sizes"].items():
+        before = (baseline or {}).get("sizes", {}).get(size, {}).get("cases", {})
+        for name, r in current["cases"].items():
+            if "error" in r:
+                print(f"{name:<30} {size:>7}  unavailable: {r['error']}")
+                continue
+            line = (
+                f"{name:<30} {size:>7} {r['first_ms']:>10.2f} {r['median_ms']:>10.2f} "
+                f"{r['min_ms']:>9.2f} {r['peak_kb']:>10.1f} {r['peak_rss_mb']:>8.1f}"
+            )
+            then = before.get(name)
+            if then and "error" not in then and then["median_ms"]:
+                line += f" {r['median_ms'] / then['median_ms']:>7.2f}x"
+            print(line)
+        print(f"{'':<30} {size:>7} corpus {current['corpus_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Comma-separated corpus sizes (posts)")
+    parser.add_argument("--words", type=int, default=400, help="Approximate words per post")
+    parser.add_argument("--cases", default=",".join(CASE_GROUPS), help=f"Case groups: {', '.join(CASE_GROUPS)}")
+    parser.add_argument("--budget", type=float, default=3.0, help="Seconds of steady-state calls per case")
+    parser.add_argument("--max-runs", type=int, default=200, help="Steady-state calls per case at most")
+    parser.add_argument("--data", type=Path, default=DEFAULT_DATA_DIR, help="Corpus cache directory")
+    parser.add_argument("--baseline", type=Path, help="Compare against this baseline; exit 1 on regressions")
+    parser.add_argument("--write-baseline", type=Path, help="Save this run's results as a baseline")
+    parser.add_argument("--wall-threshold", type=float, help="Allowed median_ms growth (fraction)")
+    parser.add_argument("--memory-threshold", type=float, help="Allowed peak_kb growth (fraction)")
+    parser.add_argument("--case-timeout", type=float, default=600, help="Seconds per case group and size")
+    # Worker mode: one case group over a prepared run directory
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--run-dir", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--output", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        logging.disable(logging.WARNING)
+        results = run_group(args.run_dir, args.worker, args.budget, args.max_runs)
+        args.output.write_text(json.dumps(results))
+        return
+
+    groups = [g.strip() for g in args.cases.split(",") if g.strip()]
+    unknown = [g for g in groups if g not in CASE_GROUPS]
+    if unknown:
+        sys.exit(f"Unknown case groups: {', '.join(unknown)}")
+
+    logging.disable(logging.WARNING)
+    results = {
+        "created": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "words": args.words,
+        "sizes": {},
+    }
+    for size in (int(s) for s in args.sizes.split(",")):
+        results["sizes"][str(size)] = run_size(
+            args.data, size, args.words, groups, args.budget, args.max_runs, args.case_timeout
+        )
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_results(results, baseline)
+
+    if args.write_baseline:
+        results["thresholds"] = {
+            "wall": args.wall_threshold or DEFAULT_THRESHOLD,
+            "memory": args.memory_threshold or DEFAULT_THRESHOLD,
+            "cases": {},
+        }
+        if args.write_baseline.exists():
+            # Keep hand-tuned per-case thresholds
+            previous = json.loads(args.write_baseline.read_text()).get("thresholds", {})
+            results["thresholds"]["cases"] = previous.get("cases", {})
+        args.write_baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"baseline written to {args.write_baseline}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.wall_threshold, args.memory_threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+JASPER CRM - Middleware Benchmark
+
+Requests per second through the public blog endpoints with:
+- legacy: the previous LoggingMiddleware + PerformanceMiddleware pair
+  (two BaseHTTPMiddleware layers, reproduced here for comparison)
+- asgi:   RequestContextMiddleware (single pure-ASGI pass)
+
+Requests are driven in-process through httpx's ASGI transport, so the
+numbers measure application + middleware cost without network noise.
+
+Usage:
+    python benchmarks/bench_middleware.py [--requests 3000] [--concurrency 50] [--posts 200]
+    python benchmarks/bench_middleware.py --minimal   # middleware overhead only, no blog service
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/jasper-bench.db")
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from services.logging_service import set_correlation_id, RequestLogger
+from middleware.logging_middleware import RequestContextMiddleware
+
+logger = logging.getLogger(__name__)
+request_logger = RequestLogger(logging.getLogger("jasper.requests"))
+
+
+# =============================================================================
+# Previous middleware (for the "before" numbers)
+# =============================================================================
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        correlation_id = set_correlation_id(request.headers.get("X-Correlation-ID"))
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        response.headers["X-Correlation-ID"] = correlation_id
+        if request.url.path not in ["/health", "/favicon.ico"]:
+            request_logger.log_request(
+                method=request.method,
+                path=request.url.path,
+                status_code=response.status_code,
+                duration_ms=duration_ms,
+                extra={
+                    "client_ip": request.client.host if request.client else None,
+                    "user_agent": request.headers.get("user-agent", "")[:100],
+                }
+            )
+        return response
+
+
+class LegacyPerformanceMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, slow_threshold_ms: float = 1000):
+        super().__init__(app)
+        self.slow_threshold_ms = slow_threshold_ms
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        if duration_ms > self.slow_threshold_ms:
+            logger.warning(f"Slow request detected: {request.method} {request.url.path}")
+        response.headers["X-Response-Time"] = f"{duration_ms:.2f}ms"
+        return response
+
+
+# =============================================================================
+# Apps
+# =============================================================================
+
+def _seed_posts(count: int) -> Path:
+    posts = [
+        {
+            "slug": f"dfi-funding-guide-{i}",
+            "title": f"DFI Funding Guide {i}: Preparing a Bankable Model",
+            "excerpt": "How development finance institutions assess project finance models. " * 3,
+            "content": "## Overview\n\n" + "Development finance institutions require rigorous models. " * 80,
+            "category": "DFI Insights",
+            "status": "published",
+            "publishedAt": f"2025-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}T08:00:00",
+            "tags": ["dfi", "project-finance"],
+        }
+        for i in range(count)
+    ]
+    path = Path(tempfile.mkdtemp(prefix="jasper-bench-")) / "blog_posts.json"
+    path.write_text(json.dumps(posts))
+    return path
+
+
+def _routes(minimal: bool, posts: int):
+    if minimal:
+        from fastapi import APIRouter
+
+        router = APIRouter(prefix="/blog")
+
+        @router.get("/posts")
+        async def posts_stub():
+            return [{"slug": "a"}]
+
+        @router.get("/posts/{slug}")
+        async def post_stub(slug: str):
+            return {"slug": slug}
+
+        return router, ["/blog/posts?limit=20", "/blog/posts/a"]
+
+    import services.blog_service as blog_service_module
+
+    blog_service_module.BLOG_DATA_PATH = _seed_posts(posts)
+    from routes.blog_public import router
+
+    return router, [
+        "/blog/posts?limit=20",
+        "/blog/posts/dfi-funding-guide-7",
+        "/blog/search?q=bankable&limit=10",
+    ]
+
+
+def build_app(stack: str, router) -> FastAPI:
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["https://jasperfinance.org"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    if stack == "legacy":
+        app.add_middleware(LegacyLoggingMiddleware)
+        app.add_middleware(LegacyPerformanceMiddleware, slow_threshold_ms=2000)
+    else:
+        app.add_middleware(RequestContextMiddleware, slow_threshold_ms=2000)
+    return app
+
+
+# =============================================================================
+# Driver
+# =============================================================================
+
+async def run(app: FastAPI, paths, total: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up routing, pydantic and file caches
+        for path in paths:
+            (await client.get(path)).raise_for_status()
+
+        counter = iter(range(total))
+
+        async def worker():
+            for i in counter:
+                started = time.perf_counter()
+                response = await client.get(paths[i % len(paths)])
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200
+                assert "x-correlation-id" in response.headers
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3, help="Best of N rounds per stack")
+    parser.add_argument("--minimal", action="store_true", help="Stub endpoints: isolate middleware overhead")
+    args = parser.parse_args()
+
+    # Writing request logs would dominate the measurement (RequestLogger bypasses levels)
+    logging.getLogger("jasper.requests").disabled = True
+
+    router, paths = _routes(args.minimal, args.posts)
+    results = {}
+    for stack in ("legacy", "asgi"):
+        app = build_app(stack, router)
+        rounds = [asyncio.run(run(app, paths, args.requests, args.concurrency)) for _ in range(args.rounds)]
+        results[stack] = max(rounds, key=lambda r: r["rps"])
+
+    print(f"{'stack':<8} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for stack, r in results.items():
+        print(f"{stack:<8} {r['rps']:>10.0f} {r['p50_ms']:>10.2f} {r['p99_ms']:>10.2f}")
+    print(f"speedup: {results['asgi']['rps'] / results['legacy']['rps']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+JASPER CRM - News Relevance Benchmark
+
+Replays a corpus of saved feed XML through the news monitor:
+
+- scoring: entries/s for relevance scoring of every parsed entry with
+  - legacy:   the previous per-entry loop of substring checks over the
+              global and source keyword lists (reproduced here)
+  - compiled: NewsMonitorService.match_keywords, one KeywordMatcher pass
+              per feed batch
+  Both must produce identical scores and keywords.
+- scan: scan_all_sources() over one source per corpus file, served
+  in-process through httpx.MockTransport with ETags: the first scan
+  parses and scores everything, the second is all 304s.
+
+Usage:
+    python benchmarks/bench_relevance.py [--sources 300] [--entries 20]   # synthetic corpus
+    python benchmarks/bench_relevance.py --source-keywords 200            # larger per-source keyword lists
+    python benchmarks/bench_relevance.py --corpus DIR                     # replay saved *.xml feeds
+    python benchmarks/bench_relevance.py --save DIR                       # save the live NEWS_SOURCES feeds to DIR
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/jasper-bench.db")
+
+import httpx
+import feedparser
+
+from services.news_monitor import NewsMonitorService, NewsCategory, NEWS_SOURCES, HIGH_VALUE_KEYWORDS
+
+
+# =============================================================================
+# Previous scoring (for the "before" numbers)
+# =============================================================================
+
+def legacy_relevance(title, summary, source_keywords):
+    text = f"{title} {summary}".lower()
+    score = 0.0
+    matched_keywords = []
+    for kw in HIGH_VALUE_KEYWORDS:
+        if kw.lower() in text:
+            score += 10
+            matched_keywords.append(kw)
+    for kw in source_keywords:
+        if kw.lower() in text:
+            score += 5
+            matched_keywords.append(kw)
+    dfi_count = sum(1 for dfi in ["ifc", "afdb", "idc", "dbsa", "world bank"] if dfi in text)
+    if dfi_count > 1:
+        score += 15
+    if re.search(r'\$?\d+\s*(million|billion|m|bn)', text, re.I):
+        score += 20
+    return min(score, 100.0), matched_keywords
+
+
+# =============================================================================
+# Corpus
+# =============================================================================
+
+FILLER = (
+    "the government said on tuesday that the programme would support local suppliers and "
+    "improve access to markets while officials expect the first phase to be completed next year "
+    "according to a statement published by the ministry with further details to follow"
+).split()
+
+# Extra source keywords are pairs of these; the synthetic text uses them sparingly
+SECTOR_TERMS = (
+    "battery storage hydrogen green ammonia transmission grid rail port logistics water "
+    "desalination housing student health hospital broadband fibre data centre tourism "
+    "aquaculture poultry citrus maize wine forestry cement steel platinum lithium copper"
+).split()
+
+
+def _synthetic_feed(rng: random.Random, entries: int) -> str:
+    vocabulary = [kw.lower() for kw in HIGH_VALUE_KEYWORDS] + ["eskom", "mining", "export", "shipping"]
+    now = datetime.utcnow()
+    items = []
+    for i in range(entries):
+        words = [
+            rng.choice(vocabulary) if roll < 0.06 else rng.choice(SECTOR_TERMS) if roll < 0.1 else rng.choice(FILLER)
+            for roll in (rng.random() for _ in range(70))
+        ]
+        if rng.random() < 0.3:
+            words.insert(rng.randint(0, len(words)), f"${rng.randint(5, 900)} million")
+        title = " ".join(words[:10]).capitalize()
+        summary = " ".join(words[10:])
+        published = format_datetime(now - timedelta(hours=rng.uniform(0, 150)))
+        guid = f"{rng.getrandbits(64):016x}"
+        items.append(
+            f"<item><title>{escape(title)}</title><link>https://example.org/{guid}</link>"
+            f"<guid>{guid}</guid><description>{escape(summary)}</description>"
+            f"<pubDate>{published}</pubDate></item>"
+        )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>feed</title>{"".join(items)}</channel></rss>'
+
+
+def build_corpus(sources: int, entries: int) -> Path:
+    rng = random.Random(42)
+    folder = Path(tempfile.mkdtemp(prefix="jasper-feeds-"))
+    for i in range(sources):
+        (folder / f"feed-{i:04d}.xml").write_text(_synthetic_feed(rng, entries))
+    return folder
+
+
+async def save_live_feeds(folder: Path):
+    folder.mkdir(parents=True, exist_ok=True)
+    async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
+        for source_id, config in NEWS_SOURCES.items():
+            try:
+                response = await client.get(config["url"])
+                response.raise_for_status()
+            except Exception as e:
+                print(f"{source_id}: {e}")
+                continue
+            (folder / f"{source_id}.xml").write_text(response.text)
+            print(f"{source_id}: {len(response.text)} bytes")
+
+
+def corpus_sources(corpus: dict, extra_keywords: int = 0) -> dict:
+    """
+    One monitor source per feed file, cycling through the real sources'
+    keywords, plus `extra_keywords` synthetic two-word terms each.
+    """
+    rng = random.Random(7)
+    configs = list(NEWS_SOURCES.values())
+    pool = sorted({f"{a} {b}" for a in SECTOR_TERMS for b in SECTOR_TERMS if a != b})
+    return {
+        name: {
+            "name": name,
+            "url": f"https://feeds.bench/{name}",
+            "category": NewsCategory.SECTOR_NEWS,
+            "keywords": configs[i % len(configs)]["keywords"] + rng.sample(pool, extra_keywords),
+        }
+        for i, name in enumerate(sorted(corpus))
+    }
+
+
+# =============================================================================
+# Measurements
+# =============================================================================
+
+def bench_scoring(monitor: NewsMonitorService, feeds: dict, sources: dict, rounds: int):
+    batches = []
+    for name, feed in feeds.items():
+        texts = [(e.get("title", ""), e.get("summary", e.get("description", ""))) for e in feed.entries]
+        batches.append((texts, sources[name]["keywords"]))
+    total = sum(len(texts) for texts, _ in batches)
+
+    def legacy():
+        return [[legacy_relevance(t, s, kws) for t, s in texts] for texts, kws in batches]
+
+    def compiled():
+        return [
+            [(r["score"], r["keywords"]) for r in monitor.match_keywords([f"{t} {s}" for t, s in texts], kws)]
+            for texts, kws in batches
+        ]
+
+    assert legacy() == compiled(), "compiled scoring differs from the legacy loop"
+    results = {}
+    for name, fn in (("legacy", legacy), ("compiled", compiled)):
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        results[name] = total / min(timings)
+    return total, results
+
+
+async def bench_scan(corpus: dict, sources: dict):
+    state_dir = Path(tempfile.mkdtemp(prefix="jasper-news-state-"))
+    monitor = NewsMonitorService(state_dir=state_dir)
+    monitor.sources = sources
+    monitor._matcher = monitor._build_matcher()
+
+    def handler(request):
+        name = request.url.path.rsplit("/", 1)[-1]
+        if request.headers.get("if-none-match") == f'"{name}"':
+            return httpx.Response(304)
+        return httpx.Response(200, text=corpus[name], headers={"ETag": f'"{name}"'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monitor._http = lambda: client
+
+    timings = {}
+    for label in ("first", "unchanged"):
+        started = time.perf_counter()
+        items = await monitor.scan_all_sources(force=True)
+        timings[label] = (time.perf_counter() - started, len(items))
+    await client.aclose()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, help="Directory of saved feed XML (*.xml)")
+    parser.add_argument("--save", type=Path, help="Fetch the live feeds into this directory and exit")
+    parser.add_argument("--sources", type=int, default=300, help="Synthetic corpus: number of feeds")
+    parser.add_argument("--entries", type=int, default=20, help="Synthetic corpus: entries per feed")
+    parser.add_argument("--source-keywords", type=int, default=0, help="Extra keywords per source")
+    parser.add_argument("--rounds", type=int, default=5, help="Best of N scoring rounds")
+    args = parser.parse_args()
+
+    if args.save:
+        asyncio.run(save_live_feeds(args.save))
+        return
+
+    logging.disable(logging.INFO)
+    folder = args.corpus or build_corpus(args.sources, args.entries)
+    corpus = {path.stem: path.read_text() for path in sorted(folder.glob("*.xml"))}
+    if not corpus:
+        sys.exit(f"No *.xml feeds in {folder}")
+    sources = corpus_sources(corpus, args.source_keywords)
+
+    started = time.perf_counter()
+    feeds = {name: feedparser.parse(xml) for name, xml in corpus.items()}
+    parse_s = time.perf_counter() - started
+
+    monitor = NewsMonitorService(state_dir=Path(tempfile.mkdtemp(prefix="jasper-news-state-")))
+    monitor.sources = sources
+    monitor._matcher = monitor._build_matcher()
+    entries, scoring = bench_scoring(monitor, feeds, sources, args.rounds)
+
+    print(f"corpus: {len(corpus)} feeds, {entries} entries, {len(monitor._matcher)} keywords ({folder})")
+    print(f"feedparser: {parse_s * 1000:.0f} ms total")
+    print(f"{'scoring':<10} {'entries/s':>12}")
+    for name, rate in scoring.items():
+        print(f"{name:<10} {rate:>12.0f}")
+    print(f"speedup: {scoring['compiled'] / scoring['legacy']:.2f}x")
+
+    scan = asyncio.run(bench_scan(corpus, sources))
+    for label, (seconds, items) in scan.items():
+        print(f"scan ({label}): {seconds * 1000:.0f} ms, {items} relevant items")
+
+
+if __name__ == "__main__":
+    main()
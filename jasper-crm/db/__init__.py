@@ -3,7 +3,7 @@ JASPER CRM - Database Layer
 """
 
 from .database import Base, engine, SessionLocal, get_db, init_db
-from .tables import LeadTable, NotificationTable, ActivityLogTable
+from .tables import LeadTable, NotificationTable, ActivityLogTable, EventQueueTable
 from .leads import create_lead, get_lead_by_email, get_lead_by_id, update_lead
 
 __all__ = [
@@ -15,6 +15,7 @@ __all__ = [
     "LeadTable",
     "NotificationTable",
     "ActivityLogTable",
+    "EventQueueTable",
     # Lead operations
     "create_lead",
     "get_lead_by_email",
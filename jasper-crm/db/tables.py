@@ -253,3 +253,37 @@ class EmailStepTable(Base):
 
     # Relationship
     sequence = relationship("EmailSequenceTable", back_populates="steps")
+
+
+# ============== ORCHESTRATOR EVENT QUEUE ==============
+
+class EventQueueTable(Base):
+    """Durable queue of orchestrator events and webhook jobs"""
+    __tablename__ = "event_queue"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String(50), nullable=False, index=True)  # event, whatsapp_message, email_message, ...
+    payload = Column(JSON, nullable=False)
+    ordering_key = Column(String(255), index=True)  # Jobs sharing a key run one at a time, in order
+    idempotency_key = Column(String(255), unique=True, index=True)
+    coalesce_key = Column(String(255), index=True)  # Pending jobs with the same key are merged (debounce)
+    merges = Column(Integer, default=0, nullable=False)  # Bumped on every merge; guards concurrent merges
+
+    status = Column(String(20), default="pending", nullable=False, index=True)  # pending, processing, done, dead
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+
+    # Naive UTC timestamps - compared directly in claim queries
+    available_at = Column(DateTime, nullable=False, index=True)
+    locked_at = Column(DateTime)
+    locked_by = Column(String(100))
+    created_at = Column(DateTime, nullable=False)
+    processed_at = Column(DateTime)
+
+
+class EventQueueKeyTable(Base):
+    """Idempotency keys of deliveries merged into an existing event_queue job"""
+    __tablename__ = "event_queue_keys"
+
+    idempotency_key = Column(String(255), primary_key=True)
+    job_id = Column(Integer, nullable=False, index=True)
@@ -11,10 +11,7 @@ from .auth_middleware import (
     AuthenticatedUser,
 )
 
-from .logging_middleware import (
-    LoggingMiddleware,
-    PerformanceMiddleware,
-)
+from .logging_middleware import RequestContextMiddleware
 
 __all__ = [
     # Auth
@@ -27,6 +24,5 @@ __all__ = [
     "check_rate_limit",
     "AuthenticatedUser",
     # Logging
-    "LoggingMiddleware",
-    "PerformanceMiddleware",
+    "RequestContextMiddleware",
 ]
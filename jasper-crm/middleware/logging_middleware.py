@@ -1,103 +1,150 @@
 """
 JASPER CRM - Logging Middleware
 
-FastAPI middleware for automatic request logging and correlation tracking.
+Pure ASGI middleware for request logging, correlation tracking, timing
+headers, slow-request warnings, request metrics and opt-in span tracing.
+
+This replaces the previous LoggingMiddleware/PerformanceMiddleware pair.
+Both were BaseHTTPMiddleware subclasses, and each one ran the downstream
+app in a separate task and re-wrapped the response body stream. Every
+request paid that cost twice, and streaming responses were buffered
+through both layers. RequestContextMiddleware does the same work in one
+pass. It only wraps `send` to stamp headers on `http.response.start`, so
+bodies stream straight through.
 """
 
 import time
 import logging
-from typing import Callable
+from typing import Iterable
+from uuid import uuid4
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from services.logging_service import (
-    set_correlation_id,
-    get_correlation_id,
-    RequestLogger,
-    logging_service,
-)
+from services.logging_service import correlation_id_var, RequestLogger
+from services.metrics_service import metrics_service
+from services.tracing import tracer, current_trace
 
 logger = logging.getLogger(__name__)
 request_logger = RequestLogger(logging.getLogger("jasper.requests"))
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
+class RequestContextMiddleware:
     """
-    Middleware for request logging and correlation ID tracking.
-
-    Features:
-    - Assigns correlation ID to each request
-    - Logs request details (method, path, duration)
-    - Adds correlation ID to response headers
+    Per-request correlation ID, timing, logging and metrics.
+
+    - Uses the incoming X-Correlation-ID (or generates one) for the request's
+      context, and echoes it on the response
+    - Adds X-Response-Time (time to response start)
+    - Logs every request except `quiet_paths`, and warns when the full
+      response takes longer than `slow_threshold_ms`
+    - Records MetricsService.record_request with the matched route template
+    - Traces the request when tracing is enabled or it sends `X-Trace: 1`
+      (with TRACE_ON_DEMAND=true); only on-demand traces get a Server-Timing
+      header with time per span kind so far
     """
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Get or create correlation ID
-        correlation_id = request.headers.get("X-Correlation-ID")
-        correlation_id = set_correlation_id(correlation_id)
+    def __init__(
+        self,
+        app: ASGIApp,
+        slow_threshold_ms: float = 1000,
+        quiet_paths: Iterable[str] = ("/health", "/favicon.ico"),
+    ):
+        self.app = app
+        self.slow_threshold_ms = slow_threshold_ms
+        self.quiet_paths = frozenset(quiet_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = None
+        user_agent = ""
+        trace_requested = False
+        for name, value in scope["headers"]:
+            if name == b"x-correlation-id":
+                correlation_id = value.decode("latin-1")
+            elif name == b"user-agent":
+                user_agent = value.decode("latin-1")[:100]
+            elif name == b"x-trace":
+                trace_requested = value == b"1"
+        if not correlation_id:
+            correlation_id = str(uuid4())
+        token = correlation_id_var.set(correlation_id)
+        trace_token = None
+        if tracer.should_trace(trace_requested):
+            trace_token = tracer.start(correlation_id, scope["method"], scope["path"])
+        show_timing = trace_token is not None and trace_requested and tracer.allow_on_demand
 
-        # Record start time
         start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Correlation-ID", correlation_id)
+                headers.append("X-Response-Time", f"{(time.perf_counter() - start_time) * 1000:.2f}ms")
+                server_timing = _server_timing() if show_timing else ""
+                if server_timing:
+                    headers.append("Server-Timing", server_timing)
+            await send(message)
 
-        # Process request
         try:
-            response = await call_next(request)
-        except Exception as e:
-            # Log exception
+            await self.app(scope, receive, send_with_headers)
+        except Exception:
             logger.exception(
-                f"Request failed: {request.method} {request.url.path}",
+                f"Request failed: {scope['method']} {scope['path']}",
                 extra={"correlation_id": correlation_id}
             )
             raise
-
-        # Calculate duration
-        duration_ms = (time.perf_counter() - start_time) * 1000
-
-        # Add correlation ID to response headers
-        response.headers["X-Correlation-ID"] = correlation_id
-
-        # Log request (skip health checks to reduce noise)
-        if request.url.path not in ["/health", "/favicon.ico"]:
+        finally:
+            duration_ms = (time.perf_counter() - start_time) * 1000
+            if trace_token is not None:
+                tracer.finish(trace_token, status_code)
+            self._finish(scope, status_code, duration_ms, user_agent)
+            correlation_id_var.reset(token)
+
+    def _finish(self, scope: Scope, status_code: int, duration_ms: float, user_agent: str):
+        method = scope["method"]
+        path = scope["path"]
+
+        if path not in self.quiet_paths:
+            client = scope.get("client")
             request_logger.log_request(
-                method=request.method,
-                path=request.url.path,
-                status_code=response.status_code,
+                method=method,
+                path=path,
+                status_code=status_code,
                 duration_ms=duration_ms,
                 extra={
-                    "client_ip": request.client.host if request.client else None,
-                    "user_agent": request.headers.get("user-agent", "")[:100],
+                    "client_ip": client[0] if client else None,
+                    "user_agent": user_agent,
                 }
             )
 
-        return response
-
-
-class PerformanceMiddleware(BaseHTTPMiddleware):
-    """
-    Middleware for tracking slow requests.
-
-    Logs warnings for requests exceeding threshold.
-    """
-
-    def __init__(self, app, slow_threshold_ms: float = 1000):
-        super().__init__(app)
-        self.slow_threshold_ms = slow_threshold_ms
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.perf_counter()
-
-        response = await call_next(request)
-
-        duration_ms = (time.perf_counter() - start_time) * 1000
-
         if duration_ms > self.slow_threshold_ms:
             logger.warning(
-                f"Slow request detected: {request.method} {request.url.path} "
+                f"Slow request detected: {method} {path} "
                 f"took {duration_ms:.2f}ms (threshold: {self.slow_threshold_ms}ms)"
             )
 
-        # Add timing header
-        response.headers["X-Response-Time"] = f"{duration_ms:.2f}ms"
+        metrics_service.record_request(method, self._route_path(scope), status_code, duration_ms / 1000)
+
+    @staticmethod
+    def _route_path(scope: Scope) -> str:
+        """Matched route template (e.g. /blog/posts/{slug}) to keep metric cardinality bounded."""
+        route = scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
 
-        return response
+def _server_timing() -> str:
+    """Server-Timing entries (e.g. `db-query;dur=12.3;desc="4 spans"`) for the spans recorded so far."""
+    trace = current_trace()
+    if trace is None:
+        return ""
+    return ", ".join(
+        f'{kind.replace(".", "-")};dur={v["ms"]:.1f};desc="{v["count"]} spans"'
+        for kind, v in trace.totals_by_kind().items()
+    )
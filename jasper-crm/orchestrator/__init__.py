@@ -2,6 +2,7 @@
 from .events import Event, EventType
 from .actions import Action, ActionType, ActionExecutor
 from .brain import JASPEROrchestrator
+from .event_queue import EventQueue, event_queue
 
 __all__ = [
     "Event",
@@ -10,4 +11,6 @@ __all__ = [
     "ActionType",
     "ActionExecutor",
     "JASPEROrchestrator",
+    "EventQueue",
+    "event_queue",
 ]
@@ -17,14 +17,20 @@ DeepSeek V3.2 Capabilities Used:
 
 import os
 import json
+import time
+import asyncio
 import httpx
 import logging
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, List, Dict, Any, Callable
+from typing import Optional, List, Dict, Any, Callable, FrozenSet, Tuple
 from enum import Enum
 
 from orchestrator.events import Event, EventType
 from models.lead import Lead, LeadTier, LeadStatus
+from services.metrics_service import metrics_service
+from services.lead_context_cache import lead_context_cache
+from services.llm_accounting import post_chat_completion
 
 logger = logging.getLogger(__name__)
 
@@ -362,6 +368,83 @@ JASPER_TOOLS = [
 ]
 
 
+# =============================================================================
+# TOOL DEPENDENCY SPECS
+# Declares what lead state each tool reads/writes so independent tools can
+# run concurrently while conflicting ones keep the order the model chose.
+# Resources are dotted names; "lead" covers every "lead.*" resource.
+# =============================================================================
+
+DEFAULT_TOOL_TIMEOUT = 60.0
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """Concurrency declaration for a single tool."""
+    reads: FrozenSet[str] = field(default_factory=frozenset)
+    writes: FrozenSet[str] = field(default_factory=frozenset)
+    timeout: float = DEFAULT_TOOL_TIMEOUT
+
+
+TOOL_SPECS: Dict[str, ToolSpec] = {
+    # Research rewrites the whole lead record, so it is ordered against
+    # every other tool that touches the lead ("needs research first").
+    "research_agent_light": ToolSpec(reads=frozenset({"lead"}), writes=frozenset({"lead"}), timeout=30.0),
+    "research_agent_deep": ToolSpec(reads=frozenset({"lead"}), writes=frozenset({"lead"}), timeout=120.0),
+    "comms_generate_response": ToolSpec(
+        reads=frozenset({"lead.profile", "lead.status"}),
+        writes=frozenset({"comms.outbound"}),
+    ),
+    "comms_send_initial_outreach": ToolSpec(
+        reads=frozenset({"lead.profile"}),
+        writes=frozenset({"lead.status", "comms.outbound"}),
+    ),
+    "call_coach_generate_brief": ToolSpec(reads=frozenset({"lead.profile"})),
+    "call_coach_summarize": ToolSpec(reads=frozenset({"lead.profile"})),
+    "score_lead": ToolSpec(reads=frozenset({"lead.profile"}), writes=frozenset({"lead.score"}), timeout=30.0),
+    "notify_owner": ToolSpec(reads=frozenset({"lead.score"}), writes=frozenset({"lead.owner"}), timeout=30.0),
+    "embed_in_aleph": ToolSpec(reads=frozenset({"lead.profile"}), writes=frozenset({"lead.vector"}), timeout=30.0),
+    "create_blog_post": ToolSpec(writes=frozenset({"blog"}), timeout=120.0),
+    "update_lead_status": ToolSpec(writes=frozenset({"lead.status", "lead.score"}), timeout=15.0),
+    "classify_intent": ToolSpec(timeout=30.0),
+    "get_lead_context": ToolSpec(reads=frozenset({"lead"}), timeout=15.0),
+    "schedule_follow_up": ToolSpec(writes=frozenset({"lead.followup"}), timeout=15.0),
+}
+
+
+def _resources_overlap(a: FrozenSet[str], b: FrozenSet[str]) -> bool:
+    """True if any resource in a covers or is covered by one in b."""
+    for x in a:
+        for y in b:
+            if x == y or x.startswith(y + ".") or y.startswith(x + "."):
+                return True
+    return False
+
+
+def build_tool_graph(tool_names: List[str]) -> List[List[int]]:
+    """
+    Build the dependency graph for an ordered list of tool calls.
+
+    Call j depends on an earlier call i when they conflict on lead state
+    (write/read, read/write or write/write). Returns, for each call, the
+    indices of the earlier calls it must wait for. Unknown tools have no
+    declared state and never wait.
+    """
+    specs = [TOOL_SPECS.get(name, ToolSpec()) for name in tool_names]
+    graph: List[List[int]] = []
+    for j, later in enumerate(specs):
+        deps = []
+        for i in range(j):
+            earlier = specs[i]
+            if (
+                _resources_overlap(earlier.writes, later.reads | later.writes)
+                or _resources_overlap(later.writes, earlier.reads)
+            ):
+                deps.append(i)
+        graph.append(deps)
+    return graph
+
+
 # =============================================================================
 # AGENTIC BRAIN CLASS
 # =============================================================================
@@ -401,6 +484,7 @@ class AgenticBrain:
         self.notifier = owner_notifier
         self.scoring = scoring_service
         self.blog = blog_service
+        self.context_cache = lead_context_cache
 
         # DeepSeek V3.2 via OpenRouter
         self.api_key = os.getenv("OPENROUTER_API_KEY")
@@ -442,8 +526,8 @@ class AgenticBrain:
         Instead of routing to hardcoded handlers, we:
         1. Build context about the event
         2. Ask DeepSeek V3.2 what tools to call
-        3. Execute the tools in sequence
-        4. Return results
+        3. Execute the tools, concurrently where they don't conflict
+        4. Return results with a per-tool timeline
         """
         logger.info(f"[AgenticBrain] Handling event: {event.type} (lead_id={event.lead_id})")
 
@@ -454,6 +538,12 @@ class AgenticBrain:
         system_prompt = self._build_system_prompt()
         user_prompt = self._build_event_prompt(event, context)
 
+        # Later events for this lead see this one in their history
+        if event.lead_id:
+            self.context_cache.append_event(
+                event.lead_id, event.type, event.data, event.timestamp.isoformat(timespec="seconds")
+            )
+
         # 3. Call DeepSeek V3.2 with function-calling
         tool_calls = await self._get_tool_calls(system_prompt, user_prompt)
 
@@ -461,83 +551,157 @@ class AgenticBrain:
             logger.warning(f"[AgenticBrain] No tool calls returned for event {event.type}")
             return {"handled": False, "reason": "No tools called"}
 
-        # 4. Execute tools in sequence
-        results = []
-        for tool_call in tool_calls:
-            tool_name = tool_call.get("function", {}).get("name")
-            tool_args = json.loads(tool_call.get("function", {}).get("arguments", "{}"))
-
-            logger.info(f"[AgenticBrain] Executing tool: {tool_name} with args: {tool_args}")
-
-            executor = self._tool_executors.get(tool_name)
-            if executor:
-                try:
-                    result = await executor(**tool_args)
-                    results.append({
-                        "tool": tool_name,
-                        "success": True,
-                        "result": result
-                    })
-                except Exception as e:
-                    logger.error(f"[AgenticBrain] Tool {tool_name} failed: {e}")
-                    results.append({
-                        "tool": tool_name,
-                        "success": False,
-                        "error": str(e)
-                    })
-            else:
-                logger.warning(f"[AgenticBrain] Unknown tool: {tool_name}")
-                results.append({
-                    "tool": tool_name,
-                    "success": False,
-                    "error": "Unknown tool"
-                })
+        # 4. Execute tools, overlapping the ones that don't conflict
+        results, timeline = await self._execute_tool_calls(tool_calls)
 
         return {
             "handled": True,
             "event_type": event.type,
             "lead_id": event.lead_id,
             "tools_called": len(results),
-            "results": results
+            "results": results,
+            "timeline": timeline,
         }
 
+    # =========================================================================
+    # TOOL EXECUTION
+    # =========================================================================
+
+    async def _execute_tool_calls(
+        self,
+        tool_calls: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Run tool calls as a dependency graph.
+
+        Each call starts as soon as the earlier calls it conflicts with have
+        finished, so independent tools run concurrently inside one TaskGroup.
+        Results keep the order the model returned them in.
+        """
+        names = [tc.get("function", {}).get("name") for tc in tool_calls]
+        graph = build_tool_graph(names)
+        finished = [asyncio.Event() for _ in tool_calls]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(tool_calls)
+        spans: List[Optional[Dict[str, Any]]] = [None] * len(tool_calls)
+        event_start = time.perf_counter()
+
+        async def run(index: int):
+            try:
+                for dep in graph[index]:
+                    await finished[dep].wait()
+                started = time.perf_counter()
+                results[index] = await self._run_tool(tool_calls[index])
+                ended = time.perf_counter()
+                spans[index] = {
+                    "tool": names[index],
+                    "after": [names[dep] for dep in graph[index]],
+                    "start_ms": round((started - event_start) * 1000, 1),
+                    "duration_ms": round((ended - started) * 1000, 1),
+                    "success": results[index]["success"],
+                }
+            finally:
+                finished[index].set()
+
+        async with asyncio.TaskGroup() as tg:
+            for index in range(len(tool_calls)):
+                tg.create_task(run(index))
+
+        # Tools that wrote lead state make the cached snapshot stale
+        for name, call in zip(names, tool_calls):
+            if any(r == "lead" or r.startswith("lead.") for r in TOOL_SPECS.get(name, ToolSpec()).writes):
+                try:
+                    lead_id = json.loads(call.get("function", {}).get("arguments") or "{}").get("lead_id")
+                except (ValueError, AttributeError):
+                    lead_id = None
+                if lead_id:
+                    self.context_cache.invalidate(lead_id)
+
+        timeline = {
+            "total_ms": round((time.perf_counter() - event_start) * 1000, 1),
+            "tool_ms_sum": round(sum(span["duration_ms"] for span in spans), 1),
+            "tools": spans,
+        }
+        self._emit_timeline(timeline)
+
+        return results, timeline
+
+    async def _run_tool(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a single tool call under its timeout. Never raises."""
+        tool_name = tool_call.get("function", {}).get("name")
+        executor = self._tool_executors.get(tool_name)
+        if not executor:
+            logger.warning(f"[AgenticBrain] Unknown tool: {tool_name}")
+            return {"tool": tool_name, "success": False, "error": "Unknown tool"}
+
+        spec = TOOL_SPECS.get(tool_name, ToolSpec())
+        try:
+            tool_args = json.loads(tool_call.get("function", {}).get("arguments") or "{}")
+            logger.info(f"[AgenticBrain] Executing tool: {tool_name} with args: {tool_args}")
+            async with asyncio.timeout(spec.timeout):
+                result = await executor(**tool_args)
+            return {"tool": tool_name, "success": True, "result": result}
+        except TimeoutError:
+            logger.error(f"[AgenticBrain] Tool {tool_name} timed out after {spec.timeout}s")
+            return {"tool": tool_name, "success": False, "error": f"Timed out after {spec.timeout}s"}
+        except Exception as e:
+            logger.error(f"[AgenticBrain] Tool {tool_name} failed: {e}")
+            return {"tool": tool_name, "success": False, "error": str(e)}
+
+    def _emit_timeline(self, timeline: Dict[str, Any]):
+        """Log the per-event tool timeline and record tool durations."""
+        logger.info(
+            f"[AgenticBrain] Tools finished in {timeline['total_ms']}ms "
+            f"(sequential would be {timeline['tool_ms_sum']}ms): "
+            + ", ".join(
+                f"{span['tool']}@{span['start_ms']}+{span['duration_ms']}ms"
+                for span in timeline["tools"]
+            )
+        )
+        for span in timeline["tools"]:
+            metrics_service.collector.observe_histogram(
+                "jasper_agent_tool_duration_seconds",
+                span["duration_ms"] / 1000,
+                labels={"tool": str(span["tool"])}
+            )
+
     # =========================================================================
     # CONTEXT BUILDING
     # =========================================================================
 
     async def _build_event_context(self, event: Event) -> Dict[str, Any]:
-        """Build full context about the event for AI reasoning."""
+        """
+        Build full context about the event for AI reasoning.
+
+        Lead state comes from the lead context cache and is only re-read
+        from the lead service after the lead changes.
+        """
         context = {
             "event_type": event.type,
             "event_data": event.data,
             "timestamp": datetime.utcnow().isoformat(),
         }
 
+        if not event.lead_id:
+            return context
+
         # Get lead context if available
-        if event.lead_id and self.leads:
+        snapshot = self.context_cache.get(event.lead_id)
+        if snapshot is None and self.leads:
             try:
                 lead = await self.leads.get(event.lead_id)
                 if lead:
-                    context["lead"] = {
-                        "id": lead.id,
-                        "name": lead.name,
-                        "company": lead.company,
-                        "email": lead.email,
-                        "status": lead.status.value if hasattr(lead.status, 'value') else lead.status,
-                        "tier": lead.tier.value if hasattr(lead.tier, 'value') else lead.tier,
-                        "score": lead.score,
-                        "source": lead.source,
-                        "deal_size": lead.deal_size,
-                        "responded": lead.responded,
-                        "total_calls": lead.total_calls,
-                        "research_status": lead.research_status,
-                        "has_call_scheduled": lead.has_call_scheduled,
-                        "requested_proposal": lead.requested_proposal,
-                        "owner_notified": lead.owner_notified,
-                    }
+                    snapshot = self.context_cache.store_lead(event.lead_id, lead)
             except Exception as e:
                 logger.error(f"Failed to get lead context: {e}")
 
+        if snapshot is not None:
+            context["lead"] = snapshot.lead
+            context["lead_json"] = snapshot.lead_json
+
+        history = self.context_cache.render_history(event.lead_id)
+        if history:
+            context["history"] = history
+
         return context
 
     def _build_system_prompt(self) -> str:
@@ -567,7 +731,7 @@ IMPORTANT RULES:
 - Use light research for new leads, deep research before calls
 - Consider the lead's current state before deciding actions
 
-Respond with the tools you want to call. The system will execute them in sequence."""
+Respond with the tools you want to call, in the order they should happen. Independent tools run in parallel; tools that depend on each other's results run in the order you give."""
 
     def _build_event_prompt(self, event: Event, context: Dict[str, Any]) -> str:
         """Build the user prompt describing the event."""
@@ -579,8 +743,18 @@ Respond with the tools you want to call. The system will execute them in sequenc
         if event.data:
             prompt_parts.append(f"EVENT_DATA: {json.dumps(event.data)}")
 
+        if event.data.get("batched_count", 1) > 1:
+            prompt_parts.append(
+                f"NOTE: This event batches {event.data['batched_count']} {event.type} events from the same lead "
+                f"(see EVENT_DATA.batch). Handle them together - send at most one reply."
+            )
+
         if context.get("lead"):
-            prompt_parts.append(f"LEAD_CONTEXT: {json.dumps(context['lead'])}")
+            lead_json = context.get("lead_json") or json.dumps(context["lead"])
+            prompt_parts.append(f"LEAD_CONTEXT: {lead_json}")
+
+        if context.get("history"):
+            prompt_parts.append(f"RECENT_HISTORY:\n{context['history']}")
 
         prompt_parts.append("\nWhat tools should I call to handle this event? Consider the lead's current state and what actions make sense.")
 
@@ -602,8 +776,8 @@ Respond with the tools you want to call. The system will execute them in sequenc
 
         try:
             async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
+                response = await post_chat_completion(
+                    client, f"{self.base_url}/chat/completions", "agentic_brain",
                     headers={
                         "Authorization": f"Bearer {self.api_key}",
                         "HTTP-Referer": "https://jasperfinance.org",
@@ -720,7 +894,10 @@ Respond with the tools you want to call. The system will execute them in sequenc
         lead.last_contact_at = datetime.utcnow()
 
         if self.leads:
-            await self.leads.update(lead_id, lead.dict())
+            await self.leads.update(lead_id, {
+                "status": lead.status,
+                "last_contact_at": lead.last_contact_at,
+            })
 
         return {"outreach_sent": True, "channel": channel}
 
@@ -770,8 +947,15 @@ Respond with the tools you want to call. The system will execute them in sequenc
 
         lead = await self.scoring.score_lead(lead)
 
+        # Only write scoring fields - embed/outreach may be updating the
+        # same lead concurrently.
         if self.leads:
-            await self.leads.update(lead_id, lead.dict())
+            await self.leads.update(lead_id, {
+                "score": lead.score,
+                "tier": lead.tier,
+                "similar_deals": lead.dict(include={"similar_deals"})["similar_deals"],
+                "updated_at": lead.updated_at,
+            })
 
         return {
             "scored": True,
@@ -828,7 +1012,10 @@ Respond with the tools you want to call. The system will execute them in sequenc
         lead.embedded_at = datetime.utcnow()
 
         if self.leads:
-            await self.leads.update(lead_id, lead.dict())
+            await self.leads.update(lead_id, {
+                "vector_id": lead.vector_id,
+                "embedded_at": lead.embedded_at,
+            })
 
         return {"embedded": True, "vector_id": vector_id}
 
@@ -0,0 +1,863 @@
+"""
+JASPER Lead Intelligence System - Durable Event Queue
+
+Webhooks and the orchestrator API enqueue work here instead of running
+AgenticBrain inline or in FastAPI BackgroundTasks. A pool of async workers
+drains the queue.
+
+Guarantees:
+- Persistent: jobs live in the `event_queue` table (Postgres or SQLite via
+  SQLAlchemy) and survive restarts. An in-memory store stands in for local
+  dev and tests (EVENT_QUEUE_BACKEND=memory).
+- Per-lead ordering: jobs sharing an ordering key (lead ID, phone, email)
+  are delivered one at a time, oldest first.
+- At-least-once: a job is acked only after its handler returns. Jobs whose
+  worker died are re-delivered after the visibility timeout. Idempotency
+  keys stop duplicate webhook deliveries being enqueued twice.
+- Dead-lettering: jobs that keep failing are parked with status "dead"
+  after EVENT_QUEUE_MAX_ATTEMPTS deliveries and can be retried by hand.
+- Coalescing: bursty per-lead events (MESSAGE_RECEIVED, EMAIL_OPENED,
+  EMAIL_CLICKED) wait out a debounce window; further events of the same
+  type for the same lead are merged into the waiting job, so AgenticBrain
+  runs once per burst. Windows are set per EventType in COALESCE_WINDOWS.
+  Only consecutive events merge: once a different job queues behind a
+  waiting one, the waiting job's window closes so it doesn't hold up the
+  lead's later events, and nothing more is merged into it.
+
+Usage:
+    await event_queue.enqueue_event(lead_created_event(lead.id, "website"))
+    await event_queue.enqueue(
+        "whatsapp_message",
+        {"phone": phone, "message": text, "message_id": msg_id},
+        ordering_key=f"whatsapp:{phone}",
+        idempotency_key=f"whatsapp:{msg_id}",
+    )
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Callable, Awaitable, Tuple
+
+from orchestrator.events import Event, EventType
+from services.metrics_service import metrics_service
+
+logger = logging.getLogger(__name__)
+
+
+EVENT_KIND = "event"
+
+PENDING = "pending"
+PROCESSING = "processing"
+DONE = "done"
+DEAD = "dead"
+
+# enqueue outcomes
+CREATED = "created"
+DUPLICATE = "duplicate"
+MERGED = "merged"
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+PayloadMerger = Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class CoalesceWindow:
+    """
+    Debounce settings for one event type.
+
+    A new event waits `debounce` seconds; each merged event pushes that
+    out again, but never past `max_wait` seconds after the first event.
+    """
+    debounce: float
+    max_wait: float
+
+
+COALESCE_WINDOWS: Dict[EventType, CoalesceWindow] = {
+    EventType.MESSAGE_RECEIVED: CoalesceWindow(debounce=8.0, max_wait=30.0),
+    EventType.EMAIL_OPENED: CoalesceWindow(debounce=60.0, max_wait=300.0),
+    EventType.EMAIL_CLICKED: CoalesceWindow(debounce=60.0, max_wait=300.0),
+}
+
+
+def merge_event_payloads(existing: Dict[str, Any], incoming: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge a queued event with a newer one of the same type and lead.
+
+    The merged event keeps the first event's ID, carries the newest event's
+    data and timestamp, and lists every original payload under data["batch"].
+    For MESSAGE_RECEIVED, data["content"] holds all messages in order.
+    """
+    existing_data = existing.get("data") or {}
+    batch = list(existing_data.get("batch") or [existing_data])
+    batch.append(incoming.get("data") or {})
+
+    data = dict(incoming.get("data") or {})
+    data["batch"] = batch
+    data["batched_count"] = len(batch)
+    if existing.get("type") == EventType.MESSAGE_RECEIVED.value:
+        data["content"] = "\n".join(item["content"] for item in batch if item.get("content"))
+
+    merged = dict(existing)
+    merged["data"] = data
+    merged["timestamp"] = incoming.get("timestamp", existing.get("timestamp"))
+    return merged
+
+
+@dataclass
+class QueuedJob:
+    """A job claimed from the queue."""
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    ordering_key: Optional[str]
+    idempotency_key: Optional[str]
+    attempts: int
+    created_at: datetime
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff between deliveries, capped at 5 minutes."""
+    return timedelta(seconds=min(2 ** attempts, 300))
+
+
+# =============================================================================
+# STORES
+# =============================================================================
+
+class MemoryQueueStore:
+    """
+    In-process stand-in for the event_queue table.
+
+    Same semantics as SQLQueueStore but nothing survives a restart. Used for
+    tests and local development without a database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._by_idempotency_key: Dict[str, int] = {}
+        self._next_id = 1
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        ordering_key: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        coalesce_key: Optional[str] = None,
+        window: Optional[CoalesceWindow] = None,
+        merge: Optional[PayloadMerger] = None,
+    ) -> Tuple[int, str]:
+        with self._lock:
+            if idempotency_key and idempotency_key in self._by_idempotency_key:
+                return self._by_idempotency_key[idempotency_key], DUPLICATE
+
+            now = datetime.utcnow()
+            if coalesce_key:
+                waiting = [
+                    row for row in self._rows.values()
+                    if row["coalesce_key"] == coalesce_key and row["status"] == PENDING and row["attempts"] == 0
+                ]
+                row = max(waiting, key=lambda r: r["id"]) if waiting else None
+                if row is not None and self._is_latest(row):
+                    row["payload"] = merge(row["payload"], payload)
+                    row["available_at"] = _debounced_until(row["created_at"], now, window)
+                    if idempotency_key:
+                        self._by_idempotency_key[idempotency_key] = row["id"]
+                        row["merged_keys"].append(idempotency_key)
+                    return row["id"], MERGED
+
+            if ordering_key is not None:
+                # Jobs queued behind a waiting burst mustn't wait out its window
+                for row in self._rows.values():
+                    if (row["ordering_key"] == ordering_key and row["coalesce_key"] and row["status"] == PENDING
+                            and row["attempts"] == 0 and row["available_at"] > now):
+                        row["available_at"] = now
+
+            job_id = self._next_id
+            self._next_id += 1
+            self._rows[job_id] = {
+                "id": job_id,
+                "kind": kind,
+                "payload": payload,
+                "ordering_key": ordering_key,
+                "idempotency_key": idempotency_key,
+                "coalesce_key": coalesce_key,
+                "merged_keys": [],
+                "status": PENDING,
+                "attempts": 0,
+                "last_error": None,
+                "available_at": _debounced_until(now, now, window),
+                "locked_at": None,
+                "locked_by": None,
+                "created_at": now,
+                "processed_at": None,
+            }
+            if idempotency_key:
+                self._by_idempotency_key[idempotency_key] = job_id
+            return job_id, CREATED
+
+    def _is_latest(self, row: Dict[str, Any]) -> bool:
+        """Whether no other active job is queued behind `row` for its ordering key."""
+        return row["ordering_key"] is None or not any(
+            other["ordering_key"] == row["ordering_key"] and other["id"] > row["id"]
+            and other["status"] in (PENDING, PROCESSING)
+            for other in self._rows.values()
+        )
+
+    def claim(self, worker_id: str) -> Optional[QueuedJob]:
+        with self._lock:
+            now = datetime.utcnow()
+            heads: Dict[str, int] = {}
+            for row in self._rows.values():
+                key = row["ordering_key"]
+                if key is not None and row["status"] in (PENDING, PROCESSING):
+                    heads[key] = min(heads.get(key, row["id"]), row["id"])
+
+            for job_id in sorted(self._rows):
+                row = self._rows[job_id]
+                if row["status"] != PENDING or row["available_at"] > now:
+                    continue
+                if row["ordering_key"] is not None and heads[row["ordering_key"]] != job_id:
+                    continue
+                row["status"] = PROCESSING
+                row["attempts"] += 1
+                row["locked_at"] = now
+                row["locked_by"] = worker_id
+                return _job_from_row(row)
+            return None
+
+    def ack(self, job_id: int):
+        with self._lock:
+            row = self._rows.get(job_id)
+            if row:
+                row["status"] = DONE
+                row["processed_at"] = datetime.utcnow()
+                row["locked_at"] = None
+                row["locked_by"] = None
+
+    def fail(self, job_id: int, error: str, max_attempts: int) -> str:
+        with self._lock:
+            row = self._rows.get(job_id)
+            if not row:
+                return DEAD
+            row["last_error"] = error
+            row["locked_at"] = None
+            row["locked_by"] = None
+            if row["attempts"] >= max_attempts:
+                row["status"] = DEAD
+                row["processed_at"] = datetime.utcnow()
+            else:
+                row["status"] = PENDING
+                row["available_at"] = datetime.utcnow() + _retry_delay(row["attempts"])
+            return row["status"]
+
+    def recover_stale(self, visibility_timeout: float, max_attempts: int) -> int:
+        with self._lock:
+            cutoff = datetime.utcnow() - timedelta(seconds=visibility_timeout)
+            recovered = 0
+            for row in self._rows.values():
+                if row["status"] == PROCESSING and row["locked_at"] and row["locked_at"] < cutoff:
+                    row["status"] = DEAD if row["attempts"] >= max_attempts else PENDING
+                    row["last_error"] = "Worker lost (visibility timeout)"
+                    row["locked_at"] = None
+                    row["locked_by"] = None
+                    recovered += 1
+            return recovered
+
+    def purge_done(self, older_than: timedelta) -> int:
+        with self._lock:
+            cutoff = datetime.utcnow() - older_than
+            stale = [
+                job_id for job_id, row in self._rows.items()
+                if row["status"] == DONE and row["processed_at"] and row["processed_at"] < cutoff
+            ]
+            for job_id in stale:
+                row = self._rows.pop(job_id)
+                for key in [row["idempotency_key"], *row["merged_keys"]]:
+                    if key:
+                        self._by_idempotency_key.pop(key, None)
+            return len(stale)
+
+    def depth(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {PENDING: 0, PROCESSING: 0, DONE: 0, DEAD: 0}
+            for row in self._rows.values():
+                counts[row["status"]] += 1
+            return counts
+
+    def dead_letters(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [row for row in self._rows.values() if row["status"] == DEAD]
+            return [_row_summary(row) for row in sorted(rows, key=lambda r: r["id"])[:limit]]
+
+    def requeue(self, job_id: int) -> bool:
+        with self._lock:
+            row = self._rows.get(job_id)
+            if not row or row["status"] != DEAD:
+                return False
+            row["status"] = PENDING
+            row["attempts"] = 0
+            row["available_at"] = datetime.utcnow()
+            return True
+
+
+class SQLQueueStore:
+    """
+    event_queue table store (Postgres in production, SQLite locally).
+
+    Claims are optimistic - UPDATE ... WHERE status = 'pending' - so several
+    uvicorn/gunicorn processes can share one queue without double delivery.
+    Merges are too, on the job's `merges` counter, so concurrent webhooks
+    coalescing into one job can't drop each other's messages (closing a
+    job's window bumps the counter as well). Idempotency keys of merged
+    deliveries are kept in event_queue_keys.
+    """
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        ordering_key: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        coalesce_key: Optional[str] = None,
+        window: Optional[CoalesceWindow] = None,
+        merge: Optional[PayloadMerger] = None,
+    ) -> Tuple[int, str]:
+        from sqlalchemy.exc import IntegrityError
+        from db.database import SessionLocal
+        from db.tables import EventQueueTable, EventQueueKeyTable
+
+        db = SessionLocal()
+        try:
+            if idempotency_key:
+                existing = self._job_for_key(db, idempotency_key)
+                if existing is not None:
+                    return existing, DUPLICATE
+
+            now = datetime.utcnow()
+            while coalesce_key:
+                waiting = (
+                    db.query(EventQueueTable)
+                    .filter(
+                        EventQueueTable.coalesce_key == coalesce_key,
+                        EventQueueTable.status == PENDING,
+                        EventQueueTable.attempts == 0,
+                    )
+                    .order_by(EventQueueTable.id.desc())
+                    .first()
+                )
+                if not waiting:
+                    break
+                if waiting.ordering_key is not None and db.query(EventQueueTable.id).filter(
+                    EventQueueTable.ordering_key == waiting.ordering_key,
+                    EventQueueTable.id > waiting.id,
+                    EventQueueTable.status.in_([PENDING, PROCESSING]),
+                ).first():
+                    break  # Other events queued since; only consecutive ones merge
+                # Compare-and-swap on the merge counter: if a worker claimed the
+                # job or another delivery merged into it since the read, nothing
+                # is written and we re-read instead of overwriting that merge
+                merged = (
+                    db.query(EventQueueTable)
+                    .filter(
+                        EventQueueTable.id == waiting.id,
+                        EventQueueTable.status == PENDING,
+                        EventQueueTable.attempts == 0,
+                        EventQueueTable.merges == waiting.merges,
+                    )
+                    .update(
+                        {
+                            EventQueueTable.payload: merge(waiting.payload, payload),
+                            EventQueueTable.available_at: _debounced_until(waiting.created_at, now, window),
+                            EventQueueTable.merges: waiting.merges + 1,
+                        },
+                        synchronize_session=False,
+                    )
+                )
+                if merged != 1:
+                    db.rollback()
+                    db.expire_all()
+                    continue
+                if idempotency_key:
+                    # Committed with the merge, so a redelivery is seen as a duplicate
+                    db.add(EventQueueKeyTable(idempotency_key=idempotency_key, job_id=waiting.id))
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # A concurrent delivery of the same webhook merged first
+                    db.rollback()
+                    return self._job_for_key(db, idempotency_key), DUPLICATE
+                return waiting.id, MERGED
+
+            if ordering_key is not None:
+                # Jobs queued behind a waiting burst mustn't wait out its window;
+                # the counter bump makes a racing merge into it re-read and see this job
+                db.query(EventQueueTable).filter(
+                    EventQueueTable.ordering_key == ordering_key,
+                    EventQueueTable.coalesce_key.isnot(None),
+                    EventQueueTable.status == PENDING,
+                    EventQueueTable.attempts == 0,
+                    EventQueueTable.available_at > now,
+                ).update(
+                    {EventQueueTable.available_at: now, EventQueueTable.merges: EventQueueTable.merges + 1},
+                    synchronize_session=False,
+                )
+            row = EventQueueTable(
+                kind=kind,
+                payload=payload,
+                ordering_key=ordering_key,
+                idempotency_key=idempotency_key,
+                coalesce_key=coalesce_key,
+                status=PENDING,
+                attempts=0,
+                available_at=_debounced_until(now, now, window),
+                created_at=now,
+            )
+            db.add(row)
+            try:
+                db.commit()
+            except IntegrityError:
+                # Lost a race with a concurrent delivery of the same webhook
+                db.rollback()
+                return self._job_for_key(db, idempotency_key), DUPLICATE
+            return row.id, CREATED
+        finally:
+            db.close()
+
+    @staticmethod
+    def _job_for_key(db, idempotency_key: str) -> Optional[int]:
+        """Job a delivery with this key was queued as, or merged into."""
+        from db.tables import EventQueueTable, EventQueueKeyTable
+
+        row = db.query(EventQueueTable.id).filter(EventQueueTable.idempotency_key == idempotency_key).first()
+        if row:
+            return row.id
+        alias = db.query(EventQueueKeyTable.job_id).filter(
+            EventQueueKeyTable.idempotency_key == idempotency_key
+        ).first()
+        return alias.job_id if alias else None
+
+    def claim(self, worker_id: str) -> Optional[QueuedJob]:
+        from sqlalchemy import func, or_
+        from db.database import SessionLocal
+        from db.tables import EventQueueTable as Q
+
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            # The oldest active job per ordering key is the only one allowed to run
+            heads = (
+                db.query(func.min(Q.id))
+                .filter(Q.status.in_([PENDING, PROCESSING]), Q.ordering_key.isnot(None))
+                .group_by(Q.ordering_key)
+            )
+            candidates = (
+                db.query(Q.id)
+                .filter(
+                    Q.status == PENDING,
+                    Q.available_at <= now,
+                    or_(Q.ordering_key.is_(None), Q.id.in_(heads)),
+                )
+                .order_by(Q.id)
+                .limit(10)
+                .all()
+            )
+
+            for candidate in candidates:
+                claimed = (
+                    db.query(Q)
+                    .filter(Q.id == candidate.id, Q.status == PENDING)
+                    .update(
+                        {
+                            Q.status: PROCESSING,
+                            Q.attempts: Q.attempts + 1,
+                            Q.locked_at: now,
+                            Q.locked_by: worker_id,
+                        },
+                        synchronize_session=False,
+                    )
+                )
+                db.commit()
+                if claimed == 1:
+                    row = db.query(Q).filter(Q.id == candidate.id).first()
+                    return QueuedJob(
+                        id=row.id,
+                        kind=row.kind,
+                        payload=row.payload,
+                        ordering_key=row.ordering_key,
+                        idempotency_key=row.idempotency_key,
+                        attempts=row.attempts,
+                        created_at=row.created_at,
+                    )
+            return None
+        finally:
+            db.close()
+
+    def ack(self, job_id: int):
+        from db.database import SessionLocal
+        from db.tables import EventQueueTable as Q
+
+        db = SessionLocal()
+        try:
+            db.query(Q).filter(Q.id == job_id).update(
+                {Q.status: DONE, Q.processed_at: datetime.utcnow(), Q.locked_at: None, Q.locked_by: None},
+                synchronize_session=False,
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def fail(self, job_id: int, error: str, max_attempts: int) -> str:
+        from db.database import SessionLocal
+        from db.tables import EventQueueTable as Q
+
+        db = SessionLocal()
+        try:
+            row = db.query(Q).filter(Q.id == job_id).first()
+            if not row:
+                return DEAD
+            row.last_error = error[:2000]
+            row.locked_at = None
+            row.locked_by = None
+            if row.attempts >= max_attempts:
+                row.status = DEAD
+                row.processed_at = datetime.utcnow()
+            else:
+                row.status = PENDING
+                row.available_at = datetime.utcnow() + _retry_delay(row.attempts)
+            status = row.status
+            db.commit()
+            return status
+        finally:
+            db.close()
+
+    def recover_stale(self, visibility_timeout: float, max_attempts: int) -> int:
+        from db.database import SessionLocal
+        from db.tables import EventQueueTable as Q
+
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=visibility_timeout)
+            stale = db.query(Q).filter(Q.status == PROCESSING, Q.locked_at < cutoff).all()
+            for row in stale:
+                row.status = DEAD if row.attempts >= max_attempts else PENDING
+                row.last_error = "Worker lost (visibility timeout)"
+                row.locked_at = None
+                row.locked_by = None
+            db.commit()
+            return len(stale)
+        finally:
+            db.close()
+
+    def purge_done(self, older_than: timedelta) -> int:
+        from db.database import SessionLocal
+        from db.tables import EventQueueTable as Q, EventQueueKeyTable
+
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - older_than
+            purged = db.query(Q.id).filter(Q.status == DONE, Q.processed_at < cutoff)
+            db.query(EventQueueKeyTable).filter(EventQueueKeyTable.job_id.in_(purged)).delete(
+                synchronize_session=False
+            )
+            deleted = db.query(Q).filter(Q.status == DONE, Q.processed_at < cutoff).delete(
+                synchronize_session=False
+            )
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    def depth(self) -> Dict[str, int]:
+        from sqlalchemy import func
+        from db.database import SessionLocal
+        from db.tables import EventQueueTable as Q
+
+        db = SessionLocal()
+        try:
+            counts = {PENDING: 0, PROCESSING: 0, DONE: 0, DEAD: 0}
+            for status, count in db.query(Q.status, func.count(Q.id)).group_by(Q.status).all():
+                counts[status] = count
+            return counts
+        finally:
+            db.close()
+
+    def dead_letters(self, limit: int = 50) -> List[Dict[str, Any]]:
+        from db.database import SessionLocal
+        from db.tables import EventQueueTable as Q
+
+        db = SessionLocal()
+        try:
+            rows = db.query(Q).filter(Q.status == DEAD).order_by(Q.id).limit(limit).all()
+            return [_row_summary({c.name: getattr(row, c.name) for c in Q.__table__.columns}) for row in rows]
+        finally:
+            db.close()
+
+    def requeue(self, job_id: int) -> bool:
+        from db.database import SessionLocal
+        from db.tables import EventQueueTable as Q
+
+        db = SessionLocal()
+        try:
+            updated = db.query(Q).filter(Q.id == job_id, Q.status == DEAD).update(
+                {Q.status: PENDING, Q.attempts: 0, Q.available_at: datetime.utcnow()},
+                synchronize_session=False,
+            )
+            db.commit()
+            return updated == 1
+        finally:
+            db.close()
+
+
+def _debounced_until(first_seen: datetime, now: datetime, window: Optional[CoalesceWindow]) -> datetime:
+    """When a coalescing job becomes deliverable."""
+    if window is None:
+        return now
+    return min(now + timedelta(seconds=window.debounce), first_seen + timedelta(seconds=window.max_wait))
+
+
+def _job_from_row(row: Dict[str, Any]) -> QueuedJob:
+    return QueuedJob(
+        id=row["id"],
+        kind=row["kind"],
+        payload=row["payload"],
+        ordering_key=row["ordering_key"],
+        idempotency_key=row["idempotency_key"],
+        attempts=row["attempts"],
+        created_at=row["created_at"],
+    )
+
+
+def _row_summary(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": row["id"],
+        "kind": row["kind"],
+        "ordering_key": row["ordering_key"],
+        "idempotency_key": row["idempotency_key"],
+        "coalesce_key": row["coalesce_key"],
+        "attempts": row["attempts"],
+        "last_error": row["last_error"],
+        "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+        "payload": row["payload"],
+    }
+
+
+# =============================================================================
+# QUEUE + WORKER POOL
+# =============================================================================
+
+class EventQueue:
+    """Durable queue with a pool of async consumer workers."""
+
+    def __init__(
+        self,
+        store=None,
+        workers: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        visibility_timeout: Optional[float] = None,
+        poll_interval: float = 1.0,
+        housekeeping_interval: float = 30.0,
+        coalesce_windows: Optional[Dict[EventType, CoalesceWindow]] = None,
+    ):
+        if store is None:
+            backend = os.getenv("EVENT_QUEUE_BACKEND", "db").lower()
+            store = MemoryQueueStore() if backend == "memory" else SQLQueueStore()
+        self.store = store
+        self.workers = workers or int(os.getenv("EVENT_QUEUE_WORKERS", "4"))
+        self.max_attempts = max_attempts or int(os.getenv("EVENT_QUEUE_MAX_ATTEMPTS", "5"))
+        self.visibility_timeout = visibility_timeout or float(os.getenv("EVENT_QUEUE_VISIBILITY_TIMEOUT", "300"))
+        self.poll_interval = poll_interval
+        self.housekeeping_interval = housekeeping_interval
+        self.retention = timedelta(days=int(os.getenv("EVENT_QUEUE_RETENTION_DAYS", "7")))
+        self.coalesce_windows = COALESCE_WINDOWS if coalesce_windows is None else coalesce_windows
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self.running = False
+
+    # -------------------------------------------------------------------------
+    # Registration
+    # -------------------------------------------------------------------------
+
+    def register(self, kind: str, handler: JobHandler):
+        """Register the coroutine that processes jobs of this kind."""
+        self._handlers[kind] = handler
+
+    def register_event_handler(self, handle_event: Callable[[Event], Awaitable[Any]]):
+        """Route queued orchestrator events to e.g. AgenticBrain.handle_event."""
+        async def _handle(payload: Dict[str, Any]):
+            return await handle_event(Event(**payload))
+
+        self.register(EVENT_KIND, _handle)
+
+    # -------------------------------------------------------------------------
+    # Producers
+    # -------------------------------------------------------------------------
+
+    async def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        ordering_key: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        coalesce_key: Optional[str] = None,
+        window: Optional[CoalesceWindow] = None,
+        merge: Optional[PayloadMerger] = None,
+    ) -> Dict[str, Any]:
+        """
+        Persist a job and wake a worker.
+
+        With a coalesce_key, the job is held for the window and later jobs
+        with the same key are folded into it with `merge`.
+        """
+        job_id, outcome = await asyncio.to_thread(
+            self.store.enqueue, kind, payload, ordering_key, idempotency_key, coalesce_key, window, merge
+        )
+        metrics_service.collector.inc_counter(
+            "jasper_event_queue_enqueued_total", labels={"kind": kind, "outcome": outcome}
+        )
+        if outcome == CREATED and self._wakeup:
+            self._wakeup.set()
+        elif outcome == DUPLICATE:
+            logger.info(f"[EventQueue] Duplicate {kind} job ignored (idempotency_key={idempotency_key})")
+        return {"job_id": job_id, "duplicate": outcome == DUPLICATE, "merged": outcome == MERGED}
+
+    async def enqueue_event(self, event: Event, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Queue an orchestrator event, ordered per lead and debounced per COALESCE_WINDOWS."""
+        window = self.coalesce_windows.get(EventType(event.type)) if event.lead_id else None
+        return await self.enqueue(
+            EVENT_KIND,
+            event.model_dump(mode="json"),
+            ordering_key=f"lead:{event.lead_id}" if event.lead_id else None,
+            idempotency_key=idempotency_key,
+            coalesce_key=f"{event.type}:{event.lead_id}" if window else None,
+            window=window,
+            merge=merge_event_payloads if window else None,
+        )
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    async def start(self):
+        """Start the worker pool and housekeeping loop."""
+        if self.running:
+            return
+        self.running = True
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(f"{os.getpid()}-{i}"))
+            for i in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._housekeeping()))
+        logger.info(f"[EventQueue] Started {self.workers} workers ({type(self.store).__name__})")
+
+    async def stop(self):
+        """Stop workers. In-flight jobs are re-delivered after the visibility timeout."""
+        self.running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("[EventQueue] Stopped")
+
+    # -------------------------------------------------------------------------
+    # Consumers
+    # -------------------------------------------------------------------------
+
+    async def _worker(self, worker_id: str):
+        while self.running:
+            self._wakeup.clear()
+            try:
+                job = await asyncio.to_thread(self.store.claim, worker_id)
+            except Exception as e:
+                logger.error(f"[EventQueue] Claim failed: {e}")
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._process(job)
+
+    async def _process(self, job: QueuedJob):
+        """Run one job and ack, retry or dead-letter it."""
+        metrics_service.collector.observe_histogram(
+            "jasper_event_queue_lag_seconds",
+            (datetime.utcnow() - job.created_at).total_seconds(),
+            labels={"kind": job.kind}
+        )
+
+        handler = self._handlers.get(job.kind)
+        if handler is None:
+            await asyncio.to_thread(self.store.fail, job.id, f"No handler for {job.kind}", 0)
+            metrics_service.collector.inc_counter("jasper_event_queue_jobs_total", labels={"kind": job.kind, "result": DEAD})
+            logger.error(f"[EventQueue] No handler registered for {job.kind} - job {job.id} dead-lettered")
+            return
+
+        try:
+            # Finish before the visibility timeout so the job isn't re-delivered mid-run
+            async with asyncio.timeout(self.visibility_timeout * 0.9):
+                await handler(job.payload)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            status = await asyncio.to_thread(self.store.fail, job.id, error, self.max_attempts)
+            result = DEAD if status == DEAD else "retry"
+            metrics_service.collector.inc_counter("jasper_event_queue_jobs_total", labels={"kind": job.kind, "result": result})
+            logger.error(f"[EventQueue] {job.kind} job {job.id} failed (attempt {job.attempts}): {error} -> {status}")
+            return
+
+        await asyncio.to_thread(self.store.ack, job.id)
+        metrics_service.collector.inc_counter("jasper_event_queue_jobs_total", labels={"kind": job.kind, "result": DONE})
+
+    async def _housekeeping(self):
+        while self.running:
+            try:
+                recovered = await asyncio.to_thread(self.store.recover_stale, self.visibility_timeout, self.max_attempts)
+                if recovered:
+                    logger.warning(f"[EventQueue] Re-queued {recovered} jobs from lost workers")
+                await asyncio.to_thread(self.store.purge_done, self.retention)
+                await self.stats()
+            except Exception as e:
+                logger.error(f"[EventQueue] Housekeeping failed: {e}")
+            await asyncio.sleep(self.housekeeping_interval)
+
+    # -------------------------------------------------------------------------
+    # Introspection
+    # -------------------------------------------------------------------------
+
+    async def stats(self) -> Dict[str, Any]:
+        """Queue depth by status; also refreshes the depth gauges."""
+        depth = await asyncio.to_thread(self.store.depth)
+        for status, count in depth.items():
+            metrics_service.collector.set_gauge("jasper_event_queue_depth", count, labels={"status": status})
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "backend": type(self.store).__name__,
+            "max_attempts": self.max_attempts,
+            "depth": depth,
+        }
+
+    async def dead_letters(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.dead_letters, limit)
+
+    async def requeue(self, job_id: int) -> bool:
+        requeued = await asyncio.to_thread(self.store.requeue, job_id)
+        if requeued and self._wakeup:
+            self._wakeup.set()
+        return requeued
+
+
+# Singleton instance
+event_queue = EventQueue()
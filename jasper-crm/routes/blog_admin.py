@@ -11,7 +11,8 @@ import json
 import logging
 from pathlib import Path
 
-from services.blog_service import blog_service
+from services.blog_service import blog_service, PostVersionConflict
+from services.semantic_links import semantic_links
 from routes.blog import normalize_blocks, markdown_to_blocks
 
 logger = logging.getLogger(__name__)
@@ -135,6 +136,7 @@ class UpdatePostRequest(BaseModel):
     featured: Optional[bool] = None
     seoTitle: Optional[str] = None  # Custom SEO title
     seoDescription: Optional[str] = None  # Custom SEO description
+    expected_version: Optional[int] = None  # Reject the update if the post changed since this version
     user_id: Optional[str] = "system"
 
 
@@ -314,6 +316,8 @@ async def update_post(slug: str, request: UpdatePostRequest):
 
     SEO score is automatically recalculated on update.
     Activity is logged for transparency.
+    Send `expected_version` (the post's "version") to get a 409 instead of
+    overwriting someone else's concurrent edit.
     """
     # DEBUG: Log raw request content_blocks BEFORE dict conversion
     logger.info(f"[DEBUG] PUT /posts/{slug} - request.content_blocks present: {request.content_blocks is not None}")
@@ -322,7 +326,7 @@ async def update_post(slug: str, request: UpdatePostRequest):
         if request.content_blocks:
             logger.info(f"[DEBUG] PUT /posts/{slug} - first block: {request.content_blocks[0] if request.content_blocks else 'empty'}")
 
-    updates = request.dict(exclude_none=True, exclude={"user_id"})
+    updates = request.dict(exclude_none=True, exclude={"user_id", "expected_version"})
 
     # DEBUG: Log updates dict after conversion
     logger.info(f"[DEBUG] PUT /posts/{slug} - updates keys: {list(updates.keys())}")
@@ -334,7 +338,10 @@ async def update_post(slug: str, request: UpdatePostRequest):
     if not updates:
         raise HTTPException(status_code=400, detail="No updates provided")
 
-    post = blog_service.update_post(slug, updates, request.user_id)
+    try:
+        post = blog_service.update_post(slug, updates, request.user_id, expected_version=request.expected_version)
+    except PostVersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not post:
         raise HTTPException(status_code=404, detail=f"Post not found: {slug}")
 
@@ -848,6 +855,38 @@ Format as JSON with keys: primary, secondary, long_tail, related"""
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# =============================================================================
+# RELATED CONTENT & INTERNAL LINK ENDPOINTS
+# =============================================================================
+
+@router.get("/posts/{slug}/related", response_model=Dict[str, Any])
+async def get_related_posts(slug: str, limit: int = Query(5, ge=1, le=20)):
+    """
+    Related published posts: embedding similarity (jasper-memory) blended
+    with category/tag overlap. Falls back to tag overlap alone if the
+    vector index is unavailable.
+    """
+    related = await semantic_links.related_articles(slug, limit=limit)
+    return {"success": True, "slug": slug, "related": related}
+
+
+@router.get("/posts/{slug}/link-suggestions", response_model=Dict[str, Any])
+async def get_link_suggestions(slug: str, limit: int = Query(5, ge=1, le=20)):
+    """
+    Internal link suggestions: an anchor phrase in one of the post's
+    paragraphs and the post whose content is closest to that paragraph.
+    """
+    suggestions = await semantic_links.suggest_links(slug, limit=limit)
+    return {"success": True, "slug": slug, "suggestions": suggestions}
+
+
+@router.post("/semantic-index/sync", response_model=Dict[str, Any])
+async def sync_semantic_index(force: bool = Query(False, description="Re-embed every published post")):
+    """Embed new/changed published posts and drop removed ones (one embedding pass)."""
+    stats = await semantic_links.index_all(force=force)
+    return {"success": True, **stats}
+
+
 # =============================================================================
 # SOCIAL SHARING ENDPOINTS
 # =============================================================================
@@ -1771,6 +1810,7 @@ async def suggest_author(request: SuggestAuthorRequest):
     try:
         import google.generativeai as genai
         import os
+        from services.llm_accounting import llm_accounting, gemini_usage, scoped_feature, BudgetExceeded
         
         # Load available authors
         authors = load_authors()
@@ -1818,13 +1858,18 @@ Return ONLY a valid JSON object (no markdown, no explanation):
 """
         
         # Call Gemini
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.3,
-                "max_output_tokens": 500,
-            }
-        )
+        budget = llm_accounting.check_budget(scoped_feature("author_suggestion"), "gemini-2.0-flash")
+        if not budget.allowed:
+            raise BudgetExceeded(budget)
+        with llm_accounting.track(budget.model, feature=budget.feature, budget_action=budget.action) as call:
+            response = model.generate_content(
+                prompt,
+                generation_config={
+                    "temperature": 0.3,
+                    "max_output_tokens": 500,
+                }
+            )
+            call.usage = gemini_usage(response)
         
         # Parse response
         result_text = response.text.strip()
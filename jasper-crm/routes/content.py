@@ -11,6 +11,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 from services.content_service import content_service
+from services.llm_accounting import accounting_scope
 from services.keyword_service import keyword_service
 from services.image_service import image_service
 from agents.seo_agent import content_optimizer, keyword_research_agent
@@ -540,11 +541,12 @@ async def batch_generate_content(
                         for kw in keyword_recs.get("existing_matches", [])[:3]
                     ]
 
-                generated = await content_service.generate_blog_post(
-                    topic=topic_data.get("topic"),
-                    category=topic_data.get("category", "dfi-insights"),
-                    seo_keywords=target_keywords
-                )
+                with accounting_scope(feature="batch_generate", article=topic_data.get("topic")):
+                    generated = await content_service.generate_blog_post(
+                        topic=topic_data.get("topic"),
+                        category=topic_data.get("category", "dfi-insights"),
+                        seo_keywords=target_keywords
+                    )
 
                 if generated.get("error"):
                     task["failed"] += 1
@@ -881,15 +883,16 @@ async def auto_generate_article(
             # - Links are injected AFTER generation (adds ~10-15% to SEO)
             # - Auto-improve agent can optimize articles later
             # - 50% ensures baseline quality without being too restrictive
-            result = await blog_service.generate_post(
-                topic=topic,
-                category=category,
-                keywords=keywords,
-                tone="professional",
-                user_id="auto-generate",
-                min_seo_score=50,
-                use_ai_images=request.include_hero_image
-            )
+            with accounting_scope(feature="auto_generate", article=topic):
+                result = await blog_service.generate_post(
+                    topic=topic,
+                    category=category,
+                    keywords=keywords,
+                    tone="professional",
+                    user_id="auto-generate",
+                    min_seo_score=50,
+                    use_ai_images=request.include_hero_image
+                )
 
             if result.get("success"):
                 logger.info(f"Article generated successfully on attempt {attempt}")
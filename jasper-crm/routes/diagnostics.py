@@ -0,0 +1,105 @@
+"""
+JASPER CRM - Diagnostics Routes
+
+Local-only endpoints for investigating slow requests:
+- GET /admin/traces                   - Recent request traces
+- GET /admin/traces/{correlation_id}  - Spans for one request
+- GET /admin/profile?seconds=10       - Sampling profile as collapsed stacks
+
+Only requests from the loopback interface are served, e.g.
+`curl localhost:8001/admin/profile?seconds=10 > out.folded` on the host.
+Behind Traefik, external clients arrive from the proxy's address and are
+refused.
+
+Render a profile with any collapsed-stack tool, e.g.
+`flamegraph.pl out.folded > out.svg` or by dropping the file on speedscope.app.
+"""
+
+import asyncio
+import ipaddress
+import logging
+
+from fastapi import APIRouter, HTTPException, Query, Request, Depends
+from fastapi.responses import PlainTextResponse
+
+from services.tracing import tracer
+from services.profiler import sampling_profiler, MAX_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def _is_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host in ("localhost", "testclient")
+
+
+def require_local(request: Request):
+    """
+    Reject anything that didn't come from loopback.
+
+    Traefik connects from 127.0.0.1, so the peer address alone would let
+    every proxied request through (it is only rewritten to the real client
+    if uvicorn runs with proxy headers trusted for the proxy's address).
+    So the client addresses Traefik forwards in X-Forwarded-For / X-Real-IP
+    must be loopback too. Traefik appends the real client to any
+    X-Forwarded-For the client sent, so a forged header can't pass.
+    """
+    host = request.client.host if request.client else ""
+    forwarded = request.headers.get("x-forwarded-for", "").split(",") + [request.headers.get("x-real-ip", "")]
+    hops = [host] + [h.strip() for h in forwarded if h.strip()]
+    if not all(_is_loopback(hop) for hop in hops):
+        raise HTTPException(status_code=403, detail="Diagnostics are only available from localhost")
+
+
+router = APIRouter(prefix="/admin", tags=["Diagnostics"], dependencies=[Depends(require_local)])
+
+
+@router.get("/traces")
+async def list_traces(
+    limit: int = Query(50, ge=1, le=200),
+    min_ms: float = Query(0, ge=0, description="Only traces at least this slow"),
+):
+    """
+    Most recent traced requests, newest first.
+
+    Requests are traced when TRACING_ENABLED=true, or on demand with an
+    `X-Trace: 1` request header when TRACE_ON_DEMAND=true.
+    """
+    return {
+        "tracing_enabled": tracer.enabled,
+        "sample_rate": tracer.sample_rate,
+        "traces": tracer.recent(limit=limit, min_ms=min_ms),
+    }
+
+
+@router.get("/traces/{correlation_id}")
+async def get_trace(correlation_id: str):
+    """All spans for one request, with time per span kind."""
+    trace = tracer.get(correlation_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (not traced, or aged out)")
+    return trace.to_dict()
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10, gt=0, le=MAX_SECONDS),
+    interval_ms: float = Query(5, ge=1, le=1000, description="Sampling interval"),
+    include_idle: bool = Query(False, description="Include threads parked in waits"),
+):
+    """
+    Sample all threads for `seconds` and return collapsed stacks
+    (flamegraph.pl / speedscope / inferno input format).
+    """
+    logger.info(f"[Diagnostics] Profiling for {seconds}s at {interval_ms}ms")
+    stacks = await asyncio.to_thread(
+        sampling_profiler.profile, seconds, interval_ms / 1000, include_idle
+    )
+    if stacks is None:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    return PlainTextResponse(
+        stacks + "\n",
+        headers={"Content-Disposition": 'attachment; filename="jasper-profile.folded"'},
+    )
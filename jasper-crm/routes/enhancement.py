@@ -10,6 +10,7 @@ from pydantic import BaseModel
 
 from services.enhancement_orchestrator import enhancement_orchestrator
 from services.task_tracker_service import task_tracker
+from services.content_transforms import get_content_transform_pipeline
 
 router = APIRouter(prefix="/api/v1/enhancement", tags=["enhancement"])
 
@@ -42,6 +43,12 @@ class ProcessResponse(BaseModel):
     tasks: list
 
 
+class TransformRequest(BaseModel):
+    transforms: Optional[List[str]] = None  # Default transforms if omitted
+    slugs: Optional[List[str]] = None       # All posts if omitted
+    dry_run: bool = False
+
+
 class StatusResponse(BaseModel):
     orchestrator: dict
     task_stats: dict
@@ -139,6 +146,34 @@ async def process_pending_tasks(
         }
 
 
+# ============================================================================
+# SITE-WIDE TRANSFORMS
+# ============================================================================
+
+@router.get("/transforms")
+async def list_content_transforms():
+    """List registered content transforms."""
+    return {"transforms": get_content_transform_pipeline().list_transforms()}
+
+
+@router.post("/transforms/run")
+async def run_content_transforms(request: TransformRequest):
+    """
+    Run content transforms (CTA, related links, citations, image URLs)
+    over the blog in one pass and one write.
+
+    Set dry_run=true to get per-post diffs without saving.
+    """
+    try:
+        return await get_content_transform_pipeline().run(
+            transforms=request.transforms,
+            slugs=request.slugs,
+            dry_run=request.dry_run
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ============================================================================
 # STATUS & MONITORING
 # ============================================================================
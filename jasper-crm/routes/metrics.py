@@ -3,6 +3,7 @@ JASPER CRM - Metrics and Health Endpoints
 
 Provides:
 - /metrics - Prometheus metrics endpoint
+- /metrics/llm-usage - LLM token/cost usage against daily budgets
 - /health/detailed - Detailed health check
 - /health/aggregated - All services health
 """
@@ -10,14 +11,16 @@ Provides:
 import os
 import logging
 import asyncio
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, Any, Optional
 
 import httpx
-from fastapi import APIRouter, Response
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
 
 from services.metrics_service import metrics_service
 from services.cache_service import cache_service
+from services.llm_accounting import llm_accounting
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +61,20 @@ async def prometheus_metrics():
     )
 
 
+@router.get("/metrics/llm-usage")
+async def llm_usage(date: Optional[str] = None):
+    """
+    LLM calls, tokens and spend per feature for a day (YYYY-MM-DD, default today),
+    with each feature's daily budget.
+    """
+    if date is not None:
+        try:
+            date = datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+    return llm_accounting.get_daily_summary(date)
+
+
 # ============================================
 # Detailed Health Check
 # ============================================
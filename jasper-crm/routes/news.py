@@ -125,6 +125,7 @@ async def preview_scan():
             "preview": preview,
             "total_found": len(items),
             "high_relevance": len([i for i in items if i.relevance_score >= 50]),
+            "stories_found": len(news_monitor.group_stories(items)[0]),
             "timestamp": datetime.now().isoformat()
         }
 
@@ -18,6 +18,7 @@ from orchestrator.events import (
     content_requested_event,
     research_requested_event
 )
+from orchestrator.event_queue import event_queue
 
 router = APIRouter(prefix="/api/v1/orchestrator", tags=["Orchestrator"])
 
@@ -31,6 +32,8 @@ class TriggerEventRequest(BaseModel):
     event_type: str = Field(..., description="Event type from EventType enum")
     lead_id: Optional[str] = Field(default=None, description="Lead ID if applicable")
     data: Optional[Dict[str, Any]] = Field(default=None, description="Event data payload")
+    idempotency_key: Optional[str] = Field(default=None, description="Dedupe key - repeated triggers with the same key are queued once")
+    wait: bool = Field(default=False, description="Run inline and return the brain's result instead of queueing")
 
 
 class TestBrainRequest(BaseModel):
@@ -49,7 +52,9 @@ async def trigger_event(request: TriggerEventRequest, req: Request):
     Trigger an event through the AgenticBrain.
 
     The AgenticBrain (DeepSeek V3.2) will decide which tools to call
-    based on the event type and context.
+    based on the event type and context. By default the event is put on
+    the durable event queue and this returns immediately; set "wait": true
+    to run it inline and get the tool results back.
 
     Example:
         POST /api/v1/orchestrator/event
@@ -84,6 +89,20 @@ async def trigger_event(request: TriggerEventRequest, req: Request):
         source="api"
     )
 
+    if not request.wait:
+        try:
+            queued = await event_queue.enqueue_event(event, idempotency_key=request.idempotency_key)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to queue event: {e}")
+        return {
+            "success": True,
+            "queued": True,
+            "event_id": event.id,
+            "event_type": event.type,
+            "job_id": queued["job_id"],
+            "duplicate": queued["duplicate"],
+        }
+
     # Process through AgenticBrain
     try:
         result = await brain.handle_event(event)
@@ -97,6 +116,31 @@ async def trigger_event(request: TriggerEventRequest, req: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/queue")
+async def get_queue_status():
+    """
+    Get event queue depth and worker status.
+
+    Depth is broken down by status: pending, processing, done, dead.
+    """
+    return await event_queue.stats()
+
+
+@router.get("/queue/dead-letters")
+async def get_dead_letters(limit: int = 50):
+    """List jobs that exhausted their retries."""
+    dead = await event_queue.dead_letters(limit=limit)
+    return {"count": len(dead), "jobs": dead}
+
+
+@router.post("/queue/dead-letters/{job_id}/retry")
+async def retry_dead_letter(job_id: int):
+    """Put a dead-lettered job back on the queue with a fresh retry budget."""
+    if not await event_queue.requeue(job_id):
+        raise HTTPException(status_code=404, detail=f"Dead-lettered job {job_id} not found")
+    return {"success": True, "job_id": job_id}
+
+
 @router.post("/test")
 async def test_brain(request: TestBrainRequest, req: Request):
     """
@@ -10,12 +10,14 @@ API endpoints for SEO agent system:
 Integrates with existing keyword CSV infrastructure.
 """
 
+import asyncio
 import logging
-from typing import Optional, List
+from typing import Literal, Optional, List
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 
 from services.keyword_service import keyword_service
+from services.seo_audit import seo_audit, CHECKS as AUDIT_CHECKS
 from agents.seo_agent import (
     keyword_research_agent,
     content_optimizer,
@@ -34,6 +36,14 @@ router = APIRouter(prefix="/api/v1/seo", tags=["SEO"])
 class KeywordAnalysisRequest(BaseModel):
     """Request for keyword analysis"""
     keyword: str = Field(..., description="Keyword to analyze")
+    force: bool = Field(False, description="Re-analyze even if a fresh result is stored")
+
+
+class KeywordBatchEnrichRequest(BaseModel):
+    """Request for batched keyword enrichment"""
+    keywords: List[str] = Field(default_factory=list, description="Keywords to analyze")
+    category: Optional[str] = Field(None, description="Enrich every keyword in this category instead")
+    force: bool = Field(False, description="Re-analyze keywords with fresh stored results")
 
 
 class KeywordSearchRequest(BaseModel):
@@ -44,6 +54,7 @@ class KeywordSearchRequest(BaseModel):
     min_volume: Optional[int] = None
     max_difficulty: Optional[int] = None
     limit: int = 50
+    sort_by: Optional[Literal["volume", "difficulty"]] = None
 
 
 class ContentScoreRequest(BaseModel):
@@ -147,6 +158,7 @@ async def search_keywords(request: KeywordSearchRequest):
         min_volume=request.min_volume,
         max_difficulty=request.max_difficulty,
         limit=request.limit,
+        sort_by=request.sort_by,
     )
 
     return {
@@ -164,12 +176,12 @@ async def get_keywords_by_category(
     """
     Get all keywords for a specific category.
     """
-    keywords = keyword_service.get_by_category(category)
+    keywords = keyword_service.get_by_category(category, limit=limit)
     return {
         "success": True,
         "category": category,
-        "keywords": keywords[:limit],
-        "total": len(keywords),
+        "keywords": keywords,
+        "total": keyword_service.get_categories().get(category, 0),
     }
 
 
@@ -245,7 +257,7 @@ async def enrich_keyword(request: KeywordAnalysisRequest):
     Estimates volume, difficulty, intent without external API.
     """
     try:
-        result = await keyword_service.enrich_keyword(request.keyword)
+        result = await keyword_service.enrich_keyword(request.keyword, force=request.force)
         return {
             "success": True,
             "enrichment": result,
@@ -255,6 +267,31 @@ async def enrich_keyword(request: KeywordAnalysisRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/research/enrich-batch")
+async def enrich_keywords_batch(request: KeywordBatchEnrichRequest):
+    """
+    Enrich many keywords, several per AI call.
+
+    Keywords enriched recently are served from the keyword catalog
+    without calling the model (unless force is set).
+    """
+    if not request.keywords and not request.category:
+        raise HTTPException(status_code=400, detail="Provide keywords or a category")
+    try:
+        if request.category:
+            summary = await keyword_service.enrich_category(request.category, force=request.force)
+            return {"success": True, **summary}
+        results = await keyword_service.enrich_batch(request.keywords, limit=None, force=request.force)
+        return {
+            "success": True,
+            "enrichments": results,
+            "total": len(results),
+        }
+    except Exception as e:
+        logger.error(f"Batch enrichment error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/research/gap-analysis")
 async def gap_analysis(
     sector: Optional[str] = Query(None, description="Sector focus"),
@@ -415,6 +452,68 @@ async def suggest_internal_links(request: InternalLinksRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# =============================================================================
+# SITE AUDIT ENDPOINTS
+# =============================================================================
+
+@router.get("/audit")
+async def get_audit_summary():
+    """
+    Latest site-wide SEO audit: averages, grade distribution, per-check
+    failure counts and changes since the previous audit.
+
+    Reads the precomputed audit; nothing is scored per request.
+    """
+    audit = seo_audit.latest()
+    if not audit:
+        return {"success": True, "audit": None, "running": seo_audit.running}
+    return {
+        "success": True,
+        "running": seo_audit.running,
+        "audit": {k: v for k, v in audit.items() if k != "columns"},
+        "history": seo_audit.history(),
+    }
+
+
+@router.get("/audit/posts")
+async def get_audit_posts(
+    max_score: Optional[int] = Query(None, ge=0, le=100, description="Only posts scoring at or below this"),
+    failing_check: Optional[str] = Query(None, description="Only posts failing this check"),
+    limit: int = Query(100, ge=1, le=5000),
+    offset: int = Query(0, ge=0),
+):
+    """Per-post, per-check scores from the latest audit, lowest scores first."""
+    if failing_check and failing_check not in AUDIT_CHECKS:
+        raise HTTPException(status_code=400, detail=f"Unknown check: {failing_check}")
+    rows = seo_audit.rows(max_score=max_score, failing_check=failing_check)
+    return {
+        "success": True,
+        "total": len(rows),
+        "checks": AUDIT_CHECKS,
+        "posts": rows[offset:offset + limit],
+    }
+
+
+@router.post("/audit/run")
+async def run_audit(force: bool = Query(False, description="Re-score posts that haven't changed")):
+    """
+    Run a site-wide SEO audit now (nightly runs use `python -m services.seo_audit`).
+
+    Only posts changed since the previous audit are re-scored unless `force`.
+    """
+    if seo_audit.running:
+        raise HTTPException(status_code=409, detail="An audit is already running")
+    try:
+        audit = await asyncio.to_thread(seo_audit.run, force)
+    except Exception as e:
+        logger.error(f"SEO audit error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "success": True,
+        "audit": {k: v for k, v in audit.items() if k != "columns"},
+    }
+
+
 # =============================================================================
 # INTEGRATION ENDPOINTS (CRM + SEO)
 # =============================================================================
@@ -447,7 +546,7 @@ async def suggest_keywords_for_lead_sector(sector: str):
 
     category = category_map.get(sector.lower(), None)
     if category:
-        category_keywords = keyword_service.get_by_category(category)
+        category_keywords = keyword_service.get_by_category(category, limit=20)
     else:
         category_keywords = []
 
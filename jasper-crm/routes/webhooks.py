@@ -7,19 +7,22 @@ Handles inbound webhooks from:
 - LinkedIn (future)
 
 All inbound messages are routed through the AgenticBrain
-for AI-powered processing and response.
+for AI-powered processing and response. Processing happens on the
+durable event queue (orchestrator/event_queue.py), so endpoints return
+as soon as the job is persisted.
 """
 
 import os
 import hmac
 import hashlib
 import logging
-from fastapi import APIRouter, HTTPException, Request, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 from orchestrator.events import message_received_event, lead_created_event, EventType
+from orchestrator.event_queue import event_queue
 from services.comms_agent import comms_agent
 
 router = APIRouter(prefix="/api/v1/webhooks", tags=["Webhooks"])
@@ -102,19 +105,17 @@ async def whatsapp_verify(request: Request):
 
 
 @router.post("/whatsapp")
-async def whatsapp_webhook(
-    request: Request,
-    background_tasks: BackgroundTasks
-):
+async def whatsapp_webhook(request: Request):
     """
     Handle inbound WhatsApp messages from Meta Business API.
 
     Flow:
     1. Verify webhook signature
     2. Extract message data
-    3. Find or create lead
-    4. Route through AgenticBrain
-    5. Send AI response
+    3. Queue each message (process_whatsapp_message runs on a queue worker)
+
+    Returns 503 if a message couldn't be queued, so Meta redelivers it
+    (messages that were queued dedupe on their ID).
     """
     # Verify signature (optional but recommended)
     if WHATSAPP_APP_SECRET:
@@ -154,45 +155,72 @@ async def whatsapp_webhook(
                     })
     except Exception as e:
         logger.error(f"Failed to extract WhatsApp messages: {e}")
-        return {"status": "ok"}  # Always return 200 to Meta
+        return {"status": "ok"}  # Malformed - a redelivery would fail the same way
 
-    # Process each message in background
+    # Queue each message - Meta retries deliveries, so dedupe on message ID.
+    # A burst from one number is merged into one job, answered with one reply.
+    window = event_queue.coalesce_windows.get(EventType.MESSAGE_RECEIVED)
+    failed = []
     for msg in messages:
         if msg.get("text"):
-            background_tasks.add_task(
-                process_whatsapp_message,
-                phone=msg["from_number"],
-                message=msg["text"],
-                message_id=msg["message_id"],
-                contacts=msg.get("contacts", [])
-            )
+            try:
+                await event_queue.enqueue(
+                    "whatsapp_message",
+                    {
+                        "phone": msg["from_number"],
+                        "message": msg["text"],
+                        "message_id": msg["message_id"],
+                        "contacts": msg.get("contacts", []),
+                    },
+                    ordering_key=f"whatsapp:{msg['from_number']}",
+                    idempotency_key=f"whatsapp:{msg['message_id']}",
+                    coalesce_key=f"whatsapp:{msg['from_number']}" if window else None,
+                    window=window,
+                    merge=merge_whatsapp_payloads if window else None,
+                )
+            except Exception as e:
+                logger.error(f"Failed to queue WhatsApp message {msg['message_id']}: {e}")
+                failed.append(msg["message_id"])
 
+    if failed:
+        raise HTTPException(status_code=503, detail=f"Failed to queue {len(failed)} message(s)")
     return {"status": "ok"}
 
 
+def merge_whatsapp_payloads(existing: Dict[str, Any], incoming: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold a newer WhatsApp message from the same number into a queued job."""
+    return {
+        "phone": existing["phone"],
+        "message": "\n".join(m for m in (existing.get("message"), incoming.get("message")) if m),
+        "message_id": incoming["message_id"],
+        "message_ids": (existing.get("message_ids") or [existing["message_id"]]) + [incoming["message_id"]],
+        "contacts": existing.get("contacts") or incoming.get("contacts", []),
+    }
+
+
 async def process_whatsapp_message(
     phone: str,
     message: str,
     message_id: str,
-    contacts: List[Dict] = None
+    contacts: List[Dict] = None,
+    message_ids: List[str] = None
 ):
     """
-    Process a WhatsApp message through the AgenticBrain.
+    Process a WhatsApp message (or a merged burst of them) through the AgenticBrain.
 
     1. Find existing lead by phone or create new
-    2. Create message_received event
-    3. Generate AI response
-    4. Send response via WhatsApp
+    2. Generate one AI response for the whole burst
+    3. Queue the reply, any owner escalation and a message_received event
+
+    The side effects are separate jobs keyed by message_id, so a retry of
+    this job doesn't send the reply or notify the owner twice.
     """
-    logger.info(f"Processing WhatsApp from {phone}: {message[:50]}...")
+    batched = len(message_ids) if message_ids else 1
+    logger.info(f"Processing WhatsApp from {phone} ({batched} message(s)): {message[:50]}...")
 
     try:
         # Import here to avoid circular imports
         from db.leads import get_lead_by_phone, create_lead
-        from app.main import app
-
-        # Get brain from app state
-        brain = getattr(app.state, 'agentic_brain', None)
 
         # Find or create lead
         lead = await get_lead_by_phone(phone)
@@ -213,9 +241,8 @@ async def process_whatsapp_message(
             logger.info(f"Created new lead from WhatsApp: {lead.id}")
 
             # Trigger lead_created event through brain
-            if brain:
-                event = lead_created_event(lead.id, "whatsapp", {"phone": phone})
-                await brain.handle_event(event)
+            event = lead_created_event(lead.id, "whatsapp", {"phone": phone})
+            await event_queue.enqueue_event(event)
 
         # Generate AI response
         response = await comms_agent.generate_response(
@@ -226,33 +253,39 @@ async def process_whatsapp_message(
 
         if response.get("reply"):
             # Send response
-            await comms_agent.send_whatsapp(phone, response["reply"])
-            logger.info(f"Sent WhatsApp response to {phone}")
+            await event_queue.enqueue(
+                "whatsapp_reply",
+                {"phone": phone, "reply": response["reply"]},
+                ordering_key=f"whatsapp-reply:{phone}",
+                idempotency_key=f"reply:{message_id}",
+            )
 
             # Check for escalation
             if response.get("escalate"):
-                from services.owner_notify import OwnerNotifier
-                notifier = OwnerNotifier()
-                await notifier.send_whatsapp(
-                    f"⚠️ *Escalation from WhatsApp*\n\n"
-                    f"Lead: {lead.name}\n"
-                    f"Phone: {phone}\n"
-                    f"Message: {message}\n"
-                    f"Reason: {response.get('escalate_reason', 'AI flagged for review')}"
+                await event_queue.enqueue(
+                    "owner_escalation",
+                    {
+                        "text": f"⚠️ *Escalation from WhatsApp*\n\n"
+                                f"Lead: {lead.name}\n"
+                                f"Phone: {phone}\n"
+                                f"Message: {message}\n"
+                                f"Reason: {response.get('escalate_reason', 'AI flagged for review')}"
+                    },
+                    idempotency_key=f"escalation:{message_id}",
                 )
 
         # Create message_received event for tracking
-        if brain:
-            event = message_received_event(
-                lead_id=lead.id,
-                channel="whatsapp",
-                content=message,
-                from_address=phone
-            )
-            await brain.handle_event(event)
+        event = message_received_event(
+            lead_id=lead.id,
+            channel="whatsapp",
+            content=message,
+            from_address=phone
+        )
+        await event_queue.enqueue_event(event, idempotency_key=f"msg:{message_id}")
 
     except Exception as e:
         logger.error(f"WhatsApp processing error: {e}")
+        raise  # The event queue retries, then dead-letters
 
 
 # =============================================================================
@@ -262,8 +295,7 @@ async def process_whatsapp_message(
 @router.post("/email")
 async def email_webhook(
     payload: EmailWebhookPayload,
-    request: Request,
-    background_tasks: BackgroundTasks
+    request: Request
 ):
     """
     Handle inbound emails from email forwarding/polling service.
@@ -275,9 +307,7 @@ async def email_webhook(
 
     Flow:
     1. Verify webhook secret
-    2. Find or create lead by email
-    3. Route through AgenticBrain
-    4. Send AI response
+    2. Queue the email (process_email_message runs on a queue worker)
     """
     # Verify webhook secret
     secret = request.headers.get("X-Webhook-Secret", "")
@@ -285,17 +315,25 @@ async def email_webhook(
         logger.warning("Email webhook secret mismatch")
         raise HTTPException(status_code=403, detail="Invalid secret")
 
-    # Process in background
-    background_tasks.add_task(
-        process_email_message,
-        from_email=payload.from_email,
-        from_name=payload.from_name,
-        subject=payload.subject,
-        body=payload.body_text,
-        message_id=payload.message_id
+    # Queue for processing
+    queued = await event_queue.enqueue(
+        "email_message",
+        {
+            "from_email": payload.from_email,
+            "from_name": payload.from_name,
+            "subject": payload.subject,
+            "body": payload.body_text,
+            "message_id": payload.message_id,
+        },
+        ordering_key=f"email:{payload.from_email.lower()}",
+        idempotency_key=f"email:{payload.message_id}",
     )
 
-    return {"status": "queued", "message_id": payload.message_id}
+    return {
+        "status": "duplicate" if queued["duplicate"] else "queued",
+        "message_id": payload.message_id,
+        "job_id": queued["job_id"],
+    }
 
 
 async def process_email_message(
@@ -307,14 +345,14 @@ async def process_email_message(
 ):
     """
     Process an inbound email through the AgenticBrain.
+
+    The reply and the message_received event are queued as jobs keyed by
+    message_id, so a retry of this job doesn't send the reply twice.
     """
     logger.info(f"Processing email from {from_email}: {subject}")
 
     try:
         from db.leads import get_lead_by_email, create_lead
-        from app.main import app
-
-        brain = getattr(app.state, 'agentic_brain', None)
 
         # Find or create lead
         lead = await get_lead_by_email(from_email)
@@ -328,9 +366,8 @@ async def process_email_message(
             })
             logger.info(f"Created new lead from email: {lead.id}")
 
-            if brain:
-                event = lead_created_event(lead.id, "email", {"email": from_email})
-                await brain.handle_event(event)
+            event = lead_created_event(lead.id, "email", {"email": from_email})
+            await event_queue.enqueue_event(event)
 
         # Generate AI response
         response = await comms_agent.generate_response(
@@ -343,25 +380,25 @@ async def process_email_message(
             # Generate subject for reply
             reply_subject = f"Re: {subject}" if not subject.startswith("Re:") else subject
 
-            await comms_agent.send_email(
-                to_email=from_email,
-                subject=reply_subject,
-                body=response["reply"]
+            await event_queue.enqueue(
+                "email_reply",
+                {"to_email": from_email, "subject": reply_subject, "body": response["reply"]},
+                ordering_key=f"email-reply:{from_email.lower()}",
+                idempotency_key=f"reply:{message_id}",
             )
-            logger.info(f"Sent email response to {from_email}")
 
         # Track event
-        if brain:
-            event = message_received_event(
-                lead_id=lead.id,
-                channel="email",
-                content=body,
-                from_address=from_email
-            )
-            await brain.handle_event(event)
+        event = message_received_event(
+            lead_id=lead.id,
+            channel="email",
+            content=body,
+            from_address=from_email
+        )
+        await event_queue.enqueue_event(event, idempotency_key=f"msg:{message_id}")
 
     except Exception as e:
         logger.error(f"Email processing error: {e}")
+        raise  # The event queue retries, then dead-letters
 
 
 # =============================================================================
@@ -371,8 +408,7 @@ async def process_email_message(
 @router.post("/message")
 async def manual_message(
     payload: ManualMessageRequest,
-    request: Request,
-    background_tasks: BackgroundTasks
+    request: Request
 ):
     """
     Manually input a message for AI processing.
@@ -395,9 +431,6 @@ async def manual_message(
     """
     try:
         from db.leads import get_lead_by_phone, get_lead_by_email, get_lead, create_lead
-        from app.main import app
-
-        brain = getattr(app.state, 'agentic_brain', None)
 
         # Find existing lead
         lead = None
@@ -448,17 +481,15 @@ async def manual_message(
                 )
                 result["sent"] = send_result.get("success", False)
 
-        # Track event in background
-        if brain:
-            background_tasks.add_task(
-                brain.handle_event,
-                message_received_event(
-                    lead_id=lead.id,
-                    channel=payload.channel,
-                    content=payload.message,
-                    from_address=payload.phone or payload.email or "manual"
-                )
+        # Track event via the queue
+        await event_queue.enqueue_event(
+            message_received_event(
+                lead_id=lead.id,
+                channel=payload.channel,
+                content=payload.message,
+                from_address=payload.phone or payload.email or "manual"
             )
+        )
 
         return result
 
@@ -472,10 +503,7 @@ async def manual_message(
 # =============================================================================
 
 @router.post("/lead")
-async def collect_lead(
-    request: Request,
-    background_tasks: BackgroundTasks
-):
+async def collect_lead(request: Request):
     """
     Lead collection endpoint for website forms.
 
@@ -510,9 +538,6 @@ async def collect_lead(
             raise HTTPException(status_code=400, detail="Email is required")
 
         from db.leads import create_lead
-        from app.main import app
-
-        brain = getattr(app.state, 'agentic_brain', None)
 
         # Create lead
         lead = await create_lead({
@@ -529,16 +554,14 @@ async def collect_lead(
 
         logger.info(f"Collected new lead: {lead.id} - {lead.name}")
 
-        # Process through AgenticBrain in background
-        if brain:
-            background_tasks.add_task(
-                brain.handle_event,
-                lead_created_event(
-                    lead_id=lead.id,
-                    source=data.get("source", "website"),
-                    data=data
-                )
+        # Process through AgenticBrain via the queue
+        await event_queue.enqueue_event(
+            lead_created_event(
+                lead_id=lead.id,
+                source=data.get("source", "website"),
+                data=data
             )
+        )
 
         return {
             "success": True,
@@ -574,8 +597,7 @@ class ContactFormPayload(BaseModel):
 @router.post("/contact-form")
 async def contact_form_webhook(
     payload: ContactFormPayload,
-    request: Request,
-    background_tasks: BackgroundTasks
+    request: Request
 ):
     """
     Webhook for contact form submissions from jasper-api.
@@ -597,9 +619,6 @@ async def contact_form_webhook(
 
     try:
         from db.leads import create_lead, get_lead_by_email
-        from app.main import app
-
-        brain = getattr(app.state, 'agentic_brain', None)
 
         # Check for existing lead
         existing_lead = await get_lead_by_email(payload.email.lower())
@@ -649,52 +668,41 @@ async def contact_form_webhook(
         logger.info(f"Contact form: Created lead {lead.id} for {payload.email}")
 
         # Trigger AgenticBrain for AI qualification and outreach
-        if brain:
-            background_tasks.add_task(
-                brain.handle_event,
-                lead_created_event(
-                    lead_id=lead.id,
-                    source="website_contact_form",
-                    data={
-                        "name": payload.name,
-                        "email": payload.email,
-                        "company": payload.company,
-                        "sector": payload.sector,
-                        "funding_stage": payload.funding_stage,
-                        "message": payload.message,
-                        "reference": payload.reference,
-                    }
-                )
+        await event_queue.enqueue_event(
+            lead_created_event(
+                lead_id=lead.id,
+                source="website_contact_form",
+                data={
+                    "name": payload.name,
+                    "email": payload.email,
+                    "company": payload.company,
+                    "sector": payload.sector,
+                    "funding_stage": payload.funding_stage,
+                    "message": payload.message,
+                    "reference": payload.reference,
+                }
             )
-            logger.info(f"Contact form: Queued AgenticBrain processing for {lead.id}")
+        )
+        logger.info(f"Contact form: Queued AgenticBrain processing for {lead.id}")
 
         # Queue initial outreach email via CommsAgent
-        async def send_initial_outreach():
-            try:
-                result = await comms_agent.initial_outreach(
-                    lead={
-                        "id": lead.id,
-                        "name": payload.name,
-                        "email": payload.email,
-                        "company": payload.company,
-                        "sector": payload.sector,
-                        "funding_stage": payload.funding_stage,
-                        "message": payload.message,
-                        "source": "website_contact_form",
-                    },
-                    channel="email"
-                )
-                if result.get("body"):
-                    await comms_agent.send_email(
-                        to_email=payload.email,
-                        subject=result.get("subject", "Thank you for contacting JASPER"),
-                        body=result["body"]
-                    )
-                    logger.info(f"Contact form: Sent AI outreach to {payload.email}")
-            except Exception as e:
-                logger.error(f"Contact form outreach error: {e}")
-
-        background_tasks.add_task(send_initial_outreach)
+        await event_queue.enqueue(
+            "contact_form_outreach",
+            {
+                "lead": {
+                    "id": lead.id,
+                    "name": payload.name,
+                    "email": payload.email,
+                    "company": payload.company,
+                    "sector": payload.sector,
+                    "funding_stage": payload.funding_stage,
+                    "message": payload.message,
+                    "source": "website_contact_form",
+                },
+            },
+            ordering_key=f"lead:{lead.id}",
+            idempotency_key=f"contact_form_outreach:{lead.id}",
+        )
 
         return {
             "success": True,
@@ -710,6 +718,52 @@ async def contact_form_webhook(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def send_contact_form_outreach(lead: Dict[str, Any]):
+    """Send the AI-written first email to a contact form lead."""
+    try:
+        result = await comms_agent.initial_outreach(lead=lead, channel="email")
+        if result.get("body"):
+            await comms_agent.send_email(
+                to_email=lead["email"],
+                subject=result.get("subject", "Thank you for contacting JASPER"),
+                body=result["body"]
+            )
+            logger.info(f"Contact form: Sent AI outreach to {lead['email']}")
+    except Exception as e:
+        logger.error(f"Contact form outreach error: {e}")
+        raise  # The event queue retries, then dead-letters
+
+
+# =============================================================================
+# QUEUE HANDLERS
+# =============================================================================
+
+async def send_whatsapp_reply(phone: str, reply: str):
+    """Send an AI reply queued by process_whatsapp_message."""
+    await comms_agent.send_whatsapp(phone, reply)
+    logger.info(f"Sent WhatsApp response to {phone}")
+
+
+async def send_email_reply(to_email: str, subject: str, body: str):
+    """Send an AI reply queued by process_email_message."""
+    await comms_agent.send_email(to_email=to_email, subject=subject, body=body)
+    logger.info(f"Sent email response to {to_email}")
+
+
+async def send_owner_escalation(text: str):
+    """Notify the owner of a conversation the AI flagged for review."""
+    from services.owner_notify import OwnerNotifier
+    await OwnerNotifier().send_whatsapp(text)
+
+
+event_queue.register("whatsapp_message", lambda payload: process_whatsapp_message(**payload))
+event_queue.register("email_message", lambda payload: process_email_message(**payload))
+event_queue.register("contact_form_outreach", lambda payload: send_contact_form_outreach(**payload))
+event_queue.register("whatsapp_reply", lambda payload: send_whatsapp_reply(**payload))
+event_queue.register("email_reply", lambda payload: send_email_reply(**payload))
+event_queue.register("owner_escalation", lambda payload: send_owner_escalation(**payload))
+
+
 # =============================================================================
 # CONVERSATION HISTORY
 # =============================================================================
@@ -11,11 +11,14 @@ Via OpenRouter API.
 """
 
 import os
+import time
 import httpx
 import logging
 from typing import Optional, Dict, Any, List
 from enum import Enum
 
+from services.llm_accounting import llm_accounting, scoped_feature
+
 logger = logging.getLogger(__name__)
 
 
@@ -102,6 +105,7 @@ class AIRouter:
         max_tokens: int = 1000,
         temperature: float = 0.7,
         enable_search: bool = False,
+        feature: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Route a task to the appropriate DeepSeek model
@@ -113,9 +117,12 @@ class AIRouter:
             max_tokens: Maximum tokens in response
             temperature: Response creativity (0.0-1.0)
             enable_search: Enable web search for R1 tasks
+            feature: Accounting tag (defaults to the accounting scope, then the task)
 
         Returns:
-            Dict with 'content' (response text) and 'model' (model used)
+            Dict with 'content' (response text) and 'model' (model used).
+            Over the feature's daily budget, R1 is downgraded to V3 and other
+            calls are refused with an error.
         """
         if not self.api_key:
             logger.error("OPENROUTER_API_KEY not configured")
@@ -126,26 +133,34 @@ class AIRouter:
             }
 
         model = MODEL_ROUTING.get(task, DeepSeekModel.V3)
+        model_id = model.value if isinstance(model, DeepSeekModel) else model
 
         # For research tasks, prefer R1 with search enabled
         if task in [AITask.RESEARCH, AITask.WEB_SEARCH, AITask.DFI_DISCOVERY]:
             enable_search = True
 
+        feature = feature or scoped_feature(task.value)
+        budget = llm_accounting.check_budget(feature, model_id)
+        if not budget.allowed:
+            return {"content": None, "model": model_id, "error": budget.error(), "throttled": True}
+        model_id = budget.model
+
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
 
+        started = time.perf_counter()
         try:
             request_body = {
-                "model": model.value if isinstance(model, DeepSeekModel) else model,
+                "model": model_id,
                 "messages": messages,
                 "max_tokens": max_tokens,
                 "temperature": temperature,
             }
 
             # Add search capability for R1
-            if enable_search and model == DeepSeekModel.R1:
+            if enable_search and model_id == DeepSeekModel.R1.value:
                 request_body["plugins"] = ["web-search"]
 
             async with httpx.AsyncClient() as client:
@@ -162,6 +177,10 @@ class AIRouter:
 
                 if response.status_code == 200:
                     data = response.json()
+                    llm_accounting.record(
+                        model_id, data.get("usage"), time.perf_counter() - started,
+                        feature=feature, budget_action=budget.action,
+                    )
                     content = data["choices"][0]["message"]["content"]
 
                     # Extract reasoning if present (R1 returns thinking + answer)
@@ -172,24 +191,32 @@ class AIRouter:
 
                     return {
                         "content": content,
-                        "model": model.value if isinstance(model, DeepSeekModel) else model,
+                        "model": model_id,
                         "reasoning": reasoning,
                         "usage": data.get("usage"),
                     }
                 else:
                     error_text = response.text
                     logger.error(f"OpenRouter API error: {response.status_code} - {error_text}")
+                    llm_accounting.record(
+                        model_id, None, time.perf_counter() - started,
+                        feature=feature, success=False, budget_action=budget.action,
+                    )
                     return {
                         "content": None,
-                        "model": model.value if isinstance(model, DeepSeekModel) else model,
+                        "model": model_id,
                         "error": f"API error: {response.status_code}",
                     }
 
         except Exception as e:
             logger.error(f"AIRouter error: {e}")
+            llm_accounting.record(
+                model_id, None, time.perf_counter() - started,
+                feature=feature, success=False, budget_action=budget.action,
+            )
             return {
                 "content": None,
-                "model": model.value if isinstance(model, DeepSeekModel) else model,
+                "model": model_id,
                 "error": str(e),
             }
 
@@ -1,14 +1,33 @@
 """
 JASPER API Cost Monitor
 Tracks all AI API calls with token counts and costs
+
+Storage is a segmented, append-only NDJSON log with daily rollover:
+
+    data/api_usage/calls-YYYY-MM-DD.ndjson   one line per call, appended
+    data/api_usage/totals-YYYY-MM-DD.json    aggregates, written once a day closes
+
+Logging a call is a single locked append, so its cost doesn't grow with the
+log and concurrent writers (threads or worker processes) can't lose records.
+Today's totals are maintained incrementally by reading only the bytes added
+to the current segment since the last read.
 """
 import json
 import os
+import threading
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from loguru import logger
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+from services.llm_accounting import llm_accounting, scoped_feature
+
 # Cost per million tokens (DeepSeek V3.2 - Dec 2025)
 DEEPSEEK_PRICING = {
     "deepseek-chat": {
@@ -23,7 +42,189 @@ DEEPSEEK_PRICING = {
     }
 }
 
-LOG_FILE = Path("/opt/jasper-crm/data/api_usage_log.json")
+LOG_DIR = Path(os.getenv("API_USAGE_LOG_DIR", "/opt/jasper-crm/data/api_usage"))
+LEGACY_LOG_FILE = Path("/opt/jasper-crm/data/api_usage_log.json")
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"calls": 0, "tokens": 0, "cost": 0}
+
+
+def _add_to_totals(totals: Dict[str, Any], record: Dict[str, Any]):
+    totals["calls"] += 1
+    totals["tokens"] += record["tokens"]["total"]
+    totals["cost"] = round(totals["cost"] + record["cost"]["total"], 6)
+
+
+class UsageLog:
+    """
+    Append-only daily segments of call records with incrementally maintained totals.
+
+    Totals for the current day are kept in memory along with the byte offset
+    they cover; each read consumes only the complete lines written after that
+    offset (by this process or any other). Closed days get a totals file so
+    their summary never rescans the segment.
+    """
+
+    def __init__(self, directory: Path = LOG_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._day: Optional[str] = None
+        self._offset = 0
+        self._totals = _empty_totals()
+
+    def segment_path(self, day: str) -> Path:
+        return self.directory / f"calls-{day}.ndjson"
+
+    def totals_path(self, day: str) -> Path:
+        return self.directory / f"totals-{day}.json"
+
+    # -------------------------------------------------------------------------
+    # Writes
+    # -------------------------------------------------------------------------
+
+    def append(self, record: Dict[str, Any]):
+        """Append one record to its day's segment."""
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        day = record["timestamp"][:10]
+        with self._lock:
+            # O_APPEND + one write per record; flock orders writers across processes
+            fd = os.open(self.segment_path(day), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                os.write(fd, line)
+            finally:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+    # -------------------------------------------------------------------------
+    # Aggregates
+    # -------------------------------------------------------------------------
+
+    def _catch_up(self, day: str):
+        """Fold lines appended since the last read into the running totals. Caller holds the lock."""
+        if day != self._day:
+            if self._day is not None and self._day < day:
+                self._close_day(self._day)
+            self._day, self._offset, self._totals = day, 0, _empty_totals()
+
+        path = self.segment_path(day)
+        try:
+            if path.stat().st_size <= self._offset:
+                return
+            with open(path, "rb") as f:
+                f.seek(self._offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return
+
+        # Only consume complete lines; a write in progress is picked up next time
+        complete = chunk[:chunk.rfind(b"\n") + 1]
+        for raw in complete.splitlines():
+            try:
+                _add_to_totals(self._totals, json.loads(raw))
+            except (ValueError, KeyError) as e:
+                logger.warning(f"[API Monitor] Skipping bad usage record: {e}")
+        self._offset += len(complete)
+
+    def _close_day(self, day: str):
+        """Persist a finished day's totals so later reads skip its segment."""
+        if self.totals_path(day).exists():
+            return
+        totals = self._totals if day == self._day else self._scan(day)
+        self._write_totals(day, totals)
+
+    def _write_totals(self, day: str, totals: Dict[str, Any]):
+        path = self.totals_path(day)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps(totals))
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.error(f"[API Monitor] Failed to write totals for {day}: {e}")
+
+    def _scan(self, day: str) -> Dict[str, Any]:
+        totals = _empty_totals()
+        for record in self.read_day(day):
+            _add_to_totals(totals, record)
+        return totals
+
+    def day_totals(self, day: Optional[str] = None) -> Dict[str, Any]:
+        """Totals for a day (default today)."""
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        day = day or today
+        with self._lock:
+            if day == today:
+                self._catch_up(day)
+                return dict(self._totals)
+            path = self.totals_path(day)
+            if path.exists():
+                return json.loads(path.read_text())
+            if day < today and self.segment_path(day).exists():
+                totals = self._scan(day)
+                self._write_totals(day, totals)
+                return totals
+            return _empty_totals()
+
+    def read_day(self, day: str) -> List[Dict[str, Any]]:
+        """All complete records for a day."""
+        records = []
+        try:
+            with open(self.segment_path(day), "rb") as f:
+                for raw in f:
+                    if raw.endswith(b"\n"):
+                        try:
+                            records.append(json.loads(raw))
+                        except ValueError:
+                            continue
+        except FileNotFoundError:
+            pass
+        return records
+
+    # -------------------------------------------------------------------------
+    # Migration
+    # -------------------------------------------------------------------------
+
+    def migrate_legacy(self, legacy_file: Path):
+        """
+        Move records from the old single-JSON log into daily segments (once).
+
+        Every worker calls this at import; an exclusive flock makes the first
+        one do the move while the rest wait and then find no legacy file.
+        """
+        if not legacy_file.exists():
+            return
+        fd = os.open(self.directory / "migrate.lock", os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            self._migrate_legacy(legacy_file)
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _migrate_legacy(self, legacy_file: Path):
+        """Caller holds the migration lock."""
+        try:
+            data = json.loads(legacy_file.read_text())
+        except FileNotFoundError:
+            return  # Another worker migrated it first
+        except (OSError, ValueError) as e:
+            logger.error(f"[API Monitor] Could not read legacy log {legacy_file}: {e}")
+            return
+        for record in data.get("calls", []):
+            if "timestamp" in record:
+                self.append(record)
+        try:
+            legacy_file.rename(legacy_file.with_suffix(".json.migrated"))
+        except FileNotFoundError:
+            return
+        logger.info(f"[API Monitor] Migrated {len(data.get('calls', []))} calls from {legacy_file}")
+
 
 class APIMonitor:
     """Singleton monitor for tracking API costs"""
@@ -40,9 +241,12 @@ class APIMonitor:
         if self._initialized:
             return
         self._initialized = True
-        self.session_calls = []
+        # Recent calls for the session view; totals are kept separately so memory stays bounded
+        self.session_calls = deque(maxlen=500)
+        self.session_totals = _empty_totals()
         self.session_start = datetime.utcnow()
-        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        self.usage_log = UsageLog(LOG_DIR)
+        self.usage_log.migrate_legacy(LEGACY_LOG_FILE)
     
     def log_deepseek_call(
         self,
@@ -52,9 +256,12 @@ class APIMonitor:
         output_tokens: int,
         cached_tokens: int = 0,
         caller: str = "unknown",
-        prompt_preview: str = ""
+        prompt_preview: str = "",
+        latency_s: float = 0.0,
+        feature: Optional[str] = None,
+        article: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Log a DeepSeek API call with cost calculation"""
+        """Log a DeepSeek API call with cost calculation (also recorded in llm_accounting)"""
         
         pricing = DEEPSEEK_PRICING.get(model, DEEPSEEK_PRICING["deepseek-chat"])
         
@@ -87,6 +294,7 @@ class APIMonitor:
         }
         
         self.session_calls.append(call_record)
+        _add_to_totals(self.session_totals, call_record)
         
         # Log to console
         logger.info(
@@ -99,61 +307,45 @@ class APIMonitor:
         
         # Append to file
         self._append_to_log(call_record)
+
+        llm_accounting.record(
+            model,
+            {
+                "prompt_tokens": input_tokens,
+                "completion_tokens": output_tokens,
+                "prompt_cache_hit_tokens": cached_tokens,
+            },
+            latency_s,
+            feature=feature or scoped_feature(caller.split(".", 1)[0]),
+            article=article,
+        )
         
         return call_record
     
     def _append_to_log(self, record: Dict[str, Any]):
-        """Append a record to the JSON log file"""
+        """Append a record to today's log segment"""
         try:
-            if LOG_FILE.exists():
-                with open(LOG_FILE, "r") as f:
-                    data = json.load(f)
-            else:
-                data = {"calls": [], "daily_totals": {}}
-            
-            data["calls"].append(record)
-            
-            # Update daily totals
-            today = datetime.utcnow().strftime("%Y-%m-%d")
-            if today not in data["daily_totals"]:
-                data["daily_totals"][today] = {"calls": 0, "tokens": 0, "cost": 0}
-            
-            data["daily_totals"][today]["calls"] += 1
-            data["daily_totals"][today]["tokens"] += record["tokens"]["total"]
-            data["daily_totals"][today]["cost"] += record["cost"]["total"]
-            
-            with open(LOG_FILE, "w") as f:
-                json.dump(data, f, indent=2)
-                
-        except Exception as e:
+            self.usage_log.append(record)
+        except OSError as e:
             logger.error(f"[API Monitor] Failed to write log: {e}")
     
     def get_session_summary(self) -> Dict[str, Any]:
         """Get summary of current session"""
-        total_tokens = sum(c["tokens"]["total"] for c in self.session_calls)
-        total_cost = sum(c["cost"]["total"] for c in self.session_calls)
-        
         return {
             "session_start": self.session_start.isoformat(),
-            "total_calls": len(self.session_calls),
-            "total_tokens": total_tokens,
-            "total_cost": round(total_cost, 6),
-            "calls": self.session_calls
+            "total_calls": self.session_totals["calls"],
+            "total_tokens": self.session_totals["tokens"],
+            "total_cost": self.session_totals["cost"],
+            "calls": list(self.session_calls)
         }
     
     def get_today_summary(self) -> Dict[str, Any]:
-        """Get today usage summary from log file"""
+        """Get today usage summary from the incrementally maintained aggregates"""
         try:
-            if not LOG_FILE.exists():
-                return {"calls": 0, "tokens": 0, "cost": 0}
-            
-            with open(LOG_FILE, "r") as f:
-                data = json.load(f)
-            
-            today = datetime.utcnow().strftime("%Y-%m-%d")
-            return data["daily_totals"].get(today, {"calls": 0, "tokens": 0, "cost": 0})
-        except:
-            return {"calls": 0, "tokens": 0, "cost": 0}
+            return self.usage_log.day_totals()
+        except Exception as e:
+            logger.error(f"[API Monitor] Failed to read usage totals: {e}")
+            return _empty_totals()
 
 
 # Global instance
@@ -13,8 +13,11 @@ Features:
 """
 
 import os
+import copy
+import asyncio
 import json
 import logging
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from pathlib import Path
@@ -29,6 +32,10 @@ from services.content_service import content_service
 from services.image_service import image_service, ensure_jpeg_url
 from services.ai_image_service import generate_article_images, get_fallback_image
 from services.image_library_service import image_library
+from services.tracing import span
+from services.json_file_store import json_file
+from services.revision_store import RevisionStore
+from services.semantic_links import semantic_links
 
 logger = logging.getLogger(__name__)
 
@@ -42,10 +49,25 @@ def _optimize_image_url(url: str) -> str:
 # Blog posts JSON file location
 BLOG_DATA_PATH = Path(__file__).parent.parent / "data" / "blog_posts.json"
 
-# Blog revisions JSON file location (version history)
+# Blog revisions (version history): one delta-compressed segment per post
+REVISION_DIR = Path(__file__).parent.parent / "data" / "blog_revisions"
+# Legacy single-file history, migrated into REVISION_DIR on first use
 REVISION_DATA_PATH = Path(__file__).parent.parent / "data" / "blog_revisions.json"
 MAX_REVISIONS_PER_POST = 50  # Keep last 50 revisions per post
 
+# Rapid edits (editor autosave, ratings) are coalesced into one write per burst
+BLOG_WRITE_DEBOUNCE_S = float(os.getenv("BLOG_WRITE_DEBOUNCE_MS", "250")) / 1000
+
+
+class PostVersionConflict(Exception):
+    """Raised by update_post when expected_version no longer matches the stored post."""
+
+    def __init__(self, slug: str, expected: int, actual: int):
+        self.slug = slug
+        self.expected = expected
+        self.actual = actual
+        super().__init__(f"Post {slug} is at version {actual}, not {expected}")
+
 
 class BlogService:
     """
@@ -56,6 +78,9 @@ class BlogService:
 
     def __init__(self):
         self.data_path = BLOG_DATA_PATH
+        # Shared with every other service that goes through json_file() for these paths
+        self._posts_file = json_file(self.data_path, default=list, debounce_s=BLOG_WRITE_DEBOUNCE_S)
+        self.revisions = RevisionStore(REVISION_DIR, REVISION_DATA_PATH, max_revisions=MAX_REVISIONS_PER_POST)
         self._ensure_data_file()
 
         # Social service URL (jasper-social on port 8002)
@@ -65,54 +90,53 @@ class BlogService:
         self.discord_webhook = os.getenv("DISCORD_WEBHOOK_URL")
         self.slack_webhook = os.getenv("SLACK_WEBHOOK_URL")
 
+        # Fire-and-forget work (semantic indexing); referenced here so tasks aren't collected mid-run
+        self._background_tasks = set()
+
     def _ensure_data_file(self):
         """Ensure blog_posts.json exists."""
         if not self.data_path.exists():
-            self.data_path.parent.mkdir(parents=True, exist_ok=True)
-            self._save_posts([])
+            with self._posts_file.edit():
+                pass  # Creates "[]" under the lock unless another process got there first
 
     def _load_posts(self) -> List[Dict[str, Any]]:
-        """Load all posts from JSON file."""
+        """Load all posts from JSON file (including edits not yet flushed)."""
         try:
-            with open(self.data_path, "r") as f:
-                return json.load(f)
+            with span("file.json", "load", path=self.data_path.name):
+                return self._posts_file.read()
         except Exception as e:
             logger.error(f"Failed to load blog posts: {e}")
             return []
 
     def _save_posts(self, posts: List[Dict[str, Any]]):
-        """Save posts to JSON file."""
+        """Replace all posts (atomic, locked write)."""
         try:
-            with open(self.data_path, "w") as f:
-                json.dump(posts, f, indent=2, default=str)
+            with span("file.json", "save", path=self.data_path.name):
+                self._posts_file.write(posts)
         except Exception as e:
             logger.error(f"Failed to save blog posts: {e}")
             raise
 
+    @contextmanager
+    def _editing_post(self, slug: str):
+        """
+        Locked read-modify-write of one post; yields the post (or None).
+
+        Mutate it in place - the file is written on exit if anything changed,
+        and the post's version is bumped so expected_version checks see the
+        change. Keep slow work (HTTP, DB logging) outside the block.
+        """
+        with span("file.json", "edit", path=self.data_path.name), self._posts_file.edit() as posts:
+            post = next((p for p in posts if p.get("slug") == slug), None)
+            before = copy.deepcopy(post)
+            yield post
+            if post is not None and post != before:
+                post["version"] = before.get("version", 0) + 1
+
     # =========================================================================
     # REVISION MANAGEMENT (Version History)
     # =========================================================================
 
-    def _load_revisions(self) -> Dict[str, Any]:
-        """Load all revisions from JSON file."""
-        try:
-            if REVISION_DATA_PATH.exists():
-                with open(REVISION_DATA_PATH, "r") as f:
-                    return json.load(f)
-            return {}
-        except Exception as e:
-            logger.error(f"Failed to load revisions: {e}")
-            return {}
-
-    def _save_revisions(self, revisions: Dict[str, Any]):
-        """Save revisions to JSON file."""
-        try:
-            with open(REVISION_DATA_PATH, "w") as f:
-                json.dump(revisions, f, indent=2, default=str)
-        except Exception as e:
-            logger.error(f"Failed to save revisions: {e}")
-            raise
-
     def _create_snapshot(self, post: Dict[str, Any]) -> Dict[str, Any]:
         """Create a snapshot of versioned fields only."""
         return {
@@ -151,32 +175,14 @@ class BlogService:
         Returns:
             The created revision record
         """
-        revisions = self._load_revisions()
-
-        if slug not in revisions:
-            revisions[slug] = {"current_revision": 0, "revisions": []}
-
-        post_revisions = revisions[slug]
-        next_rev = post_revisions["current_revision"] + 1
-
-        new_revision = {
-            "rev": next_rev,
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "user_id": user_id,
-            "action": action,
-            "snapshot": self._create_snapshot(post),
-            "summary": summary or f"{action.capitalize()} by {user_id}"
-        }
-
-        post_revisions["revisions"].append(new_revision)
-        post_revisions["current_revision"] = next_rev
-
-        # Prune old revisions (keep last MAX_REVISIONS_PER_POST)
-        if len(post_revisions["revisions"]) > MAX_REVISIONS_PER_POST:
-            post_revisions["revisions"] = post_revisions["revisions"][-MAX_REVISIONS_PER_POST:]
-
-        revisions[slug] = post_revisions
-        self._save_revisions(revisions)
+        with span("file.json", "edit", path=f"blog_revisions/{slug}"):
+            new_revision = self.revisions.append(slug, self._create_snapshot(post), {
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+                "user_id": user_id,
+                "action": action,
+                "summary": summary or f"{action.capitalize()} by {user_id}"
+            })
+        next_rev = new_revision["rev"]
 
         logger.info(f"Saved revision {next_rev} for post: {slug} (action: {action})")
         return new_revision
@@ -187,33 +193,25 @@ class BlogService:
 
         Returns metadata only (not full snapshots) for performance.
         """
-        revisions = self._load_revisions()
-        post_revs = revisions.get(slug, {}).get("revisions", [])
+        with span("file.json", "load", path=f"blog_revisions/{slug}"):
+            post_revs = self.revisions.history(slug, limit)
 
-        # Return metadata only (not full snapshots)
-        history = []
-        for rev in reversed(post_revs[-limit:]):
-            history.append({
+        return [
+            {
                 "rev": rev["rev"],
                 "timestamp": rev["timestamp"],
                 "user_id": rev["user_id"],
                 "action": rev["action"],
                 "summary": rev.get("summary", ""),
-                "title": rev["snapshot"].get("title", "Untitled")
-            })
-
-        return history
+                "title": rev.get("title", "Untitled")
+            }
+            for rev in post_revs
+        ]
 
     def get_revision(self, slug: str, rev_number: int) -> Optional[Dict[str, Any]]:
         """Get a specific revision with full snapshot."""
-        revisions = self._load_revisions()
-        post_revs = revisions.get(slug, {}).get("revisions", [])
-
-        for rev in post_revs:
-            if rev["rev"] == rev_number:
-                return rev
-
-        return None
+        with span("file.json", "load", path=f"blog_revisions/{slug}"):
+            return self.revisions.get(slug, rev_number)
 
     def restore_revision(
         self,
@@ -255,36 +253,32 @@ class BlogService:
         updates = {k: v for k, v in snapshot.items() if v is not None}
 
         # Direct update without calling update_post to avoid double revision
-        posts = self._load_posts()
-        for i, p in enumerate(posts):
-            if p.get("slug") == slug:
-                for key, value in updates.items():
-                    p[key] = value
-                p["updatedAt"] = datetime.utcnow().isoformat() + "Z"
-                posts[i] = p
-                self._save_posts(posts)
-
-                # Save restored state as new revision
-                self.save_revision(
-                    slug,
-                    p,
-                    "restored",
-                    user_id,
-                    f"Restored to revision {rev_number}"
-                )
-
-                # Log activity
-                self._log_activity(
-                    entity_id=slug,
-                    action="restored",
-                    details={"from_revision": rev_number},
-                    user_id=user_id
-                )
+        with self._editing_post(slug) as p:
+            if p is None:
+                return None
+            for key, value in updates.items():
+                p[key] = value
+            p["updatedAt"] = datetime.utcnow().isoformat() + "Z"
+
+        # Save restored state as new revision
+        self.save_revision(
+            slug,
+            p,
+            "restored",
+            user_id,
+            f"Restored to revision {rev_number}"
+        )
 
-                logger.info(f"Post {slug} restored to revision {rev_number}")
-                return p
+        # Log activity
+        self._log_activity(
+            entity_id=slug,
+            action="restored",
+            details={"from_revision": rev_number},
+            user_id=user_id
+        )
 
-        return None
+        logger.info(f"Post {slug} restored to revision {rev_number}")
+        return p
 
     def _generate_slug(self, title: str) -> str:
         """Generate URL-friendly slug from title."""
@@ -294,6 +288,17 @@ class BlogService:
         slug = re.sub(r'-+', '-', slug)
         return slug.strip('-')
 
+    @staticmethod
+    def _unique_slug(slug: str, posts: List[Dict[str, Any]]) -> str:
+        """Append -2, -3, ... until the slug is unused."""
+        existing_slugs = {p.get("slug") for p in posts}
+        if slug in existing_slugs:
+            counter = 2
+            while f"{slug}-{counter}" in existing_slugs:
+                counter += 1
+            slug = f"{slug}-{counter}"
+        return slug
+
     def _log_activity(
         self,
         entity_id: str,
@@ -469,15 +474,8 @@ class BlogService:
         content = content or ""
         excerpt = excerpt or ""
 
-        slug = self._generate_slug(title)
-
-        # Ensure unique slug
-        existing_slugs = [p.get("slug") for p in posts]
-        if slug in existing_slugs:
-            counter = 2
-            while f"{slug}-{counter}" in existing_slugs:
-                counter += 1
-            slug = f"{slug}-{counter}"
+        base_slug = self._generate_slug(title)
+        slug = self._unique_slug(base_slug, posts)
 
         now = datetime.utcnow().isoformat() + "Z"
 
@@ -540,11 +538,15 @@ class BlogService:
                 "count": 0,
                 "distribution": {"5": 0, "4": 0, "3": 0, "2": 0, "1": 0}
             },
-            "aiGenerated": source == "ai"
+            "aiGenerated": source == "ai",
+            "version": 1
         }
 
-        posts.append(new_post)
-        self._save_posts(posts)
+        with span("file.json", "edit", path=self.data_path.name), self._posts_file.edit() as posts:
+            # Re-check under the lock: another writer may have taken the slug since we read
+            slug = self._unique_slug(base_slug, posts)
+            new_post["slug"] = slug
+            posts.append(new_post)
 
         # Save initial revision (for version history)
         self.save_revision(
@@ -569,9 +571,17 @@ class BlogService:
         self,
         slug: str,
         updates: Dict[str, Any],
-        user_id: str = "system"
+        user_id: str = "system",
+        expected_version: Optional[int] = None
     ) -> Optional[Dict[str, Any]]:
-        """Update an existing post."""
+        """
+        Update an existing post.
+
+        With `expected_version`, the update is a compare-and-swap: it is
+        written immediately and raises PostVersionConflict if the stored
+        post's "version" moved on since the caller read it. Without it, the
+        write is coalesced with other rapid edits by the debounced flusher.
+        """
         # DEBUG: Log incoming updates
         logger.info(f"[DEBUG] update_post called for slug: {slug}")
         logger.info(f"[DEBUG] Updates keys received: {list(updates.keys())}")
@@ -583,105 +593,119 @@ class BlogService:
         else:
             logger.warning(f"[DEBUG] content_blocks NOT in updates for {slug}")
 
-        posts = self._load_posts()
+        post = self.get_post_by_slug(slug)
+        if post is None:
+            return None
+        if expected_version is not None and post.get("version", 0) != expected_version:
+            raise PostVersionConflict(slug, expected_version, post.get("version", 0))
+        previous = copy.deepcopy(post)
 
-        for i, post in enumerate(posts):
-            if post.get("slug") == slug:
-                # Save revision BEFORE applying changes (for version history)
-                self.save_revision(
-                    slug,
-                    post,
-                    "updated",
-                    user_id,
-                    f"Content updated"
-                )
+        # Track what changed
+        changes = {}
+        for key, value in updates.items():
+            if key in post and post[key] != value:
+                changes[key] = {"old": post[key], "new": value}
 
-                # Track what changed
-                changes = {}
-                for key, value in updates.items():
-                    if key in post and post[key] != value:
-                        changes[key] = {"old": post[key], "new": value}
-
-                # Apply updates
-                for key, value in updates.items():
-                    if key != "slug":  # Don't allow slug changes
-                        post[key] = value
-
-                post["updatedAt"] = datetime.utcnow().isoformat() + "Z"
-
-                # Recalculate readTime from content word count
-                content = post.get("content", "")
-                if content:
-                    word_count = len(content.split())
-                    post["readTime"] = max(1, word_count // 200)
-                    logger.info(f"[update_post] Recalculated readTime: {word_count} words → {post['readTime']} min")
-
-                # Recalculate SEO score
-                seo_result = seo_scorer.calculate_score(post)
-                if "seo" not in post:
-                    post["seo"] = {}
-                post["seo"]["score"] = seo_result.score
-                post["seoScore"] = seo_result.score  # Also update top-level field
-
-                posts[i] = post
-                self._save_posts(posts)
-
-                # Log activity
-                self._log_activity(
-                    entity_id=slug,
-                    action="updated",
-                    details={"changes": changes},
-                    user_id=user_id
-                )
+        now = datetime.utcnow().isoformat() + "Z"
 
-                return post
+        def apply_updates(posts):
+            # Runs under the file lock, now or again at flush time when deferred,
+            # so only the updated fields are applied to the stored post - edits
+            # other workers made to it in the meantime are kept
+            for p in posts:
+                if p.get("slug") == slug:
+                    if expected_version is not None and p.get("version", 0) != expected_version:
+                        raise PostVersionConflict(slug, expected_version, p.get("version", 0))
+                    self._apply_updates(p, updates, now)
+                    return
+
+        with span("file.json", "save", path=self.data_path.name):
+            posts = self._posts_file.update(apply_updates, defer=expected_version is None)
+        post = next((p for p in posts if p.get("slug") == slug), None)
+        if post is None:
+            return None
+        logger.info(f"[update_post] {slug}: readTime {post.get('readTime')} min, SEO score {post.get('seoScore')}")
 
-        return None
+        # Save revision of the state before this change (for version history)
+        self.save_revision(
+            slug,
+            previous,
+            "updated",
+            user_id,
+            f"Content updated"
+        )
 
-    def delete_post(self, slug: str, user_id: str = "system") -> bool:
-        """Soft delete (archive) a post."""
-        posts = self._load_posts()
+        # Log activity
+        self._log_activity(
+            entity_id=slug,
+            action="updated",
+            details={"changes": changes},
+            user_id=user_id
+        )
 
-        for post in posts:
-            if post.get("slug") == slug:
-                post["status"] = "archived"
-                post["archivedAt"] = datetime.utcnow().isoformat() + "Z"
-                self._save_posts(posts)
+        return post
 
-                self._log_activity(
-                    entity_id=slug,
-                    action="archived",
-                    details={"title": post.get("title")},
-                    user_id=user_id
-                )
-                return True
+    @staticmethod
+    def _apply_updates(post: Dict[str, Any], updates: Dict[str, Any], now: str):
+        """Apply `updates` to a stored post and refresh its version, readTime and SEO score."""
+        for key, value in updates.items():
+            if key != "slug":  # Don't allow slug changes
+                post[key] = copy.deepcopy(value)  # Applied again at flush time when deferred
+
+        post["updatedAt"] = now
+        post["version"] = post.get("version", 0) + 1
+
+        # Recalculate readTime from content word count
+        content = post.get("content", "")
+        if content:
+            post["readTime"] = max(1, len(content.split()) // 200)
 
-        return False
+        # Recalculate SEO score
+        seo_result = seo_scorer.calculate_score(post)
+        if "seo" not in post:
+            post["seo"] = {}
+        post["seo"]["score"] = seo_result.score
+        post["seoScore"] = seo_result.score  # Also update top-level field
+
+    def delete_post(self, slug: str, user_id: str = "system") -> bool:
+        """Soft delete (archive) a post."""
+        with self._editing_post(slug) as post:
+            if post is None:
+                return False
+            post["status"] = "archived"
+            post["archivedAt"] = datetime.utcnow().isoformat() + "Z"
+
+        self._log_activity(
+            entity_id=slug,
+            action="archived",
+            details={"title": post.get("title")},
+            user_id=user_id
+        )
+        return True
 
     def purge_post(self, slug: str) -> bool:
         """Permanently delete a post - cannot be recovered."""
-        posts = self._load_posts()
-        original_count = len(posts)
-
-        posts = [p for p in posts if p.get("slug") != slug]
+        with self._posts_file.edit() as posts:
+            original_count = len(posts)
+            posts[:] = [p for p in posts if p.get("slug") != slug]
+            purged = len(posts) < original_count
 
-        if len(posts) < original_count:
-            self._save_posts(posts)
+        if purged:
+            self.revisions.delete(slug)
             logger.info(f"Permanently deleted post: {slug}")
-            return True
-        return False
+        return purged
 
     def purge_archived_posts(self) -> dict:
         """Permanently delete all archived posts."""
-        posts = self._load_posts()
-        original_count = len(posts)
-
-        archived_slugs = [p.get("slug") for p in posts if p.get("status") == "archived"]
-        posts = [p for p in posts if p.get("status") != "archived"]
-        purged_count = original_count - len(posts)
+        with self._posts_file.edit() as posts:
+            original_count = len(posts)
+            archived_slugs = [p.get("slug") for p in posts if p.get("status") == "archived"]
+            posts[:] = [p for p in posts if p.get("status") != "archived"]
+            purged_count = original_count - len(posts)
 
         if purged_count > 0:
-            self._save_posts(posts)
+            for slug in archived_slugs:
+                self.revisions.delete(slug)
             logger.info(f"Purged {purged_count} archived posts: {archived_slugs}")
 
         return {"count": purged_count, "slugs": archived_slugs}
@@ -698,64 +722,67 @@ class BlogService:
         user_id: str = "system"
     ) -> Optional[Dict[str, Any]]:
         """Publish a post immediately."""
-        posts = self._load_posts()
+        with self._editing_post(slug) as post:
+            if post is None:
+                return None
+            now = datetime.utcnow().isoformat() + "Z"
+            post["status"] = "published"
+            post["publishedAt"] = now
+            post["updatedAt"] = now
+            post["scheduledFor"] = None
+            post["sync_status"] = "synced"  # Track that it's live on the website
 
-        for i, post in enumerate(posts):
-            if post.get("slug") == slug:
-                now = datetime.utcnow().isoformat() + "Z"
-                post["status"] = "published"
-                post["publishedAt"] = now
-                post["updatedAt"] = now
-                post["scheduledFor"] = None
-                post["sync_status"] = "synced"  # Track that it's live on the website
+        # Log activity
+        self._log_activity(
+            entity_id=slug,
+            action="published",
+            details={"auto_share": auto_share},
+            user_id=user_id
+        )
 
-                posts[i] = post
-                self._save_posts(posts)
+        # Notify Slack/Discord
+        url = f"https://jasperfinance.org/insights/{slug}"
+        await self._notify_slack_discord("blog_published", post["title"], url)
 
-                # Log activity
-                self._log_activity(
-                    entity_id=slug,
-                    action="published",
-                    details={"auto_share": auto_share},
-                    user_id=user_id
-                )
+        # Embed for related content / link suggestions (skipped if content unchanged)
+        self._index_in_background(post)
 
-                # Notify Slack/Discord
-                url = f"https://jasperfinance.org/insights/{slug}"
-                await self._notify_slack_discord("blog_published", post["title"], url)
+        # Auto-share to social if enabled
+        if auto_share:
+            await self.share_to_twitter(slug, user_id)
+            await self.share_to_linkedin(slug, user_id)
 
-                # Auto-share to social if enabled
-                if auto_share:
-                    await self.share_to_twitter(slug, user_id)
-                    await self.share_to_linkedin(slug, user_id)
+        return post
 
-                return post
+    def _index_in_background(self, post: Dict[str, Any]):
+        """Embed a post without making the caller wait on (or fail with) the embedding service."""
+        async def index(post):
+            try:
+                await semantic_links.index_post(post)
+            except Exception as e:
+                logger.error(f"Semantic indexing failed for {post.get('slug')}: {e}")
 
-        return None
+        task = asyncio.create_task(index(copy.deepcopy(post)))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
 
     def unpublish_post(self, slug: str, user_id: str = "system") -> Optional[Dict[str, Any]]:
         """Revert post to draft status."""
-        posts = self._load_posts()
-
-        for i, post in enumerate(posts):
-            if post.get("slug") == slug:
-                post["status"] = "draft"
-                post["publishedAt"] = None
-                post["updatedAt"] = datetime.utcnow().isoformat() + "Z"
-
-                posts[i] = post
-                self._save_posts(posts)
+        with self._editing_post(slug) as post:
+            if post is None:
+                return None
+            post["status"] = "draft"
+            post["publishedAt"] = None
+            post["updatedAt"] = datetime.utcnow().isoformat() + "Z"
 
-                self._log_activity(
-                    entity_id=slug,
-                    action="unpublished",
-                    details={"title": post.get("title")},
-                    user_id=user_id
-                )
-
-                return post
+        self._log_activity(
+            entity_id=slug,
+            action="unpublished",
+            details={"title": post.get("title")},
+            user_id=user_id
+        )
 
-        return None
+        return post
 
     def schedule_post(
         self,
@@ -766,35 +793,29 @@ class BlogService:
         user_id: str = "system"
     ) -> Optional[Dict[str, Any]]:
         """Schedule a post for future publication."""
-        posts = self._load_posts()
-
-        for i, post in enumerate(posts):
-            if post.get("slug") == slug:
-                post["status"] = "scheduled"
-                post["scheduledFor"] = scheduled_for
-                post["updatedAt"] = datetime.utcnow().isoformat() + "Z"
-                # Store auto-share preferences for scheduler
-                post["autoShareOnPublish"] = auto_share_twitter or auto_share_linkedin
-                post["autoShareTwitter"] = auto_share_twitter
-                post["autoShareLinkedin"] = auto_share_linkedin
+        with self._editing_post(slug) as post:
+            if post is None:
+                return None
+            post["status"] = "scheduled"
+            post["scheduledFor"] = scheduled_for
+            post["updatedAt"] = datetime.utcnow().isoformat() + "Z"
+            # Store auto-share preferences for scheduler
+            post["autoShareOnPublish"] = auto_share_twitter or auto_share_linkedin
+            post["autoShareTwitter"] = auto_share_twitter
+            post["autoShareLinkedin"] = auto_share_linkedin
 
-                posts[i] = post
-                self._save_posts(posts)
-
-                self._log_activity(
-                    entity_id=slug,
-                    action="scheduled",
-                    details={
-                        "scheduled_for": scheduled_for,
-                        "auto_share_twitter": auto_share_twitter,
-                        "auto_share_linkedin": auto_share_linkedin
-                    },
-                    user_id=user_id
-                )
-
-                return post
+        self._log_activity(
+            entity_id=slug,
+            action="scheduled",
+            details={
+                "scheduled_for": scheduled_for,
+                "auto_share_twitter": auto_share_twitter,
+                "auto_share_linkedin": auto_share_linkedin
+            },
+            user_id=user_id
+        )
 
-        return None
+        return post
 
     # =========================================================================
     # SOCIAL SHARING
@@ -818,16 +839,13 @@ class BlogService:
                     tweet_id = data.get("tweet_id")
 
                     # Update post with Twitter status
-                    posts = self._load_posts()
-                    for p in posts:
-                        if p.get("slug") == slug:
+                    with self._editing_post(slug) as p:
+                        if p is not None:
                             if "social" not in p:
                                 p["social"] = {}
                             p["social"]["twitterShared"] = True
                             p["social"]["twitterPostId"] = tweet_id
                             p["social"]["twitterSharedAt"] = datetime.utcnow().isoformat() + "Z"
-                            break
-                    self._save_posts(posts)
 
                     # Log activity
                     self._log_activity(
@@ -871,16 +889,13 @@ class BlogService:
                     post_id = data.get("post_id")
 
                     # Update post with LinkedIn status
-                    posts = self._load_posts()
-                    for p in posts:
-                        if p.get("slug") == slug:
+                    with self._editing_post(slug) as p:
+                        if p is not None:
                             if "social" not in p:
                                 p["social"] = {}
                             p["social"]["linkedinShared"] = True
                             p["social"]["linkedinPostId"] = post_id
                             p["social"]["linkedinSharedAt"] = datetime.utcnow().isoformat() + "Z"
-                            break
-                    self._save_posts(posts)
 
                     # Log activity
                     self._log_activity(
@@ -1230,31 +1245,36 @@ class BlogService:
         if not 1 <= rating <= 5:
             return {"success": False, "error": "Rating must be 1-5"}
 
-        posts = self._load_posts()
-
-        for post in posts:
-            if post.get("slug") == slug:
-                if "rating" not in post:
-                    post["rating"] = {"average": 0, "count": 0, "distribution": {"5": 0, "4": 0, "3": 0, "2": 0, "1": 0}}
+        def add_rating(posts):
+            for post in posts:
+                if post.get("slug") == slug:
+                    if "rating" not in post:
+                        post["rating"] = {"average": 0, "count": 0, "distribution": {"5": 0, "4": 0, "3": 0, "2": 0, "1": 0}}
 
-                # Update distribution
-                post["rating"]["distribution"][str(rating)] += 1
-                post["rating"]["count"] += 1
+                    # Update distribution
+                    post["rating"]["distribution"][str(rating)] += 1
+                    post["rating"]["count"] += 1
 
-                # Recalculate average
-                dist = post["rating"]["distribution"]
-                total_votes = post["rating"]["count"]
-                weighted_sum = sum(int(k) * v for k, v in dist.items())
-                post["rating"]["average"] = round(weighted_sum / total_votes, 1) if total_votes > 0 else 0
+                    # Recalculate average
+                    dist = post["rating"]["distribution"]
+                    total_votes = post["rating"]["count"]
+                    weighted_sum = sum(int(k) * v for k, v in dist.items())
+                    post["rating"]["average"] = round(weighted_sum / total_votes, 1) if total_votes > 0 else 0
+                    return
 
-                self._save_posts(posts)
+        if self.get_post_by_slug(slug) is None:
+            return {"success": False, "error": "Post not found"}
 
-                return {
-                    "success": True,
-                    "rating": post["rating"]
-                }
+        # Bursts of votes are coalesced into one write
+        posts = self._posts_file.update(add_rating, defer=True)
+        post = next((p for p in posts if p.get("slug") == slug), None)
+        if post is None:
+            return {"success": False, "error": "Post not found"}
 
-        return {"success": False, "error": "Post not found"}
+        return {
+            "success": True,
+            "rating": post["rating"]
+        }
 
     def get_rating(self, slug: str) -> Dict[str, Any]:
         """Get rating for a post."""
@@ -0,0 +1,86 @@
+"""
+JASPER CRM - Rolling Bloom Filter
+
+Bounded, persistable "have we seen this id?" set. Two generations of a
+Bloom filter: new ids go into the current one; when it has taken
+`capacity` ids it becomes the previous generation and a fresh one
+starts, so memory stays fixed and ids are forgotten after roughly
+1-2 x capacity newer ones.
+
+Membership has no false negatives within that window and a false
+positive rate of about `error_rate` per generation checked.
+"""
+
+import math
+import base64
+import hashlib
+from typing import Any, Dict, Iterable
+
+
+class RollingBloomFilter:
+    """Two-generation Bloom filter over string ids."""
+
+    def __init__(self, capacity: int = 20000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.current = bytearray((self.num_bits + 7) // 8)
+        self.previous = bytearray((self.num_bits + 7) // 8)
+        self.count = 0           # Ids added to the current generation
+        self.previous_count = 0
+
+    def __len__(self) -> int:
+        """Approximate number of ids remembered."""
+        return self.count + self.previous_count
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    @staticmethod
+    def _has(bits: bytearray, positions: Iterable[int]) -> bool:
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def __contains__(self, item: str) -> bool:
+        positions = self._positions(item)
+        return self._has(self.current, positions) or self._has(self.previous, positions)
+
+    def add(self, item: str) -> bool:
+        """Add `item`; returns False if it was (probably) already present."""
+        positions = self._positions(item)
+        if self._has(self.current, positions) or self._has(self.previous, positions):
+            return False
+        if self.count >= self.capacity:
+            self.previous, self.previous_count = self.current, self.count
+            self.current, self.count = bytearray(len(self.previous)), 0
+        for p in positions:
+            self.current[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "count": self.count,
+            "previous_count": self.previous_count,
+            "current": base64.b64encode(bytes(self.current)).decode("ascii"),
+            "previous": base64.b64encode(bytes(self.previous)).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], capacity: int, error_rate: float) -> "RollingBloomFilter":
+        """Restore a saved filter; a filter saved with other sizing starts empty."""
+        bloom = cls(capacity, error_rate)
+        if not data or data.get("capacity") != capacity or data.get("error_rate") != error_rate:
+            return bloom
+        current = base64.b64decode(data["current"])
+        previous = base64.b64decode(data["previous"])
+        if len(current) != len(bloom.current) or len(previous) != len(bloom.previous):
+            return bloom
+        bloom.current, bloom.previous = bytearray(current), bytearray(previous)
+        bloom.count, bloom.previous_count = data["count"], data["previous_count"]
+        return bloom
@@ -16,6 +16,8 @@ from datetime import timedelta
 from typing import Optional, Any, Callable, TypeVar
 from functools import wraps
 
+from services.tracing import span
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
@@ -104,7 +106,8 @@ class CacheService:
 
         try:
             full_key = self._make_key(key)
-            value = self._redis.get(full_key)
+            with span("redis", "GET"):
+                value = self._redis.get(full_key)
             if value:
                 return json.loads(value)
             return None
@@ -136,7 +139,8 @@ class CacheService:
             full_key = self._make_key(key)
             ttl = ttl or self.config.default_ttl
             serialized = json.dumps(value)
-            self._redis.setex(full_key, ttl, serialized)
+            with span("redis", "SETEX"):
+                self._redis.setex(full_key, ttl, serialized)
             return True
         except Exception as e:
             logger.warning(f"Cache set error for {key}: {e}")
@@ -149,7 +153,8 @@ class CacheService:
 
         try:
             full_key = self._make_key(key)
-            self._redis.delete(full_key)
+            with span("redis", "DEL"):
+                self._redis.delete(full_key)
             return True
         except Exception as e:
             logger.warning(f"Cache delete error for {key}: {e}")
@@ -170,7 +175,8 @@ class CacheService:
 
         try:
             full_pattern = self._make_key(pattern)
-            keys = self._redis.keys(full_pattern)
+            with span("redis", "KEYS", pattern=full_pattern):
+                keys = self._redis.keys(full_pattern)
             if keys:
                 return self._redis.delete(*keys)
             return 0
@@ -231,7 +237,8 @@ class CacheService:
 
         try:
             full_key = self._make_key(key)
-            return self._redis.incr(full_key, amount)
+            with span("redis", "INCRBY"):
+                return self._redis.incr(full_key, amount)
         except Exception as e:
             logger.warning(f"Cache increment error for {key}: {e}")
             return 0
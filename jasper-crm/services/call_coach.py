@@ -9,6 +9,8 @@ import logging
 from typing import Dict, Any, Optional
 from dataclasses import dataclass
 
+from services.llm_accounting import post_chat_completion
+
 logger = logging.getLogger(__name__)
 
 
@@ -75,8 +77,8 @@ Return ONLY valid JSON, no markdown."""
 
         try:
             async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
+                response = await post_chat_completion(
+                    client, f"{self.base_url}/chat/completions", "call_brief",
                     headers={
                         "Authorization": f"Bearer {self.api_key}",
                         "Content-Type": "application/json",
@@ -145,8 +147,8 @@ Return ONLY valid JSON."""
 
         try:
             async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
+                response = await post_chat_completion(
+                    client, f"{self.base_url}/chat/completions", "call_summary",
                     headers={
                         "Authorization": f"Bearer {self.api_key}",
                         "Content-Type": "application/json",
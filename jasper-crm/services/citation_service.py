@@ -21,6 +21,7 @@ from datetime import datetime
 from pathlib import Path
 
 from services.ai_router import AIRouter, AITask
+from services.json_file_store import json_file
 
 logger = logging.getLogger(__name__)
 
@@ -80,8 +81,7 @@ class CitationService:
     def _load_blog_post(self, slug: str) -> Optional[Dict]:
         """Load blog post by slug"""
         try:
-            with open(self.blog_posts_path, 'r') as f:
-                posts = json.load(f)
+            posts = json_file(self.blog_posts_path).read()
 
             for post in posts:
                 if post.get("slug") == slug:
@@ -95,17 +95,13 @@ class CitationService:
     def _save_blog_post(self, updated_post: Dict):
         """Save updated blog post"""
         try:
-            with open(self.blog_posts_path, 'r') as f:
-                posts = json.load(f)
-
-            # Find and update the post
-            for i, post in enumerate(posts):
-                if post.get("slug") == updated_post.get("slug"):
-                    posts[i] = updated_post
-                    break
-
-            with open(self.blog_posts_path, 'w') as f:
-                json.dump(posts, f, indent=2)
+            # Locked read-modify-write shared with BlogService
+            with json_file(self.blog_posts_path).edit() as posts:
+                # Find and update the post
+                for i, post in enumerate(posts):
+                    if post.get("slug") == updated_post.get("slug"):
+                        posts[i] = updated_post
+                        break
 
             logger.info(f"Saved updated post: {updated_post.get('slug')}")
         except Exception as e:
@@ -123,6 +119,11 @@ class CitationService:
         if not post:
             return {"error": f"Article {slug} not found"}
 
+        return await self.analyze_post(post)
+
+    async def analyze_post(self, post: Dict[str, Any]) -> Dict[str, Any]:
+        """analyze_article() for an already loaded post."""
+        slug = post.get("slug")
         content = post.get("content", "")
         title = post.get("title", "")
 
@@ -285,21 +286,55 @@ Find the most authoritative source to validate this claim and provide a natural
         if not post:
             return {"error": f"Article {slug} not found"}
 
-        # First analyze to find what needs citations
-        analysis_result = await self.analyze_article(slug)
-        if analysis_result.get("error"):
-            return analysis_result
-
-        analysis = analysis_result.get("analysis", {})
-        needs_citation = analysis.get("needs_citation", [])
+        cited = await self.cite_post(post, citation_style)
+        if cited.get("error"):
+            return cited
 
-        if not needs_citation:
+        if not cited["needs_citation"]:
             return {
                 "slug": slug,
                 "message": "No claims requiring citations were found",
                 "needs_citation": []
             }
 
+        citations_added = cited["citations"]
+        updated_content = cited["content"]
+
+        result = {
+            "slug": slug,
+            "title": post.get("title"),
+            "citations_added": len(citations_added),
+            "citations": citations_added,
+            "preview": updated_content if dry_run else None,
+        }
+
+        # Save if not dry run
+        if not dry_run and citations_added:
+            post.update(self.cited_fields(post, updated_content, len(citations_added)))
+
+            self._save_blog_post(post)
+            result["saved"] = True
+        else:
+            result["saved"] = False
+
+        return result
+
+    async def cite_post(self, post: Dict[str, Any], citation_style: str = "inline") -> Dict[str, Any]:
+        """
+        Find sources for a post's claims and cite them, without saving.
+
+        Returns:
+            Dict with the claims that needed citations, the citations added
+            and the updated content, or an error
+        """
+        # First analyze to find what needs citations
+        analysis_result = await self.analyze_post(post)
+        if analysis_result.get("error"):
+            return analysis_result
+
+        analysis = analysis_result.get("analysis", {})
+        needs_citation = analysis.get("needs_citation", [])
+
         # Find sources for each claim
         citations_added = []
         updated_content = post.get("content", "")
@@ -358,28 +393,19 @@ Find the most authoritative source to validate this claim and provide a natural
 
             updated_content += footnotes_section
 
-        result = {
-            "slug": slug,
-            "title": post.get("title"),
-            "citations_added": len(citations_added),
+        return {
+            "needs_citation": needs_citation,
             "citations": citations_added,
-            "preview": updated_content if dry_run else None,
+            "content": updated_content,
         }
 
-        # Save if not dry run
-        if not dry_run and citations_added:
-            post["content"] = updated_content
-            post["updated_at"] = datetime.utcnow().isoformat()
-            post["metadata"] = post.get("metadata", {})
-            post["metadata"]["citations_added"] = len(citations_added)
-            post["metadata"]["last_citation_update"] = datetime.utcnow().isoformat()
-
-            self._save_blog_post(post)
-            result["saved"] = True
-        else:
-            result["saved"] = False
-
-        return result
+    def cited_fields(self, post: Dict[str, Any], content: str, citations_added: int) -> Dict[str, Any]:
+        """Top-level post fields to store after adding citations."""
+        now = datetime.utcnow().isoformat()
+        metadata = dict(post.get("metadata") or {})
+        metadata["citations_added"] = citations_added
+        metadata["last_citation_update"] = now
+        return {"content": content, "updated_at": now, "metadata": metadata}
 
     def get_source_registry(self, limit: Optional[int] = None) -> Dict[str, Any]:
         """
@@ -20,6 +20,8 @@ from datetime import datetime
 from typing import Optional, List, Dict, Any
 from enum import Enum
 
+from services.llm_accounting import post_chat_completion
+
 logger = logging.getLogger(__name__)
 
 
@@ -152,8 +154,8 @@ Classify the customer message into ONE of these intents:
 Respond with ONLY the intent label, nothing else."""
 
         try:
-            response = await self.http_client.post(
-                f"{self.base_url}/chat/completions",
+            response = await post_chat_completion(
+                self.http_client, f"{self.base_url}/chat/completions", "comms_intent",
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
                     "HTTP-Referer": "https://jasperfinance.org",
@@ -275,8 +277,8 @@ New message from lead: "{message}"
 Generate an appropriate response."""
 
         try:
-            response = await self.http_client.post(
-                f"{self.base_url}/chat/completions",
+            response = await post_chat_completion(
+                self.http_client, f"{self.base_url}/chat/completions", "comms_reply",
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
                     "HTTP-Referer": "https://jasperfinance.org",
@@ -418,8 +420,8 @@ Respond in JSON:
         name = lead.get('name', 'there') if isinstance(lead, dict) else getattr(lead, 'name', 'there')
 
         try:
-            response = await self.http_client.post(
-                f"{self.base_url}/chat/completions",
+            response = await post_chat_completion(
+                self.http_client, f"{self.base_url}/chat/completions", "comms_outreach",
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
                     "HTTP-Referer": "https://jasperfinance.org",
@@ -637,8 +639,8 @@ Respond in JSON:
 }}"""
 
         try:
-            response = await self.http_client.post(
-                f"{self.base_url}/chat/completions",
+            response = await post_chat_completion(
+                self.http_client, f"{self.base_url}/chat/completions", "comms_followup",
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
                     "HTTP-Referer": "https://jasperfinance.org",
@@ -157,11 +157,18 @@ class ContentPipeline:
             # Sort by relevance (highest first)
             filtered.sort(key=lambda x: x.relevance_score, reverse=True)
 
+            # One item per story: drop other feeds' copies and stories already covered
+            from services.news_monitor import news_monitor
+
+            stories, covered = news_monitor.group_stories(filtered)
+            unique = [story[0] for story in stories]
+
             return {
                 "success": True,
-                "items": filtered,
+                "items": unique,
                 "original_count": len(items),
-                "filtered_count": len(filtered),
+                "filtered_count": len(unique),
+                "duplicates_skipped": len(filtered) - len(unique),
                 "min_score_applied": self.min_relevance_score
             }
         except Exception as e:
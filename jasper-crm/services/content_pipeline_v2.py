@@ -12,11 +12,13 @@ Pipeline:
 import os
 import re
 import json
+import time
 import httpx
 from typing import Dict, Any, List, Optional
 from loguru import logger
 # API monitoring
 from services.api_monitor import api_monitor
+from services.llm_accounting import llm_accounting, scoped_feature
 
 # Import the new prompts
 from agents.content_prompts import (
@@ -207,6 +209,11 @@ class ContentPipelineV2:
         research_context: str
     ) -> Dict[str, Any]:
         """Generate the draft using DeepSeek V3.2."""
+        budget = llm_accounting.check_budget(scoped_feature("content_pipeline"), "deepseek-chat")
+        if not budget.allowed:
+            return {"error": budget.error()}
+
+        started = time.perf_counter()
         try:
             system_prompt = build_system_prompt(category, research_context)
             user_prompt = build_user_prompt(topic, keywords)
@@ -244,7 +251,10 @@ class ContentPipelineV2:
                     output_tokens=usage.get("completion_tokens", 0),
                     cached_tokens=usage.get("prompt_cache_hit_tokens", 0),
                     caller="content_pipeline_v2._generate_draft",
-                    prompt_preview=topic[:100]
+                    prompt_preview=topic[:100],
+                    latency_s=time.perf_counter() - started,
+                    feature=budget.feature,
+                    article=topic,
                 )
                 
                 raw_content = data["choices"][0]["message"]["content"]
@@ -13,13 +13,16 @@ Features:
 """
 
 import os
+import time
 import random
 import httpx
+import numpy as np
 import logging
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 
 from services.keyword_service import keyword_service
+from services.llm_accounting import llm_accounting, scoped_feature
 
 logger = logging.getLogger(__name__)
 
@@ -43,14 +46,14 @@ class ContentService:
         self.blog_api_url = os.getenv("BLOG_API_URL", "http://localhost:3000/api/blog")
         self.blog_api_key = os.getenv("AI_BLOG_API_KEY", "jasper-ai-blog-key")
 
-        # Use KeywordService for SEO keywords
+        # Use KeywordService for SEO keywords (its catalog loads on first use)
         self.keyword_service = keyword_service
-        self.seo_keywords = self._load_keywords_from_service()
 
-        logger.info(f"ContentService initialized with {len(self.seo_keywords)} SEO keywords from KeywordService")
+        logger.info("ContentService initialized with SEO keywords from KeywordService")
 
-    def _load_keywords_from_service(self) -> List[Dict[str, Any]]:
-        """Load SEO keywords from KeywordService."""
+    @property
+    def seo_keywords(self) -> List[Dict[str, Any]]:
+        """All SEO keywords from KeywordService."""
         return self.keyword_service.keywords
 
     async def generate_blog_post(
@@ -84,6 +87,11 @@ class ContentService:
         system_prompt = self._build_content_system_prompt(category, tone)
         user_prompt = self._build_content_user_prompt(topic, seo_keywords, lead_context)
 
+        budget = llm_accounting.check_budget(scoped_feature("content_generation"), self.model)
+        if not budget.allowed:
+            return {"error": budget.error()}
+
+        started = time.perf_counter()
         try:
             async with httpx.AsyncClient() as client:
                 response = await client.post(
@@ -104,6 +112,16 @@ class ContentService:
                     timeout=120.0,  # Long-form content takes time
                 )
 
+                llm_accounting.record(
+                    self.model,
+                    response.json().get("usage") if response.status_code == 200 else None,
+                    time.perf_counter() - started,
+                    feature=budget.feature,
+                    lead_id=(lead_context or {}).get("lead_id"),
+                    article=topic,
+                    success=response.status_code == 200,
+                )
+
                 if response.status_code == 200:
                     data = response.json()
                     content = data["choices"][0]["message"]["content"]
@@ -276,10 +294,11 @@ class ContentService:
                 })
 
         # SEO opportunity suggestions
-        high_volume_keywords = [
-            kw for kw in self.seo_keywords
-            if kw.get("volume", 0) > 1000 and kw.get("difficulty", 100) < 40
-        ]
+        high_volume_keywords = self.keyword_service.search(
+            min_volume=1001,
+            max_difficulty=39,
+            limit=None,
+        )
 
         if high_volume_keywords:
             selected = random.sample(high_volume_keywords, min(2, len(high_volume_keywords)))
@@ -296,22 +315,23 @@ class ContentService:
 
     def _select_seo_keywords(self, topic: str, category: str) -> List[str]:
         """Auto-select relevant SEO keywords for a topic."""
-        topic_lower = topic.lower()
+        table = self.keyword_service.table
 
         # Find keywords that match the topic
-        relevant = []
-        for kw in self.seo_keywords:
-            keyword = kw.get("keyword", "").lower()
-            if any(word in keyword for word in topic_lower.split()):
-                relevant.append(kw)
-            elif kw.get("category", "").lower() == category.lower():
-                relevant.append(kw)
+        relevant = np.zeros(len(table), dtype=bool)
+        for word in topic.lower().split():
+            relevant[table.match_text(word)] = True
+        for code, value in enumerate(table.category.values):
+            if value.lower() == category.lower():
+                relevant |= table.category.codes == code
 
         # Sort by volume/difficulty ratio
-        relevant.sort(key=lambda x: x.get("volume", 0) / max(x.get("difficulty", 50), 1), reverse=True)
+        rows = np.flatnonzero(relevant)
+        ratio = table.volume[rows] / np.maximum(table.difficulty[rows], 1)
+        top = rows[np.argsort(-ratio, kind="stable")[:5]]
 
         # Return top 5 keyword strings
-        return [kw["keyword"] for kw in relevant[:5]]
+        return [table.keywords[int(row)] for row in top]
 
     def _build_content_system_prompt(self, category: str, tone: str) -> str:
         """Build the system prompt for content generation."""
@@ -0,0 +1,288 @@
+"""
+JASPER CRM - Content Transform Pipeline
+
+Site-wide maintenance passes over blog_posts.json in one read and one
+write, instead of each service loading and rewriting the file per
+operation. Transforms are registered by name; each takes a post and
+returns a patch - the top-level fields it would change - or None:
+
+- related_links: "Related Articles" section from the related-article graph
+- citations: sourced citations for claims (CitationService; AI calls, so
+  only run when asked for by name)
+- image_urls: optimized hero image URL (JPEG, 1600px max width)
+- cta: category call-to-action for articles that lack one
+
+run() reads the posts once and passes each through the selected
+transforms in registration order, each seeing the previous ones' output.
+Posts are processed concurrently (bounded by `concurrency`), so async
+transforms overlap their I/O. A dry run returns per-field diffs; otherwise
+every patch is committed in one locked, atomic write. A post whose
+patched fields were changed by someone else since the read is left alone
+and reported as a conflict.
+"""
+
+import asyncio
+import difflib
+import inspect
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from services.json_file_store import json_file
+
+logger = logging.getLogger(__name__)
+
+BLOG_DATA_PATH = Path(__file__).parent.parent / "data" / "blog_posts.json"
+DEFAULT_CONCURRENCY = 8
+
+Patch = Dict[str, Any]
+TransformFn = Callable[[Dict[str, Any]], Union[Optional[Patch], Awaitable[Optional[Patch]]]]
+
+
+@dataclass
+class Transform:
+    name: str
+    fn: TransformFn
+    published_only: bool = False
+    default: bool = True                      # Runs when no transforms are named
+    after_commit: Optional[Callable[[List[Dict[str, Any]]], Any]] = None  # Called with all posts once committed
+
+
+def _field_diff(field: str, before: Any, after: Any) -> Any:
+    if isinstance(before, str) and isinstance(after, str):
+        return "\n".join(difflib.unified_diff(
+            before.splitlines(), after.splitlines(),
+            fromfile=f"{field} (current)", tofile=f"{field} (transformed)", lineterm="", n=2,
+        ))
+    return {"before": before, "after": after}
+
+
+class ContentTransformPipeline:
+    """Registered post transforms, applied in one pass over blog_posts.json."""
+
+    def __init__(self, posts_path: Path = BLOG_DATA_PATH, concurrency: int = DEFAULT_CONCURRENCY):
+        self.posts_path = Path(posts_path)
+        self.concurrency = concurrency
+        self.transforms: Dict[str, Transform] = {}
+
+    def register(
+        self,
+        name: str,
+        fn: TransformFn,
+        published_only: bool = False,
+        default: bool = True,
+        after_commit: Optional[Callable[[List[Dict[str, Any]]], Any]] = None,
+    ) -> Transform:
+        transform = Transform(name, fn, published_only, default, after_commit)
+        self.transforms[name] = transform
+        return transform
+
+    def list_transforms(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": t.name, "published_only": t.published_only, "default": t.default}
+            for t in self.transforms.values()
+        ]
+
+    def _select(self, names: Optional[List[str]]) -> List[Transform]:
+        if names is None:
+            return [t for t in self.transforms.values() if t.default]
+        unknown = [name for name in names if name not in self.transforms]
+        if unknown:
+            raise ValueError(f"Unknown transforms: {', '.join(unknown)}")
+        # Registration order, whatever order they were named in
+        return [t for t in self.transforms.values() if t.name in names]
+
+    async def _apply(
+        self, post: Dict[str, Any], transforms: List[Transform]
+    ) -> Tuple[Patch, List[str], Dict[str, str]]:
+        """(patch, transforms that changed the post, errors by transform) for one post."""
+        current = post
+        patch: Patch = {}
+        applied: List[str] = []
+        errors: Dict[str, str] = {}
+        for transform in transforms:
+            if transform.published_only and current.get("status") != "published":
+                continue
+            try:
+                result = transform.fn(current)
+                if inspect.isawaitable(result):
+                    result = await result
+            except Exception as e:
+                logger.error(f"[ContentTransforms] {transform.name} failed for {post.get('slug')}: {e}")
+                errors[transform.name] = str(e)
+                continue
+            changed = {
+                key: value for key, value in (result or {}).items()
+                if key != "slug" and current.get(key) != value
+            }
+            if changed:
+                current = {**current, **changed}
+                patch.update(changed)
+                applied.append(transform.name)
+        return patch, applied, errors
+
+    def _commit(self, changes: List[Tuple[Dict[str, Any], Patch]]) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+        """Apply patches in one locked write: (committed slugs, conflicting slugs, all posts)."""
+        now = datetime.utcnow().isoformat() + "Z"
+        committed, conflicts = [], []
+        with json_file(self.posts_path).edit() as posts:
+            by_slug = {p.get("slug"): p for p in posts}
+            for original, patch in changes:
+                stored = by_slug.get(original["slug"])
+                if stored is None or any(stored.get(key) != original.get(key) for key in patch):
+                    conflicts.append(original["slug"])
+                    continue
+                stored.update(patch)
+                stored["updatedAt"] = now
+                stored["version"] = stored.get("version", 0) + 1
+                committed.append(original["slug"])
+        return committed, conflicts, posts
+
+    async def run(
+        self,
+        transforms: Optional[List[str]] = None,
+        slugs: Optional[List[str]] = None,
+        dry_run: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Run transforms over the posts (all of them, or just `slugs`).
+
+        Args:
+            transforms: Names to run, in registration order; default transforms if None
+            slugs: Limit the pass to these posts
+            dry_run: Return diffs without saving
+
+        Returns:
+            Dict with counts, per-post details (with diffs on a dry run) and errors
+        """
+        selected = self._select(transforms)
+        posts = json_file(self.posts_path).read()
+        wanted = set(slugs) if slugs is not None else None
+        targets = [p for p in posts if p.get("slug") and (wanted is None or p["slug"] in wanted)]
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def process(post):
+            async with semaphore:
+                return await self._apply(post, selected)
+
+        outcomes = await asyncio.gather(*(process(post) for post in targets))
+
+        results: Dict[str, Any] = {
+            "transforms": [t.name for t in selected],
+            "total_posts": len(posts),
+            "processed": len(targets),
+            "updated": 0,
+            "details": [],
+            "errors": [],
+            "dry_run": dry_run,
+        }
+        changes = []
+        for post, (patch, applied, errors) in zip(targets, outcomes):
+            for name, error in errors.items():
+                results["errors"].append({"slug": post["slug"], "transform": name, "error": error})
+            if not patch:
+                continue
+            changes.append((post, patch))
+            detail = {"slug": post["slug"], "transforms": applied, "fields": sorted(patch)}
+            if dry_run:
+                detail["diff"] = {key: _field_diff(key, post.get(key), value) for key, value in patch.items()}
+            results["details"].append(detail)
+
+        if dry_run or not changes:
+            results["updated"] = len(changes)
+            return results
+
+        committed, conflicts, all_posts = self._commit(changes)
+        results["updated"] = len(committed)
+        results["conflicts"] = conflicts
+        committed_set = set(committed)
+        for detail in results["details"]:
+            detail["status"] = "updated" if detail["slug"] in committed_set else "conflict"
+        logger.info(
+            f"[ContentTransforms] {len(committed)} posts updated by {', '.join(results['transforms'])}"
+            f" ({len(conflicts)} conflicts)"
+        )
+
+        touched = {name for detail in results["details"] if detail["status"] == "updated" for name in detail["transforms"]}
+        for transform in selected:
+            if transform.after_commit and transform.name in touched:
+                try:
+                    transform.after_commit(all_posts)
+                except Exception as e:
+                    logger.error(f"[ContentTransforms] after-commit hook for {transform.name} failed: {e}")
+        return results
+
+
+# =============================================================================
+# Built-in transforms
+# =============================================================================
+
+RELATED_LINKS_HEADING = "## Related Articles"
+
+
+def register_builtin_transforms(pipeline: ContentTransformPipeline, max_links: int = 5):
+    """Register related_links, citations, image_urls and cta, in that order."""
+    from services.link_builder_service import LinkBuilderService
+
+    link_builder = LinkBuilderService(str(pipeline.posts_path))
+
+    def related_links(post):
+        content = post.get("content") or ""
+        if RELATED_LINKS_HEADING in content:
+            return None
+        section = link_builder._format_related_links(link_builder.find_related_articles(post["slug"], max_links))
+        if not section:
+            return None
+        # Keep an existing CTA at the end of the article
+        cut = content.rfind("\n---\n", max(0, len(content) - 500)) if link_builder.has_cta(content) else -1
+        if cut >= 0:
+            return {"content": content[:cut].rstrip("\n") + section + content[cut:]}
+        return {"content": content + section}
+
+    async def citations(post):
+        from services.citation_service import get_citation_service
+
+        service = get_citation_service()
+        cited = await service.cite_post(post)
+        if cited.get("error"):
+            raise RuntimeError(cited["error"])
+        if not cited["citations"]:
+            return None
+        return service.cited_fields(post, cited["content"], len(cited["citations"]))
+
+    def image_urls(post):
+        from services.blog_service import _optimize_image_url
+
+        hero_image = post.get("heroImage")
+        return {"heroImage": _optimize_image_url(hero_image)} if hero_image else None
+
+    def sync_image_registry(posts):
+        from services.image_registry import image_registry
+
+        image_registry.sync_from_posts(posts)
+
+    def cta(post):
+        content = post.get("content") or ""
+        if link_builder.has_cta(content):
+            return None
+        return {"content": content + link_builder.get_cta_for_category(post.get("category", ""))}
+
+    pipeline.register("related_links", related_links, published_only=True)
+    pipeline.register("citations", citations, published_only=True, default=False)
+    pipeline.register("image_urls", image_urls, after_commit=sync_image_registry)
+    pipeline.register("cta", cta, published_only=True)
+    return pipeline
+
+
+_pipeline: Optional[ContentTransformPipeline] = None
+
+
+def get_content_transform_pipeline() -> ContentTransformPipeline:
+    """Get or create the pipeline over blog_posts.json with the built-in transforms"""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = register_builtin_transforms(ContentTransformPipeline())
+    return _pipeline
@@ -21,6 +21,7 @@ DeepSeek R1 RAG Pipeline:
 
 import os
 import json
+import time
 import httpx
 import base64
 import logging
@@ -28,6 +29,8 @@ from typing import Optional, List, Dict, Any, Union
 from enum import Enum
 from pathlib import Path
 
+from services.llm_accounting import llm_accounting, accounting_scope, scoped_feature
+
 logger = logging.getLogger(__name__)
 
 
@@ -165,6 +168,7 @@ class DeepSeekRouter:
         enable_search: bool = False,
         max_tokens: int = 4000,
         temperature: float = 0.7,
+        feature: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Route a task to the appropriate DeepSeek model.
@@ -177,6 +181,7 @@ class DeepSeekRouter:
             enable_search: Enable web search for R1
             max_tokens: Max response tokens
             temperature: Sampling temperature
+            feature: Accounting tag (defaults to the accounting scope, then the task)
 
         Returns:
             Dict with 'content', 'model', 'reasoning_content' (for R1)
@@ -186,30 +191,45 @@ class DeepSeekRouter:
 
         logger.info(f"Routing task {task.value} to model {model_id}")
 
-        # Handle vision tasks
-        if model == DeepSeekModel.VL and images:
-            return await self._call_vision(
+        with accounting_scope(feature=feature or scoped_feature(task.value)):
+            # Handle vision tasks
+            if model == DeepSeekModel.VL and images:
+                return await self._call_vision(
+                    prompt=prompt,
+                    images=images,
+                    system_prompt=system_prompt,
+                    max_tokens=max_tokens
+                )
+
+            # Handle R1 with search
+            if model == DeepSeekModel.R1 and enable_search:
+                return await self._call_r1_search(
+                    prompt=prompt,
+                    system_prompt=system_prompt,
+                    max_tokens=max_tokens
+                )
+
+            # Standard chat completion
+            return await self._call_chat(
+                model_id=model_id,
                 prompt=prompt,
-                images=images,
                 system_prompt=system_prompt,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                temperature=temperature
             )
 
-        # Handle R1 with search
-        if model == DeepSeekModel.R1 and enable_search:
-            return await self._call_r1_search(
-                prompt=prompt,
-                system_prompt=system_prompt,
-                max_tokens=max_tokens
-            )
-
-        # Standard chat completion
-        return await self._call_chat(
-            model_id=model_id,
-            prompt=prompt,
-            system_prompt=system_prompt,
-            max_tokens=max_tokens,
-            temperature=temperature
+    def _check_budget(self, model_id: str, default_feature: str):
+        """Budget decision for a call, tagged with the scoped feature."""
+        return llm_accounting.check_budget(scoped_feature(default_feature), model_id)
+
+    def _record_usage(self, model_id: str, data: Optional[Dict[str, Any]], started: float, budget, success: bool = True):
+        llm_accounting.record(
+            model_id,
+            (data or {}).get("usage"),
+            time.perf_counter() - started,
+            feature=budget.feature,
+            success=success,
+            budget_action=budget.action,
         )
 
     # =========================================================================
@@ -234,11 +254,24 @@ class DeepSeekRouter:
         if not self.openrouter_key:
             return {"error": "OPENROUTER_API_KEY not configured"}
 
+        budget = self._check_budget("deepseek/deepseek-r1", TaskType.WEB_SEARCH.value)
+        if not budget.allowed:
+            return {"error": budget.error(), "throttled": True}
+        if budget.action == "downgrade":
+            # Over budget: answer from V3 without live search
+            return await self._call_chat(
+                model_id=budget.model,
+                prompt=prompt,
+                system_prompt=system_prompt,
+                max_tokens=min(max_tokens, 4000),
+            )
+
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
 
+        started = time.perf_counter()
         try:
             response = await self.http_client.post(
                 f"{self.openrouter_url}/chat/completions",
@@ -259,6 +292,7 @@ class DeepSeekRouter:
 
             if response.status_code == 200:
                 data = response.json()
+                self._record_usage("deepseek/deepseek-r1", data, started, budget)
                 choice = data.get("choices", [{}])[0]
                 message = choice.get("message", {})
 
@@ -270,6 +304,7 @@ class DeepSeekRouter:
                     "search_enabled": True,
                 }
             else:
+                self._record_usage("deepseek/deepseek-r1", None, started, budget, success=False)
                 return {
                     "error": f"API error: {response.status_code}",
                     "detail": response.text
@@ -277,6 +312,7 @@ class DeepSeekRouter:
 
         except Exception as e:
             logger.error(f"R1 search error: {e}")
+            self._record_usage("deepseek/deepseek-r1", None, started, budget, success=False)
             return {"error": str(e)}
 
     async def search_web(
@@ -365,11 +401,16 @@ Find the most relevant, current information and synthesize a comprehensive answe
 
         content.append({"type": "text", "text": prompt})
 
+        budget = self._check_budget("deepseek/deepseek-vl", TaskType.IMAGE_ANALYZE.value)
+        if not budget.allowed:
+            return {"error": budget.error(), "throttled": True}
+
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": content})
 
+        started = time.perf_counter()
         try:
             response = await self.http_client.post(
                 f"{self.openrouter_url}/chat/completions",
@@ -387,6 +428,7 @@ Find the most relevant, current information and synthesize a comprehensive answe
 
             if response.status_code == 200:
                 data = response.json()
+                self._record_usage("deepseek/deepseek-vl", data, started, budget)
                 return {
                     "content": data["choices"][0]["message"]["content"],
                     "model": "deepseek/deepseek-vl",
@@ -395,10 +437,12 @@ Find the most relevant, current information and synthesize a comprehensive answe
             else:
                 # Fallback to GPT-4V if VL not available
                 logger.warning("DeepSeek VL not available, trying fallback")
+                self._record_usage("deepseek/deepseek-vl", None, started, budget, success=False)
                 return await self._vision_fallback(prompt, images, system_prompt, max_tokens)
 
         except Exception as e:
             logger.error(f"Vision error: {e}")
+            self._record_usage("deepseek/deepseek-vl", None, started, budget, success=False)
             return {"error": str(e)}
 
     async def _vision_fallback(
@@ -423,6 +467,8 @@ Find the most relevant, current information and synthesize a comprehensive answe
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": content})
 
+        budget = self._check_budget("google/gemini-2.0-flash-exp:free", TaskType.IMAGE_ANALYZE.value)
+        started = time.perf_counter()
         try:
             response = await self.http_client.post(
                 f"{self.openrouter_url}/chat/completions",
@@ -439,13 +485,16 @@ Find the most relevant, current information and synthesize a comprehensive answe
 
             if response.status_code == 200:
                 data = response.json()
+                self._record_usage("google/gemini-2.0-flash-exp:free", data, started, budget)
                 return {
                     "content": data["choices"][0]["message"]["content"],
                     "model": "google/gemini-2.0-flash-exp:free",
                     "fallback": True,
                 }
+            self._record_usage("google/gemini-2.0-flash-exp:free", None, started, budget, success=False)
             return {"error": f"Fallback failed: {response.status_code}"}
         except Exception as e:
+            self._record_usage("google/gemini-2.0-flash-exp:free", None, started, budget, success=False)
             return {"error": str(e)}
 
     async def analyze_image(
@@ -547,11 +596,17 @@ Return as JSON:
         if not self.openrouter_key:
             return {"error": "OPENROUTER_API_KEY not configured"}
 
+        budget = self._check_budget(model_id, TaskType.CHAT.value)
+        if not budget.allowed:
+            return {"error": budget.error(), "throttled": True}
+        model_id = budget.model
+
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
 
+        started = time.perf_counter()
         try:
             response = await self.http_client.post(
                 f"{self.openrouter_url}/chat/completions",
@@ -570,16 +625,19 @@ Return as JSON:
 
             if response.status_code == 200:
                 data = response.json()
+                self._record_usage(model_id, data, started, budget)
                 return {
                     "content": data["choices"][0]["message"]["content"],
                     "model": model_id,
                     "usage": data.get("usage"),
                 }
             else:
+                self._record_usage(model_id, None, started, budget, success=False)
                 return {"error": f"API error: {response.status_code}"}
 
         except Exception as e:
             logger.error(f"Chat error: {e}")
+            self._record_usage(model_id, None, started, budget, success=False)
             return {"error": str(e)}
 
     # =========================================================================
@@ -0,0 +1,630 @@
+"""
+JASPER CRM - Embedded Document Store
+
+Shared transactional store for the JSON documents that services used to
+keep in whole-file rewrites (blog_posts.json, enhancement_tasks.json, ...).
+
+One SQLite database in WAL mode holds every collection:
+
+    documents(collection, id, data JSON, version, updated_at)
+
+- Readers never block the writer and vice versa (WAL).
+- Writes are per document, so saving one task costs O(document), not O(file).
+- Read-modify-write goes through `Repository.update()` / `transaction()`,
+  which take SQLite's write lock up front (BEGIN IMMEDIATE), so concurrent
+  writers - threads, workers or cron scripts - serialize instead of losing
+  updates.
+- `put(..., expected_version=n)` is a compare-and-set for callers that
+  read, think for a while, then write.
+
+Usage:
+    from services.document_store import document_store
+
+    tasks = document_store.repository("enhancement_tasks", id_field="task_id")
+    document_store.ensure_index("status")
+    tasks.put({"task_id": "t1", "status": "pending"})
+    pending = tasks.find({"status": "pending"}, order_by="created_at")
+    tasks.update("t1", lambda t: {**t, "status": "running"})
+
+Migrating existing files (one-shot, idempotent per file) and exporting a
+collection back to its original JSON shape for anything that still reads
+the files directly:
+
+    python -m services.document_store migrate [--data-dir DIR ...] [--force]
+    python -m services.document_store export enhancement_tasks.json OUT.json
+    python -m services.document_store stats
+
+Configuration:
+    DOCUMENT_STORE_PATH  (default /opt/jasper-crm/data/jasper_documents.db)
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = "/opt/jasper-crm/data/jasper_documents.db"
+
+# Collection holding per-collection metadata (the non-list keys of legacy files)
+META_COLLECTION = "_meta"
+
+_FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    collection TEXT NOT NULL,
+    id         TEXT NOT NULL,
+    data       TEXT NOT NULL CHECK (json_valid(data)),
+    version    INTEGER NOT NULL DEFAULT 1,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (collection, id)
+);
+CREATE INDEX IF NOT EXISTS idx_documents_updated ON documents (collection, updated_at);
+CREATE TABLE IF NOT EXISTS migrations (
+    source      TEXT PRIMARY KEY,
+    collection  TEXT NOT NULL,
+    documents   INTEGER NOT NULL,
+    migrated_at TEXT NOT NULL
+);
+"""
+
+
+class VersionConflict(Exception):
+    """Raised when a compare-and-set write finds a different version stored."""
+
+    def __init__(self, collection: str, doc_id: str, expected: int, actual: Optional[int]):
+        self.collection = collection
+        self.doc_id = doc_id
+        self.expected = expected
+        self.actual = actual
+        super().__init__(
+            f"{collection}/{doc_id}: expected version {expected}, found {actual if actual is not None else 'none'}"
+        )
+
+
+def _json_path(field: str) -> str:
+    if not _FIELD_RE.match(field):
+        raise ValueError(f"Invalid document field name: {field!r}")
+    return f"$.{field}"
+
+
+def _sql_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def _dumps(doc: Any) -> str:
+    return json.dumps(doc, default=str, separators=(",", ":"))
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+class DocumentStore:
+    """SQLite (WAL) backed store of JSON documents grouped into collections."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = str(path or os.getenv("DOCUMENT_STORE_PATH", DEFAULT_STORE_PATH))
+        self._local = threading.local()
+        self._repos: Dict[str, "Repository"] = {}
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    # -------------------------------------------------------------------------
+    # Connections & transactions
+    # -------------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: we issue BEGIN/COMMIT ourselves
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("PRAGMA foreign_keys=ON")
+        with self._init_lock:
+            if not self._initialized:
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """This thread's connection (sqlite3 connections aren't shared across threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run a block atomically with the write lock held from the start.
+
+        Nested calls join the outermost transaction.
+        """
+        conn = self.conn
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+        finally:
+            self._local.depth = 0
+
+    def close(self):
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # -------------------------------------------------------------------------
+    # Collections
+    # -------------------------------------------------------------------------
+
+    def repository(self, collection: str, id_field: str = "id") -> "Repository":
+        repo = self._repos.get(collection)
+        if repo is None or repo.id_field != id_field:
+            repo = Repository(self, collection, id_field)
+            self._repos[collection] = repo
+        return repo
+
+    def collections(self) -> Dict[str, int]:
+        """Document count per collection."""
+        rows = self.conn.execute(
+            "SELECT collection, COUNT(*) FROM documents GROUP BY collection ORDER BY collection"
+        ).fetchall()
+        return {name: count for name, count in rows}
+
+    def ensure_index(self, field: str):
+        """
+        Index json_extract(data, field), scoped by collection.
+
+        One index per field serves every collection that has that field.
+        """
+        path = _json_path(field)
+        name = "idx_documents_" + field.replace(".", "__")
+        # DDL can't take bound parameters; the field name is validated above
+        self.conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON documents (collection, json_extract(data, '{path}'))"
+        )
+
+
+class Repository:
+    """Documents of one collection, addressed by the value of `id_field`."""
+
+    def __init__(self, store: DocumentStore, collection: str, id_field: str = "id"):
+        self.store = store
+        self.collection = collection
+        self.id_field = id_field
+
+    def _id_of(self, doc: Dict[str, Any]) -> str:
+        doc_id = doc.get(self.id_field)
+        if doc_id is None or doc_id == "":
+            raise ValueError(f"{self.collection}: document has no '{self.id_field}'")
+        return str(doc_id)
+
+    def _where(self, where: Optional[Dict[str, Any]]):
+        clauses, params = ["collection = ?"], [self.collection]
+        for field, value in (where or {}).items():
+            expr = f"json_extract(data, '{_json_path(field)}')"
+            if value is None:
+                clauses.append(f"{expr} IS NULL")
+            elif isinstance(value, (list, tuple, set)):
+                values = [_sql_value(v) for v in value]
+                clauses.append(f"{expr} IN ({','.join('?' * len(values)) or 'NULL'})")
+                params.extend(values)
+            else:
+                clauses.append(f"{expr} = ?")
+                params.append(_sql_value(value))
+        return " AND ".join(clauses), params
+
+    # -------------------------------------------------------------------------
+    # Reads
+    # -------------------------------------------------------------------------
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        row = self.store.conn.execute(
+            "SELECT data FROM documents WHERE collection = ? AND id = ?",
+            (self.collection, str(doc_id)),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_with_version(self, doc_id: str):
+        """(document, version), or (None, None) if absent."""
+        row = self.store.conn.execute(
+            "SELECT data, version FROM documents WHERE collection = ? AND id = ?",
+            (self.collection, str(doc_id)),
+        ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else (None, None)
+
+    def find(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Documents whose fields equal `where` (a list/tuple value means IN).
+
+        Without `order_by`, documents come back in insertion order.
+        """
+        clause, params = self._where(where)
+        if order_by:
+            order = f"json_extract(data, '{_json_path(order_by)}') {'DESC' if descending else 'ASC'}, rowid"
+        else:
+            order = f"rowid {'DESC' if descending else 'ASC'}"
+        sql = f"SELECT data FROM documents WHERE {clause} ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [int(limit), int(offset)]
+        return [json.loads(row[0]) for row in self.store.conn.execute(sql, params)]
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self.find()
+
+    def count(self, where: Optional[Dict[str, Any]] = None) -> int:
+        clause, params = self._where(where)
+        return self.store.conn.execute(f"SELECT COUNT(*) FROM documents WHERE {clause}", params).fetchone()[0]
+
+    def ids(self) -> List[str]:
+        return [row[0] for row in self.store.conn.execute(
+            "SELECT id FROM documents WHERE collection = ? ORDER BY rowid", (self.collection,)
+        )]
+
+    # -------------------------------------------------------------------------
+    # Writes
+    # -------------------------------------------------------------------------
+
+    def put(
+        self,
+        doc: Dict[str, Any],
+        expected_version: Optional[int] = None,
+        doc_id: Optional[str] = None,
+    ) -> int:
+        """
+        Insert or replace a document and return its new version.
+
+        The id comes from `id_field` unless `doc_id` is given. With
+        `expected_version`, the write only happens if the stored version
+        still matches (0 = must not exist yet); otherwise VersionConflict.
+        """
+        doc_id = str(doc_id) if doc_id is not None else self._id_of(doc)
+        with self.store.transaction() as conn:
+            row = conn.execute(
+                "SELECT version FROM documents WHERE collection = ? AND id = ?",
+                (self.collection, doc_id),
+            ).fetchone()
+            current = row[0] if row else None
+            if expected_version is not None and (current or 0) != expected_version:
+                raise VersionConflict(self.collection, doc_id, expected_version, current)
+            version = (current or 0) + 1
+            conn.execute(
+                "INSERT INTO documents (collection, id, data, version, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (collection, id) DO UPDATE SET "
+                "data = excluded.data, version = excluded.version, updated_at = excluded.updated_at",
+                (self.collection, doc_id, _dumps(doc), version, _now()),
+            )
+        return version
+
+    def put_many(self, docs: Iterable[Dict[str, Any]]) -> int:
+        """Upsert several documents in one transaction."""
+        return self._put_items((self._id_of(d), d) for d in docs)
+
+    def _put_items(self, items: Iterable[tuple]) -> int:
+        now = _now()
+        rows = [(self.collection, str(doc_id), _dumps(doc), now) for doc_id, doc in items]
+        with self.store.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO documents (collection, id, data, version, updated_at) VALUES (?, ?, ?, 1, ?) "
+                "ON CONFLICT (collection, id) DO UPDATE SET "
+                "data = excluded.data, version = version + 1, updated_at = excluded.updated_at",
+                rows,
+            )
+        return len(rows)
+
+    def update(
+        self,
+        doc_id: str,
+        fn: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Atomically read-modify-write one document.
+
+        `fn` gets the current document (None if absent) and returns the new
+        one, or None to leave it untouched. No other writer can interleave.
+        """
+        with self.store.transaction():
+            current = self.get(doc_id)
+            updated = fn(current)
+            if updated is None:
+                return current
+            self.put(updated, doc_id=doc_id)
+            return updated
+
+    def delete(self, doc_id: str) -> bool:
+        with self.store.transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM documents WHERE collection = ? AND id = ?", (self.collection, str(doc_id))
+            )
+        return cursor.rowcount > 0
+
+    def delete_where(self, where: Dict[str, Any]) -> int:
+        clause, params = self._where(where)
+        with self.store.transaction() as conn:
+            cursor = conn.execute(f"DELETE FROM documents WHERE {clause}", params)
+        return cursor.rowcount
+
+    def replace_all(self, docs: Iterable[Dict[str, Any]]) -> int:
+        """Swap the whole collection's contents in one transaction."""
+        return self._replace_items([(self._id_of(d), d) for d in docs])
+
+    def _replace_items(self, items: List[tuple]) -> int:
+        with self.store.transaction() as conn:
+            conn.execute("DELETE FROM documents WHERE collection = ?", (self.collection,))
+            self._put_items(items)
+        return len(items)
+
+    def items(self) -> List[tuple]:
+        """(id, document) pairs in insertion order."""
+        return [(row[0], json.loads(row[1])) for row in self.store.conn.execute(
+            "SELECT id, data FROM documents WHERE collection = ? ORDER BY rowid", (self.collection,)
+        )]
+
+    def ensure_index(self, field: str):
+        self.store.ensure_index(field)
+
+    # -------------------------------------------------------------------------
+    # Collection metadata (stats, timestamps, other non-document state)
+    # -------------------------------------------------------------------------
+
+    def meta(self) -> Dict[str, Any]:
+        return Repository(self.store, META_COLLECTION).get(self.collection) or {}
+
+    def update_meta(self, fn: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """Atomically read-modify-write this collection's metadata."""
+        return Repository(self.store, META_COLLECTION).update(
+            self.collection, lambda current: fn(dict(current or {}))
+        )
+
+
+# =============================================================================
+# LEGACY JSON FILES: MIGRATION & READ-COMPAT EXPORT
+# =============================================================================
+
+@dataclass(frozen=True)
+class LegacySource:
+    """
+    How one legacy JSON file maps onto a collection.
+
+    shape:
+      list   - top-level list of documents; id from `id_field`, else list position
+      map    - top-level {id: document}; non-object values are kept under "_value"
+      keyed  - object whose `list_key` holds the documents; other keys -> collection meta
+      object - the whole file is a single document with id "state"
+    """
+    filename: str
+    collection: str
+    shape: str
+    id_field: str = "id"
+    list_key: Optional[str] = None
+
+
+LEGACY_SOURCES: List[LegacySource] = [
+    LegacySource("blog_posts.json", "blog_posts", "list", id_field="slug"),
+    LegacySource("blog_revisions.json", "blog_revisions", "map"),
+    LegacySource("image_library.json", "image_library", "keyed", list_key="images"),
+    LegacySource("image_registry.json", "image_registry", "object"),
+    LegacySource("enhancement_tasks.json", "enhancement_tasks", "keyed", id_field="task_id", list_key="tasks"),
+    LegacySource("job_monitor_state.json", "job_monitor_state", "object"),
+    LegacySource("competitor_analysis.json", "competitor_analysis", "map"),
+    LegacySource("source_registry.json", "source_registry", "object"),
+    LegacySource("ab_tests.json", "ab_tests", "map"),
+    LegacySource("editor_in_chief_log.json", "editor_in_chief_log", "list"),
+    LegacySource("editor_accomplishments.json", "editor_accomplishments", "list"),
+    LegacySource("orchestrator_state.json", "orchestrator_state", "object"),
+]
+
+SOURCES_BY_FILENAME = {s.filename: s for s in LEGACY_SOURCES}
+
+DEFAULT_DATA_DIRS = [
+    Path(__file__).parent.parent / "data",
+    Path("/opt/jasper-crm/data"),
+]
+
+STATE_ID = "state"   # id of the single document of an "object" file
+
+
+def _documents_from(source: LegacySource, raw: Any):
+    """Split a legacy file's contents into ([(id, document)], meta)."""
+    if source.shape == "object":
+        return [(STATE_ID, raw)], {}
+
+    if source.shape == "map":
+        return [
+            (str(key), value if isinstance(value, dict) else {"_value": value})
+            for key, value in (raw or {}).items()
+        ], {}
+
+    meta = {}
+    items = raw
+    if source.shape == "keyed":
+        raw = raw or {}
+        items = raw.get(source.list_key) or []
+        meta = {k: v for k, v in raw.items() if k != source.list_key}
+
+    docs = []
+    seen = set()
+    for position, item in enumerate(items or []):
+        doc = item if isinstance(item, dict) else {"_value": item}
+        doc_id = doc.get(source.id_field)
+        # Missing or duplicate ids fall back to list position so nothing is dropped
+        if doc_id in (None, "") or str(doc_id) in seen:
+            doc_id = f"#{position:06d}"
+        seen.add(str(doc_id))
+        docs.append((str(doc_id), doc))
+    return docs, meta
+
+
+def _unwrap(doc: Dict[str, Any]) -> Any:
+    return doc["_value"] if set(doc) == {"_value"} else doc
+
+
+def migrate_file(store: DocumentStore, source: LegacySource, path: Path, force: bool = False) -> Optional[int]:
+    """
+    Import one legacy JSON file into its collection.
+
+    Returns the number of documents imported, or None if the file was
+    already migrated (unless `force`) or doesn't exist. The collection's
+    previous contents are replaced, in a single transaction.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    key = str(path.resolve())
+    conn = store.conn
+    if not force and conn.execute("SELECT 1 FROM migrations WHERE source = ?", (key,)).fetchone():
+        return None
+
+    with open(path, "r") as f:
+        raw = json.load(f)
+    docs, meta = _documents_from(source, raw)
+
+    repo = Repository(store, source.collection, source.id_field)
+    with store.transaction():
+        repo._replace_items(docs)
+        if meta:
+            repo.update_meta(lambda current: {**current, **meta})
+        conn.execute(
+            "INSERT OR REPLACE INTO migrations (source, collection, documents, migrated_at) VALUES (?, ?, ?, ?)",
+            (key, source.collection, len(docs), _now()),
+        )
+    logger.info(f"[DocumentStore] Migrated {len(docs)} documents from {path} into '{source.collection}'")
+    return len(docs)
+
+
+def migrate_all(
+    store: DocumentStore,
+    data_dirs: Optional[List[Path]] = None,
+    force: bool = False,
+) -> Dict[str, int]:
+    """
+    Migrate every known legacy file found in `data_dirs`. Returns {path: documents}.
+
+    Each file is taken from the first directory that has it; copies in later
+    directories are ignored, since migrating them would replace the collection.
+    """
+    results = {}
+    for source in LEGACY_SOURCES:
+        path = next(
+            (Path(d) / source.filename for d in data_dirs or DEFAULT_DATA_DIRS if (Path(d) / source.filename).exists()),
+            None,
+        )
+        if path is None:
+            continue
+        try:
+            count = migrate_file(store, source, path, force=force)
+        except (OSError, ValueError) as e:
+            logger.error(f"[DocumentStore] Failed to migrate {path}: {e}")
+            continue
+        if count is not None:
+            results[str(path)] = count
+    return results
+
+
+def export_collection(store: DocumentStore, source: LegacySource) -> Any:
+    """Rebuild a collection's contents in the legacy file's JSON shape."""
+    repo = Repository(store, source.collection, source.id_field)
+    items = repo.items()
+    if source.shape == "object":
+        return next((doc for doc_id, doc in items if doc_id == STATE_ID), {})
+    if source.shape == "map":
+        return {doc_id: _unwrap(doc) for doc_id, doc in items}
+    docs = [_unwrap(doc) for _, doc in items]
+    if source.shape == "keyed":
+        return {**repo.meta(), source.list_key: docs}
+    return docs
+
+
+def write_export(store: DocumentStore, source: LegacySource, path: Path) -> Path:
+    """Write a read-compat JSON file atomically (temp file + rename)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(export_collection(store, source), f, indent=2, default=str)
+    os.replace(tmp, path)
+    return path
+
+
+# Singleton instance
+document_store = DocumentStore()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Jasper CRM document store")
+    parser.add_argument("--db", help="Store path (default: DOCUMENT_STORE_PATH)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    migrate = sub.add_parser("migrate", help="Import legacy JSON files")
+    migrate.add_argument("--data-dir", action="append", type=Path, help="Directory to scan (repeatable)")
+    migrate.add_argument("--force", action="store_true", help="Re-import files already migrated")
+
+    export = sub.add_parser("export", help="Write a collection back out in its legacy JSON shape")
+    export.add_argument("filename", choices=sorted(SOURCES_BY_FILENAME))
+    export.add_argument("output", type=Path)
+
+    sub.add_parser("stats", help="Document count per collection")
+
+    args = parser.parse_args(argv)
+    store = DocumentStore(args.db) if args.db else document_store
+
+    if args.command == "migrate":
+        started = time.perf_counter()
+        results = migrate_all(store, args.data_dir, force=args.force)
+        for path, count in results.items():
+            print(f"{count:>8}  {path}")
+        print(f"Migrated {len(results)} files in {time.perf_counter() - started:.2f}s into {store.path}")
+    elif args.command == "export":
+        path = write_export(store, SOURCES_BY_FILENAME[args.filename], args.output)
+        print(f"Wrote {path}")
+    else:
+        for name, count in store.collections().items():
+            print(f"{count:>8}  {name}")
+
+
+if __name__ == "__main__":
+    main()
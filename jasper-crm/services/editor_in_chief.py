@@ -18,6 +18,7 @@ Runs on APScheduler - Pure Python Architecture (no n8n/Zapier)
 
 import os
 import json
+import time
 import logging
 import re
 from pathlib import Path
@@ -29,6 +30,9 @@ from enum import Enum
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
+from services.llm_accounting import llm_accounting, gemini_usage
+from services.json_file_store import json_file
+
 # Google AI SDK for Gemini 3.0 Flash
 try:
     from google import genai
@@ -106,20 +110,16 @@ class EditorAccomplishment:
 def load_blog_posts() -> List[Dict[str, Any]]:
     """Load blog posts from JSON file."""
     try:
-        if BLOG_DATA_PATH.exists():
-            with open(BLOG_DATA_PATH, 'r') as f:
-                return json.load(f)
-        return []
+        return json_file(BLOG_DATA_PATH).read()
     except Exception as e:
         logger.error(f"Failed to load blog posts: {e}")
         return []
 
 
 def save_blog_posts(posts: List[Dict[str, Any]]) -> bool:
-    """Save blog posts to JSON file."""
+    """Save blog posts to JSON file (atomic, locked write)."""
     try:
-        with open(BLOG_DATA_PATH, 'w') as f:
-            json.dump(posts, f, indent=2)
+        json_file(BLOG_DATA_PATH).write(posts)
         return True
     except Exception as e:
         logger.error(f"Failed to save blog posts: {e}")
@@ -156,6 +156,31 @@ def save_accomplishment(accomplishment: EditorAccomplishment) -> None:
 # GEMINI 3.0 FLASH - AI-POWERED ASSESSMENT FUNCTIONS
 # =============================================================================
 
+GEMINI_MODEL = "gemini-3-flash-preview"  # Gemini 3.0 Flash
+
+
+def _gemini_generate(prompt: str, post: Dict[str, Any]):
+    """Call Gemini under the editor's LLM budget, recording token usage against the article."""
+    budget = llm_accounting.check_budget("editor_in_chief", GEMINI_MODEL)
+    if not budget.allowed:
+        raise RuntimeError(budget.error())
+
+    started = time.perf_counter()
+    try:
+        response = gemini_client.models.generate_content(model=GEMINI_MODEL, contents=prompt)
+    except Exception:
+        llm_accounting.record(
+            GEMINI_MODEL, None, time.perf_counter() - started,
+            feature="editor_in_chief", article=post.get("slug"), success=False,
+        )
+        raise
+    llm_accounting.record(
+        GEMINI_MODEL, gemini_usage(response), time.perf_counter() - started,
+        feature="editor_in_chief", article=post.get("slug"),
+    )
+    return response
+
+
 async def ai_assess_article_quality(post: Dict[str, Any]) -> Dict[str, Any]:
     """
     Use Gemini 3.0 Flash to assess article quality holistically.
@@ -216,10 +241,7 @@ Return JSON only:
 }}"""
 
     try:
-        response = gemini_client.models.generate_content(
-            model="gemini-3-flash-preview",  # Gemini 3.0 Flash
-            contents=prompt
-        )
+        response = _gemini_generate(prompt, post)
 
         text = response.text
         if "```json" in text:
@@ -285,10 +307,7 @@ Return JSON only:
 }}"""
 
     try:
-        response = gemini_client.models.generate_content(
-            model="gemini-3-flash-preview",
-            contents=prompt
-        )
+        response = _gemini_generate(prompt, post)
 
         text = response.text
         if "```json" in text:
@@ -337,10 +356,7 @@ Focus on actions that will have the BIGGEST impact on article quality.
 Consider: images, SEO, content depth, social sharing."""
 
     try:
-        response = gemini_client.models.generate_content(
-            model="gemini-3-flash-preview",
-            contents=prompt
-        )
+        response = _gemini_generate(prompt, post)
 
         text = response.text
         if "```json" in text:
@@ -720,16 +736,15 @@ class EditorInChief:
             )
 
             if result:
-                # Update the post with infographic
-                posts = load_blog_posts()
-                post_to_update = next((p for p in posts if p.get("slug") == slug), None)
-
-                if post_to_update:
-                    post_to_update["infographicImage"] = f"/generated-images/{result.id}.jpg"
-                    post_to_update["infographicType"] = infographic_type
-                    post_to_update["infographicTitle"] = title
-                    post_to_update["infographicGeneratedAt"] = datetime.utcnow().isoformat() + "Z"
-                    save_blog_posts(posts)
+                # Update the post with infographic (locked read-modify-write)
+                with json_file(BLOG_DATA_PATH).edit() as posts:
+                    post_to_update = next((p for p in posts if p.get("slug") == slug), None)
+
+                    if post_to_update:
+                        post_to_update["infographicImage"] = f"/generated-images/{result.id}.jpg"
+                        post_to_update["infographicType"] = infographic_type
+                        post_to_update["infographicTitle"] = title
+                        post_to_update["infographicGeneratedAt"] = datetime.utcnow().isoformat() + "Z"
 
                 self._stats["images_generated"] += 1
                 self._stats["articles_improved"] += 1
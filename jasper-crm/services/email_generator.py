@@ -14,6 +14,7 @@ from models.email_sequence import (
     EmailPreviewResponse,
 )
 from services.aleph_client import aleph
+from services.llm_accounting import post_chat_completion
 
 
 # Tone prompts for AI personalization
@@ -226,8 +227,8 @@ LEAD CONTEXT:
 
         try:
             async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
+                response = await post_chat_completion(
+                    client, f"{self.base_url}/chat/completions", "email_generation",
                     headers={
                         "Authorization": f"Bearer {self.api_key}",
                         "HTTP-Referer": "https://jasperfinance.org",
@@ -395,8 +396,8 @@ Generate a thoughtful reply suggestion."""
 
         try:
             async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
+                response = await post_chat_completion(
+                    client, f"{self.base_url}/chat/completions", "email_reply_suggestion",
                     headers={
                         "Authorization": f"Bearer {self.api_key}",
                         "HTTP-Referer": "https://jasperfinance.org",
@@ -472,8 +473,8 @@ Analyze and provide improvement recommendations."""
 
         try:
             async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
+                response = await post_chat_completion(
+                    client, f"{self.base_url}/chat/completions", "email_analysis",
                     headers={
                         "Authorization": f"Bearer {self.api_key}",
                         "HTTP-Referer": "https://jasperfinance.org",
@@ -29,6 +29,8 @@ from typing import Optional, List, Dict, Any
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from services.llm_accounting import generate_gemini_content
+
 logger = logging.getLogger(__name__)
 
 
@@ -296,7 +298,8 @@ Respond with JSON only:
                 max_output_tokens=300,
             )
 
-            response = self.client.models.generate_content(
+            response = generate_gemini_content(
+                self.client, "content_evaluation",
                 model=self.model,
                 contents=prompt,
                 config=config,
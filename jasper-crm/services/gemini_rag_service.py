@@ -9,6 +9,8 @@ from typing import Optional, List, Dict, Any
 from google import genai
 from google.genai import types
 
+from services.llm_accounting import generate_gemini_content
+
 logger = logging.getLogger(__name__)
 
 # IMPORTANT: Use Gemini 3.0 Flash consistently
@@ -132,7 +134,8 @@ class GeminiRAGService:
         store_id = self.get_or_create_store(store_name)
         
         try:
-            response = self.client.models.generate_content(
+            response = generate_gemini_content(
+                self.client, "rag_search",
                 model=self.model,
                 contents=query,
                 config=types.GenerateContentConfig(
@@ -213,7 +216,8 @@ class GeminiRAGService:
             # Include URL in the prompt with url_context tool
             full_prompt = f"Based on the content at {url}, please answer: {prompt}"
             
-            response = self.client.models.generate_content(
+            response = generate_gemini_content(
+                self.client, "url_research",
                 model=self.model,
                 contents=full_prompt,
                 config=types.GenerateContentConfig(
@@ -248,7 +252,8 @@ class GeminiRAGService:
             Synthesized answer from all sources
         """
         try:
-            response = self.client.models.generate_content(
+            response = generate_gemini_content(
+                self.client, "url_research",
                 model=self.model,
                 contents=question,
                 config=types.GenerateContentConfig(
@@ -299,7 +304,8 @@ class GeminiRAGService:
             prompt = f"Context: {context}\n\nQuery: {query}"
         
         try:
-            response = self.client.models.generate_content(
+            response = generate_gemini_content(
+                self.client, "web_search",
                 model=self.model,
                 contents=prompt,
                 config=types.GenerateContentConfig(
@@ -17,6 +17,8 @@ from datetime import datetime
 from typing import Optional, Dict, List, Any
 import logging
 
+from services.json_file_store import json_file
+
 logger = logging.getLogger(__name__)
 
 # Registry file location
@@ -48,16 +50,14 @@ class ImageRegistry:
     
     def _load_registry(self) -> Dict[str, Any]:
         try:
-            with open(self.registry_file, "r") as f:
-                return json.load(f)
+            return json_file(self.registry_file, default=dict).read()
         except Exception as e:
             logger.error(f"Failed to load registry: {e}")
             return {"assignments": {}, "article_images": {}}
     
     def _save_registry(self, data: Dict[str, Any]):
         data["updated_at"] = datetime.utcnow().isoformat()
-        with open(self.registry_file, "w") as f:
-            json.dump(data, f, indent=2)
+        json_file(self.registry_file, default=dict).write(data)
     
     def is_available(self, image_path: str) -> bool:
         if not image_path or image_path == "/images/blog/default.jpg":
@@ -140,14 +140,15 @@ class ImageRegistry:
         
         return available
     
-    def sync_from_posts(self):
-        posts_file = DATA_DIR / "blog_posts.json"
-        if not posts_file.exists():
-            logger.warning("No blog_posts.json found to sync from")
-            return
-        
-        with open(posts_file, "r") as f:
-            posts = json.load(f)
+    def sync_from_posts(self, posts: Optional[List[Dict[str, Any]]] = None):
+        """Rebuild assignments from the posts' hero images (read from blog_posts.json if not given)."""
+        if posts is None:
+            posts_file = DATA_DIR / "blog_posts.json"
+            if not posts_file.exists():
+                logger.warning("No blog_posts.json found to sync from")
+                return
+            
+            posts = json_file(posts_file).read()
         
         if isinstance(posts, dict):
             posts = posts.get("posts", [])
@@ -1,18 +1,49 @@
 """
 JASPER CRM - Job Monitoring Service
 Tracks background job success/failure rates and provides metrics.
+
+Per job type, outcomes go into:
+- a ring of per-minute buckets covering the last 24 hours (counts, duration
+  sum and a fixed-bucket duration histogram), so rolling failure rates and
+  duration percentiles cost O(window buckets), never O(jobs)
+- running totals for the alert window, updated as minutes roll over, so
+  the failure-rate check after each failure is O(1)
+- a fixed-size ring buffer of the most recent outcomes (for last_failure)
+
+Finished jobs are kept in a bounded ring too. State is snapshotted to
+job_monitor_state.json every SNAPSHOT_INTERVAL_S when something changed
+(and at shutdown), instead of rewriting the file on every completion.
 """
 
+import bisect
+import atexit
 import logging
+import threading
+import time
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional
 from enum import Enum
-from collections import defaultdict
-import json
 import os
 
+from services.json_file_store import json_file
+
 logger = logging.getLogger(__name__)
 
+WINDOW_MINUTES = 24 * 60           # Longest window get_metrics() can report on
+RECENT_OUTCOMES = 1000             # Ring buffer of outcomes per job type
+FINISHED_JOBS_KEPT = 1000          # Finished job records kept for get_job()/get_recent_jobs()
+ALERT_WINDOW_MINUTES = int(os.getenv("JOB_ALERT_WINDOW_MINUTES", "60"))
+ALERT_MIN_SAMPLES = 10
+ALERT_COOLDOWN_S = 15 * 60
+SNAPSHOT_INTERVAL_S = float(os.getenv("JOB_MONITOR_SNAPSHOT_S", "60"))
+
+# Duration histogram upper bounds (ms); the last bucket is open-ended
+DURATION_BUCKETS_MS = [
+    10, 25, 50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000, 30_000,
+    60_000, 120_000, 300_000, 600_000, 1_800_000, 3_600_000,
+]
+
 
 class JobStatus(str, Enum):
     PENDING = "pending"
@@ -22,101 +53,320 @@ class JobStatus(str, Enum):
     TIMEOUT = "timeout"
 
 
+class _MinuteBucket:
+    """Outcomes of one job type within one wall-clock minute."""
+
+    __slots__ = ("minute", "completed", "failed", "duration_sum", "hist")
+
+    def __init__(self, minute: int):
+        self.minute = minute
+        self.completed = 0
+        self.failed = 0
+        self.duration_sum = 0.0  # completed jobs only, like avg_duration_ms
+        self.hist = [0] * (len(DURATION_BUCKETS_MS) + 1)
+
+    def to_list(self) -> list:
+        return [self.minute, self.completed, self.failed, self.duration_sum, self.hist]
+
+    @classmethod
+    def from_list(cls, data: list) -> "_MinuteBucket":
+        bucket = cls(data[0])
+        bucket.completed, bucket.failed, bucket.duration_sum, bucket.hist = data[1], data[2], data[3], list(data[4])
+        return bucket
+
+
+class JobTypeStats:
+    """Rolling telemetry for one job type; all updates are O(1)."""
+
+    def __init__(self, alert_window: int = ALERT_WINDOW_MINUTES):
+        self.buckets: List[Optional[_MinuteBucket]] = [None] * WINDOW_MINUTES
+        self.recent: deque = deque(maxlen=RECENT_OUTCOMES)
+        self.alert_window = alert_window
+        self.window_total = 0
+        self.window_failed = 0
+        self._window_minute: Optional[int] = None  # Newest minute included in window totals
+
+    def _bucket(self, minute: int) -> _MinuteBucket:
+        slot = minute % WINDOW_MINUTES
+        bucket = self.buckets[slot]
+        if bucket is None or bucket.minute != minute:
+            bucket = _MinuteBucket(minute)
+            self.buckets[slot] = bucket
+        return bucket
+
+    def _advance(self, minute: int):
+        """Drop minutes that fell out of the alert window from the running totals."""
+        if self._window_minute is None or minute - self._window_minute >= self.alert_window:
+            self.window_total = self.window_failed = 0
+        else:
+            for leaving in range(self._window_minute - self.alert_window + 1, minute - self.alert_window + 1):
+                old = self.buckets[leaving % WINDOW_MINUTES]
+                if old is not None and old.minute == leaving:
+                    self.window_total -= old.completed + old.failed
+                    self.window_failed -= old.failed
+        self._window_minute = max(minute, self._window_minute or minute)
+
+    def record(self, ts: float, status: str, duration_ms: float, error: Optional[str] = None):
+        minute = int(ts // 60)
+        self._advance(minute)
+        self.recent.append((ts, status, duration_ms, error))
+        if self._window_minute - minute >= WINDOW_MINUTES:
+            return  # Older than anything the buckets cover
+        bucket = self._bucket(minute)
+        failed = status != JobStatus.COMPLETED.value
+        if failed:
+            bucket.failed += 1
+        else:
+            bucket.completed += 1
+            bucket.duration_sum += duration_ms
+        if minute > self._window_minute - self.alert_window:
+            self.window_total += 1
+            self.window_failed += failed
+        bucket.hist[bisect.bisect_left(DURATION_BUCKETS_MS, duration_ms)] += 1
+
+    def failure_rate(self, now: float) -> tuple:
+        """(failures, total) over the alert window ending now."""
+        self._advance(int(now // 60))
+        return self.window_failed, self.window_total
+
+    def window(self, now: float, minutes: int) -> Dict[str, Any]:
+        """Totals and duration percentiles over the last `minutes` (max 24h)."""
+        minutes = max(1, min(minutes, WINDOW_MINUTES))
+        current = int(now // 60)
+        completed = failed = 0
+        duration_sum = 0.0
+        hist = [0] * (len(DURATION_BUCKETS_MS) + 1)
+        for minute in range(current - minutes + 1, current + 1):
+            bucket = self.buckets[minute % WINDOW_MINUTES]
+            if bucket is None or bucket.minute != minute:
+                continue
+            completed += bucket.completed
+            failed += bucket.failed
+            duration_sum += bucket.duration_sum
+            for i, count in enumerate(bucket.hist):
+                if count:
+                    hist[i] += count
+        return {
+            "completed": completed,
+            "failed": failed,
+            "duration_sum": duration_sum,
+            "p50": _percentile(hist, 0.50),
+            "p95": _percentile(hist, 0.95),
+            "p99": _percentile(hist, 0.99),
+        }
+
+    def last_failure(self, since: float) -> Optional[Dict[str, Any]]:
+        for ts, status, duration_ms, error in reversed(self.recent):
+            if ts <= since:
+                break
+            if status == JobStatus.FAILED.value:
+                return {
+                    "timestamp": datetime.fromtimestamp(ts).isoformat(),
+                    "status": status,
+                    "duration_ms": duration_ms,
+                    "error": error,
+                }
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "buckets": [b.to_list() for b in self.buckets if b is not None],
+            "recent": [list(r) for r in self.recent],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], now: float, alert_window: int = ALERT_WINDOW_MINUTES) -> "JobTypeStats":
+        stats = cls(alert_window)
+        current = int(now // 60)
+        for raw in data.get("buckets", []):
+            bucket = _MinuteBucket.from_list(raw)
+            if current - WINDOW_MINUTES < bucket.minute <= current:
+                stats.buckets[bucket.minute % WINDOW_MINUTES] = bucket
+        stats.recent.extend(tuple(r) for r in data.get("recent", []))
+        # Rebuild alert-window totals from the restored buckets
+        stats._window_minute = current
+        for minute in range(current - alert_window + 1, current + 1):
+            bucket = stats.buckets[minute % WINDOW_MINUTES]
+            if bucket is not None and bucket.minute == minute:
+                stats.window_total += bucket.completed + bucket.failed
+                stats.window_failed += bucket.failed
+        return stats
+
+
+def _percentile(hist: List[int], q: float) -> Optional[float]:
+    """Linear interpolation within the histogram bucket holding quantile q."""
+    total = sum(hist)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, count in enumerate(hist):
+        if count and seen + count >= rank:
+            lower = DURATION_BUCKETS_MS[i - 1] if i > 0 else 0
+            upper = DURATION_BUCKETS_MS[i] if i < len(DURATION_BUCKETS_MS) else DURATION_BUCKETS_MS[-1] * 2
+            return round(lower + (upper - lower) * ((rank - seen) / count), 2)
+        seen += count
+    return float(DURATION_BUCKETS_MS[-1])
+
+
 class JobMonitor:
     """
     Monitors background jobs and tracks metrics.
     Provides alerting when failure rates exceed thresholds.
     """
 
-    def __init__(self, data_dir: str = "/opt/jasper-crm/data"):
+    def __init__(
+        self,
+        data_dir: str = "/opt/jasper-crm/data",
+        clock: Callable[[], float] = time.time,
+        snapshot_interval: float = SNAPSHOT_INTERVAL_S,
+    ):
         self.data_dir = data_dir
-        self.jobs: Dict[str, Dict[str, Any]] = {}
-        self.metrics: Dict[str, List[Dict]] = defaultdict(list)
+        self.clock = clock
+        self.running: Dict[str, Dict[str, Any]] = {}
+        self.finished: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.stats: Dict[str, JobTypeStats] = {}
         self.alert_threshold = 0.3  # 30% failure rate triggers alert
+        self._last_alert: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._state_file = json_file(os.path.join(data_dir, "job_monitor_state.json"), default=dict)
         self._load_state()
 
+        self.snapshot_interval = snapshot_interval
+        if snapshot_interval > 0:
+            threading.Thread(target=self._snapshot_loop, name="job-monitor-snapshot", daemon=True).start()
+        atexit.register(self.save_snapshot)
+
+    @property
+    def jobs(self) -> Dict[str, Dict[str, Any]]:
+        """All tracked jobs (running and recently finished) by ID."""
+        with self._lock:
+            return {**self.finished, **self.running}
+
+    # -------------------------------------------------------------------------
+    # Persistence
+    # -------------------------------------------------------------------------
+
     def _load_state(self):
-        """Load persisted job state."""
-        state_file = os.path.join(self.data_dir, "job_monitor_state.json")
+        """Load the last snapshot (or a pre-snapshot state file)."""
         try:
-            if os.path.exists(state_file):
-                with open(state_file, 'r') as f:
-                    data = json.load(f)
-                    self.jobs = data.get("jobs", {})
-                    self.metrics = defaultdict(list, data.get("metrics", {}))
+            data = self._state_file.read()
         except Exception as e:
             logger.error(f"Failed to load job monitor state: {e}")
+            return
+        now = self.clock()
+        if data.get("format") == 2:
+            self.running = data.get("running", {})
+            self.finished = OrderedDict(data.get("finished", []))
+            self.stats = {
+                job_type: JobTypeStats.from_dict(raw, now)
+                for job_type, raw in data.get("stats", {}).items()
+            }
+            return
+
+        # Legacy state: every job plus a list of metric dicts per type
+        for job_id, job in data.get("jobs", {}).items():
+            target = self.running if job.get("status") == JobStatus.RUNNING.value else self.finished
+            target[job_id] = job
+        for job_type, metrics in data.get("metrics", {}).items():
+            stats = self.stats.setdefault(job_type, JobTypeStats())
+            for m in metrics:
+                try:
+                    ts = datetime.fromisoformat(m["timestamp"]).timestamp()
+                except (KeyError, ValueError):
+                    continue
+                if ts > now - WINDOW_MINUTES * 60:
+                    stats.record(ts, m.get("status"), m.get("duration_ms") or 0.0, m.get("error"))
+        self._trim_finished()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "format": 2,
+                "saved_at": datetime.now().isoformat(),
+                "running": dict(self.running),
+                "finished": list(self.finished.items()),
+                "stats": {job_type: s.to_dict() for job_type, s in self.stats.items()},
+            }
 
-    def _save_state(self):
-        """Persist job state to disk."""
-        state_file = os.path.join(self.data_dir, "job_monitor_state.json")
+    def save_snapshot(self, force: bool = False):
+        """Persist state if anything changed since the last snapshot."""
+        with self._lock:
+            if not (self._dirty or force):
+                return
+            self._dirty = False
+            data = self.snapshot()
         try:
-            os.makedirs(self.data_dir, exist_ok=True)
-            with open(state_file, 'w') as f:
-                json.dump({
-                    "jobs": self.jobs,
-                    "metrics": dict(self.metrics)
-                }, f, indent=2, default=str)
+            self._state_file.write(data)
         except Exception as e:
+            self._dirty = True
             logger.error(f"Failed to save job monitor state: {e}")
 
+    def _snapshot_loop(self):
+        while True:
+            time.sleep(self.snapshot_interval)
+            self.save_snapshot()
+
+    # -------------------------------------------------------------------------
+    # Recording
+    # -------------------------------------------------------------------------
+
     def start_job(self, job_id: str, job_type: str, metadata: Dict = None) -> Dict[str, Any]:
         """Record job start."""
         job = {
             "id": job_id,
             "type": job_type,
             "status": JobStatus.RUNNING.value,
-            "started_at": datetime.now().isoformat(),
+            "started_at": datetime.fromtimestamp(self.clock()).isoformat(),
             "completed_at": None,
             "duration_ms": None,
             "error": None,
             "metadata": metadata or {}
         }
-        self.jobs[job_id] = job
+        with self._lock:
+            self.running[job_id] = job
+            self._dirty = True
         logger.info(f"Job started: {job_id} ({job_type})")
         return job
 
+    def _finish(self, job_id: str, status: JobStatus, **fields) -> Optional[Dict[str, Any]]:
+        now = self.clock()
+        with self._lock:
+            job = self.running.pop(job_id, None)
+            if job is None:
+                return None
+            job["status"] = status.value
+            job["completed_at"] = datetime.fromtimestamp(now).isoformat()
+            job.update(fields)
+
+            # Calculate duration
+            started = datetime.fromisoformat(job["started_at"]).timestamp()
+            job["duration_ms"] = (now - started) * 1000
+
+            self.finished[job_id] = job
+            self._trim_finished()
+            self._record_metric(job, now)
+            self._dirty = True
+        return job
+
     def complete_job(self, job_id: str, result: Dict = None) -> Dict[str, Any]:
         """Record job completion."""
-        if job_id not in self.jobs:
+        job = self._finish(job_id, JobStatus.COMPLETED, result=result)
+        if job is None:
             logger.warning(f"Unknown job completed: {job_id}")
             return None
 
-        job = self.jobs[job_id]
-        job["status"] = JobStatus.COMPLETED.value
-        job["completed_at"] = datetime.now().isoformat()
-        job["result"] = result
-
-        # Calculate duration
-        started = datetime.fromisoformat(job["started_at"])
-        job["duration_ms"] = (datetime.now() - started).total_seconds() * 1000
-
-        # Record metric
-        self._record_metric(job)
-        self._save_state()
-
         logger.info(f"Job completed: {job_id} ({job['duration_ms']:.0f}ms)")
         return job
 
     def fail_job(self, job_id: str, error: str) -> Dict[str, Any]:
         """Record job failure."""
-        if job_id not in self.jobs:
+        job = self._finish(job_id, JobStatus.FAILED, error=error)
+        if job is None:
             logger.warning(f"Unknown job failed: {job_id}")
             return None
 
-        job = self.jobs[job_id]
-        job["status"] = JobStatus.FAILED.value
-        job["completed_at"] = datetime.now().isoformat()
-        job["error"] = error
-
-        # Calculate duration
-        started = datetime.fromisoformat(job["started_at"])
-        job["duration_ms"] = (datetime.now() - started).total_seconds() * 1000
-
-        # Record metric
-        self._record_metric(job)
-        self._save_state()
-
         logger.error(f"Job failed: {job_id} - {error}")
 
         # Check if alert needed
@@ -124,31 +374,35 @@ class JobMonitor:
 
         return job
 
-    def _record_metric(self, job: Dict):
-        """Record job metric for analytics."""
-        metric = {
-            "timestamp": datetime.now().isoformat(),
-            "status": job["status"],
-            "duration_ms": job["duration_ms"],
-            "error": job.get("error")
-        }
-        self.metrics[job["type"]].append(metric)
+    def _trim_finished(self):
+        while len(self.finished) > FINISHED_JOBS_KEPT:
+            self.finished.popitem(last=False)
 
-        # Keep only last 1000 metrics per type
-        if len(self.metrics[job["type"]]) > 1000:
-            self.metrics[job["type"]] = self.metrics[job["type"]][-1000:]
+    def _record_metric(self, job: Dict, now: float):
+        """Record job metric for analytics."""
+        stats = self.stats.get(job["type"])
+        if stats is None:
+            stats = self.stats[job["type"]] = JobTypeStats()
+        stats.record(now, job["status"], job["duration_ms"], job.get("error"))
 
     def _check_alert(self, job_type: str):
-        """Check if failure rate exceeds threshold."""
-        recent = self.metrics[job_type][-100:]  # Last 100 jobs
-        if len(recent) < 10:
-            return  # Not enough data
-
-        failures = sum(1 for m in recent if m["status"] == JobStatus.FAILED.value)
-        failure_rate = failures / len(recent)
-
-        if failure_rate >= self.alert_threshold:
-            self._trigger_alert(job_type, failure_rate)
+        """Check if the rolling-window failure rate exceeds threshold."""
+        now = self.clock()
+        with self._lock:
+            stats = self.stats.get(job_type)
+            if stats is None:
+                return
+            failures, total = stats.failure_rate(now)
+            if total < ALERT_MIN_SAMPLES:
+                return  # Not enough data
+            failure_rate = failures / total
+            if failure_rate < self.alert_threshold:
+                return
+            if now - self._last_alert.get(job_type, 0) < ALERT_COOLDOWN_S:
+                return
+            self._last_alert[job_type] = now
+
+        self._trigger_alert(job_type, failure_rate)
 
     def _trigger_alert(self, job_type: str, failure_rate: float):
         """Trigger alert for high failure rate."""
@@ -156,42 +410,50 @@ class JobMonitor:
         alerting_service.send_alert(
             level="warning",
             title=f"High Job Failure Rate: {job_type}",
-            message=f"Failure rate: {failure_rate*100:.1f}% (threshold: {self.alert_threshold*100:.0f}%)",
+            message=(
+                f"Failure rate: {failure_rate*100:.1f}% over the last {ALERT_WINDOW_MINUTES} min "
+                f"(threshold: {self.alert_threshold*100:.0f}%)"
+            ),
             metadata={"job_type": job_type, "failure_rate": failure_rate}
         )
 
-    def get_metrics(self, job_type: str = None, hours: int = 24) -> Dict[str, Any]:
-        """Get job metrics for dashboard."""
-        cutoff = datetime.now() - timedelta(hours=hours)
-
-        if job_type:
-            types_to_check = [job_type]
-        else:
-            types_to_check = list(self.metrics.keys())
-
-        results = {}
-        for jtype in types_to_check:
-            recent = [
-                m for m in self.metrics[jtype]
-                if datetime.fromisoformat(m["timestamp"]) > cutoff
-            ]
-
-            if not recent:
-                continue
-
-            completed = [m for m in recent if m["status"] == JobStatus.COMPLETED.value]
-            failed = [m for m in recent if m["status"] == JobStatus.FAILED.value]
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
 
-            avg_duration = sum(m["duration_ms"] for m in completed) / len(completed) if completed else 0
-
-            results[jtype] = {
-                "total": len(recent),
-                "completed": len(completed),
-                "failed": len(failed),
-                "success_rate": len(completed) / len(recent) if recent else 0,
-                "avg_duration_ms": round(avg_duration, 2),
-                "last_failure": failed[-1] if failed else None
-            }
+    def get_metrics(self, job_type: str = None, hours: int = 24) -> Dict[str, Any]:
+        """Get job metrics for dashboard (windows longer than 24h are capped at 24h)."""
+        now = self.clock()
+        minutes = int(hours * 60)
+
+        with self._lock:
+            if job_type:
+                types_to_check = [job_type] if job_type in self.stats else []
+            else:
+                types_to_check = list(self.stats.keys())
+
+            results = {}
+            for jtype in types_to_check:
+                stats = self.stats[jtype]
+                window = stats.window(now, minutes)
+                total = window["completed"] + window["failed"]
+                if not total:
+                    continue
+
+                completed = window["completed"]
+                avg_duration = window["duration_sum"] / completed if completed else 0
+
+                results[jtype] = {
+                    "total": total,
+                    "completed": completed,
+                    "failed": window["failed"],
+                    "success_rate": completed / total,
+                    "avg_duration_ms": round(avg_duration, 2),
+                    "p50_duration_ms": window["p50"],
+                    "p95_duration_ms": window["p95"],
+                    "p99_duration_ms": window["p99"],
+                    "last_failure": stats.last_failure(now - minutes * 60)
+                }
 
         return {
             "period_hours": hours,
@@ -201,7 +463,8 @@ class JobMonitor:
 
     def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Get job details by ID."""
-        return self.jobs.get(job_id)
+        with self._lock:
+            return self.running.get(job_id) or self.finished.get(job_id)
 
     def get_recent_jobs(self, limit: int = 20, job_type: str = None) -> List[Dict[str, Any]]:
         """Get recent jobs."""
@@ -217,20 +480,21 @@ class JobMonitor:
 
     def cleanup_old_jobs(self, days: int = 7):
         """Remove jobs older than specified days."""
-        cutoff = datetime.now() - timedelta(days=days)
-
-        to_remove = []
-        for job_id, job in self.jobs.items():
-            started = datetime.fromisoformat(job["started_at"])
-            if started < cutoff:
-                to_remove.append(job_id)
+        cutoff = datetime.fromtimestamp(self.clock()) - timedelta(days=days)
 
-        for job_id in to_remove:
-            del self.jobs[job_id]
+        with self._lock:
+            to_remove = [
+                job_id for job_id, job in self.jobs.items()
+                if datetime.fromisoformat(job["started_at"]) < cutoff
+            ]
+            for job_id in to_remove:
+                self.running.pop(job_id, None)
+                self.finished.pop(job_id, None)
+            if to_remove:
+                self._dirty = True
 
         if to_remove:
             logger.info(f"Cleaned up {len(to_remove)} old jobs")
-            self._save_state()
 
 
 # Singleton instance
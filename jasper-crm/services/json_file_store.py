@@ -0,0 +1,369 @@
+"""
+JASPER CRM - Safe JSON File Persistence
+
+Shared writer for JSON data files that several services read and write
+(blog_posts.json above all: BlogService, LinkBuilderService,
+CitationService, editor_in_chief and ImageRegistry all touch it).
+
+- Atomic: the new contents are written to a temp file in the same
+  directory and fsync'd before os.replace() swaps it in. Readers see the
+  old file or the new one, never a truncated one, and a crash mid-write
+  leaves the previous version intact.
+- Locked: writers take an exclusive flock on `<file>.lock` (inter-process)
+  plus a per-file RLock (threads), and read-modify-write happens under it,
+  so concurrent editors no longer overwrite each other's changes.
+- Versioned: `read_versioned()` returns a version token; `write(data,
+  expected_version=...)` raises WriteConflict if the file changed since.
+- Debounced: `update(fn, defer=True)` applies `fn` to the in-memory view
+  immediately and queues it; a background flusher replays queued updates
+  on the latest file contents and writes once per burst (after
+  `debounce_s` of quiet, at most `max_delay_s` after the first change).
+  A queued update that raises when replayed is logged and dropped; the
+  others are still written.
+
+Usage:
+    from services.json_file_store import json_file
+
+    posts_file = json_file(BLOG_DATA_PATH, default=list)
+
+    with posts_file.edit() as posts:       # locked read-modify-write
+        posts.append(new_post)
+
+    posts_file.update(bump_views, defer=True)   # coalesced with other edits
+
+One JsonFile is shared per path within a process, so every service that
+goes through json_file() shares the same lock and pending-write queue.
+"""
+
+import os
+import copy
+import json
+import time
+import fcntl
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WriteConflict(Exception):
+    """Raised when a compare-and-swap write finds the file has changed."""
+
+    def __init__(self, path: Path, expected: Optional[str], actual: Optional[str]):
+        self.path = path
+        self.expected = expected
+        self.actual = actual
+        super().__init__(f"{path.name} changed since it was read (expected {expected}, found {actual})")
+
+
+def _apply(fn: Callable[[Any], Any], data: Any) -> Any:
+    """Run an update; fn may mutate in place (returning None) or return new data."""
+    result = fn(data)
+    return data if result is None else result
+
+
+class JsonFile:
+    """One JSON file with atomic, locked, optionally debounced writes."""
+
+    def __init__(
+        self,
+        path: Path,
+        default: Callable[[], Any] = list,
+        debounce_s: float = 0.0,
+        max_delay_s: float = 2.0,
+        indent: Optional[int] = 2,
+    ):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.default = default
+        self.debounce_s = debounce_s
+        self.max_delay_s = max_delay_s
+        self.indent = indent
+
+        self._lock = threading.RLock()
+        self._lock_fd: Optional[int] = None
+        self._lock_depth = 0
+
+        self._pending: List[Callable[[Any], Any]] = []
+        self._view: Any = None
+        self._first_pending_at: Optional[float] = None
+        self._last_change_at = 0.0
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    # -------------------------------------------------------------------------
+    # Locking
+    # -------------------------------------------------------------------------
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Hold the thread lock and the inter-process file lock (re-entrant)."""
+        with self._lock:
+            if self._lock_depth == 0:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                self._lock_fd = fd
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                    os.close(self._lock_fd)
+                    self._lock_fd = None
+
+    # -------------------------------------------------------------------------
+    # Disk I/O
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _version_of(st: os.stat_result) -> str:
+        # os.replace() gives every write a new inode; mtime/size catch in-place writers
+        return f"{st.st_ino}-{st.st_mtime_ns}-{st.st_size}"
+
+    def _read_disk(self) -> Tuple[Any, Optional[str], Optional[str]]:
+        """(data, raw text, version); the default when the file doesn't exist."""
+        try:
+            with open(self.path, "r") as f:
+                version = self._version_of(os.fstat(f.fileno()))
+                raw = f.read()
+        except FileNotFoundError:
+            return self.default(), None, None
+        return json.loads(raw), raw, version
+
+    def _dumps(self, data: Any) -> str:
+        return json.dumps(data, indent=self.indent, default=str)
+
+    def _write_text(self, text: str) -> str:
+        """Write-ahead to a temp file, fsync, then atomically swap it in."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, "w") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        dir_fd = os.open(self.path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        return self._version_of(os.stat(self.path))
+
+    # -------------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------------
+
+    def read(self) -> Any:
+        """Current contents, including queued (not yet flushed) updates."""
+        with self._lock:
+            if self._pending:
+                return copy.deepcopy(self._view)
+        return self._read_disk()[0]
+
+    def read_versioned(self) -> Tuple[Any, Optional[str]]:
+        """(data, version) for a later write(..., expected_version=version)."""
+        with self.locked():
+            self._flush_locked()
+            data, _, version = self._read_disk()
+            return data, version
+
+    def version(self) -> Optional[str]:
+        try:
+            return self._version_of(os.stat(self.path))
+        except FileNotFoundError:
+            return None
+
+    def write(self, data: Any, expected_version: Optional[str] = None) -> str:
+        """
+        Replace the file's contents and return the new version.
+
+        Queued updates are flushed first. With `expected_version`, raises
+        WriteConflict if the file changed since that version was read.
+        """
+        with self.locked():
+            self._flush_locked()
+            if expected_version is not None:
+                current = self.version()
+                if current != expected_version:
+                    raise WriteConflict(self.path, expected_version, current)
+            return self._write_text(self._dumps(data))
+
+    def update(self, fn: Callable[[Any], Any], defer: bool = False) -> Any:
+        """
+        Apply `fn` to the latest contents and persist the result.
+
+        With `defer=True` (and a debounce configured), the write is queued
+        and coalesced with other updates; `fn` is then run again on the
+        file's contents at flush time, so it must only depend on its input.
+        Returns the updated data.
+        """
+        if defer and self.debounce_s > 0:
+            with self._lock:
+                base = self._view if self._pending else self._read_disk()[0]
+                try:
+                    self._view = _apply(fn, base)
+                except Exception:
+                    if self._pending:
+                        self._view = self._replay(self._pending)[0]  # Undo a partial in-place change
+                    raise
+                self._pending.append(fn)
+                self._schedule()
+                return copy.deepcopy(self._view)
+
+        with self.locked():
+            self._flush_locked()
+            data, raw, _ = self._read_disk()
+            data = _apply(fn, data)
+            text = self._dumps(data)
+            if text != raw:
+                self._write_text(text)
+            return data
+
+    @contextmanager
+    def edit(self) -> Iterator[Any]:
+        """
+        Locked read-modify-write: mutate the yielded data in place.
+
+        The file is rewritten on exit only if the contents changed, and not
+        at all if the block raises.
+        """
+        with self.locked():
+            self._flush_locked()
+            data, raw, _ = self._read_disk()
+            yield data
+            text = self._dumps(data)
+            if text != raw:
+                self._write_text(text)
+
+    def flush(self):
+        """Write any queued updates now."""
+        with self.locked():
+            self._flush_locked()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    # -------------------------------------------------------------------------
+    # Debounced flushing
+    # -------------------------------------------------------------------------
+
+    def _replay(self, fns: List[Callable[[Any], Any]]) -> Tuple[Any, Optional[str]]:
+        """
+        Apply queued updates to the file's contents; returns (data, raw).
+
+        An update that raises is logged and removed from `fns`, and the rest
+        are replayed on a fresh read (it may have half-applied in place), so
+        one bad update can't wedge the queue.
+        """
+        while True:
+            data, raw, _ = self._read_disk()
+            for i, fn in enumerate(fns):
+                try:
+                    data = _apply(fn, data)
+                except Exception as e:
+                    logger.error(f"[JsonFile] Dropped a queued update to {self.path.name} that failed: {e!r}")
+                    del fns[i]
+                    break
+            else:
+                return data, raw
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        pending = list(self._pending)
+        data, raw = self._replay(pending)
+        text = self._dumps(data)
+        if text != raw:
+            self._write_text(text)
+        self._pending.clear()
+        self._view = None
+        self._first_pending_at = None
+        logger.debug(f"[JsonFile] Flushed {len(pending)} queued updates to {self.path.name}")
+
+    def _schedule(self):
+        now = time.monotonic()
+        if self._first_pending_at is None:
+            self._first_pending_at = now
+        self._last_change_at = now
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(
+                target=self._run_flusher, name=f"json-flush-{self.path.name}", daemon=True
+            )
+            self._flusher.start()
+        self._wake.set()
+
+    def _run_flusher(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        break
+                    due = min(
+                        self._last_change_at + self.debounce_s,
+                        self._first_pending_at + self.max_delay_s,
+                    )
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(min(delay, self.debounce_s))
+                    continue
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"[JsonFile] Flush of {self.path.name} failed, will retry: {e}")
+                    time.sleep(max(self.debounce_s, 0.5))
+
+
+_files: Dict[str, JsonFile] = {}
+_files_lock = threading.Lock()
+
+
+def json_file(
+    path: Path,
+    default: Callable[[], Any] = list,
+    debounce_s: Optional[float] = None,
+    max_delay_s: Optional[float] = None,
+) -> JsonFile:
+    """The process-wide JsonFile for `path` (created on first use)."""
+    key = os.path.abspath(path)
+    with _files_lock:
+        handle = _files.get(key)
+        if handle is None:
+            handle = JsonFile(Path(path), default=default)
+            _files[key] = handle
+        if debounce_s is not None:
+            handle.debounce_s = debounce_s
+        if max_delay_s is not None:
+            handle.max_delay_s = max_delay_s
+        return handle
+
+
+@atexit.register
+def flush_all():
+    """Flush queued updates for every file (runs at interpreter exit)."""
+    for handle in list(_files.values()):
+        if handle.pending:
+            try:
+                handle.flush()
+            except Exception as e:
+                logger.error(f"[JsonFile] Final flush of {handle.path.name} failed: {e}")
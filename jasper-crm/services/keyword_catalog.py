@@ -0,0 +1,250 @@
+"""
+JASPER CRM - Compiled Keyword Catalog
+
+The keyword CSVs compiled into a KeywordTable on disk, so API workers
+memory-map one shared copy instead of each parsing every sector CSV
+into a list of dicts at import time.
+
+data/keyword_catalog/
+    manifest.json       source CSVs (mtime/size/sha1), current build, column metadata
+    build-<id>/*.npy    KeywordTable.save() arrays (columns, string table, indexes)
+    enrichment.json     AI enrichment results by lowercased keyword, with timestamps
+
+- Lazy: nothing is read until the first search.
+- Rebuilt only when needed: on load the CSVs are stat'ed against the
+  manifest. A file whose mtime changed but whose sha1 didn't just has its
+  manifest entry refreshed; added, removed or edited files trigger one
+  compile, under the manifest's inter-process lock so concurrent workers
+  don't all compile.
+- Enrichment survives rebuilds: it is keyed by keyword text and applied
+  on top of the mapped columns (enriched flag, missing intents).
+
+Compile ahead of a deploy with:  python -m services.keyword_catalog
+"""
+
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import argparse
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from services.json_file_store import json_file
+from services.keyword_table import KeywordTable
+
+logger = logging.getLogger(__name__)
+
+CATALOG_DIR = Path(__file__).parent.parent / "data" / "keyword_catalog"
+CATALOG_FORMAT = 1  # Bump when KeywordTable's saved arrays change
+BUILDS_KEPT = 2     # Current build plus the previous one (workers may still map it)
+
+SourcesFn = Callable[[], List[Path]]
+ParseFn = Callable[[Path], List[Dict[str, Any]]]
+
+
+def _sha1(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class KeywordCatalog:
+    """Lazily loaded, incrementally rebuilt KeywordTable over the keyword CSVs."""
+
+    def __init__(self, sources_fn: SourcesFn, parse_fn: ParseFn, catalog_dir: Path = CATALOG_DIR):
+        self.sources_fn = sources_fn
+        self.parse_fn = parse_fn
+        self.catalog_dir = Path(catalog_dir)
+        self._manifest = json_file(self.catalog_dir / "manifest.json", default=dict)
+        self._enrichment = json_file(self.catalog_dir / "enrichment.json", default=dict)
+        self._lock = threading.RLock()
+        self._table: Optional[KeywordTable] = None
+
+    # -------------------------------------------------------------------------
+    # Loading
+    # -------------------------------------------------------------------------
+
+    @property
+    def table(self) -> KeywordTable:
+        """The keyword table, compiled or mapped on first use."""
+        table = self._table
+        if table is None:
+            with self._lock:
+                if self._table is None:
+                    self._table = self._open()
+                table = self._table
+        return table
+
+    def refresh(self) -> bool:
+        """Re-check the CSVs and reload if the catalog was rebuilt; True if it changed."""
+        with self._lock:
+            previous = self._manifest.read().get("build")
+            table = self._open()
+            changed = self._manifest.read().get("build") != previous or self._table is None
+            self._table = table
+            return changed
+
+    def _open(self) -> KeywordTable:
+        started = time.perf_counter()
+        if not self.sources_fn():
+            # Nothing to compile; don't leave an empty catalog behind
+            return KeywordTable.from_records([])
+        manifest = self._manifest.read()
+        if not self._is_current(manifest):
+            with self._manifest.locked():
+                # Another worker may have compiled while we waited for the lock
+                manifest = self._manifest.read()
+                if not self._is_current(manifest):
+                    manifest = self._compile()
+        table = KeywordTable.load(self.catalog_dir / manifest["build"], manifest["table"])
+        self._apply_enrichment(table, self._enrichment.read())
+        logger.info(
+            f"[KeywordCatalog] Mapped {len(table)} keywords from build {manifest['build']} "
+            f"in {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+        return table
+
+    def _is_current(self, manifest: Dict[str, Any]) -> bool:
+        if manifest.get("format") != CATALOG_FORMAT or not manifest.get("build"):
+            return False
+        if not (self.catalog_dir / manifest["build"]).is_dir():
+            return False
+        recorded = manifest.get("sources", {})
+        sources = self.sources_fn()
+        if sorted(str(path) for path in sources) != sorted(recorded):
+            return False
+
+        touched = {}
+        for path in sources:
+            entry = recorded[str(path)]
+            st = path.stat()
+            if st.st_mtime_ns == entry["mtime_ns"] and st.st_size == entry["size"]:
+                continue
+            # Touched (checkout, copy) but maybe not edited: compare content
+            if st.st_size != entry["size"] or _sha1(path) != entry["sha1"]:
+                return False
+            touched[str(path)] = dict(entry, mtime_ns=st.st_mtime_ns)
+        if touched:
+            def remember_mtimes(data):
+                data["sources"].update(touched)
+            self._manifest.update(remember_mtimes)
+        return True
+
+    # -------------------------------------------------------------------------
+    # Compiling
+    # -------------------------------------------------------------------------
+
+    def compile(self) -> Dict[str, Any]:
+        """Rebuild from the CSVs unconditionally and switch to the new build."""
+        with self._lock, self._manifest.locked():
+            manifest = self._compile()
+            self._table = None
+            return manifest
+
+    def _compile(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        sources = {}
+        records: List[Dict[str, Any]] = []
+        for path in self.sources_fn():
+            st = path.stat()
+            sources[str(path)] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha1": _sha1(path)}
+            records.extend(self.parse_fn(path))
+
+        # Never reuse a name: another worker may have the old build mapped
+        build = f"build-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        meta = KeywordTable.from_records(records).save(self.catalog_dir / build)
+        manifest = {
+            "format": CATALOG_FORMAT,
+            "build": build,
+            "built_at": datetime.now(timezone.utc).isoformat(),
+            "sources": sources,
+            "table": meta,
+        }
+        self._manifest.write(manifest)
+        self._remove_old_builds(build)
+        logger.info(
+            f"[KeywordCatalog] Compiled {len(records)} keywords from {len(sources)} files "
+            f"in {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+        return manifest
+
+    def _remove_old_builds(self, current: str):
+        builds = sorted(
+            (p for p in self.catalog_dir.glob("build-*") if p.is_dir() and p.name != current),
+            key=lambda p: p.stat().st_mtime,
+        )
+        for old in builds[:max(0, len(builds) - (BUILDS_KEPT - 1))]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    # -------------------------------------------------------------------------
+    # Enrichment
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _apply_entry(table: KeywordTable, keyword: str, entry: Dict[str, Any]):
+        intent = (entry.get("result") or {}).get("search_intent")
+        for row in table.rows_for(keyword):
+            table.enriched[row] = True
+            if intent and table.intent.value(row) is None:
+                table.intent.set(row, intent)
+
+    def _apply_enrichment(self, table: KeywordTable, enrichment: Dict[str, Dict[str, Any]]):
+        for keyword, entry in enrichment.items():
+            self._apply_entry(table, keyword, entry)
+
+    def enrichment(self, keyword: str) -> Optional[Dict[str, Any]]:
+        """Stored enrichment for `keyword`: {"result": {...}, "enriched_at": iso}."""
+        return self._enrichment.read().get(keyword.lower())
+
+    def enrichments(self) -> Dict[str, Dict[str, Any]]:
+        """Every stored enrichment, by lowercased keyword."""
+        return self._enrichment.read()
+
+    def record_enrichment(self, keyword: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Store an enrichment result and apply it to the loaded table."""
+        return self.record_enrichments({keyword: result})[keyword.lower()]
+
+    def record_enrichments(self, results: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Store several results in one write (one LLM batch), timestamped now."""
+        enriched_at = datetime.now(timezone.utc).isoformat()
+        entries = {
+            keyword.lower(): {"result": result, "enriched_at": enriched_at}
+            for keyword, result in results.items()
+        }
+
+        def store(data):
+            data.update(entries)
+
+        self._enrichment.update(store)
+        with self._lock:
+            if self._table is not None:
+                for keyword, entry in entries.items():
+                    self._apply_entry(self._table, keyword, entry)
+        return entries
+
+
+def main(argv: Optional[List[str]] = None):
+    from services.keyword_service import keyword_service
+
+    parser = argparse.ArgumentParser(description="Jasper CRM keyword catalog")
+    parser.add_argument("--force", action="store_true", help="Recompile even if the CSVs are unchanged")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    catalog = keyword_service.catalog
+    if args.force:
+        catalog.compile()
+    else:
+        catalog.refresh()
+    manifest = catalog._manifest.read()
+    print(f"{manifest['table']['rows']} keywords from {len(manifest['sources'])} files in {manifest['build']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+JASPER CRM - Compiled Keyword Matcher
+
+Finds every occurrence of a fixed set of keywords in text - the output
+of an Aho-Corasick automaton: all keywords, overlapping ones included,
+with their start positions - compiled once and reused for every entry.
+
+The keywords' trie is compiled into a single `re` pattern, so the scan
+runs in the regex engine's C loop rather than stepping an automaton per
+character in Python (which measured slower than the substring loop it
+replaces). The regex yields leftmost-longest, non-overlapping matches;
+the occurrences it skips are recovered from tables built with the trie:
+
+- implied: keywords that lie inside a matched keyword (its prefixes and
+  inner substrings), at fixed offsets from the match
+- straddling: keywords that start inside a match and run past its end;
+  for each keyword the offsets where its tail is the head of another
+  keyword are precomputed, indexed by the character that must follow
+  the match, so usually nothing needs checking
+
+Matching is case-insensitive; positions index the lowercased text.
+find_batch() scans many texts as one joined string, so scoring a feed's
+entries costs one pass.
+"""
+
+import re
+import bisect
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+Matches = Dict[str, List[int]]  # keyword -> start positions
+
+_SEPARATOR = "\x00"  # Joins batch texts; never part of a keyword
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # End of a keyword
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A keyword ends here; the regex prefers the longer continuation
+            body = (f"(?:{body})" if len(branches) == 1 else body) + "?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """All occurrences of a fixed keyword set, from one compiled pattern."""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: Tuple[str, ...] = tuple(sorted({
+            kw.lower() for kw in keywords if kw and _SEPARATOR not in kw
+        }))
+        self._keyword_set = set(self.keywords)
+        self._pattern = re.compile(_trie_pattern(self.keywords)) if self.keywords else None
+
+        # Keywords by each of their proper prefixes
+        extending: Dict[str, List[str]] = {}
+        for kw in self.keywords:
+            for end in range(1, len(kw)):
+                extending.setdefault(kw[:end], []).append(kw)
+        lengths = sorted({len(kw) for kw in self.keywords})
+
+        # Only keywords with implied or straddling occurrences get an entry:
+        # keyword -> (implied, straddling by the character after the match)
+        self._overlaps: Dict[str, Tuple[List[Tuple[int, str]], Dict[str, List[Tuple[int, str]]]]] = {}
+        for kw in self.keywords:
+            implied = [
+                (offset, kw[offset:offset + length])
+                for offset in range(len(kw))
+                for length in lengths
+                if offset + length <= len(kw) and (offset, length) != (0, len(kw))
+                and kw[offset:offset + length] in self._keyword_set
+            ]
+            straddling: Dict[str, List[Tuple[int, str]]] = {}
+            for offset in range(1, len(kw)):
+                for other in extending.get(kw[offset:], ()):
+                    straddling.setdefault(other[len(kw) - offset], []).append((offset, other))
+            if implied or straddling:
+                self._overlaps[kw] = (implied, straddling)
+
+    def __contains__(self, keyword: str) -> bool:
+        return keyword.lower() in self._keyword_set
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _scan(self, text: str, bounds: List[int]) -> List[Matches]:
+        """
+        Matches in already-lowercased `text`, split into the segments that
+        start at `bounds` (positions relative to each segment).
+        """
+        results: List[Matches] = [{} for _ in bounds]
+        if self._pattern is None:
+            return results
+        overlaps = self._overlaps
+        base = 0
+        next_bound = bounds[1] if len(bounds) > 1 else len(text) + 1
+        matches = results[0]
+        for match in self._pattern.finditer(text):
+            keyword = match.group()
+            start = match.start()
+            if start >= next_bound:
+                segment = bisect.bisect_right(bounds, start) - 1
+                base = bounds[segment]
+                next_bound = bounds[segment + 1] if segment + 1 < len(bounds) else len(text) + 1
+                matches = results[segment]
+            positions = matches.get(keyword)
+            if positions is None:
+                matches[keyword] = [start - base]
+            else:
+                positions.append(start - base)
+            if keyword not in overlaps:
+                continue
+            implied, straddling = overlaps[keyword]
+            for offset, other in implied:
+                matches.setdefault(other, []).append(start + offset - base)
+            end = match.end()
+            for offset, other in straddling.get(text[end:end + 1], ()):
+                if text.startswith(other, start + offset):
+                    matches.setdefault(other, []).append(start + offset - base)
+        for matches in results:
+            for positions in matches.values():
+                if len(positions) > 1:
+                    positions.sort()
+        return results
+
+    def find(self, text: str) -> Matches:
+        """Start positions of each keyword occurring in `text`."""
+        return self._scan(text.lower(), [0])[0]
+
+    def find_batch(self, texts: Sequence[str]) -> List[Matches]:
+        """find() for each of `texts`, in one scan over them joined together."""
+        if not texts:
+            return []
+        bounds = []
+        parts = []
+        offset = 0
+        for text in texts:
+            bounds.append(offset)
+            part = text.lower().replace(_SEPARATOR, " ")
+            parts.append(part)
+            offset += len(part) + 1
+        return self._scan(_SEPARATOR.join(parts), bounds)
@@ -12,19 +12,45 @@ Integrates with existing /seo/ folder structure.
 
 import os
 import csv
+import json
+import time
+import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict, Any
 from pathlib import Path
 from enum import Enum
 
 from services.deepseek_router import deepseek_router, TaskType
+from services.keyword_catalog import KeywordCatalog, CATALOG_DIR
+from services.keyword_table import KeywordTable
 
 logger = logging.getLogger(__name__)
 
 
+# Batched enrichment: keywords per prompt, prompts in flight, result lifetime
+ENRICH_BATCH_SIZE = 25
+ENRICH_CONCURRENCY = int(os.getenv("KEYWORD_ENRICH_CONCURRENCY", "4"))
+ENRICH_MAX_AGE_DAYS = float(os.getenv("KEYWORD_ENRICH_MAX_AGE_DAYS", "90"))
+ENRICH_TOKENS_PER_KEYWORD = 180
+
+ENRICH_CONTEXT = (
+    "JASPER Financial Architecture helps clients access R10M-R2B+ in Development Finance "
+    "Institution funding (IDC, DBSA, AfDB, IFC) for infrastructure projects in Africa."
+)
+ENRICH_FIELDS = "\n".join([
+    '    "estimated_volume": <monthly searches estimate: low=100, medium=500, high=2000>,',
+    '    "estimated_difficulty": <SEO difficulty 1-100>,',
+    '    "search_intent": "informational|commercial|transactional|navigational",',
+    '    "buyer_stage": "awareness|consideration|decision",',
+    '    "relevance_score": <1-10 relevance to DFI consulting>,',
+    '    "suggested_content_type": "blog|guide|case-study|landing-page",',
+    '    "related_keywords": ["<3-5 related keywords>"],',
+    '    "notes": "<brief analysis>"',
+])
+
 # SEO folder location
-SEO_FOLDER = Path("/Users/mac/Downloads/jasper-financial-architecture/seo")
+SEO_FOLDER = Path(os.getenv("SEO_KEYWORDS_DIR", "/Users/mac/Downloads/jasper-financial-architecture/seo"))
 
 
 class SearchIntent(str, Enum):
@@ -81,41 +107,39 @@ class KeywordService:
     - Search functionality for SEO agents
     """
 
-    def __init__(self):
-        self.keywords: List[Dict[str, Any]] = []
-        self.keywords_by_category: Dict[str, List[Dict[str, Any]]] = {}
+    def __init__(self, seo_folder: Path = SEO_FOLDER, catalog_dir: Path = CATALOG_DIR):
+        self.seo_folder = Path(seo_folder)
         self.router = deepseek_router
 
-        # Load keywords on init
-        self._load_all_keywords()
-        logger.info(f"KeywordService initialized with {len(self.keywords)} keywords")
+        # Keywords live in a compiled catalog, mapped on first use
+        self.catalog = KeywordCatalog(self._source_files, self._load_csv_file, catalog_dir)
+
+    @property
+    def table(self) -> KeywordTable:
+        return self.catalog.table
+
+    @property
+    def keywords(self) -> List[Dict[str, Any]]:
+        """Every keyword as a dict (materialized per call; prefer search())."""
+        return self.table.records(range(len(self.table)))
 
     # =========================================================================
     # LOADING KEYWORDS FROM CSVs
     # =========================================================================
 
-    def _load_all_keywords(self) -> None:
-        """Load all keywords from sector CSVs."""
-        if not SEO_FOLDER.exists():
-            logger.warning(f"SEO folder not found: {SEO_FOLDER}")
-            return
-
-        csv_files = list(SEO_FOLDER.glob("*.csv"))
-
-        for csv_file in csv_files:
-            if csv_file.name == "MASTER_KEYWORDS_COMBINED.csv":
-                continue  # Skip master, load from individual files for category
-
-            category = self._infer_category(csv_file.name)
-            keywords = self._load_csv(csv_file, category)
-
-            self.keywords.extend(keywords)
-
-            if category.value not in self.keywords_by_category:
-                self.keywords_by_category[category.value] = []
-            self.keywords_by_category[category.value].extend(keywords)
+    def _source_files(self) -> List[Path]:
+        """Sector CSVs the catalog is compiled from."""
+        if not self.seo_folder.exists():
+            logger.warning(f"SEO folder not found: {self.seo_folder}")
+            return []
+        # Skip master, load from individual files for category
+        return sorted(
+            path for path in self.seo_folder.glob("*.csv")
+            if path.name != "MASTER_KEYWORDS_COMBINED.csv"
+        )
 
-        logger.info(f"Loaded {len(self.keywords)} keywords from {len(csv_files)} files")
+    def _load_csv_file(self, filepath: Path) -> List[Dict[str, Any]]:
+        return self._load_csv(filepath, self._infer_category(filepath.name))
 
     def _infer_category(self, filename: str) -> KeywordCategory:
         """Infer category from filename."""
@@ -142,7 +166,7 @@ class KeywordService:
                         "source_file": filepath.name,
                         "volume": int(row.get("volume", 0) or 0),
                         "difficulty": int(row.get("difficulty", 50) or 50),
-                        "intent": row.get("intent", None),
+                        "intent": row.get("intent") or None,
                         "enriched": False,
                     })
         except Exception as e:
@@ -162,6 +186,7 @@ class KeywordService:
         min_volume: int = None,
         max_difficulty: int = None,
         limit: int = 50,
+        sort_by: str = None,
     ) -> List[Dict[str, Any]]:
         """
         Search keywords with filtering.
@@ -173,76 +198,94 @@ class KeywordService:
             min_volume: Minimum search volume
             max_difficulty: Maximum difficulty score
             limit: Max results
+            sort_by: "volume" (highest first) or "difficulty" (easiest first);
+                file order when omitted
 
         Returns:
             List of matching keywords
         """
-        results = self.keywords.copy()
-
-        # Text search
-        if query:
-            query_lower = query.lower()
-            results = [
-                kw for kw in results
-                if query_lower in kw["keyword"].lower()
-            ]
-
-        # Category filter
-        if category:
-            results = [kw for kw in results if kw["category"] == category]
-
-        # Intent filter
-        if intent:
-            results = [kw for kw in results if kw.get("intent") == intent]
-
-        # Volume filter
-        if min_volume:
-            results = [kw for kw in results if kw.get("volume", 0) >= min_volume]
-
-        # Difficulty filter
-        if max_difficulty:
-            results = [kw for kw in results if kw.get("difficulty", 100) <= max_difficulty]
-
-        return results[:limit]
+        rows = self.table.select(
+            query=query,
+            category=category,
+            intent=intent,
+            min_volume=min_volume,
+            max_difficulty=max_difficulty,
+            sort_by=sort_by,
+            limit=limit,
+        )
+        return self.table.records(rows)
 
-    def get_by_category(self, category: str) -> List[Dict[str, Any]]:
-        """Get all keywords for a category."""
-        return self.keywords_by_category.get(category, [])
+    def get_by_category(self, category: str, limit: int = None) -> List[Dict[str, Any]]:
+        """Get keywords for a category (all of them unless `limit` is given)."""
+        return self.table.records(self.table.select(category=category, limit=limit))
 
     def get_categories(self) -> Dict[str, int]:
         """Get all categories with keyword counts."""
-        return {
-            cat: len(keywords)
-            for cat, keywords in self.keywords_by_category.items()
-        }
+        return self.table.category_counts()
 
     # =========================================================================
     # AI ENRICHMENT (DeepSeek R1)
     # =========================================================================
 
-    async def enrich_keyword(self, keyword: str) -> Dict[str, Any]:
+    def _fresh_enrichment(self, entry: Optional[Dict[str, Any]], max_age_days: float) -> Optional[Dict[str, Any]]:
+        """The stored result if it is younger than `max_age_days`."""
+        if not entry:
+            return None
+        try:
+            enriched_at = datetime.fromisoformat(entry["enriched_at"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if datetime.now(timezone.utc) - enriched_at > timedelta(days=max_age_days):
+            return None
+        return entry["result"]
+
+    @staticmethod
+    def _parse_json(content: str) -> Any:
+        if "```json" in content:
+            content = content.split("```json")[1].split("```")[0]
+        elif "```" in content:
+            content = content.split("```")[1].split("```")[0]
+        return json.loads(content.strip())
+
+    @staticmethod
+    def _fallback_enrichment(keyword: str) -> Dict[str, Any]:
+        return {
+            "keyword": keyword,
+            "estimated_volume": 100,
+            "estimated_difficulty": 50,
+            "search_intent": "informational",
+            "relevance_score": 5,
+            "notes": "Could not analyze",
+        }
+
+    async def enrich_keyword(
+        self,
+        keyword: str,
+        force: bool = False,
+        max_age_days: float = ENRICH_MAX_AGE_DAYS,
+    ) -> Dict[str, Any]:
         """
         Use DeepSeek R1 to analyze and enrich a single keyword.
 
         Returns estimated volume, difficulty, intent, and related keywords.
+        A stored result younger than `max_age_days` is returned without
+        calling the model unless `force` is set.
         """
+        if not force:
+            cached = self._fresh_enrichment(self.catalog.enrichment(keyword), max_age_days)
+            if cached is not None:
+                return cached
+
         prompt = f"""Analyze this SEO keyword for a DFI/infrastructure finance consulting firm:
 
 KEYWORD: "{keyword}"
 
-CONTEXT: JASPER Financial Architecture helps clients access R10M-R2B+ in Development Finance Institution funding (IDC, DBSA, AfDB, IFC) for infrastructure projects in Africa.
+CONTEXT: {ENRICH_CONTEXT}
 
 Provide JSON analysis:
 {{
     "keyword": "{keyword}",
-    "estimated_volume": <monthly searches estimate: low=100, medium=500, high=2000>,
-    "estimated_difficulty": <SEO difficulty 1-100>,
-    "search_intent": "informational|commercial|transactional|navigational",
-    "buyer_stage": "awareness|consideration|decision",
-    "relevance_score": <1-10 relevance to DFI consulting>,
-    "suggested_content_type": "blog|guide|case-study|landing-page",
-    "related_keywords": ["<3-5 related keywords>"],
-    "notes": "<brief analysis>"
+{ENRICH_FIELDS}
 }}"""
 
         result = await self.router.route(
@@ -254,41 +297,145 @@ Provide JSON analysis:
 
         if result.get("content"):
             try:
-                import json
-                content = result["content"]
-
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0]
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0]
-
-                return json.loads(content.strip())
+                enriched = self._parse_json(result["content"])
             except:
                 pass
+            else:
+                # Persist into the keyword catalog (survives restarts and rebuilds)
+                self.catalog.record_enrichment(keyword, enriched)
+                return enriched
 
-        # Fallback
-        return {
-            "keyword": keyword,
-            "estimated_volume": 100,
-            "estimated_difficulty": 50,
-            "search_intent": "informational",
-            "relevance_score": 5,
-            "notes": "Could not analyze",
-        }
+        return self._fallback_enrichment(keyword)
+
+    async def _enrich_chunk(self, keywords: List[str]) -> Dict[str, Dict[str, Any]]:
+        """One LLM call for up to ENRICH_BATCH_SIZE keywords; results by lowercased keyword."""
+        listing = "\n".join(f"{i}. {keyword}" for i, keyword in enumerate(keywords, 1))
+        prompt = f"""Analyze these {len(keywords)} SEO keywords for a DFI/infrastructure finance consulting firm:
+
+KEYWORDS:
+{listing}
+
+CONTEXT: {ENRICH_CONTEXT}
+
+Return a JSON array with one object per keyword, in the same order, each copying the keyword exactly:
+[
+  {{
+    "keyword": "<keyword as given>",
+{ENRICH_FIELDS}
+  }}
+]"""
+
+        result = await self.router.route(
+            task=TaskType.REASONING,
+            prompt=prompt,
+            max_tokens=ENRICH_TOKENS_PER_KEYWORD * len(keywords) + 200,
+            temperature=0.3,
+        )
+        try:
+            items = self._parse_json(result.get("content") or "")
+        except Exception as e:
+            logger.warning(f"[KeywordEnrichment] Unparseable batch of {len(keywords)} keywords: {e}")
+            return {}
+        if isinstance(items, dict):
+            items = items.get("keywords") or items.get("results") or []
+
+        wanted = {keyword.lower(): keyword for keyword in keywords}
+        results: Dict[str, Dict[str, Any]] = {}
+        for position, item in enumerate(items if isinstance(items, list) else []):
+            if not isinstance(item, dict):
+                continue
+            key = str(item.get("keyword") or "").strip().lower()
+            if not key and position < len(keywords):
+                key = keywords[position].lower()
+            if key in wanted:
+                results[key] = item
+
+        if results:
+            # One catalog write per call, keyed by the caller's spelling
+            self.catalog.record_enrichments({wanted[key]: item for key, item in results.items()})
+        missing = len(keywords) - len(results)
+        if missing:
+            logger.warning(f"[KeywordEnrichment] {missing}/{len(keywords)} keywords missing from batch response")
+        return results
 
     async def enrich_batch(
         self,
         keywords: List[str],
-        limit: int = 10,
+        limit: Optional[int] = 10,
+        force: bool = False,
+        max_age_days: float = ENRICH_MAX_AGE_DAYS,
+        batch_size: int = ENRICH_BATCH_SIZE,
+        concurrency: int = ENRICH_CONCURRENCY,
     ) -> List[Dict[str, Any]]:
-        """Enrich multiple keywords using AI."""
-        results = []
-
-        for keyword in keywords[:limit]:
-            enriched = await self.enrich_keyword(keyword)
-            results.append(enriched)
+        """
+        Enrich multiple keywords using AI.
 
-        return results
+        Keywords with a stored result younger than `max_age_days` are
+        skipped (unless `force`). The rest are packed `batch_size` to a
+        prompt, with at most `concurrency` calls in flight. Results come
+        back in input order; keywords the model didn't return get the
+        fallback estimate (not stored, so they are retried next time).
+        """
+        keywords = keywords[:limit] if limit is not None else list(keywords)
+        stored = {} if force else self.catalog.enrichments()
+        results: Dict[str, Dict[str, Any]] = {}
+        todo: List[str] = []
+        seen = set()
+        for keyword in keywords:
+            key = keyword.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            cached = self._fresh_enrichment(stored.get(key), max_age_days)
+            if cached is not None:
+                results[key] = cached
+            else:
+                todo.append(keyword)
+
+        if todo:
+            started = time.perf_counter()
+            semaphore = asyncio.Semaphore(max(1, concurrency))
+            chunks = [todo[i:i + batch_size] for i in range(0, len(todo), max(1, batch_size))]
+
+            async def run(chunk: List[str]) -> Dict[str, Dict[str, Any]]:
+                async with semaphore:
+                    try:
+                        return await self._enrich_chunk(chunk)
+                    except Exception as e:
+                        logger.error(f"[KeywordEnrichment] Batch of {len(chunk)} keywords failed: {e}")
+                        return {}
+
+            for chunk_results in await asyncio.gather(*(run(chunk) for chunk in chunks)):
+                results.update(chunk_results)
+            logger.info(
+                f"[KeywordEnrichment] Enriched {sum(1 for k in todo if k.lower() in results)}/{len(todo)} "
+                f"keywords in {len(chunks)} calls ({len(keywords) - len(todo)} fresh, skipped) "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+
+        return [results.get(keyword.lower()) or self._fallback_enrichment(keyword) for keyword in keywords]
+
+    async def enrich_category(
+        self,
+        category: str,
+        force: bool = False,
+        max_age_days: float = ENRICH_MAX_AGE_DAYS,
+    ) -> Dict[str, Any]:
+        """Enrich every keyword in a category; returns counts."""
+        keywords = [kw["keyword"] for kw in self.get_by_category(category)]
+        stored = {} if force else self.catalog.enrichments()
+        already = sum(
+            1 for keyword in keywords
+            if self._fresh_enrichment(stored.get(keyword.lower()), max_age_days) is not None
+        )
+        await self.enrich_batch(keywords, limit=None, force=force, max_age_days=max_age_days)
+        enriched = int(self.table.enriched[self.table.select(category=category)].sum())
+        return {
+            "category": category,
+            "keywords": len(keywords),
+            "skipped_fresh": already,
+            "enriched": enriched,
+        }
 
     # =========================================================================
     # KEYWORD RECOMMENDATIONS
@@ -356,7 +503,7 @@ Suggest 5-10 additional keywords we should target. Provide JSON:
             "topic": topic,
             "existing_matches": existing_matches[:count],
             "ai_suggestions": ai_suggestions,
-            "total_in_category": len(self.get_by_category(category)) if category else len(self.keywords),
+            "total_in_category": len(self.table.select(category=category)) if category else len(self.table),
         }
 
     # =========================================================================
@@ -403,7 +550,7 @@ Identify gaps and opportunities. Provide JSON:
 
         analysis = {
             "current_coverage": current_categories,
-            "total_keywords": len(self.keywords),
+            "total_keywords": len(self.table),
         }
 
         if result.get("content"):
@@ -426,12 +573,13 @@ Identify gaps and opportunities. Provide JSON:
 
     def get_stats(self) -> Dict[str, Any]:
         """Get keyword database statistics."""
+        table = self.table
         return {
-            "total_keywords": len(self.keywords),
+            "total_keywords": len(table),
             "categories": self.get_categories(),
-            "enriched_count": len([kw for kw in self.keywords if kw.get("enriched")]),
-            "with_volume": len([kw for kw in self.keywords if kw.get("volume", 0) > 0]),
-            "source_files": list(set(kw.get("source_file", "") for kw in self.keywords)),
+            "enriched_count": int(table.enriched.sum()),
+            "with_volume": int((table.volume > 0).sum()),
+            "source_files": list(table.source_file.values),
         }
 
 
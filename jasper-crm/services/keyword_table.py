@@ -0,0 +1,415 @@
+"""
+JASPER CRM - Columnar Keyword Table
+
+Column-oriented view of the keyword database for KeywordService.search:
+
+- volume / difficulty: int32 NumPy arrays
+- category / intent / source_file: categorical codes (int16) into small
+  value lists, so equality filters compare integers
+- keyword: a string table (one UTF-8 blob plus row offsets), decoded only
+  for the rows a query returns
+- keyword text: a positional trigram index over the lowercased keywords
+  joined into one string, built on the first text query. Trigram ids
+  pack three code points into a uint64 and are kept sorted, so the
+  trigrams sharing a one- or two-character prefix are one contiguous
+  range: queries of any length are answered from the index, and longer
+  queries are exact without re-checking rows.
+
+A search builds one boolean mask from the filters and reads the first
+`limit` set rows, in load order or in a precomputed volume/difficulty
+order. Nothing is copied per query except the rows returned.
+
+save()/load() store every array as .npy in one directory; load() memory-
+maps them, so worker processes share the catalog through the page cache
+(see services/keyword_catalog.py).
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NO_CODE = -1  # Code for a missing intent
+DEFAULT_DIFFICULTY = 50
+
+SEPARATOR = "\n"  # Between keywords in the joined text; never matched
+
+SORT_KEYS = ("volume", "difficulty")
+
+MATCH_CACHE_SIZE = 256  # Recent text queries kept with their matching rows
+
+# Arrays written by save(); the categorical value lists go in the metadata
+_ARRAYS = (
+    "volume", "difficulty", "category", "intent", "source_file",
+    "keyword_blob", "keyword_offsets", "order_volume", "order_difficulty",
+    "key_hashes", "key_rows",
+    "text_offsets", "gram_keys", "gram_starts", "gram_positions",
+)
+
+
+def keyword_hash(keyword: str) -> int:
+    """64-bit hash of a keyword's lowercased text (exact-match lookups)."""
+    digest = hashlib.blake2b(keyword.lower().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class _Categorical:
+    """Value list plus int16 code column."""
+
+    def __init__(self, values: List[str], codes: np.ndarray):
+        self.values = values
+        self.index: Dict[str, int] = {value: code for code, value in enumerate(values)}
+        self.codes = codes
+
+    @classmethod
+    def encode(cls, items: Iterable[Optional[str]]) -> "_Categorical":
+        values: List[str] = []
+        index: Dict[str, int] = {}
+        codes = []
+        for value in items:
+            if value is None or value == "":
+                codes.append(NO_CODE)
+                continue
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(values)
+                values.append(value)
+            codes.append(code)
+        return cls(values, np.array(codes, dtype=np.int16))
+
+    def value(self, row: int) -> Optional[str]:
+        code = int(self.codes[row])
+        return self.values[code] if code != NO_CODE else None
+
+    def set(self, row: int, value: str):
+        """Set one row's value (the code column must be writable)."""
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        self.codes[row] = code
+
+
+class _StringColumn:
+    """Strings stored as one UTF-8 blob plus offsets; decoded per access."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def encode(cls, strings: List[str]) -> "_StringColumn":
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return self.blob[self.offsets[row]:self.offsets[row + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        text = self.blob.tobytes()
+        offsets = self.offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield text[start:end].decode("utf-8")
+
+
+class KeywordTable:
+    """Columnar keyword table with vectorized filtering."""
+
+    def __init__(
+        self,
+        keywords: _StringColumn,
+        volume: np.ndarray,
+        difficulty: np.ndarray,
+        category: _Categorical,
+        intent: _Categorical,
+        source_file: _Categorical,
+        arrays: Optional[Dict[str, np.ndarray]] = None,
+    ):
+        arrays = arrays or {}
+        self.size = len(keywords)
+        self.keywords = keywords
+        self.volume = volume
+        self.difficulty = difficulty
+        self.category = category
+        self.intent = intent
+        self.source_file = source_file
+        self.enriched = np.zeros(self.size, dtype=bool)
+
+        # Stable orders: highest volume first / easiest first, load order on ties
+        if "order_volume" in arrays:
+            self._orders = {"volume": arrays["order_volume"], "difficulty": arrays["order_difficulty"]}
+        else:
+            self._orders = {
+                "volume": np.argsort(-volume.astype(np.int64), kind="stable"),
+                "difficulty": np.argsort(difficulty, kind="stable"),
+            }
+
+        self._key_hashes: Optional[np.ndarray] = arrays.get("key_hashes")  # Sorted keyword_hash values
+        self._key_rows: Optional[np.ndarray] = arrays.get("key_rows")      # Row of each hash
+
+        self._text_lock = threading.Lock()
+        self._offsets: Optional[np.ndarray] = arrays.get("text_offsets")           # Row -> start in the joined text
+        self._gram_keys: Optional[np.ndarray] = arrays.get("gram_keys")            # Sorted distinct trigram ids
+        self._gram_starts: Optional[np.ndarray] = arrays.get("gram_starts")        # Trigram -> slice of _gram_positions
+        self._gram_positions: Optional[np.ndarray] = arrays.get("gram_positions")  # Text positions grouped by trigram
+        self._matches: "OrderedDict[str, np.ndarray]" = OrderedDict()  # Recent query -> rows
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "KeywordTable":
+        """Build a table from keyword dicts (the format KeywordService returns)."""
+        return cls(
+            keywords=_StringColumn.encode([r["keyword"] for r in records]),
+            volume=np.array([r.get("volume") or 0 for r in records], dtype=np.int32),
+            difficulty=np.array(
+                [DEFAULT_DIFFICULTY if r.get("difficulty") is None else r["difficulty"] for r in records],
+                dtype=np.int32,
+            ),
+            category=_Categorical.encode(r.get("category") for r in records),
+            intent=_Categorical.encode(r.get("intent") for r in records),
+            source_file=_Categorical.encode(r.get("source_file") for r in records),
+        )
+
+    def __len__(self) -> int:
+        return self.size
+
+    # -------------------------------------------------------------------------
+    # Persistence
+    # -------------------------------------------------------------------------
+
+    def save(self, directory: Path) -> Dict[str, Any]:
+        """Write every array (indexes included) to `directory`; returns the metadata load() needs."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self._ensure_key_index()
+        self._ensure_text_index()
+        arrays = {
+            "volume": self.volume,
+            "difficulty": self.difficulty,
+            "category": self.category.codes,
+            "intent": self.intent.codes,
+            "source_file": self.source_file.codes,
+            "keyword_blob": self.keywords.blob,
+            "keyword_offsets": self.keywords.offsets,
+            "order_volume": self._orders["volume"],
+            "order_difficulty": self._orders["difficulty"],
+            "key_hashes": self._key_hashes,
+            "key_rows": self._key_rows,
+            "text_offsets": self._offsets,
+            "gram_keys": self._gram_keys,
+            "gram_starts": self._gram_starts,
+            "gram_positions": self._gram_positions,
+        }
+        for name in _ARRAYS:
+            np.save(directory / f"{name}.npy", arrays[name])
+        return {
+            "rows": self.size,
+            "categories": self.category.values,
+            "intents": self.intent.values,
+            "source_files": self.source_file.values,
+        }
+
+    @classmethod
+    def load(cls, directory: Path, meta: Dict[str, Any]) -> "KeywordTable":
+        """Memory-map a table written by save()."""
+        directory = Path(directory)
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in _ARRAYS}
+        return cls(
+            keywords=_StringColumn(arrays["keyword_blob"], arrays["keyword_offsets"]),
+            volume=arrays["volume"],
+            difficulty=arrays["difficulty"],
+            category=_Categorical(list(meta["categories"]), arrays["category"]),
+            # Enrichment can fill in missing intents, so this column is a private copy
+            intent=_Categorical(list(meta["intents"]), np.array(arrays["intent"])),
+            source_file=_Categorical(list(meta["source_files"]), arrays["source_file"]),
+            arrays=arrays,
+        )
+
+    # -------------------------------------------------------------------------
+    # Exact lookup
+    # -------------------------------------------------------------------------
+
+    def _ensure_key_index(self):
+        if self._key_hashes is not None:
+            return
+        with self._text_lock:
+            if self._key_hashes is not None:
+                return
+            hashes = np.fromiter((keyword_hash(kw) for kw in self.keywords), dtype=np.uint64, count=self.size)
+            order = np.argsort(hashes, kind="stable")
+            self._key_rows = order.astype(np.int64)
+            self._key_hashes = hashes[order]
+
+    def rows_for(self, keyword: str) -> List[int]:
+        """Rows whose keyword equals `keyword` (case-insensitive)."""
+        self._ensure_key_index()
+        value = np.uint64(keyword_hash(keyword))
+        lo = int(np.searchsorted(self._key_hashes, value, side="left"))
+        hi = int(np.searchsorted(self._key_hashes, value, side="right"))
+        lowered = keyword.lower()
+        return sorted(
+            int(row) for row in self._key_rows[lo:hi]
+            if self.keywords[int(row)].lower() == lowered
+        )
+
+    # -------------------------------------------------------------------------
+    # Text index
+    # -------------------------------------------------------------------------
+
+    def _ensure_text_index(self):
+        if self._gram_keys is not None:
+            return
+        with self._text_lock:
+            if self._gram_keys is not None:
+                return
+            lowered = [kw.lower() + SEPARATOR for kw in self.keywords]
+            lengths = np.fromiter((len(t) for t in lowered), dtype=np.int64, count=len(lowered))
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+            # Two extra separators so every character starts a full trigram
+            text = "".join(lowered) + SEPARATOR * 2
+            codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+            keys = (codes[:-2] << np.uint64(42)) | (codes[1:-1] << np.uint64(21)) | codes[2:]
+            # Stable sort keeps each trigram's positions in text order
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            gram_keys, starts = np.unique(sorted_keys, return_index=True)
+            self._offsets = offsets
+            self._gram_positions = order.astype(np.int64)
+            self._gram_starts = np.append(starts, len(sorted_keys)).astype(np.int64)
+            self._gram_keys = gram_keys
+            logger.info(f"[KeywordTable] Indexed {len(gram_keys)} trigrams over {self.size} keywords")
+
+    def _key_range(self, prefix: str) -> Tuple[int, int]:
+        """Range of trigram ids whose first len(prefix) characters are `prefix`."""
+        codes = [ord(c) for c in prefix]
+        shift = 42
+        low = 0
+        for code in codes:
+            low |= code << shift
+            shift -= 21
+        high = low + (1 << (shift + 21))
+        return (
+            int(np.searchsorted(self._gram_keys, np.uint64(low), side="left")),
+            int(np.searchsorted(self._gram_keys, np.uint64(high), side="left")),
+        )
+
+    def _positions(self, gram: str) -> np.ndarray:
+        """Sorted text positions where the trigram `gram` (or shorter prefix) starts."""
+        lo, hi = self._key_range(gram)
+        positions = self._gram_positions[self._gram_starts[lo]:self._gram_starts[hi]]
+        return positions if hi - lo <= 1 else np.sort(positions)
+
+    def match_text(self, query: str) -> np.ndarray:
+        """Sorted row ids whose keyword contains `query` (case-insensitive)."""
+        self._ensure_text_index()
+        query = query.lower()
+        if not query or SEPARATOR in query:
+            return np.empty(0, dtype=np.int64)
+        with self._text_lock:
+            rows = self._matches.get(query)
+            if rows is not None:
+                self._matches.move_to_end(query)
+                return rows
+        rows = self._match_text(query)
+        with self._text_lock:
+            self._matches[query] = rows
+            while len(self._matches) > MATCH_CACHE_SIZE:
+                self._matches.popitem(last=False)
+        return rows
+
+    def _match_text(self, query: str) -> np.ndarray:
+        if len(query) < 3:
+            matches = self._positions(query)
+        else:
+            # A match at p has query[j:j+3] at p+j; checking trigrams at
+            # j = 0, 3, 6, ... and the last one covers every character.
+            shifts = sorted(set(range(0, len(query) - 2, 3)) | {len(query) - 3})
+            candidates = sorted(
+                ((self._positions(query[j:j + 3]), j) for j in shifts),
+                key=lambda item: len(item[0]),
+            )
+            positions, j = candidates[0]
+            matches = positions - j
+            for positions, j in candidates[1:]:
+                if not len(matches):
+                    break
+                wanted = matches + j
+                found = np.searchsorted(positions, wanted)
+                found[found == len(positions)] = 0
+                matches = matches[positions[found] == wanted] if len(positions) else matches[:0]
+
+        rows = np.searchsorted(self._offsets, matches, side="right") - 1
+        if len(rows):
+            rows = rows[np.concatenate(([True], rows[1:] != rows[:-1]))]
+        return rows
+
+    # -------------------------------------------------------------------------
+    # Search
+    # -------------------------------------------------------------------------
+
+    def select(
+        self,
+        query: Optional[str] = None,
+        category: Optional[str] = None,
+        intent: Optional[str] = None,
+        min_volume: Optional[int] = None,
+        max_difficulty: Optional[int] = None,
+        sort_by: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> np.ndarray:
+        """Row ids matching every given filter, in load order or `sort_by` order."""
+        if sort_by is not None and sort_by not in SORT_KEYS:
+            raise ValueError(f"sort_by must be one of {SORT_KEYS}, got {sort_by!r}")
+        empty = np.empty(0, dtype=np.int64)
+
+        mask = None
+        if query:
+            mask = np.zeros(self.size, dtype=bool)
+            mask[self.match_text(query)] = True
+        for column, value in ((self.category, category), (self.intent, intent)):
+            if not value:
+                continue
+            code = column.index.get(value)
+            if code is None:
+                return empty
+            mask = column.codes == code if mask is None else mask & (column.codes == code)
+        if min_volume:
+            mask = self.volume >= min_volume if mask is None else mask & (self.volume >= min_volume)
+        if max_difficulty:
+            mask = self.difficulty <= max_difficulty if mask is None else mask & (self.difficulty <= max_difficulty)
+
+        if sort_by:
+            order = self._orders[sort_by]
+            rows = order if mask is None else order[mask[order]]
+        else:
+            rows = np.arange(self.size) if mask is None else np.flatnonzero(mask)
+        return rows[:limit] if limit is not None else rows
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Row as the keyword dict KeywordService has always returned."""
+        return {
+            "keyword": self.keywords[row],
+            "category": self.category.value(row),
+            "source_file": self.source_file.value(row),
+            "volume": int(self.volume[row]),
+            "difficulty": int(self.difficulty[row]),
+            "intent": self.intent.value(row),
+            "enriched": bool(self.enriched[row]),
+        }
+
+    def records(self, rows: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self.record(int(row)) for row in rows]
+
+    def category_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.category.codes[self.category.codes != NO_CODE], minlength=len(self.category.values))
+        return {value: int(counts[code]) for code, value in enumerate(self.category.values)}
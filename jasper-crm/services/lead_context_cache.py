@@ -0,0 +1,218 @@
+"""
+JASPER CRM - Lead Context Cache
+
+Per-lead snapshots of the context AgenticBrain and LeadService.get_context
+build for every event, so they aren't rebuilt from the database each time.
+
+A snapshot has two parts:
+- Lead state: the lead model, its prompt-ready dict and pre-serialized JSON,
+  plus derived fields (engagement, recommended actions). Dropped when the
+  lead is written (LeadTable after_update, LeadService.update, brain tools)
+  and expires after LEAD_CONTEXT_TTL seconds to pick up writes from other
+  processes.
+- Conversation history: one line per handled event, appended as events
+  arrive. Once the lines exceed LEAD_CONTEXT_TOKEN_BUDGET, the oldest are
+  folded into a fixed-size rolling summary. The rendered history therefore
+  has a bounded size no matter how long the conversation runs.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict, Counter
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def _enum_value(value: Any) -> Any:
+    return value.value if hasattr(value, "value") else value
+
+
+LEAD_CONTEXT_FIELDS = [
+    "id", "name", "company", "email", "status", "tier", "score", "source",
+    "deal_size", "responded", "total_calls", "research_status",
+    "has_call_scheduled", "requested_proposal", "owner_notified",
+]
+
+
+def lead_to_context(lead: Any) -> Dict[str, Any]:
+    """The lead fields AgenticBrain reasons over."""
+    return {name: _enum_value(getattr(lead, name, None)) for name in LEAD_CONTEXT_FIELDS}
+
+
+@dataclass
+class LeadSnapshot:
+    """Cached context for one lead."""
+    lead_id: str
+    lead_model: Any = None
+    lead: Optional[Dict[str, Any]] = None
+    lead_json: Optional[str] = None
+    derived: Optional[Dict[str, Any]] = None
+    loaded_at: float = 0.0
+
+    # Conversation history
+    history: List[str] = field(default_factory=list)
+    history_tokens: int = 0
+    folded_count: int = 0
+    folded_types: Counter = field(default_factory=Counter)
+    folded_since: Optional[str] = None
+    last_folded: Optional[str] = None
+    _rendered_history: Optional[str] = None
+
+
+class LeadContextCache:
+    """LRU cache of LeadSnapshots keyed by lead ID."""
+
+    SUMMARY_LINE_CHARS = 300
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        token_budget: Optional[int] = None,
+        max_leads: int = 2000,
+    ):
+        self.ttl = ttl_seconds if ttl_seconds is not None else float(os.getenv("LEAD_CONTEXT_TTL", "300"))
+        self.token_budget = token_budget or int(os.getenv("LEAD_CONTEXT_TOKEN_BUDGET", "1500"))
+        self.max_leads = max_leads
+        self._snapshots: "OrderedDict[str, LeadSnapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._watching = False
+
+    # -------------------------------------------------------------------------
+    # Lead state
+    # -------------------------------------------------------------------------
+
+    def _snapshot(self, lead_id: str) -> LeadSnapshot:
+        snapshot = self._snapshots.get(lead_id)
+        if snapshot is None:
+            snapshot = LeadSnapshot(lead_id=lead_id)
+            self._snapshots[lead_id] = snapshot
+            while len(self._snapshots) > self.max_leads:
+                self._snapshots.popitem(last=False)
+        else:
+            self._snapshots.move_to_end(lead_id)
+        return snapshot
+
+    def get(self, lead_id: str) -> Optional[LeadSnapshot]:
+        """Return the snapshot if its lead state is loaded and fresh."""
+        with self._lock:
+            snapshot = self._snapshots.get(lead_id)
+            if snapshot is None or snapshot.lead is None:
+                return None
+            if time.monotonic() - snapshot.loaded_at > self.ttl:
+                snapshot.lead_model = snapshot.lead = snapshot.lead_json = snapshot.derived = None
+                return None
+            self._snapshots.move_to_end(lead_id)
+            return snapshot
+
+    def store_lead(
+        self,
+        lead_id: str,
+        lead_model: Any,
+        derived: Optional[Dict[str, Any]] = None,
+    ) -> LeadSnapshot:
+        """Cache freshly loaded lead state, keeping any history."""
+        lead = lead_to_context(lead_model)
+        lead_json = json.dumps(lead, default=str)
+        with self._lock:
+            snapshot = self._snapshot(lead_id)
+            snapshot.lead_model = lead_model
+            snapshot.lead = lead
+            snapshot.lead_json = lead_json
+            if derived is not None or snapshot.derived is None:
+                snapshot.derived = derived
+            snapshot.loaded_at = time.monotonic()
+            return snapshot
+
+    def invalidate(self, lead_id: str):
+        """Drop cached lead state after a write. History is kept."""
+        with self._lock:
+            snapshot = self._snapshots.get(lead_id)
+            if snapshot is not None:
+                snapshot.lead_model = snapshot.lead = snapshot.lead_json = snapshot.derived = None
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+
+    # -------------------------------------------------------------------------
+    # Conversation history
+    # -------------------------------------------------------------------------
+
+    def append_event(self, lead_id: str, event_type: str, data: Optional[Dict[str, Any]], timestamp: str):
+        """Record a handled event, compacting old history past the token budget."""
+        content = (data or {}).get("content")
+        if content is None:
+            content = json.dumps({k: v for k, v in (data or {}).items() if k != "batch"}, default=str)
+        line = f"[{timestamp}] {event_type}: {' '.join(str(content).split())[:self.SUMMARY_LINE_CHARS]}"
+
+        with self._lock:
+            snapshot = self._snapshot(lead_id)
+            snapshot.history.append(line)
+            snapshot.history_tokens += estimate_tokens(line)
+            snapshot._rendered_history = None
+
+            if snapshot.history_tokens > self.token_budget:
+                self._compact(snapshot)
+
+    def _compact(self, snapshot: LeadSnapshot):
+        """Fold the oldest lines into the rolling summary until under half the budget."""
+        target = self.token_budget // 2
+        while snapshot.history and snapshot.history_tokens > target:
+            line = snapshot.history.pop(0)
+            snapshot.history_tokens -= estimate_tokens(line)
+            snapshot.folded_count += 1
+            stamp, _, rest = line.partition("] ")
+            snapshot.folded_types[rest.split(":", 1)[0]] += 1
+            if snapshot.folded_since is None:
+                snapshot.folded_since = stamp.lstrip("[")
+            snapshot.last_folded = rest
+
+    def render_history(self, lead_id: str) -> str:
+        """Rolling summary followed by recent events. Cached until the next append."""
+        with self._lock:
+            snapshot = self._snapshots.get(lead_id)
+            if snapshot is None:
+                return ""
+            if snapshot._rendered_history is None:
+                parts = []
+                if snapshot.folded_count:
+                    counts = ", ".join(f"{count} {kind}" for kind, count in snapshot.folded_types.most_common())
+                    parts.append(
+                        f"Earlier activity since {snapshot.folded_since}: {snapshot.folded_count} events ({counts}). "
+                        f"Last of these - {snapshot.last_folded}"
+                    )
+                parts.extend(snapshot.history)
+                snapshot._rendered_history = "\n".join(parts)
+            return snapshot._rendered_history
+
+    # -------------------------------------------------------------------------
+    # Invalidation hook
+    # -------------------------------------------------------------------------
+
+    def watch_lead_table(self):
+        """Invalidate snapshots whenever a LeadTable row is updated or deleted in this process."""
+        if self._watching:
+            return
+        from sqlalchemy import event as sa_event
+        from db.tables import LeadTable
+
+        def _on_write(mapper, connection, target):
+            self.invalidate(str(target.id))
+
+        sa_event.listen(LeadTable, "after_update", _on_write)
+        sa_event.listen(LeadTable, "after_delete", _on_write)
+        self._watching = True
+
+
+# Singleton instance
+lead_context_cache = LeadContextCache()
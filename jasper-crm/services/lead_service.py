@@ -7,6 +7,8 @@ import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
+from services.lead_context_cache import lead_context_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,6 +21,10 @@ class LeadService:
     """
 
     def __init__(self):
+        try:
+            lead_context_cache.watch_lead_table()
+        except Exception as e:
+            logger.warning(f"Lead context cache not watching lead writes (TTL only): {e}")
         logger.info("LeadService initialized")
 
     async def get(self, lead_id: str) -> Optional[Any]:
@@ -77,6 +83,7 @@ class LeadService:
 
             lead_row.updated_at = datetime.utcnow()
             db.commit()
+            lead_context_cache.invalidate(lead_id)
             db.refresh(lead_row)
             logger.info(f"Updated lead {lead_id}")
             return self._row_to_model(lead_row)
@@ -161,18 +168,34 @@ class LeadService:
         return {"success": result is not None, "lead": result}
 
     async def get_context(self, lead_id: str) -> Dict[str, Any]:
-        """Get full context for a lead including interactions."""
-        lead = await self.get(lead_id)
-        if not lead:
-            return {"success": False, "error": "Lead not found"}
+        """
+        Get full context for a lead including interactions.
+
+        Served from the lead context cache until the lead is updated.
+        """
+        snapshot = lead_context_cache.get(lead_id)
+        if snapshot is None or snapshot.derived is None:
+            lead = await self.get(lead_id)
+            if not lead:
+                return {"success": False, "error": "Lead not found"}
+
+            snapshot = lead_context_cache.store_lead(
+                lead_id,
+                lead,
+                derived={
+                    "engagement_level": self._calculate_engagement(lead),
+                    "recommended_actions": self._get_recommended_actions(lead),
+                },
+            )
 
+        lead = snapshot.lead_model
         return {
             "success": True,
             "lead": lead,
             "context": {
                 "days_since_created": (datetime.utcnow() - lead.created_at).days if lead.created_at else 0,
-                "engagement_level": self._calculate_engagement(lead),
-                "recommended_actions": self._get_recommended_actions(lead)
+                **snapshot.derived,
+                "history": lead_context_cache.render_history(lead_id),
             }
         }
 
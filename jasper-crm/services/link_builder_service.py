@@ -9,11 +9,15 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 from pathlib import Path
 
+from services.json_file_store import json_file, WriteConflict
+from services.related_articles import related_article_graph
+
 class LinkBuilderService:
     """Build internal links between related articles using keyword/category matching"""
     
     def __init__(self, blog_posts_path: str = "/opt/jasper-crm/data/blog_posts.json"):
         self.blog_posts_path = blog_posts_path
+        self._loaded_version = None  # Version of blog_posts.json at the last _load_articles()
         self.article_index = []
         
         # Category normalization mapping
@@ -81,8 +85,8 @@ JASPER helps prepare investment-grade financial models for DFI funding.
     def _load_articles(self) -> List[Dict[str, Any]]:
         """Load articles from blog_posts.json"""
         try:
-            with open(self.blog_posts_path, 'r') as f:
-                return json.load(f)
+            articles, self._loaded_version = json_file(self.blog_posts_path).read_versioned()
+            return articles
         except Exception as e:
             print(f"Error loading articles: {e}")
             return []
@@ -99,11 +103,15 @@ JASPER helps prepare investment-grade financial models for DFI funding.
                     f.write(backup_content)
                 print(f"✅ Backup created: {backup_path}")
             
-            # Save new content
-            with open(self.blog_posts_path, 'w') as f:
-                json.dump(articles, f, indent=2)
+            # Save new content - refused if anyone else wrote since we loaded
+            self._loaded_version = json_file(self.blog_posts_path).write(
+                articles, expected_version=self._loaded_version
+            )
             
             return True
+        except WriteConflict as e:
+            print(f"❌ Not saved, blog posts changed since they were loaded: {e}")
+            return False
         except Exception as e:
             print(f"❌ Error saving articles: {e}")
             return False
@@ -161,6 +169,19 @@ JASPER helps prepare investment-grade financial models for DFI funding.
         
         return score
     
+    def article_features(self, article: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Sparse weighted feature vector for an article.
+        The dot product of two vectors equals calculate_relevance().
+        Reads only related_articles.FEATURE_FIELDS.
+        """
+        features = {"cat:" + self.normalize_category(article.get("category", "")): 3.0}
+        for tag in article.get("tags", None) or []:
+            features["tag:" + tag.lower()] = 1.5
+        for keyword in self.extract_keywords(article):
+            features["kw:" + keyword] = 0.5
+        return features
+    
     def build_article_index(self) -> Dict[str, Any]:
         """Index all articles with keywords, tags, category"""
         articles = self._load_articles()
@@ -185,36 +206,12 @@ JASPER helps prepare investment-grade financial models for DFI funding.
         }
     
     def find_related_articles(self, slug: str, max_links: int = 5) -> List[Dict[str, Any]]:
-        """Find related articles for a given slug"""
-        articles = self._load_articles()
-        
-        # Find target article
-        target = None
-        for article in articles:
-            if article["slug"] == slug:
-                target = article
-                break
-        
-        if not target:
-            return []
-        
-        # Calculate relevance scores
-        scored_articles = []
-        for article in articles:
-            if article["slug"] != slug and article.get("status") == "published":
-                score = self.calculate_relevance(target, article)
-                if score > 0:
-                    scored_articles.append({
-                        "slug": article["slug"],
-                        "title": article["title"],
-                        "category": self.normalize_category(article.get("category", "")),
-                        "excerpt": article.get("excerpt", "")[:150],
-                        "score": score
-                    })
-        
-        # Sort by score and return top N
-        scored_articles.sort(key=lambda x: x["score"], reverse=True)
-        return scored_articles[:max_links]
+        """Find related articles for a given slug (precomputed neighbours, see related_articles)"""
+        graph = related_article_graph(Path(self.blog_posts_path), self.article_features)
+        related = graph.related(slug, max_links=max_links)
+        for article in related:
+            article["category"] = self.normalize_category(article["category"])
+        return related
     
     def preview_links(self, slug: str) -> Dict[str, Any]:
         """Preview what links would be added (dry run)"""
@@ -0,0 +1,569 @@
+"""
+JASPER CRM - LLM Token and Cost Accounting
+
+One place every LLM caller reports usage to, failed calls included:
+- AIRouter.route / DeepSeekRouter.route (OpenRouter)
+- ContentService.generate_blog_post (OpenRouter)
+- AgenticBrain, CommsAgent, CallCoach, EmailGenerator (OpenRouter/DeepSeek)
+- editor_in_chief, ResearchService, EvaluationAgent, GeminiRAGService and
+  author suggestions (Gemini)
+- APIMonitor.log_deepseek_call (direct DeepSeek API)
+
+Callers that POST to an OpenAI-style chat/completions endpoint themselves
+go through post_chat_completion(), google-genai callers through
+generate_gemini_content(), and anything else is wrapped in
+llm_accounting.track(). All of them record exceptions and error responses
+as failed calls.
+
+Each call becomes one row in a daily, append-only CSV log with fixed
+columns (LLM_USAGE_DIR/usage-YYYY-MM-DD.csv), tagged with the feature,
+lead or article, and the request correlation ID. Rows are only ever
+appended, so a crash loses at most the row being written and the file can
+be loaded straight into pandas/duckdb for analysis.
+
+Per-feature daily budgets (USD) are enforced before a call goes out:
+- Over budget: calls to models with a cheaper alternative (R1 -> V3) are
+  downgraded; everything else still runs.
+- Over budget x LLM_BUDGET_HARD_MULTIPLIER (default 1.25): every call for
+  the feature is throttled (refused) until midnight UTC. The routers return
+  an error result; post_chat_completion() and generate_gemini_content()
+  raise BudgetExceeded.
+
+Budgets come from LLM_BUDGET_<FEATURE> (e.g. LLM_BUDGET_RESEARCH=2.50),
+falling back to LLM_DAILY_BUDGET_DEFAULT. Unset means unlimited.
+
+Spend is shared by every process writing to LLM_USAGE_DIR: before each
+budget check, rows other uvicorn workers have appended to today's log are
+folded into this process's totals, so all workers draw on one allowance.
+Calls still in flight in another worker aren't counted until they finish.
+
+Usage:
+    from services.llm_accounting import llm_accounting, accounting_scope
+
+    with accounting_scope(feature="lead_scoring", lead_id=lead.id):
+        result = await ai_router.route(AITask.QUALIFICATION, prompt)
+
+    response = await post_chat_completion(client, url, "comms", headers=..., json=payload)
+
+    with llm_accounting.track(model_name, feature="author_suggestion") as call:
+        response = model.generate_content(prompt)
+        call.usage = gemini_usage(response)
+"""
+
+import os
+import csv
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from services.metrics_service import metrics_service
+from services.tracing import add_span
+
+logger = logging.getLogger(__name__)
+
+
+# USD per million tokens
+MODEL_PRICING = {
+    "deepseek-chat": {"input": 0.28, "cached_input": 0.028, "output": 0.42},
+    "deepseek-reasoner": {"input": 0.55, "cached_input": 0.14, "output": 2.19},
+    "deepseek-r1": {"input": 0.55, "cached_input": 0.14, "output": 2.19},
+    "deepseek-r1-distill-qwen-32b": {"input": 0.12, "cached_input": 0.12, "output": 0.18},
+    "deepseek-coder": {"input": 0.28, "cached_input": 0.028, "output": 0.42},
+    "deepseek-vl": {"input": 0.15, "cached_input": 0.15, "output": 0.15},
+    "gemini-3-flash-preview": {"input": 0.50, "cached_input": 0.05, "output": 3.00},
+    "gemini-3.0-flash-preview": {"input": 0.50, "cached_input": 0.05, "output": 3.00},
+    "gemini-2.5-flash-lite": {"input": 0.10, "cached_input": 0.01, "output": 0.40},
+    "gemini-2.0-flash": {"input": 0.10, "cached_input": 0.025, "output": 0.40},
+}
+DEFAULT_PRICING = MODEL_PRICING["deepseek-chat"]
+
+# Cheaper model to fall back to when a feature is over budget
+DOWNGRADES = {
+    "deepseek-r1": "deepseek/deepseek-chat",
+    "deepseek-reasoner": "deepseek-chat",
+}
+
+USAGE_DIR = Path(os.getenv("LLM_USAGE_DIR", "/opt/jasper-crm/data/llm_usage"))
+
+
+def _model_key(model: str) -> str:
+    """'deepseek/deepseek-r1' -> 'deepseek-r1', 'google/gemini-2.0-flash-exp:free' -> 'gemini-2.0-flash-exp'."""
+    return (model or "").rsplit("/", 1)[-1].split(":", 1)[0]
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """Cost in USD for one call."""
+    if (model or "").endswith(":free"):
+        return 0.0
+    pricing = MODEL_PRICING.get(_model_key(model), DEFAULT_PRICING)
+    cached = min(cached_tokens, prompt_tokens)
+    return (
+        (prompt_tokens - cached) * pricing["input"]
+        + cached * pricing["cached_input"]
+        + completion_tokens * pricing["output"]
+    ) / 1_000_000
+
+
+def gemini_usage(response: Any) -> Dict[str, int]:
+    """OpenAI-style usage dict from a google-genai response's usage_metadata."""
+    meta = getattr(response, "usage_metadata", None)
+    if meta is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(meta, "prompt_token_count", 0) or 0,
+        "completion_tokens": getattr(meta, "candidates_token_count", 0) or 0,
+        "prompt_cache_hit_tokens": getattr(meta, "cached_content_token_count", 0) or 0,
+    }
+
+
+# -----------------------------------------------------------------------------
+# Call tagging
+# -----------------------------------------------------------------------------
+
+_scope_var: ContextVar[Dict[str, str]] = ContextVar("llm_accounting_scope", default={})
+
+
+@contextmanager
+def accounting_scope(feature: Optional[str] = None, lead_id: Optional[str] = None, article: Optional[str] = None):
+    """Tag every LLM call made inside the block. Inner scopes override outer ones."""
+    current = dict(_scope_var.get())
+    for key, value in (("feature", feature), ("lead_id", lead_id), ("article", article)):
+        if value:
+            current[key] = str(value)
+    token = _scope_var.set(current)
+    try:
+        yield
+    finally:
+        _scope_var.reset(token)
+
+
+def scoped_feature(default: str) -> str:
+    """The feature set by the enclosing accounting_scope, else `default`."""
+    return _scope_var.get().get("feature") or default
+
+
+def _current_correlation_id() -> str:
+    try:
+        from services.logging_service import get_correlation_id
+        return get_correlation_id()
+    except Exception:
+        return ""
+
+
+# -----------------------------------------------------------------------------
+# Records and budgets
+# -----------------------------------------------------------------------------
+
+@dataclass
+class UsageRecord:
+    """One LLM call. Field order is the CSV column order - append new fields at the end."""
+    timestamp: str
+    feature: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+    latency_ms: float
+    cost_usd: float
+    success: bool
+    lead_id: str = ""
+    article: str = ""
+    correlation_id: str = ""
+    budget_action: str = ""
+
+
+COLUMNS = [f.name for f in fields(UsageRecord)]
+
+
+@dataclass
+class TrackedCall:
+    """Filled in by the caller inside LLMAccounting.track()."""
+    model: str
+    usage: Optional[Dict[str, Any]] = None
+    success: bool = True
+
+
+class _CallTracker:
+    """Context manager behind LLMAccounting.track(); works with `with` and `async with`."""
+
+    def __init__(self, accounting: "LLMAccounting", call: TrackedCall, tags: Dict[str, Any]):
+        self.accounting = accounting
+        self.call = call
+        self.tags = tags
+        self.started = 0.0
+
+    def __enter__(self) -> TrackedCall:
+        self.started = time.perf_counter()
+        return self.call
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.call.success = False
+        self.accounting.record(
+            self.call.model, self.call.usage, time.perf_counter() - self.started,
+            success=self.call.success, **self.tags,
+        )
+        return False
+
+    async def __aenter__(self) -> TrackedCall:
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+@dataclass
+class BudgetDecision:
+    """What to do with a call before it is sent."""
+    action: str  # allow, downgrade, throttle
+    model: str
+    feature: str
+    spent_usd: float
+    budget_usd: Optional[float]
+
+    @property
+    def allowed(self) -> bool:
+        return self.action != "throttle"
+
+    def error(self) -> str:
+        return (
+            f"Daily LLM budget exceeded for '{self.feature}' "
+            f"(${self.spent_usd:.4f} spent, budget ${self.budget_usd:.2f})"
+        )
+
+
+class BudgetExceeded(RuntimeError):
+    """A feature's daily budget is past its hard limit (raised by the call wrappers below)."""
+
+    def __init__(self, decision: BudgetDecision):
+        super().__init__(decision.error())
+        self.decision = decision
+
+
+class LLMAccounting:
+    """Records usage, tracks daily spend per feature and enforces budgets."""
+
+    def __init__(self, usage_dir: Optional[Path] = None, budgets: Optional[Dict[str, float]] = None):
+        self.usage_dir = Path(usage_dir) if usage_dir else USAGE_DIR
+        self._budgets = budgets
+        self.hard_multiplier = float(os.getenv("LLM_BUDGET_HARD_MULTIPLIER", "1.25"))
+        self._lock = threading.Lock()
+        self._day: Optional[str] = None
+        self._spend: Dict[str, float] = {}
+        self._tokens: Dict[str, int] = {}
+        self._calls: Dict[str, int] = {}
+        self._offset = 0  # Bytes of today's log already folded into the totals
+
+    # -------------------------------------------------------------------------
+    # Budgets
+    # -------------------------------------------------------------------------
+
+    def budget_for(self, feature: str) -> Optional[float]:
+        if self._budgets is not None:
+            value = self._budgets.get(feature, self._budgets.get("default"))
+            return float(value) if value is not None else None
+        value = os.getenv(f"LLM_BUDGET_{feature.upper()}") or os.getenv("LLM_DAILY_BUDGET_DEFAULT")
+        try:
+            return float(value) if value else None
+        except ValueError:
+            logger.warning(f"[LLMAccounting] Ignoring invalid budget '{value}' for {feature}")
+            return None
+
+    def check_budget(self, feature: str, model: str) -> BudgetDecision:
+        """Decide whether a call to `model` for `feature` may go ahead, and on which model."""
+        with self._lock:
+            self._roll_day()
+            spent = self._spend.get(feature, 0.0)
+        budget = self.budget_for(feature)
+
+        if budget is None or spent < budget:
+            return BudgetDecision("allow", model, feature, spent, budget)
+
+        cheaper = DOWNGRADES.get(_model_key(model))
+        if spent >= budget * self.hard_multiplier:
+            action, cheaper = "throttle", None
+        elif cheaper:
+            action = "downgrade"
+        else:
+            return BudgetDecision("allow", model, feature, spent, budget)
+
+        metrics_service.collector.inc_counter(
+            "jasper_llm_budget_actions_total", labels={"feature": feature, "action": action}
+        )
+        logger.warning(
+            f"[LLMAccounting] {feature} over daily budget (${spent:.4f}/${budget:.2f}) - "
+            f"{action}{' to ' + cheaper if cheaper else ''}"
+        )
+        return BudgetDecision(action, cheaper or model, feature, spent, budget)
+
+    # -------------------------------------------------------------------------
+    # Recording
+    # -------------------------------------------------------------------------
+
+    def record(
+        self,
+        model: str,
+        usage: Optional[Dict[str, Any]] = None,
+        latency_s: float = 0.0,
+        feature: Optional[str] = None,
+        lead_id: Optional[str] = None,
+        article: Optional[str] = None,
+        success: bool = True,
+        budget_action: str = "",
+    ) -> UsageRecord:
+        """
+        Record one call.
+
+        `usage` is an OpenAI-style usage dict (prompt_tokens, completion_tokens,
+        and prompt_cache_hit_tokens or prompt_tokens_details.cached_tokens).
+        Explicit arguments win over the surrounding accounting_scope.
+        """
+        scope = _scope_var.get()
+        usage = usage or {}
+        prompt_tokens = int(usage.get("prompt_tokens") or 0)
+        completion_tokens = int(usage.get("completion_tokens") or 0)
+        cached_tokens = int(
+            usage.get("prompt_cache_hit_tokens")
+            or (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+            or 0
+        )
+
+        record = UsageRecord(
+            timestamp=datetime.utcnow().isoformat(),
+            feature=feature or scope.get("feature") or "unknown",
+            model=model or "unknown",
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+            latency_ms=round(latency_s * 1000, 1),
+            cost_usd=round(estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens), 8),
+            success=success,
+            lead_id=lead_id or scope.get("lead_id", ""),
+            article=article or scope.get("article", ""),
+            correlation_id=_current_correlation_id(),
+            budget_action=budget_action,
+        )
+
+        with self._lock:
+            self._roll_day()
+            if self._append(record):
+                self._sync()
+            else:
+                self._add(asdict(record))
+            spent = self._spend.get(record.feature, 0.0)
+
+        self._export(record, spent)
+        add_span(
+            "llm.call", _model_key(record.model), record.latency_ms,
+            feature=record.feature, tokens=prompt_tokens + completion_tokens, cost_usd=record.cost_usd,
+        )
+        return record
+
+    def track(
+        self,
+        model: str,
+        feature: Optional[str] = None,
+        lead_id: Optional[str] = None,
+        article: Optional[str] = None,
+        budget_action: str = "",
+    ) -> _CallTracker:
+        """
+        Record the call made inside the block (`with` or `async with`).
+
+        Set `call.usage` from the response, and `call.success = False` on an
+        error response. An exception escaping the block is recorded as a
+        failed call and re-raised.
+        """
+        tags = {"feature": feature, "lead_id": lead_id, "article": article, "budget_action": budget_action}
+        return _CallTracker(self, TrackedCall(model), tags)
+
+    def _export(self, record: UsageRecord, spent: float):
+        collector = metrics_service.collector
+        labels = {"feature": record.feature, "model": _model_key(record.model)}
+        collector.inc_counter("jasper_llm_tokens_total", record.prompt_tokens, {**labels, "kind": "prompt"})
+        collector.inc_counter("jasper_llm_tokens_total", record.completion_tokens, {**labels, "kind": "completion"})
+        collector.inc_counter("jasper_llm_cost_usd_total", record.cost_usd, labels)
+        collector.inc_counter("jasper_llm_calls_total", 1, {**labels, "success": str(record.success).lower()})
+        collector.observe_histogram("jasper_llm_latency_seconds", record.latency_ms / 1000, labels)
+        collector.set_gauge("jasper_llm_daily_spend_usd", spent, {"feature": record.feature})
+        budget = self.budget_for(record.feature)
+        if budget is not None:
+            collector.set_gauge("jasper_llm_daily_budget_usd", budget, {"feature": record.feature})
+
+    # -------------------------------------------------------------------------
+    # Storage
+    # -------------------------------------------------------------------------
+
+    def _path(self, day: str) -> Path:
+        return self.usage_dir / f"usage-{day}.csv"
+
+    def _append(self, record: UsageRecord) -> bool:
+        """Append one row; writes the header when the day's file is new. Caller holds the lock."""
+        path = self._path(self._day)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            new_file = not path.exists()
+            with open(path, "a", newline="") as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(COLUMNS)
+                row = asdict(record)
+                writer.writerow([row[name] for name in COLUMNS])
+            return True
+        except OSError as e:
+            logger.error(f"[LLMAccounting] Failed to append usage row: {e}")
+            return False
+
+    def _roll_day(self):
+        """Reset totals at midnight UTC, then catch up on today's log. Caller holds the lock."""
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        if today != self._day:
+            self._day = today
+            self._spend, self._tokens, self._calls = {}, {}, {}
+            self._offset = 0
+        self._sync()
+
+    def _sync(self):
+        """Fold rows appended to today's log since the last sync, by any process, into the totals."""
+        path = self._path(self._day)
+        try:
+            size = path.stat().st_size
+            if size <= self._offset:
+                return
+            with open(path, "rb") as f:
+                f.seek(self._offset)
+                chunk = f.read(size - self._offset)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.error(f"[LLMAccounting] Failed to read {path}: {e}")
+            return
+
+        # Leave a row another process is still writing for the next sync
+        end = chunk.rfind(b"\n") + 1
+        self._offset += end
+        for values in csv.reader(chunk[:end].decode("utf-8", errors="replace").splitlines()):
+            if len(values) <= COLUMNS.index("cost_usd") or values[0] == COLUMNS[0]:
+                continue  # Header (or a damaged row)
+            self._add(dict(zip(COLUMNS, values)))
+
+    def _add(self, row: Dict[str, Any]):
+        feature = row["feature"]
+        try:
+            cost = float(row["cost_usd"] or 0)
+            tokens = int(row["prompt_tokens"] or 0) + int(row["completion_tokens"] or 0)
+        except ValueError:
+            return
+        self._spend[feature] = self._spend.get(feature, 0.0) + cost
+        self._tokens[feature] = self._tokens.get(feature, 0) + tokens
+        self._calls[feature] = self._calls.get(feature, 0) + 1
+
+    def _read_rows(self, day: str) -> List[Dict[str, str]]:
+        path = self._path(day)
+        if not path.exists():
+            return []
+        try:
+            with open(path, newline="") as f:
+                return list(csv.DictReader(f))
+        except (OSError, csv.Error) as e:
+            logger.error(f"[LLMAccounting] Failed to read {path}: {e}")
+            return []
+
+    # -------------------------------------------------------------------------
+    # Reporting
+    # -------------------------------------------------------------------------
+
+    def get_daily_summary(self, day: Optional[str] = None) -> Dict[str, Any]:
+        """Per-feature calls, tokens and spend against budget for a day (default today)."""
+        if day is None or day == datetime.utcnow().strftime("%Y-%m-%d"):
+            with self._lock:
+                self._roll_day()
+                day = self._day
+                totals = {
+                    feature: (self._calls[feature], self._tokens[feature], self._spend[feature])
+                    for feature in self._spend
+                }
+        else:
+            totals: Dict[str, Tuple[int, int, float]] = {}
+            for row in self._read_rows(day):
+                calls, tokens, cost = totals.get(row["feature"], (0, 0, 0.0))
+                totals[row["feature"]] = (
+                    calls + 1,
+                    tokens + int(row["prompt_tokens"] or 0) + int(row["completion_tokens"] or 0),
+                    cost + float(row["cost_usd"] or 0),
+                )
+
+        features = {
+            feature: {
+                "calls": calls,
+                "tokens": tokens,
+                "cost_usd": round(cost, 6),
+                "budget_usd": self.budget_for(feature),
+            }
+            for feature, (calls, tokens, cost) in sorted(totals.items())
+        }
+        return {
+            "date": day,
+            "total_cost_usd": round(sum(f["cost_usd"] for f in features.values()), 6),
+            "total_tokens": sum(f["tokens"] for f in features.values()),
+            "features": features,
+        }
+
+
+# Singleton instance
+llm_accounting = LLMAccounting()
+
+
+def _budgeted(feature: str, model: str) -> BudgetDecision:
+    """check_budget() for a wrapped call; raises BudgetExceeded when throttled."""
+    budget = llm_accounting.check_budget(feature, model)
+    if not budget.allowed:
+        raise BudgetExceeded(budget)
+    return budget
+
+
+async def post_chat_completion(client: Any, url: str, feature: str, **kwargs) -> Any:
+    """
+    client.post() to a chat/completions endpoint, recorded in llm_accounting.
+
+    The model is read from the JSON body; `feature` is overridden by an
+    enclosing accounting_scope. Over budget, the body's model is swapped
+    for the cheaper one, or BudgetExceeded is raised once throttled.
+    Returns the response unchanged.
+    """
+    feature = scoped_feature(feature)
+    body = kwargs.get("json") or {}
+    budget = _budgeted(feature, body.get("model", "unknown"))
+    if budget.action == "downgrade":
+        kwargs["json"] = {**body, "model": budget.model}
+    async with llm_accounting.track(budget.model, feature=feature, budget_action=budget.action) as call:
+        response = await client.post(url, **kwargs)
+        if response.status_code == 200:
+            try:
+                call.usage = response.json().get("usage")
+            except ValueError:
+                pass
+        else:
+            call.success = False
+    return response
+
+
+def generate_gemini_content(client: Any, feature: str, **kwargs) -> Any:
+    """
+    client.models.generate_content() (google-genai), recorded in llm_accounting
+    and subject to the same budget checks as post_chat_completion().
+    """
+    feature = scoped_feature(feature)
+    budget = _budgeted(feature, kwargs.get("model", "gemini"))
+    if budget.action == "downgrade":
+        kwargs["model"] = budget.model
+    with llm_accounting.track(budget.model, feature=feature, budget_action=budget.action) as call:
+        response = client.models.generate_content(**kwargs)
+        call.usage = gemini_usage(response)
+    return response
@@ -9,12 +9,17 @@ Exposes application metrics for monitoring:
 """
 
 import os
+import re
+import json
+import math
 import time
 import logging
-from typing import Optional, Dict, Any, Callable
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, List, Sequence, Tuple
 from functools import wraps
 from dataclasses import dataclass, field
-from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
@@ -29,42 +34,345 @@ class MetricValue:
     help_text: str = ""
 
 
-class MetricsCollector:
+_UUID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+_NUMERIC_ID_RE = re.compile(r'/\d+')
+
+# Multiprocess snapshots not rewritten for this many flush intervals are from dead workers
+STALE_SNAPSHOT_FLUSHES = 6
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    return ",".join(f'{k}="{v}"' for k, v in labels)
+
+
+def _series(name: str, label_text: str, extra: str = "") -> str:
+    inner = ",".join(part for part in (label_text, extra) if part)
+    return f"{name}{{{inner}}}" if inner else name
+
+
+class QuantileSketch:
     """
-    In-memory metrics collector.
+    Streaming quantile sketch with bounded relative error (DDSketch-style).
 
-    For production, integrate with prometheus_client.
+    Values are counted in logarithmic buckets of width `relative_accuracy`,
+    so memory depends on the value range, not the number of observations,
+    and two sketches merge by adding bucket counts.
     """
 
-    def __init__(self):
-        self.counters: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
-        self.gauges: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
-        self.histograms: Dict[str, Dict[str, list]] = defaultdict(lambda: defaultdict(list))
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float):
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + 1
+
+    def merge(self, bins: Dict[int, int], zero_count: int):
+        for key, n in bins.items():
+            self.bins[key] = self.bins.get(key, 0) + n
+        self.zero_count += zero_count
+        self.count += zero_count + sum(bins.values())
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return float("nan")
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+
+class _ValueChild:
+    """A counter or gauge series."""
+    __slots__ = ("label_text", "value")
+
+    def __init__(self, label_text: str):
+        self.label_text = label_text
+        self.value = 0.0
+
+    def inc(self, value: float = 1):
+        self.value += value
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _HistogramChild:
+    """A histogram series: per-bucket counts, sum and a quantile sketch."""
+    __slots__ = ("label_text", "upper_bounds", "bucket_counts", "sum", "count", "sketch")
+
+    def __init__(self, label_text: str, upper_bounds: Sequence[float], quantiles: bool):
+        self.label_text = label_text
+        self.upper_bounds = upper_bounds
+        # One slot per finite bucket plus +Inf; cumulated only at scrape time
+        self.bucket_counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.sketch = QuantileSketch() if quantiles else None
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+        if self.sketch is not None:
+            self.sketch.add(value)
+
+
+class MetricFamily:
+    """A named metric and its labelled children."""
+
+    def __init__(
+        self,
+        name: str,
+        metric_type: str,
+        help_text: str = "",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    ):
+        self.name = name
+        self.type = metric_type
+        self.help = help_text or f"{metric_type.capitalize()} metric"
+        self.buckets = tuple(sorted(buckets))
+        self.quantiles = tuple(quantiles)
+        self.children: Dict[Tuple[Tuple[str, str], ...], Any] = {}
+        # Lookup cache keyed by labels in the caller's order, so the hot path skips sorting
+        self._resolved: Dict[Tuple[Tuple[str, str], ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels: str):
+        """Pre-resolve a child for hot paths: `family.labels(path="/x").inc()`."""
+        return self.child(labels)
+
+    def child(self, labels: Optional[Dict[str, str]] = None):
+        key = tuple(labels.items()) if labels else ()
+        child = self._resolved.get(key)
+        if child is None:
+            child = self._create(key)
+        return child
+
+    def _create(self, key):
+        canonical = tuple(sorted((k, str(v)) for k, v in key))
+        with self._lock:
+            child = self.children.get(canonical)
+            if child is None:
+                label_text = _format_labels(canonical)
+                if self.type == "histogram":
+                    child = _HistogramChild(label_text, self.buckets, bool(self.quantiles))
+                else:
+                    child = _ValueChild(label_text)
+                self.children[canonical] = child
+            self._resolved[key] = child
+        return child
+
+
+class MetricsCollector:
+    """
+    In-memory metrics collector with Prometheus text export.
+
+    - Counters and gauges are plain floats on pre-resolved children; the hot
+      path is one dict lookup and an add, with no lock or label formatting.
+    - Histograms use fixed cumulative buckets (O(log buckets) observe) and
+      keep a streaming quantile sketch, exported as a `<name>_quantiles`
+      summary. Nothing is rescanned at scrape time.
+    - With METRICS_MULTIPROC_DIR set, each process snapshots its metrics to
+      that directory and a scrape merges all snapshots, so any uvicorn
+      worker can answer /metrics for the whole service. Counters, buckets
+      and sketches are summed; gauges take the max across workers.
+      Snapshots of workers that exited (pid gone) or stopped flushing
+      (older than STALE_SNAPSHOT_FLUSHES flush intervals) are deleted at
+      startup and skipped/deleted at scrape time, so a restart or deploy
+      doesn't leave dead workers' counters and gauges in every scrape.
+      The directory must be local to one host (pids are checked).
+    """
+
+    def __init__(self, multiproc_dir: Optional[str] = None, flush_interval: float = 5.0):
+        self.families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
         self._start_time = time.time()
 
-    def _make_label_key(self, labels: Dict[str, str]) -> str:
-        """Create a string key from labels."""
-        if not labels:
-            return ""
-        return ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+        self.multiproc_dir = multiproc_dir if multiproc_dir is not None else os.getenv("METRICS_MULTIPROC_DIR")
+        self.flush_interval = flush_interval
+        self._flusher: Optional[threading.Thread] = None
+        if self.multiproc_dir:
+            Path(self.multiproc_dir).mkdir(parents=True, exist_ok=True)
+            self._live_snapshots()  # Startup cleanup: drops snapshots left by a previous run's workers
+
+    # -------------------------------------------------------------------------
+    # Registration
+    # -------------------------------------------------------------------------
+
+    def _family(self, name: str, metric_type: str, **kwargs) -> MetricFamily:
+        family = self.families.get(name)
+        if family is None:
+            with self._lock:
+                family = self.families.get(name)
+                if family is None:
+                    family = MetricFamily(name, metric_type, **kwargs)
+                    self.families[name] = family
+                    if self.multiproc_dir and self._flusher is None:
+                        self._start_flusher()
+        return family
+
+    def counter(self, name: str, help_text: str = "") -> MetricFamily:
+        return self._family(name, "counter", help_text=help_text)
+
+    def gauge(self, name: str, help_text: str = "") -> MetricFamily:
+        return self._family(name, "gauge", help_text=help_text)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str = "",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    ) -> MetricFamily:
+        return self._family(name, "histogram", help_text=help_text, buckets=buckets, quantiles=quantiles)
+
+    # -------------------------------------------------------------------------
+    # Recording
+    # -------------------------------------------------------------------------
 
     def inc_counter(self, name: str, value: float = 1, labels: Optional[Dict[str, str]] = None):
         """Increment a counter."""
-        key = self._make_label_key(labels or {})
-        self.counters[name][key] += value
+        self.counter(name).child(labels).inc(value)
 
     def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
         """Set a gauge value."""
-        key = self._make_label_key(labels or {})
-        self.gauges[name][key] = value
+        self.gauge(name).child(labels).set(value)
 
     def observe_histogram(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
         """Observe a histogram value."""
-        key = self._make_label_key(labels or {})
-        self.histograms[name][key].append(value)
-        # Keep only last 1000 observations
-        if len(self.histograms[name][key]) > 1000:
-            self.histograms[name][key] = self.histograms[name][key][-1000:]
+        self.histogram(name).child(labels).observe(value)
+
+    # -------------------------------------------------------------------------
+    # Multi-process snapshots
+    # -------------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """This process's metrics as JSON-serializable data."""
+        families = {}
+        for name, family in list(self.families.items()):
+            series = []
+            for labels, child in list(family.children.items()):
+                if family.type == "histogram":
+                    entry = {"buckets": list(child.bucket_counts), "sum": child.sum, "count": child.count}
+                    if child.sketch is not None:
+                        entry["sketch"] = {str(k): n for k, n in child.sketch.bins.items()}
+                        entry["zero"] = child.sketch.zero_count
+                else:
+                    entry = {"value": child.value}
+                series.append({"labels": labels, **entry})
+            families[name] = {
+                "type": family.type,
+                "help": family.help,
+                "buckets": list(family.buckets),
+                "quantiles": list(family.quantiles),
+                "series": series,
+            }
+        return {"pid": os.getpid(), "written_at": time.time(), "families": families}
+
+    def flush(self):
+        """Write this process's snapshot for other workers' scrapes."""
+        if not self.multiproc_dir:
+            return
+        path = Path(self.multiproc_dir) / f"metrics-{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(self.snapshot()))
+            os.replace(tmp, path)
+        except (OSError, RuntimeError) as e:
+            logger.warning(f"[Metrics] Snapshot flush failed: {e}")
+
+    def _start_flusher(self):
+        def run():
+            while True:
+                time.sleep(self.flush_interval)
+                self.flush()
+
+        self._flusher = threading.Thread(target=run, name="metrics-flusher", daemon=True)
+        self._flusher.start()
+
+    def _is_stale(self, snapshot: Dict[str, Any], now: float) -> bool:
+        """Whether a snapshot belongs to a worker that exited or stopped flushing."""
+        if snapshot.get("written_at", 0) < now - STALE_SNAPSHOT_FLUSHES * self.flush_interval:
+            return True
+        pid = snapshot.get("pid")
+        if not isinstance(pid, int) or pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass  # Alive, owned by another user
+        return False
+
+    def _live_snapshots(self) -> List[Dict[str, Any]]:
+        """Snapshots in the multiprocess directory; stale ones are deleted."""
+        now = time.time()
+        snapshots = []
+        for path in sorted(Path(self.multiproc_dir).glob("metrics-*.json")):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if self._is_stale(data, now):
+                path.unlink(missing_ok=True)
+                continue
+            snapshots.append(data)
+        return snapshots
+
+    def _merged(self) -> Dict[str, MetricFamily]:
+        """All live workers' snapshots merged into fresh families (this process read live)."""
+        self.flush()
+        merged: Dict[str, MetricFamily] = {}
+        seen_gauges = set()
+        for data in self._live_snapshots():
+            for name, spec in data["families"].items():
+                family = merged.get(name)
+                if family is None:
+                    family = merged[name] = MetricFamily(
+                        name, spec["type"], spec["help"], spec["buckets"], spec["quantiles"]
+                    )
+                for entry in spec["series"]:
+                    child = family.child(dict(entry["labels"]))
+                    if family.type == "histogram":
+                        if len(entry["buckets"]) != len(child.bucket_counts):
+                            continue
+                        for i, n in enumerate(entry["buckets"]):
+                            child.bucket_counts[i] += n
+                        child.sum += entry["sum"]
+                        child.count += entry["count"]
+                        if child.sketch is not None and "sketch" in entry:
+                            child.sketch.merge({int(k): n for k, n in entry["sketch"].items()}, entry["zero"])
+                    elif family.type == "gauge":
+                        if id(child) in seen_gauges:
+                            child.value = max(child.value, entry["value"])
+                        else:
+                            child.value = entry["value"]
+                            seen_gauges.add(id(child))
+                    else:
+                        child.value += entry["value"]
+        return merged
+
+    # -------------------------------------------------------------------------
+    # Export
+    # -------------------------------------------------------------------------
 
     def get_metrics_text(self) -> str:
         """Export metrics in Prometheus text format."""
@@ -80,44 +388,41 @@ class MetricsCollector:
         lines.append("# TYPE jasper_uptime_seconds gauge")
         lines.append(f"jasper_uptime_seconds {time.time() - self._start_time:.2f}")
 
-        # Counters
-        for name, label_values in self.counters.items():
-            lines.append(f"# HELP {name} Counter metric")
-            lines.append(f"# TYPE {name} counter")
-            for label_key, value in label_values.items():
-                if label_key:
-                    lines.append(f"{name}{{{label_key}}} {value}")
-                else:
-                    lines.append(f"{name} {value}")
-
-        # Gauges
-        for name, label_values in self.gauges.items():
-            lines.append(f"# HELP {name} Gauge metric")
-            lines.append(f"# TYPE {name} gauge")
-            for label_key, value in label_values.items():
-                if label_key:
-                    lines.append(f"{name}{{{label_key}}} {value}")
-                else:
-                    lines.append(f"{name} {value}")
-
-        # Histograms (simplified - just count, sum, and buckets)
-        for name, label_values in self.histograms.items():
-            lines.append(f"# HELP {name} Histogram metric")
+        families = self._merged() if self.multiproc_dir else self.families
+        for name, family in list(families.items()):
+            children = list(family.children.values())
+            if family.type != "histogram":
+                lines.append(f"# HELP {name} {family.help}")
+                lines.append(f"# TYPE {name} {family.type}")
+                for child in children:
+                    lines.append(f"{_series(name, child.label_text)} {child.value}")
+                continue
+
+            lines.append(f"# HELP {name} {family.help}")
             lines.append(f"# TYPE {name} histogram")
-            for label_key, values in label_values.items():
-                if values:
-                    count = len(values)
-                    total = sum(values)
-                    prefix = f"{name}{{{label_key}}}" if label_key else name
-                    lines.append(f"{prefix}_count {count}")
-                    lines.append(f"{prefix}_sum {total:.4f}")
-
-                    # Buckets
-                    buckets = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
-                    for bucket in buckets:
-                        bucket_count = sum(1 for v in values if v <= bucket)
-                        lines.append(f'{prefix}_bucket{{le="{bucket}"}} {bucket_count}')
-                    lines.append(f'{prefix}_bucket{{le="+Inf"}} {count}')
+            bucket_labels = [f'le="{bound}"' for bound in family.buckets]
+            inf_label = 'le="+Inf"'
+            for child in children:
+                cumulative = 0
+                for le, n in zip(bucket_labels, child.bucket_counts):
+                    cumulative += n
+                    lines.append(f"{_series(name + '_bucket', child.label_text, le)} {cumulative}")
+                lines.append(f"{_series(name + '_bucket', child.label_text, inf_label)} {child.count}")
+                lines.append(f"{_series(name + '_sum', child.label_text)} {child.sum:.4f}")
+                lines.append(f"{_series(name + '_count', child.label_text)} {child.count}")
+
+            if family.quantiles:
+                summary = f"{name}_quantiles"
+                lines.append(f"# HELP {summary} Streaming quantiles of {name}")
+                lines.append(f"# TYPE {summary} summary")
+                for child in children:
+                    if not child.count or child.sketch is None:
+                        continue
+                    for q in family.quantiles:
+                        quantile_label = f'quantile="{q}"'
+                        lines.append(f"{_series(summary, child.label_text, quantile_label)} {child.sketch.quantile(q):.6f}")
+                    lines.append(f"{_series(summary + '_sum', child.label_text)} {child.sum:.4f}")
+                    lines.append(f"{_series(summary + '_count', child.label_text)} {child.count}")
 
         return "\n".join(lines)
 
@@ -148,6 +453,14 @@ class MetricsService:
         self.collector = MetricsCollector()
         self._initialized = True
 
+        # Hot-path families resolved once
+        self._http_requests = self.collector.counter(
+            "jasper_http_requests_total", "HTTP requests by method, path and status"
+        )
+        self._http_duration = self.collector.histogram(
+            "jasper_http_request_duration_seconds", "HTTP request latency by method and path"
+        )
+
         logger.info("MetricsService initialized")
 
     def record_request(
@@ -170,20 +483,17 @@ class MetricsService:
             "status": str(status_code),
         }
 
-        self.collector.inc_counter("jasper_http_requests_total", labels=labels)
-        self.collector.observe_histogram(
-            "jasper_http_request_duration_seconds",
-            duration_seconds,
-            labels={"method": method, "path": normalized_path}
-        )
+        self._http_requests.child(labels).inc()
+        self._http_duration.child({"method": method, "path": normalized_path}).observe(duration_seconds)
 
     def _normalize_path(self, path: str) -> str:
         """Normalize path by replacing IDs with placeholders."""
-        import re
+        if "{" in path:
+            return path  # Already a route template
         # Replace UUIDs
-        path = re.sub(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', '{id}', path)
+        path = _UUID_RE.sub('{id}', path)
         # Replace numeric IDs
-        path = re.sub(r'/\d+', '/{id}', path)
+        path = _NUMERIC_ID_RE.sub('/{id}', path)
         return path
 
     def record_lead_created(self, source: str = "unknown"):
@@ -0,0 +1,163 @@
+"""
+JASPER CRM - Near-Duplicate Detection
+
+MinHash signatures and an LSH (banded) index for spotting the same story
+told twice: one announcement syndicated by several feeds, or a news item
+we have already written a post about.
+
+- signature(text): 128 MinHash values over the character 5-grams of the
+  normalized text (markup stripped, lowercased, punctuation collapsed).
+  The fraction of equal values estimates the Jaccard similarity of two
+  texts' shingle sets.
+- NearDuplicateIndex: signatures split into 32 bands of 4 rows; texts
+  sharing any whole band are candidates (likely above ~0.4 similarity),
+  and candidates are then checked against the threshold, so a lookup
+  touches a handful of entries instead of the whole index.
+- cluster(): greedy grouping of an ordered list - each entry joins the
+  cluster of the first earlier entry it duplicates, so the first entry
+  of each cluster (e.g. the most relevant) represents it.
+
+Signatures are plain uint32 arrays; encode()/decode() turn them into
+short strings for JSON state files.
+"""
+
+import re
+import base64
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from services.seo_document import plain_text
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+DUPLICATE_THRESHOLD = 0.5    # Estimated Jaccard similarity treated as the same story
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240611)  # Fixed: stored signatures must stay comparable
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercased plain text with punctuation and whitespace collapsed."""
+    return _NON_WORD_RE.sub(" ", plain_text(text).lower()).strip()
+
+
+def shingles(text: str) -> Set[str]:
+    text = normalize(text)
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature of `text`, or None if it has no words."""
+    grams = shingles(text)
+    if not grams:
+        return None
+    hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    # (a*x + b) mod p per permutation; a, x < 2^31 so the product fits in 64 bits
+    permuted = (np.outer(hashes % _PRIME, _A) + _B) % _PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def encode(sig: np.ndarray) -> str:
+    return base64.b64encode(sig.astype("<u4").tobytes()).decode("ascii")
+
+
+def decode(data: str) -> Optional[np.ndarray]:
+    """Signature from encode(); None if it was made with other sizing."""
+    raw = base64.b64decode(data)
+    if len(raw) != NUM_PERM * 4:
+        return None
+    return np.frombuffer(raw, dtype="<u4").astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """LSH index of signatures by key."""
+
+    def __init__(self, threshold: float = DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._signatures
+
+    @staticmethod
+    def _bands(sig: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        for band in range(BANDS):
+            yield band, sig[band * ROWS:(band + 1) * ROWS].tobytes()
+
+    def add(self, key: str, sig: np.ndarray):
+        if key in self._signatures:
+            self.remove(key)
+        self._signatures[key] = sig
+        for bucket in self._bands(sig):
+            self._buckets.setdefault(bucket, set()).add(key)
+
+    def remove(self, key: str):
+        sig = self._signatures.pop(key, None)
+        if sig is None:
+            return
+        for bucket in self._bands(sig):
+            keys = self._buckets.get(bucket)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[bucket]
+
+    def query(self, sig: np.ndarray, threshold: Optional[float] = None) -> List[Tuple[str, float]]:
+        """(key, similarity) of indexed signatures at or above the threshold, most similar first."""
+        threshold = self.threshold if threshold is None else threshold
+        candidates: Set[str] = set()
+        for bucket in self._bands(sig):
+            candidates.update(self._buckets.get(bucket, ()))
+        matches = []
+        for key in candidates:
+            score = similarity(sig, self._signatures[key])
+            if score >= threshold:
+                matches.append((key, score))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+
+def cluster(
+    entries: Sequence[Tuple[str, Optional[np.ndarray]]],
+    threshold: float = DUPLICATE_THRESHOLD,
+) -> List[List[str]]:
+    """
+    Group ordered (key, signature) entries into near-duplicate clusters.
+
+    Clusters come out in the order of their first entry, which is the
+    cluster's representative. Entries without a signature stand alone.
+    """
+    index = NearDuplicateIndex(threshold)
+    clusters: List[List[str]] = []
+    cluster_of: Dict[str, int] = {}
+    for key, sig in entries:
+        matches = index.query(sig) if sig is not None else []
+        if matches:
+            position = cluster_of[matches[0][0]]
+            clusters[position].append(key)
+        else:
+            position = len(clusters)
+            clusters.append([key])
+        cluster_of[key] = position
+        if sig is not None:
+            index.add(key, sig)
+    return clusters
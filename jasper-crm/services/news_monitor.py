@@ -2,6 +2,31 @@
 JASPER News Monitor Service
 Monitors DFI announcements, policy changes, and sector news for SEO content opportunities.
 Auto-generates and publishes timely content to capture search traffic.
+
+Feeds are polled incrementally (state in data/news_monitor/):
+- Conditional GET: each source's ETag/Last-Modified is sent back, so an
+  unchanged feed costs a 304 and no parsing.
+- High-water mark: each source remembers the keys of the last 100
+  entries it has seen, and only entries beyond that mark are scored.
+  Relevant items from earlier polls are kept per source until they are
+  7 days old, so every scan still returns the full recent set.
+- Adaptive polling: each source is polled at roughly the median gap
+  between its entries (15 min - 12 h), backing off while it is unchanged.
+  Sources that aren't due are served from their cached items.
+- Only new entries are scored, a feed's batch at a time, with one
+  KeywordMatcher over the global and every source's keywords (compiled
+  once, rebuilt only if a source brings new keywords).
+- Processed items are remembered in a persistent rolling Bloom filter
+  (bounded; ~0.1% false positives) plus a short list of recent items.
+
+Near-duplicates (services/near_duplicates.py): the same announcement
+carried by several feeds gets different links and titles, so ids don't
+match. Each scan's items are clustered by MinHash similarity of title +
+summary and only the most relevant item of a cluster is generated; the
+rest are marked processed as duplicates of it. Items are also checked
+against the signatures of the last 2000 processed stories and against
+existing blog posts (title + excerpt), so a story isn't written twice
+across cycles either.
 """
 
 import os
@@ -9,13 +34,20 @@ import re
 import json
 import asyncio
 import hashlib
+import statistics
+from collections import deque
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from pathlib import Path
+from typing import List, Dict, Optional, Any, Tuple
 from dataclasses import dataclass, field, asdict
 from enum import Enum
 import httpx
 import feedparser
+from services.bloom_filter import RollingBloomFilter
+from services.json_file_store import json_file
+from services.keyword_matcher import KeywordMatcher
 from services.logging_service import get_logger
+from services.near_duplicates import NearDuplicateIndex, cluster, decode, encode, signature
 
 logger = get_logger(__name__)
 
@@ -43,6 +75,24 @@ class NewsItem:
     processed: bool = False
     content_generated: bool = False
     blog_post_id: Optional[str] = None
+    duplicate_of: Optional[str] = None  # Id of the news item or "post:<slug>" covering the same story
+
+
+STATE_DIR = Path(__file__).parent.parent / "data" / "news_monitor"
+BLOG_DATA_PATH = Path(__file__).parent.parent / "data" / "blog_posts.json"
+
+MAX_AGE = timedelta(days=7)        # News older than this is ignored
+FEED_ENTRIES_MAX = 20              # Newest entries considered per feed
+FEED_SEEN_KEPT = 100               # Entry keys remembered per source (the high-water mark)
+MIN_POLL_INTERVAL = 15 * 60
+MAX_POLL_INTERVAL = 12 * 3600
+UNCHANGED_BACKOFF = 1.5            # Interval growth per poll with nothing new
+PROCESSED_CAPACITY = 20000         # Ids per Bloom filter generation
+PROCESSED_ERROR_RATE = 0.001
+RECENT_KEPT = 200                  # Processed items kept for get_recent_items
+STORIES_KEPT = 2000                # Processed items' signatures kept for duplicate checks
+
+RELEVANCE_MIN = 30
 
 
 # RSS Feed Sources for JASPER
@@ -127,6 +177,16 @@ HIGH_VALUE_KEYWORDS = [
     "announces", "launches", "opens", "deadline", "application", "bid"
 ]
 
+# Two or more of these earn a bonus
+DFI_NAMES = ["ifc", "afdb", "idc", "dbsa", "world bank"]
+
+_HIGH_VALUE_ORDER = {kw.lower(): (i, kw) for i, kw in enumerate(HIGH_VALUE_KEYWORDS)}
+_DFI_SET = frozenset(DFI_NAMES)
+
+# A "$" prefix is optional, so leaving it out finds the same amounts (and lets
+# the regex engine skip ahead to digits)
+FUNDING_AMOUNT_RE = re.compile(r'\d+\s*(?:million|billion|m|bn)', re.I)
+
 
 class NewsMonitorService:
     """
@@ -134,115 +194,368 @@ class NewsMonitorService:
     Automatically generates SEO-optimized content for timely topics.
     """
 
-    def __init__(self):
+    def __init__(self, state_dir: Path = STATE_DIR, posts_path: Path = BLOG_DATA_PATH):
         self.sources = NEWS_SOURCES
-        self.processed_items: Dict[str, NewsItem] = {}
         self.blog_api_url = os.getenv("BLOG_API_URL", "https://api.jasperfinance.org/api/blog")
         self.blog_api_key = os.getenv("AI_BLOG_API_KEY", "jasper-ai-blog-key")
         self.content_api_url = "http://localhost:8001/api/v1/content"
         self._running = False
         self._check_interval = 3600  # 1 hour default
 
+        self._feeds_file = json_file(Path(state_dir) / "feeds.json", default=dict)
+        self._processed_file = json_file(Path(state_dir) / "processed.json", default=dict)
+        self._feeds: Optional[Dict[str, Dict[str, Any]]] = None  # Per-source poll state, loaded lazily
+        self._processed: Optional[RollingBloomFilter] = None
+        self._recent: deque = deque(maxlen=RECENT_KEPT)
+        self._stories: deque = deque(maxlen=STORIES_KEPT)  # [id, title, encoded signature]
+        self._story_index = NearDuplicateIndex()
+        self._story_titles: Dict[str, str] = {}
+        self.posts_path = Path(posts_path)
+        self._post_index = NearDuplicateIndex()
+        self._post_texts: Dict[str, Tuple[str, str]] = {}  # key -> (title, indexed text)
+        self._posts_version: Optional[str] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+        self._matcher = self._build_matcher()
+
+    # =========================================================================
+    # PERSISTENT STATE
+    # =========================================================================
+
+    def _load_state(self):
+        if self._feeds is not None:
+            return
+        self._feeds = self._feeds_file.read()
+        data = self._processed_file.read()
+        self._processed = RollingBloomFilter.from_dict(
+            data.get("filter"), PROCESSED_CAPACITY, PROCESSED_ERROR_RATE
+        )
+        self._recent.extend(data.get("recent", []))
+        for story in data.get("stories", []):
+            self._remember_story(*story)
+
+    def _save_feeds(self):
+        self._feeds_file.write(self._feeds)
+
+    def _save_processed(self):
+        self._processed_file.write({
+            "filter": self._processed.to_dict(),
+            "recent": list(self._recent),
+            "stories": list(self._stories),
+        })
+
+    def is_processed(self, item_id: str) -> bool:
+        self._load_state()
+        return item_id in self._processed
+
+    @staticmethod
+    def _item_to_dict(item: NewsItem) -> Dict[str, Any]:
+        data = asdict(item)
+        data["category"] = item.category.value
+        data["published_at"] = item.published_at.isoformat()
+        return data
+
+    @staticmethod
+    def _item_from_dict(data: Dict[str, Any]) -> NewsItem:
+        return NewsItem(**dict(
+            data,
+            category=NewsCategory(data["category"]),
+            published_at=datetime.fromisoformat(data["published_at"]),
+        ))
+
+    def _http(self) -> httpx.AsyncClient:
+        """Shared client (keeps connections to feed hosts alive between polls)."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(timeout=30.0, follow_redirects=True)
+            self._client_loop = loop
+        return self._client
+
+    # =========================================================================
+    # NEAR-DUPLICATES
+    # =========================================================================
+
+    @staticmethod
+    def _item_signature(item: NewsItem):
+        return signature(f"{item.title}\n{item.summary}")
+
+    def _remember_story(self, item_id: str, title: str, encoded: str):
+        sig = decode(encoded)
+        if sig is None or item_id in self._story_index:
+            return
+        if len(self._stories) == self._stories.maxlen:
+            oldest = self._stories[0][0]
+            self._story_index.remove(oldest)
+            self._story_titles.pop(oldest, None)
+        self._stories.append([item_id, title, encoded])
+        self._story_index.add(item_id, sig)
+        self._story_titles[item_id] = title
+
+    def _posts_index(self) -> NearDuplicateIndex:
+        """Signatures of the blog posts, updated for posts whose title/excerpt changed."""
+        version = json_file(self.posts_path).version()
+        if version == self._posts_version:
+            return self._post_index
+        posts = json_file(self.posts_path).read() if version else []
+        texts = {}
+        for post in posts:
+            key = post.get("slug") or post.get("id")
+            if key:
+                title = post.get("title", "")
+                texts[f"post:{key}"] = (title, f"{title}\n{post.get('excerpt') or ''}")
+        for key in set(self._post_texts) - set(texts):
+            self._post_index.remove(key)
+        for key, (title, text) in texts.items():
+            if self._post_texts.get(key, (None, None))[1] != text:
+                sig = signature(text)
+                if sig is None:
+                    self._post_index.remove(key)
+                else:
+                    self._post_index.add(key, sig)
+        self._post_texts = texts
+        self._posts_version = version
+        return self._post_index
+
+    def find_duplicate(self, item: NewsItem, sig=None) -> Optional[Dict[str, Any]]:
+        """The processed story or blog post `item` near-duplicates, if any."""
+        self._load_state()
+        sig = self._item_signature(item) if sig is None else sig
+        if sig is None:
+            return None
+        best = None
+        for kind, index in (("news", self._story_index), ("post", self._posts_index())):
+            for key, score in index.query(sig):
+                if key == item.id:
+                    continue
+                if best is None or score > best["similarity"]:
+                    title = self._story_titles[key] if kind == "news" else self._post_texts[key][0]
+                    best = {"id": key, "title": title, "kind": kind, "similarity": score}
+                break  # Matches come most similar first
+        return best
+
+    def group_stories(self, items: List[NewsItem]) -> Tuple[List[List[NewsItem]], List[NewsItem]]:
+        """
+        Cluster items (most relevant first) into stories.
+
+        Returns (stories, covered): each story lists its near-duplicate
+        items with the representative - the first, most relevant one -
+        first; `covered` are the items of clusters whose story was already
+        processed or has a blog post. Every non-representative item gets
+        `duplicate_of` set.
+        """
+        signatures = {item.id: self._item_signature(item) for item in items}
+        by_id = {item.id: item for item in items}
+        stories, covered = [], []
+        for ids in cluster([(item.id, signatures[item.id]) for item in items]):
+            story = [by_id[item_id] for item_id in ids]
+            representative = story[0]
+            for duplicate in story[1:]:
+                duplicate.duplicate_of = representative.id
+            existing = self.find_duplicate(representative, signatures[representative.id])
+            if existing is None:
+                stories.append(story)
+                continue
+            representative.duplicate_of = existing["id"]
+            covered.extend(story)
+        if len(stories) < len(items):
+            logger.info(f"Grouped {len(items)} news items into {len(stories)} new stories")
+        return stories, covered
+
     def _generate_item_id(self, link: str, title: str) -> str:
         """Generate unique ID for news item"""
         content = f"{link}:{title}"
         return hashlib.md5(content.encode()).hexdigest()[:12]
 
+    def _build_matcher(self) -> KeywordMatcher:
+        keywords = set(HIGH_VALUE_KEYWORDS) | set(DFI_NAMES)
+        for config in self.sources.values():
+            keywords.update(config.get("keywords", []))
+        return KeywordMatcher(keywords)
+
+    def match_keywords(self, texts: List[str], source_keywords: List[str]) -> List[Dict[str, Any]]:
+        """
+        Score a batch of texts (0-100) in one keyword pass.
+
+        Returns {"score", "keywords", "positions"} per text: matched
+        keywords as configured (high-value first), and the start positions
+        of every matched keyword in the lowercased text.
+        """
+        if any(kw not in self._matcher for kw in source_keywords):
+            self._matcher = self._build_matcher()  # Sources changed since startup
+            if any(kw not in self._matcher for kw in source_keywords):
+                self._matcher = KeywordMatcher(self._matcher.keywords + tuple(source_keywords))
+
+        source_lower = [(kw, kw.lower()) for kw in source_keywords]
+        results = []
+        for text, positions in zip(texts, self._matcher.find_batch(texts)):
+            score = 0.0
+
+            # High-value keywords (weight: 10 each), then source-specific ones (weight: 5 each)
+            ranked = [_HIGH_VALUE_ORDER[kw] for kw in positions if kw in _HIGH_VALUE_ORDER]
+            ranked.sort()
+            high_value = [kw for _, kw in ranked]
+            from_source = [kw for kw, lower in source_lower if lower in positions]
+            score += 10 * len(high_value) + 5 * len(from_source)
+
+            # Bonus for multiple DFI mentions
+            if len(_DFI_SET.intersection(positions)) > 1:
+                score += 15
+
+            # Bonus for funding amounts
+            if FUNDING_AMOUNT_RE.search(text):
+                score += 20
+
+            results.append({
+                "score": min(score, 100.0),  # Cap at 100
+                "keywords": high_value + from_source,
+                "positions": positions,
+            })
+        return results
+
     def _calculate_relevance(self, title: str, summary: str, source_keywords: List[str]) -> float:
         """Calculate relevance score (0-100) based on keyword matching"""
-        text = f"{title} {summary}".lower()
-
-        score = 0.0
-        matched_keywords = []
-
-        # Check high-value keywords (weight: 10 each)
-        for kw in HIGH_VALUE_KEYWORDS:
-            if kw.lower() in text:
-                score += 10
-                matched_keywords.append(kw)
-
-        # Check source-specific keywords (weight: 5 each)
-        for kw in source_keywords:
-            if kw.lower() in text:
-                score += 5
-                matched_keywords.append(kw)
-
-        # Bonus for multiple DFI mentions
-        dfi_count = sum(1 for dfi in ["ifc", "afdb", "idc", "dbsa", "world bank"] if dfi in text)
-        if dfi_count > 1:
-            score += 15
-
-        # Bonus for funding amounts
-        if re.search(r'\$?\d+\s*(million|billion|m|bn)', text, re.I):
-            score += 20
-
-        # Cap at 100
-        return min(score, 100.0), matched_keywords
+        result = self.match_keywords([f"{title} {summary}"], source_keywords)[0]
+        return result["score"], result["keywords"]
+
+    @staticmethod
+    def _entry_published(entry: Dict[str, Any]) -> Optional[datetime]:
+        published = entry.get("published_parsed") or entry.get("updated_parsed")
+        return datetime(*published[:6]) if published else None
+
+    @staticmethod
+    def _entry_key(entry: Dict[str, Any]) -> str:
+        raw = entry.get("id") or entry.get("link") or entry.get("title", "")
+        return hashlib.md5(raw.encode()).hexdigest()[:12]
+
+    @staticmethod
+    def _observed_interval(published: List[datetime], current: float) -> float:
+        """Poll interval from the median gap between a feed's entries."""
+        times = sorted(published)
+        gaps = [(b - a).total_seconds() for a, b in zip(times, times[1:]) if b > a]
+        interval = statistics.median(gaps) if gaps else current
+        return min(max(interval, MIN_POLL_INTERVAL), MAX_POLL_INTERVAL)
+
+    def _score_entries(self, entries: List[Dict[str, Any]], source_config: dict, now: datetime) -> List[NewsItem]:
+        """Relevant items among a feed's new entries, scored as one batch."""
+        candidates = []
+        for entry in entries:
+            published_at = self._entry_published(entry) or now
+            # Skip old news (> 7 days)
+            if now - published_at <= MAX_AGE:
+                candidates.append((entry, published_at))
+
+        texts = [
+            f"{entry.get('title', '')} {entry.get('summary', entry.get('description', ''))}"
+            for entry, _ in candidates
+        ]
+        scores = self.match_keywords(texts, source_config.get("keywords", []))
 
-    async def fetch_feed(self, source_id: str, source_config: dict) -> List[NewsItem]:
-        """Fetch and parse RSS feed"""
         items = []
+        for (entry, published_at), result in zip(candidates, scores):
+            if result["score"] < RELEVANCE_MIN:
+                continue
+            title = entry.get("title", "")
+            summary = entry.get("summary", entry.get("description", ""))
+            link = entry.get("link", "")
+            items.append(NewsItem(
+                id=self._generate_item_id(link, title),
+                title=title,
+                summary=summary[:500],
+                link=link,
+                source=source_config["name"],
+                category=source_config["category"],
+                published_at=published_at,
+                relevance_score=result["score"],
+                keywords=result["keywords"]
+            ))
+        return items
 
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(source_config["url"])
-                if response.status_code != 200:
-                    logger.warning(f"Failed to fetch {source_id}: {response.status_code}")
-                    return items
-
-                feed = feedparser.parse(response.text)
-
-                for entry in feed.entries[:20]:  # Last 20 items
-                    title = entry.get("title", "")
-                    summary = entry.get("summary", entry.get("description", ""))
-                    link = entry.get("link", "")
-
-                    # Parse published date
-                    published = entry.get("published_parsed") or entry.get("updated_parsed")
-                    if published:
-                        published_at = datetime(*published[:6])
-                    else:
-                        published_at = datetime.now()
-
-                    # Skip old news (> 7 days)
-                    if datetime.now() - published_at > timedelta(days=7):
-                        continue
-
-                    # Calculate relevance
-                    relevance, keywords = self._calculate_relevance(
-                        title, summary, source_config.get("keywords", [])
-                    )
-
-                    # Only include if relevance > 30
-                    if relevance >= 30:
-                        item_id = self._generate_item_id(link, title)
-
-                        item = NewsItem(
-                            id=item_id,
-                            title=title,
-                            summary=summary[:500],
-                            link=link,
-                            source=source_config["name"],
-                            category=source_config["category"],
-                            published_at=published_at,
-                            relevance_score=relevance,
-                            keywords=keywords
-                        )
-                        items.append(item)
-
-                logger.info(f"Fetched {len(items)} relevant items from {source_id}")
+    async def _poll_feed(self, source_id: str, source_config: dict, state: Dict[str, Any], now: datetime) -> int:
+        """Conditional GET of one feed; scores new entries into `state`. Returns the new item count."""
+        interval = state.get("interval", self._check_interval)
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
 
+        state["last_checked"] = now.isoformat()
+        try:
+            response = await self._http().get(source_config["url"], headers=headers)
         except Exception as e:
             logger.error(f"Error fetching {source_id}: {e}")
-
+            response = None
+
+        if response is None or response.status_code != 200:
+            # 304 Not Modified, or a failure: nothing new, poll less often
+            if response is not None and response.status_code != 304:
+                logger.warning(f"Failed to fetch {source_id}: {response.status_code}")
+            state["interval"] = min(interval * UNCHANGED_BACKOFF, MAX_POLL_INTERVAL)
+            state["next_check"] = (now + timedelta(seconds=state["interval"])).isoformat()
+            return 0
+
+        state["etag"] = response.headers.get("etag")
+        state["last_modified"] = response.headers.get("last-modified")
+        feed = feedparser.parse(response.text)
+        entries = feed.entries[:FEED_ENTRIES_MAX]
+
+        # High-water mark: keys of the entries already seen. A timestamp mark
+        # would miss entries published late with an earlier pubDate.
+        seen = state.get("seen", [])
+        seen_set = set(seen)
+        new_entries = []
+        published_times = []
+        for entry in entries:
+            published = self._entry_published(entry)
+            if published is not None:
+                published_times.append(published)
+            key = self._entry_key(entry)
+            if key in seen_set:
+                continue
+            seen.append(key)
+            seen_set.add(key)
+            new_entries.append(entry)
+        new_items = self._score_entries(new_entries, source_config, now) if new_entries else []
+
+        state["seen"] = seen[-FEED_SEEN_KEPT:]
+        if new_entries:
+            state["interval"] = self._observed_interval(published_times, interval)
+            state["last_new_at"] = now.isoformat()
+        else:
+            state["interval"] = min(interval * UNCHANGED_BACKOFF, MAX_POLL_INTERVAL)
+        state["next_check"] = (now + timedelta(seconds=state["interval"])).isoformat()
+
+        cached = {item["id"]: item for item in state.get("items", [])}
+        for item in new_items:
+            cached[item.id] = self._item_to_dict(item)
+        state["items"] = list(cached.values())
+        logger.info(f"Fetched {len(new_items)} new relevant items from {source_id}")
+        return len(new_items)
+
+    def _cached_items(self, state: Dict[str, Any], now: datetime) -> List[NewsItem]:
+        """A source's relevant items that are still recent (drops expired ones from `state`)."""
+        items = [self._item_from_dict(data) for data in state.get("items", [])]
+        items = [item for item in items if now - item.published_at <= MAX_AGE]
+        state["items"] = [self._item_to_dict(item) for item in items]
         return items
 
-    async def scan_all_sources(self) -> List[NewsItem]:
-        """Scan all configured news sources"""
+    async def fetch_feed(self, source_id: str, source_config: dict, force: bool = False) -> List[NewsItem]:
+        """Relevant recent items for one feed, polling it if it is due (or `force`)."""
+        self._load_state()
+        now = datetime.now()
+        state = self._feeds.setdefault(source_id, {})
+        next_check = state.get("next_check")
+        if force or not next_check or datetime.fromisoformat(next_check) <= now:
+            await self._poll_feed(source_id, source_config, state, now)
+        return self._cached_items(state, now)
+
+    async def scan_all_sources(self, force: bool = False) -> List[NewsItem]:
+        """Scan all configured news sources (only those due unless `force`)"""
+        self._load_state()
         all_items = []
 
         tasks = [
-            self.fetch_feed(source_id, config)
+            self.fetch_feed(source_id, config, force=force)
             for source_id, config in self.sources.items()
         ]
 
@@ -253,6 +566,7 @@ class NewsMonitorService:
                 all_items.extend(result)
             elif isinstance(result, Exception):
                 logger.error(f"Feed fetch error: {result}")
+        self._save_feeds()
 
         # Sort by relevance
         all_items.sort(key=lambda x: x.relevance_score, reverse=True)
@@ -260,7 +574,7 @@ class NewsMonitorService:
         # Filter out already processed
         new_items = [
             item for item in all_items
-            if item.id not in self.processed_items
+            if item.id not in self._processed
         ]
 
         logger.info(f"Found {len(new_items)} new relevant news items")
@@ -359,11 +673,33 @@ LENGTH: 800-1200 words
             logger.error(f"Error publishing: {e}")
             return None
 
+    def _mark_processed(self, *items: NewsItem):
+        self._load_state()
+        for item in items:
+            item.processed = True
+            self._processed.add(item.id)
+            self._recent.append(self._item_to_dict(item))
+            sig = self._item_signature(item)
+            if sig is not None:
+                self._remember_story(item.id, item.title, encode(sig))
+        self._save_processed()
+
     async def process_news_item(self, item: NewsItem) -> bool:
         """Process a single news item: generate content and publish"""
 
         # Skip if already processed
-        if item.id in self.processed_items:
+        if self.is_processed(item.id):
+            return False
+
+        # Skip stories already written up (another feed's copy, or a blog post)
+        duplicate = self.find_duplicate(item)
+        if duplicate is not None:
+            logger.info(
+                f"Skipping near-duplicate: {item.title[:60]}... "
+                f"(of {duplicate['kind']} {duplicate['id']}, similarity {duplicate['similarity']:.2f})"
+            )
+            item.duplicate_of = duplicate["id"]
+            self._mark_processed(item)
             return False
 
         logger.info(f"Processing: {item.title[:60]}... (relevance: {item.relevance_score})")
@@ -371,17 +707,15 @@ LENGTH: 800-1200 words
         # Generate content
         content = await self.generate_content_for_news(item)
         if not content:
-            item.processed = True
-            self.processed_items[item.id] = item
+            self._mark_processed(item)
             return False
 
         # Publish to blog
         post_id = await self.publish_content(content, item)
 
-        item.processed = True
         item.content_generated = content is not None
         item.blog_post_id = post_id
-        self.processed_items[item.id] = item
+        self._mark_processed(item)
 
         return post_id is not None
 
@@ -392,13 +726,23 @@ LENGTH: 800-1200 words
         # Scan all sources
         items = await self.scan_all_sources()
 
-        # Process top items (by relevance)
+        # One generation per story: cluster feeds' copies of the same news
+        stories, covered = self.group_stories(items)
+        if covered:
+            self._mark_processed(*covered)
+
+        # Process top stories (by relevance of their best item)
         processed_count = 0
+        duplicates_skipped = len(covered)
         results = []
 
-        for item in items[:max_posts]:
+        for story in stories[:max_posts]:
+            item = story[0]
             if item.relevance_score >= 50:  # Only high-relevance items
                 success = await self.process_news_item(item)
+                if len(story) > 1 and self.is_processed(item.id):
+                    self._mark_processed(*story[1:])
+                    duplicates_skipped += len(story) - 1
                 if success:
                     processed_count += 1
                     results.append({
@@ -411,6 +755,8 @@ LENGTH: 800-1200 words
         summary = {
             "scan_time": datetime.now().isoformat(),
             "items_found": len(items),
+            "stories_found": len(stories),
+            "duplicates_skipped": duplicates_skipped,
             "items_processed": processed_count,
             "results": results
         }
@@ -420,24 +766,34 @@ LENGTH: 800-1200 words
 
     def get_status(self) -> Dict[str, Any]:
         """Get current monitor status"""
+        self._load_state()
         return {
             "running": self._running,
             "sources_count": len(self.sources),
-            "processed_items": len(self.processed_items),
+            "processed_items": len(self._processed),
+            "remembered_stories": len(self._stories),
             "check_interval_hours": self._check_interval / 3600,
-            "sources": list(self.sources.keys())
+            "sources": list(self.sources.keys()),
+            "polling": {
+                source_id: {
+                    "interval_minutes": round(state.get("interval", self._check_interval) / 60, 1),
+                    "last_checked": state.get("last_checked"),
+                    "next_check": state.get("next_check"),
+                    "cached_items": len(state.get("items", [])),
+                }
+                for source_id, state in self._feeds.items()
+            },
         }
 
     def get_recent_items(self, limit: int = 10) -> List[Dict]:
         """Get recently processed items"""
-        items = sorted(
-            self.processed_items.values(),
-            key=lambda x: x.published_at,
+        self._load_state()
+        return sorted(
+            self._recent,
+            key=lambda x: x["published_at"],
             reverse=True
         )[:limit]
 
-        return [asdict(item) for item in items]
-
 
 # Singleton instance
 news_monitor = NewsMonitorService()
@@ -0,0 +1,94 @@
+"""
+JASPER CRM - Sampling Profiler
+
+Samples every thread's Python stack at a fixed interval for a bounded
+window and returns the result in collapsed-stack format, one line per
+unique stack:
+
+    MainThread;uvicorn/main.py:run;...;services/blog_service.py:_load_posts 42
+
+That is the input format of flamegraph.pl, speedscope and inferno, so the
+output can be turned into a flamegraph locally. Sampling uses
+sys._current_frames() from a background thread and needs no extra
+dependencies. Overhead is roughly one stack walk per thread per interval,
+and only while a profile is running.
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+MAX_SECONDS = 60.0
+MIN_INTERVAL = 0.001
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    # Trim to the last two path components (package/module.py)
+    parts = filename.replace(os.sep, "/").rsplit("/", 2)
+    short = "/".join(parts[-2:]) if len(parts) > 1 else filename
+    return f"{short}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """One profiling session at a time; concurrent requests are rejected."""
+
+    def __init__(self):
+        self._busy = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._busy.locked()
+
+    def profile(self, seconds: float = 10.0, interval: float = 0.005, include_idle: bool = False) -> Optional[str]:
+        """
+        Sample for `seconds` and return collapsed stacks, or None if a profile is already running.
+
+        Blocking; call from a worker thread (e.g. asyncio.to_thread).
+        """
+        if not self._busy.acquire(blocking=False):
+            return None
+        try:
+            return self._sample(min(seconds, MAX_SECONDS), max(interval, MIN_INTERVAL), include_idle)
+        finally:
+            self._busy.release()
+
+    def _sample(self, seconds: float, interval: float, include_idle: bool) -> str:
+        me = threading.get_ident()
+        stacks: Counter = Counter()
+        names: Dict[int, str] = {}
+        deadline = time.perf_counter() + seconds
+
+        while time.perf_counter() < deadline:
+            for thread in threading.enumerate():
+                names.setdefault(thread.ident, thread.name)
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                if not include_idle and labels and self._is_idle(labels[0]):
+                    continue
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                stacks[";".join(reversed(labels))] += 1
+
+            time.sleep(interval)
+
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+    @staticmethod
+    def _is_idle(leaf: str) -> bool:
+        """Threads parked in a wait (event loop select, queue get, sleep) aren't interesting."""
+        return leaf.endswith((":select", ":poll", ":epoll", ":wait", ":_wait_for_tstate_lock", ":sleep")) or \
+            "selectors.py" in leaf or "threading.py:wait" in leaf
+
+
+# Singleton instance
+sampling_profiler = SamplingProfiler()
@@ -0,0 +1,246 @@
+"""
+JASPER CRM - Related Article Graph
+
+Top-k related articles for blog posts, so the related-links widget and
+internal-link passes read neighbours instead of scoring each post against
+every other one.
+
+Each post is encoded once as a sparse weighted feature vector (category,
+tags, title terms - see LinkBuilderService.article_features). Relevance
+between two posts is the sum of the weights of the features they share,
+i.e. the dot product of their vectors. The graph keeps an inverted index
+(feature -> posts), so a post's row of the similarity matrix costs only
+the posts that share a feature with it.
+
+Rows are built on first query and cached. When blog_posts.json changes,
+only posts whose feature fields or published state changed are
+re-encoded, and each cached row is patched with the changed posts' new
+scores. A row is dropped (rebuilt on its next query) only when a changed
+post that was in its top-k lost score, since a post outside the row may
+then move up. Writes that touch nothing else (view counts, ratings)
+re-encode nothing.
+
+The graph lives in memory: re-encoding a 10k-post blog on startup takes
+tens of milliseconds, so nothing is persisted.
+"""
+
+import heapq
+import logging
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from services.json_file_store import json_file
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 20  # Neighbours kept per post
+
+FEATURE_FIELDS = ("title", "category", "tags")  # Post fields the feature function reads
+
+FeatureFn = Callable[[Dict[str, Any]], Dict[str, float]]
+
+
+def _source(post: Dict[str, Any]) -> Tuple[Any, ...]:
+    """The inputs of a post's feature vector; posts whose source is unchanged aren't re-encoded."""
+    values = [post.get(field) for field in FEATURE_FIELDS]
+    return tuple(tuple(v) if isinstance(v, list) else v for v in values) + (post.get("status") == "published",)
+
+
+class RelatedArticleGraph:
+    """Top-k neighbour lists over sparse post feature vectors."""
+
+    def __init__(self, posts_path: Path, features_fn: FeatureFn, top_k: int = TOP_K):
+        self.posts_path = Path(posts_path)
+        self.features_fn = features_fn
+        self.top_k = top_k
+        self._lock = threading.RLock()
+
+        self.features: Dict[str, Dict[str, float]] = {}
+        self.sources: Dict[str, Tuple[Any, ...]] = {}
+        self.published: Set[str] = set()
+        self.meta: Dict[str, Dict[str, Any]] = {}   # title/category/excerpt/order per slug
+        self.postings: Dict[str, Set[str]] = defaultdict(set)  # feature -> published slugs
+        self.neighbors: Dict[str, List[List[Any]]] = {}        # slug -> [[slug, score], ...], built on query
+        self._source_version: Optional[str] = None
+
+    # -------------------------------------------------------------------------
+    # Scoring
+    # -------------------------------------------------------------------------
+
+    def _rank(self, scores: Dict[str, float], limit: int) -> List[List[Any]]:
+        """Best `limit` positive scores, ties broken by position in blog_posts.json."""
+        cutoff = heapq.nlargest(limit, scores.values())[-1] if len(scores) > limit else 0
+        ranked = sorted(
+            (item for item in scores.items() if item[1] > 0 and item[1] >= cutoff),
+            key=lambda item: (-item[1], self.meta[item[0]]["order"]),
+        )
+        return [[other, round(score, 4)] for other, score in ranked[:limit]]
+
+    def _row(self, slug: str, limit: int) -> List[List[Any]]:
+        """Top `limit` published neighbours of `slug` (one row of the similarity matrix)."""
+        scores: Dict[str, float] = defaultdict(float)
+        for feature, weight in self.features.get(slug, {}).items():
+            for other in self.postings.get(feature, ()):
+                if other != slug:
+                    scores[other] += weight
+        return self._rank(scores, limit)
+
+    def _score(self, slug: str, other: str) -> float:
+        """Relevance of `other` as a neighbour of `slug` (0 unless `other` is published)."""
+        if other not in self.published:
+            return 0.0
+        a, b = self.features[slug], self.features[other]
+        if len(b) < len(a):
+            a, b = b, a
+        return round(sum(weight for feature, weight in a.items() if feature in b), 4)
+
+    def _patch_row(self, slug: str, row: List[List[Any]], changed: Set[str]) -> Optional[List[List[Any]]]:
+        """`row` with the changed posts' new scores applied, or None if it must be rebuilt."""
+        for other in changed:
+            old = next((score for o, score in row if o == other), None)
+            new = self._score(slug, other) if other in self.features else 0.0
+            full = len(row) >= self.top_k
+            if old is None:
+                # Enters the row only if it reaches the k-th score
+                if new <= 0 or (full and new < row[-1][1]):
+                    continue
+            elif new == old:
+                continue
+            elif new < old and full:
+                # A post outside the row may now outrank it
+                return None
+            scores = dict((o, score) for o, score in row)
+            scores[other] = new
+            row = self._rank(scores, self.top_k)
+        return row
+
+    def _patch_rows(self, changed: Set[str]) -> int:
+        """Apply re-encoded or removed posts to the cached rows; returns how many rows changed."""
+        touched = 0
+        for slug, row in list(self.neighbors.items()):
+            patched = None if slug in changed else self._patch_row(slug, row, changed)
+            if patched is None:
+                del self.neighbors[slug]
+            elif patched is row:
+                continue
+            else:
+                self.neighbors[slug] = patched
+            touched += 1
+        return touched
+
+    def _index(self, slug: str, features: Dict[str, float], published: bool):
+        self.features[slug] = features
+        if published:
+            self.published.add(slug)
+            for feature in features:
+                self.postings[feature].add(slug)
+
+    def _unindex(self, slug: str):
+        if slug in self.published:
+            for feature in self.features.get(slug, {}):
+                members = self.postings.get(feature)
+                if members is not None:
+                    members.discard(slug)
+                    if not members:
+                        del self.postings[feature]
+            self.published.discard(slug)
+        self.features.pop(slug, None)
+
+    # -------------------------------------------------------------------------
+    # Sync with blog_posts.json
+    # -------------------------------------------------------------------------
+
+    def _ensure_current(self):
+        with self._lock:
+            version = json_file(self.posts_path).version()
+            if version != self._source_version:
+                self.refresh()
+
+    def refresh(self) -> Dict[str, int]:
+        """Re-encode posts that changed in blog_posts.json and patch the cached rows they affect."""
+        with self._lock:
+            posts, version = json_file(self.posts_path).read_versioned()
+
+            seen: Set[str] = set()
+            changed: Set[str] = set()
+            for order, post in enumerate(posts):
+                slug = post.get("slug")
+                if not slug or slug in seen:
+                    continue
+                seen.add(slug)
+                self.meta[slug] = {
+                    "title": post.get("title", ""),
+                    "category": post.get("category", ""),
+                    "excerpt": (post.get("excerpt") or "")[:150],
+                    "order": order,
+                }
+                source = _source(post)
+                if self.sources.get(slug) == source:
+                    continue
+                self.sources[slug] = source
+                features = self.features_fn(post)
+                published = source[-1]
+                if self.features.get(slug) == features and (slug in self.published) == published:
+                    continue
+                self._unindex(slug)
+                self._index(slug, features, published)
+                changed.add(slug)
+
+            removed = set(self.features) - seen
+            for slug in removed:
+                self._unindex(slug)
+                self.sources.pop(slug, None)
+
+            recomputed = self._patch_rows(changed | removed) if changed or removed else 0
+            for slug in removed:
+                self.meta.pop(slug, None)  # Needed while patching rows that still list it
+            self._source_version = version
+            if changed or removed:
+                logger.info(
+                    f"[RelatedArticles] {len(changed)} posts re-encoded, {len(removed)} removed, "
+                    f"{recomputed} cached neighbour rows updated"
+                )
+            return {"changed": len(changed), "removed": len(removed), "recomputed": recomputed}
+
+    # -------------------------------------------------------------------------
+    # API
+    # -------------------------------------------------------------------------
+
+    def related(self, slug: str, max_links: int = 5) -> List[Dict[str, Any]]:
+        """Top related published posts for `slug`, best first."""
+        self._ensure_current()
+        with self._lock:
+            if slug not in self.features:
+                return []
+            if max_links > self.top_k:
+                row = self._row(slug, max_links)
+            else:
+                row = self.neighbors.get(slug)
+                if row is None:
+                    row = self.neighbors[slug] = self._row(slug, self.top_k)
+            return [
+                {
+                    "slug": other,
+                    "title": self.meta[other]["title"],
+                    "category": self.meta[other]["category"],
+                    "excerpt": self.meta[other]["excerpt"],
+                    "score": score,
+                }
+                for other, score in row[:max_links]
+            ]
+
+
+_graphs: Dict[str, RelatedArticleGraph] = {}
+_graphs_lock = threading.Lock()
+
+
+def related_article_graph(posts_path: Path, features_fn: FeatureFn) -> RelatedArticleGraph:
+    """The process-wide graph for a blog_posts.json path (created on first use)."""
+    key = str(Path(posts_path).resolve())
+    with _graphs_lock:
+        graph = _graphs.get(key)
+        if graph is None:
+            graph = _graphs[key] = RelatedArticleGraph(posts_path, features_fn)
+        return graph
@@ -23,6 +23,8 @@ from datetime import datetime
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass, field
 
+from services.llm_accounting import generate_gemini_content
+
 logger = logging.getLogger(__name__)
 
 
@@ -131,7 +133,8 @@ Be specific with data - include actual figures, dates, and attribution.
                 max_output_tokens=2000,
             )
 
-            response = self.client.models.generate_content(
+            response = generate_gemini_content(
+                self.client, "research",
                 model=self.model,
                 contents=prompt,
                 config=config,
@@ -284,7 +287,8 @@ Respond with:
                 max_output_tokens=800,
             )
 
-            response = self.client.models.generate_content(
+            response = generate_gemini_content(
+                self.client, "claim_verification",
                 model=self.model,
                 contents=prompt,
                 config=config,
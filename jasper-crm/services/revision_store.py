@@ -0,0 +1,276 @@
+"""
+JASPER CRM - Blog Revision Store
+
+Version history for blog posts, stored as one segment file per post
+under data/blog_revisions/<slug>.json (slugs that aren't filename-safe get
+an escaped name plus a hash of the slug):
+
+    {
+      "current_revision": 57,
+      "revisions": [
+        {"rev": 8,  "timestamp": ..., "user_id": ..., "action": ..., "summary": ...,
+         "title": ..., "base": "<zlib+base64 full snapshot>"},
+        {"rev": 9,  ..., "delta": "<zlib+base64 changes vs rev 8>"},
+        ...
+      ]
+    }
+
+- Every REBASE_EVERY-th revision (and the oldest kept one) is a full base
+  snapshot; the others store only the fields that changed since the
+  previous revision. Changed text is stored as a line diff against the
+  previous value, so a one-paragraph edit of a long article costs bytes,
+  not the whole article.
+- get() reconstructs a revision from its nearest base plus at most
+  REBASE_EVERY - 1 deltas.
+- History and lookups read only the one post's segment, so they no longer
+  scale with the number of edits across the whole blog.
+
+The legacy single-file blog_revisions.json (full snapshot per revision) is
+split into segments on first use and renamed to *.migrated.
+"""
+
+import re
+import json
+import zlib
+import base64
+import difflib
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from services.json_file_store import json_file
+
+logger = logging.getLogger(__name__)
+
+REBASE_EVERY = 10
+
+# Below this size a changed value is stored whole; diffing isn't worth it
+MIN_DIFF_CHARS = 200
+
+
+def _pack(obj: Any) -> str:
+    raw = json.dumps(obj, separators=(",", ":"), default=str).encode()
+    return base64.b64encode(zlib.compress(raw, 6)).decode("ascii")
+
+
+def _unpack(blob: str) -> Any:
+    return json.loads(zlib.decompress(base64.b64decode(blob)))
+
+
+def _diff_lines(old: str, new: str) -> List[Any]:
+    """
+    Line diff of `new` against `old` as a list of ops:
+    [start, end] copies old lines start..end, a string inserts new text.
+    """
+    a = old.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+    ops: List[Any] = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:  # insert / replace
+            ops.append("".join(b[j1:j2]))
+    return ops
+
+
+def _patch_lines(old: str, ops: List[Any]) -> str:
+    a = old.splitlines(keepends=True)
+    return "".join("".join(a[op[0]:op[1]]) if isinstance(op, list) else op for op in ops)
+
+
+def _as_text(value: Any) -> Optional[str]:
+    """Text to diff for a value: strings as-is, structures as indented JSON."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, indent=1, default=str)
+    return None
+
+
+def make_delta(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Changes from snapshot `old` to `new`:
+      {"set": {field: value}, "diff": {field: ["s"|"j", ops]}, "del": [field, ...]}
+    """
+    delta: Dict[str, Any] = {}
+    for field in new:
+        value = new[field]
+        if field in old and old[field] == value:
+            continue
+        old_text, new_text = _as_text(old.get(field)), _as_text(value)
+        if (
+            old_text is not None and new_text is not None
+            and type(old.get(field)) is type(value)
+            and len(new_text) >= MIN_DIFF_CHARS
+        ):
+            ops = _diff_lines(old_text, new_text)
+            if len(json.dumps(ops)) < len(new_text):
+                delta.setdefault("diff", {})[field] = ["s" if isinstance(value, str) else "j", ops]
+                continue
+        delta.setdefault("set", {})[field] = value
+    removed = [field for field in old if field not in new]
+    if removed:
+        delta["del"] = removed
+    return delta
+
+
+def apply_delta(old: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    snapshot = dict(old)
+    for field, (kind, ops) in delta.get("diff", {}).items():
+        text = _patch_lines(_as_text(old.get(field)) or "", ops)
+        snapshot[field] = text if kind == "s" else json.loads(text)
+    snapshot.update(delta.get("set", {}))
+    for field in delta.get("del", []):
+        snapshot.pop(field, None)
+    return snapshot
+
+
+class RevisionStore:
+    """Per-post revision segments with base snapshots and deltas."""
+
+    def __init__(
+        self,
+        directory: Path,
+        legacy_path: Optional[Path] = None,
+        max_revisions: int = 50,
+        rebase_every: int = REBASE_EVERY,
+    ):
+        self.directory = Path(directory)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.max_revisions = max_revisions
+        self.rebase_every = rebase_every
+        self._migrated = False
+        self._migrate_lock = threading.Lock()
+
+    def _segment(self, slug: str):
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", slug)
+        if safe != slug or not slug or len(slug) > 200:
+            # "~" can't appear in a plain name, so escaped slugs never share a file
+            digest = hashlib.sha1(slug.encode("utf-8", "surrogatepass")).hexdigest()[:10]
+            safe = f"{safe[:180]}~{digest}"
+        return json_file(self.directory / f"{safe}.json", default=dict)
+
+    # -------------------------------------------------------------------------
+    # Reconstruction
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _materialize(revisions: List[Dict[str, Any]], index: int) -> Dict[str, Any]:
+        """Full snapshot of revisions[index]: nearest base at or before it, plus deltas."""
+        start = index
+        while start > 0 and "base" not in revisions[start]:
+            start -= 1
+        snapshot = _unpack(revisions[start]["base"])
+        for rev in revisions[start + 1:index + 1]:
+            snapshot = apply_delta(snapshot, _unpack(rev["delta"]))
+        return snapshot
+
+    @staticmethod
+    def _public(rev: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in rev.items() if k not in ("base", "delta")}
+
+    # -------------------------------------------------------------------------
+    # API
+    # -------------------------------------------------------------------------
+
+    def append(self, slug: str, snapshot: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add a revision for `slug` and return it (with its full snapshot).
+
+        `meta` holds timestamp/user_id/action/summary; "rev" is assigned here.
+        """
+        self._ensure_migrated()
+        with self._segment(slug).edit() as segment:
+            revisions = segment.setdefault("revisions", [])
+            rev_number = segment.get("current_revision", 0) + 1
+
+            record = {"rev": rev_number, **meta, "title": snapshot.get("title") or "Untitled"}
+            since_base = 0
+            for rev in reversed(revisions):
+                if "base" in rev:
+                    break
+                since_base += 1
+            if not revisions or since_base + 1 >= self.rebase_every:
+                record["base"] = _pack(snapshot)
+            else:
+                previous = self._materialize(revisions, len(revisions) - 1)
+                record["delta"] = _pack(make_delta(previous, snapshot))
+
+            revisions.append(record)
+            segment["current_revision"] = rev_number
+            self._prune(revisions)
+
+        return {**self._public(record), "snapshot": snapshot}
+
+    def _prune(self, revisions: List[Dict[str, Any]]):
+        """Keep the newest max_revisions; the oldest kept one becomes a base."""
+        excess = len(revisions) - self.max_revisions
+        if excess <= 0:
+            return
+        first = revisions[excess]
+        if "base" not in first:
+            first["base"] = _pack(self._materialize(revisions, excess))
+            del first["delta"]
+        del revisions[:excess]
+
+    def history(self, slug: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Revision metadata, newest first (no snapshots)."""
+        self._ensure_migrated()
+        revisions = self._segment(slug).read().get("revisions", [])
+        return [self._public(rev) for rev in reversed(revisions[-limit:])] if limit > 0 else []
+
+    def get(self, slug: str, rev_number: int) -> Optional[Dict[str, Any]]:
+        """One revision with its reconstructed snapshot."""
+        self._ensure_migrated()
+        revisions = self._segment(slug).read().get("revisions", [])
+        for index, rev in enumerate(revisions):
+            if rev["rev"] == rev_number:
+                return {**self._public(rev), "snapshot": self._materialize(revisions, index)}
+        return None
+
+    def delete(self, slug: str):
+        """Drop a post's whole revision chain (when the post is purged)."""
+        self._ensure_migrated()
+        segment = self._segment(slug)
+        with segment.locked():
+            segment.path.unlink(missing_ok=True)
+
+    # -------------------------------------------------------------------------
+    # Legacy blog_revisions.json
+    # -------------------------------------------------------------------------
+
+    def _ensure_migrated(self):
+        if self._migrated or self.legacy_path is None:
+            return
+        with self._migrate_lock:
+            if self._migrated:
+                return
+            legacy = json_file(self.legacy_path, default=dict)
+            with legacy.locked():
+                if self.legacy_path.exists():
+                    self._migrate(legacy.read())
+                    self.legacy_path.rename(self.legacy_path.with_suffix(".json.migrated"))
+            self._migrated = True
+
+    def _migrate(self, legacy: Dict[str, Any]):
+        """Re-encode full-snapshot history as base + delta segments."""
+        for slug, entry in legacy.items():
+            revisions = []
+            previous = None
+            for position, rev in enumerate(entry.get("revisions", [])):
+                snapshot = rev.get("snapshot") or {}
+                record = {k: v for k, v in rev.items() if k != "snapshot"}
+                record["title"] = snapshot.get("title") or "Untitled"
+                if previous is None or position % self.rebase_every == 0:
+                    record["base"] = _pack(snapshot)
+                else:
+                    record["delta"] = _pack(make_delta(previous, snapshot))
+                revisions.append(record)
+                previous = snapshot
+            self._segment(slug).write({
+                "current_revision": entry.get("current_revision", len(revisions)),
+                "revisions": revisions,
+            })
+        logger.info(f"[RevisionStore] Migrated revision history for {len(legacy)} posts from {self.legacy_path}")
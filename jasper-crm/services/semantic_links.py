@@ -0,0 +1,375 @@
+"""
+JASPER CRM - Semantic Related Content & Internal Link Suggestions
+
+Uses jasper-memory (self-hosted embeddings + Milvus) to relate blog posts
+by meaning rather than only by shared tags:
+
+- Each published post is split into chunks (by heading section, ~1200
+  chars) and stored in the jasper_blog_chunks collection, grouped by
+  slug. A content hash per post (data/semantic_index.json) means a post
+  is only re-embedded when its title or content changed.
+- index_all() syncs the whole blog in one embedding pass: changed posts'
+  chunks are sent together in a few /memory/groups/upsert batches, and
+  unpublished or deleted posts are removed.
+- related_articles() blends the ANN score from jasper-memory with the
+  existing category/tag relevance (LinkBuilderService).
+- suggest_links() finds, for each paragraph of a post, the closest chunk
+  in another post and proposes an anchor phrase from that paragraph.
+
+If jasper-memory is unreachable, related_articles() falls back to the
+tag-based neighbours and suggest_links() returns nothing.
+
+CLI:  python -m services.semantic_links index [--force]
+"""
+
+import os
+import re
+import json
+import asyncio
+import hashlib
+import logging
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from services.json_file_store import json_file
+from services.link_builder_service import LinkBuilderService
+from services.seo_document import plain_text
+
+logger = logging.getLogger(__name__)
+
+MEMORY_API_URL = os.getenv("JASPER_MEMORY_URL", "http://localhost:8002")
+MEMORY_API_KEY = os.getenv("JASPER_MEMORY_API_KEY", "")
+COLLECTION = "jasper_blog_chunks"
+
+BLOG_DATA_PATH = Path(__file__).parent.parent / "data" / "blog_posts.json"
+INDEX_STATE_PATH = Path(__file__).parent.parent / "data" / "semantic_index.json"
+
+CHUNK_CHARS = 1200
+UPSERT_BATCH_CHUNKS = 256        # Chunks per /memory/groups/upsert request
+VECTOR_WEIGHT = float(os.getenv("SEMANTIC_VECTOR_WEIGHT", "0.7"))
+TAG_SCORE_SCALE = 6.0            # calculate_relevance() score treated as a full match
+MIN_LINK_SCORE = 0.55            # Cosine similarity needed to suggest a link
+MAX_LINK_PARAGRAPHS = 60
+
+_HEADING_RE = re.compile(r"#{1,6}\s+(.*)")
+_BLOCK_SPLIT_RE = re.compile(r"\n\s*\n")
+
+
+def post_url(slug: str) -> str:
+    return f"/insights/{slug}"
+
+
+def _post_hash(post: Dict[str, Any]) -> str:
+    raw = json.dumps([post.get("title", ""), post.get("content", "")], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def paragraphs(content: str) -> List[Dict[str, str]]:
+    """Plain-text paragraphs with the heading they fall under."""
+    result = []
+    heading = ""
+    for block in _BLOCK_SPLIT_RE.split(content or ""):
+        first, _, rest = block.strip().partition("\n")
+        match = _HEADING_RE.fullmatch(first)
+        if match:
+            heading = plain_text(match.group(1))
+            block = rest
+        text = plain_text(block)
+        if text:
+            result.append({"heading": heading, "text": text})
+    return result
+
+
+def chunk_post(post: Dict[str, Any], max_chars: int = CHUNK_CHARS) -> List[Dict[str, Any]]:
+    """
+    Chunks of a post for embedding: paragraphs of one section packed up to
+    `max_chars`, each prefixed with the post title and section heading.
+    """
+    slug = post["slug"]
+    title = post.get("title", "")
+    chunks: List[Dict[str, Any]] = []
+    current: List[str] = []
+    current_heading = None
+
+    def flush():
+        if current:
+            prefix = f"{title} - {current_heading}" if current_heading else title
+            chunks.append({
+                "id": f"{slug}#{len(chunks)}",
+                "text": f"{prefix}\n\n" + "\n\n".join(current),
+                "metadata": {"slug": slug, "heading": current_heading or "", "chunk": len(chunks)},
+            })
+            current.clear()
+
+    for para in paragraphs(post.get("content", "")):
+        if para["heading"] != current_heading or sum(map(len, current)) + len(para["text"]) > max_chars:
+            flush()
+            current_heading = para["heading"]
+        current.append(para["text"])
+    flush()
+
+    if not chunks and title:
+        chunks.append({"id": f"{slug}#0", "text": title, "metadata": {"slug": slug, "heading": "", "chunk": 0}})
+    return chunks
+
+
+class SemanticLinkService:
+    """Embedding-backed related posts and internal link suggestions."""
+
+    def __init__(
+        self,
+        posts_path: Path = BLOG_DATA_PATH,
+        state_path: Path = INDEX_STATE_PATH,
+        base_url: str = MEMORY_API_URL,
+        api_key: str = MEMORY_API_KEY,
+    ):
+        self.posts_path = Path(posts_path)
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"X-API-Key": api_key}
+        self._state = json_file(Path(state_path), default=dict)
+        self.link_builder = LinkBuilderService(str(self.posts_path))
+
+    async def _post(self, path: str, payload: Dict[str, Any], timeout: float = 120.0) -> Optional[Dict[str, Any]]:
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{self.base_url}{path}", headers=self.headers, json=payload, timeout=timeout
+                )
+            if response.status_code == 200:
+                return response.json()
+            logger.warning(f"[SemanticLinks] {path} returned {response.status_code}")
+        except Exception as e:
+            logger.warning(f"[SemanticLinks] {path} failed: {e}")
+        return None
+
+    def _posts(self) -> List[Dict[str, Any]]:
+        return [p for p in json_file(self.posts_path).read() if p.get("slug")]
+
+    # -------------------------------------------------------------------------
+    # Indexing
+    # -------------------------------------------------------------------------
+
+    async def index_posts(
+        self,
+        posts: List[Dict[str, Any]],
+        force: bool = False,
+        remove_missing: bool = False,
+    ) -> Dict[str, int]:
+        """
+        Embed published posts whose content hash changed; drop unpublished
+        ones (and, with `remove_missing`, indexed posts not in `posts`).
+        """
+        state = self._state.read()
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        hashes: Dict[str, Optional[str]] = {}
+        seen = set()
+        unchanged = 0
+
+        for post in posts:
+            slug = post["slug"]
+            seen.add(slug)
+            if post.get("status") != "published":
+                if slug in state:
+                    groups[slug], hashes[slug] = [], None
+                continue
+            digest = _post_hash(post)
+            if force or state.get(slug) != digest:
+                groups[slug], hashes[slug] = chunk_post(post), digest
+            else:
+                unchanged += 1
+        if remove_missing:
+            for slug in state:
+                if slug not in seen:
+                    groups[slug], hashes[slug] = [], None
+
+        stats = {"indexed": 0, "removed": 0, "chunks": 0, "unchanged": unchanged, "failed": 0}
+        for batch in self._batches(groups):
+            result = await self._post("/memory/groups/upsert", {"collection": COLLECTION, "groups": batch})
+            if result is None:
+                stats["failed"] += len(batch)
+                continue
+
+            def record(current, batch=batch):
+                for slug in batch:
+                    if hashes[slug] is None:
+                        current.pop(slug, None)
+                    else:
+                        current[slug] = hashes[slug]
+
+            self._state.update(record)
+            for slug, chunks in batch.items():
+                stats["indexed" if chunks else "removed"] += 1
+                stats["chunks"] += len(chunks)
+
+        if groups:
+            logger.info(f"[SemanticLinks] Index sync: {stats}")
+        return stats
+
+    @staticmethod
+    def _batches(groups: Dict[str, List[Dict[str, Any]]]):
+        batch: Dict[str, List[Dict[str, Any]]] = {}
+        size = 0
+        for slug, chunks in groups.items():
+            if batch and size + len(chunks) > UPSERT_BATCH_CHUNKS:
+                yield batch
+                batch, size = {}, 0
+            batch[slug] = chunks
+            size += len(chunks)
+        if batch:
+            yield batch
+
+    async def index_post(self, post: Dict[str, Any]) -> Dict[str, int]:
+        """Index one post if its content changed (called on publish)."""
+        return await self.index_posts([post])
+
+    async def index_all(self, force: bool = False) -> Dict[str, int]:
+        """Sync the whole blog with the vector index in one embedding pass."""
+        return await self.index_posts(self._posts(), force=force, remove_missing=True)
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    async def related_articles(self, slug: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Related published posts, scored as
+        VECTOR_WEIGHT * cosine + (1 - VECTOR_WEIGHT) * normalized tag relevance.
+        """
+        posts = {p["slug"]: p for p in self._posts()}
+        target = posts.get(slug)
+        if target is None:
+            return []
+
+        vector_scores: Dict[str, float] = {}
+        result = await self._post(
+            "/jasper/related-content",
+            {"collection": COLLECTION, "group": slug, "limit": max(limit * 4, 20)},
+            timeout=30.0,
+        )
+        if result:
+            vector_scores = {r["group"]: r["score"] for r in result.get("related", [])}
+
+        # Candidates: semantic neighbours plus the precomputed tag/category neighbours
+        candidates = set(vector_scores)
+        candidates.update(r["slug"] for r in self.link_builder.find_related_articles(slug, max_links=20))
+
+        vector_weight = VECTOR_WEIGHT if vector_scores else 0.0
+        scored = []
+        for other in candidates:
+            post = posts.get(other)
+            if post is None or other == slug or post.get("status") != "published":
+                continue
+            tag_score = self.link_builder.calculate_relevance(target, post)
+            vector_score = vector_scores.get(other, 0.0)
+            score = vector_weight * vector_score + (1 - vector_weight) * min(tag_score / TAG_SCORE_SCALE, 1.0)
+            if score <= 0:
+                continue
+            scored.append({
+                "slug": other,
+                "title": post.get("title", ""),
+                "category": self.link_builder.normalize_category(post.get("category", "")),
+                "excerpt": (post.get("excerpt") or "")[:150],
+                "score": round(score, 4),
+                "vector_score": round(vector_score, 4),
+                "tag_score": tag_score,
+            })
+
+        scored.sort(key=lambda r: r["score"], reverse=True)
+        return scored[:limit]
+
+    async def suggest_links(self, slug: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Internal link suggestions for a post: paragraph, anchor phrase found
+        in it, and the target post whose chunk is closest to the paragraph.
+        """
+        posts = {p["slug"]: p for p in self._posts()}
+        source = posts.get(slug)
+        if source is None:
+            return []
+
+        paras = [p["text"] for p in paragraphs(source.get("content", ""))][:MAX_LINK_PARAGRAPHS]
+        if not paras:
+            return []
+        result = await self._post(
+            "/jasper/group-targets",
+            {"collection": COLLECTION, "texts": paras, "exclude_group": slug, "limit": 3},
+            timeout=60.0,
+        )
+        if not result:
+            return []
+
+        content_lower = (source.get("content") or "").lower()
+        suggestions = []
+        linked = set()
+        for index, (para, matches) in enumerate(zip(paras, result.get("targets", []))):
+            for match in matches:
+                target_slug = match.get("group")
+                target = posts.get(target_slug)
+                if (
+                    target is None
+                    or target.get("status") != "published"
+                    or match["score"] < MIN_LINK_SCORE
+                    or target_slug in linked
+                    or post_url(target_slug) in content_lower
+                ):
+                    continue
+                anchor = self._anchor_for(para, target)
+                if not anchor:
+                    continue
+                linked.add(target_slug)
+                suggestions.append({
+                    "anchor": anchor,
+                    "target_slug": target_slug,
+                    "target_title": target.get("title", ""),
+                    "url": post_url(target_slug),
+                    "score": round(match["score"], 4),
+                    "paragraph_index": index,
+                    "paragraph": para[:200],
+                })
+                break
+
+        suggestions.sort(key=lambda s: s["score"], reverse=True)
+        return suggestions[:limit]
+
+    def _anchor_for(self, paragraph: str, target: Dict[str, Any]) -> Optional[str]:
+        """
+        Anchor phrase for a link to `target`, as written in the paragraph:
+        the longest run of target title words found there, else a tag or
+        title keyword.
+        """
+        title = re.sub(r"[:|–—].*$", "", target.get("title", ""))
+        words = re.findall(r"[\w'-]+", title.lower())
+        phrases = {
+            " ".join(words[i:i + n])
+            for n in range(2, len(words) + 1)
+            for i in range(len(words) - n + 1)
+        }
+        phrases.update(t.lower() for t in target.get("tags", None) or [] if len(t) > 3)
+        phrases.update(self.link_builder.extract_keywords(target))
+        for phrase in sorted(phrases, key=lambda p: (p.count(" "), len(p)), reverse=True):
+            match = re.search(rf"\b{re.escape(phrase)}\b", paragraph, re.IGNORECASE)
+            if match:
+                return match.group(0)
+        return None
+
+
+semantic_links = SemanticLinkService()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Jasper CRM semantic link index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    index = sub.add_parser("index", help="Embed new/changed published posts, drop removed ones")
+    index.add_argument("--force", action="store_true", help="Re-embed every published post")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "index":
+        print(asyncio.run(semantic_links.index_all(force=args.force)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+JASPER CRM - Site-wide SEO Audit
+
+Scores every blog post with SEOScorer in one job and stores the result as
+a columnar table, so the SEO dashboard reads precomputed numbers instead
+of scoring posts per request.
+
+data/seo_audit/latest.json:
+
+    {
+      "audit_id": "20261018T020000Z",
+      "checks": ["keyword_in_title", ...],
+      "columns": {
+        "slug": [...], "title": [...], "status": [...], "fingerprint": [...],
+        "score": [...], "grade": [...],
+        "keyword_in_title": [...], ...        # one score column per check
+      },
+      "summary": {...},                       # column aggregates
+      "delta": {...}                          # changes vs the previous audit
+    }
+
+- Incremental: a post whose fingerprint (hash of every field the scorer
+  reads, plus seo_scorer.SCORER_VERSION) matches the previous audit keeps its previous row; only new or
+  edited posts are scored, so a nightly run over an unchanged blog does
+  no scoring at all.
+- Parallel: when enough posts changed, they are scored in chunks across
+  a process pool (SEO_AUDIT_WORKERS, default CPU count).
+- Deltas: score and grade changes, newly failing/passing checks, and
+  added/removed posts, computed column-wise against the previous table.
+
+Run from cron with:  python -m services.seo_audit
+"""
+
+import os
+import time
+import logging
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from services.json_file_store import json_file
+from services.seo_scorer import seo_scorer
+
+logger = logging.getLogger(__name__)
+
+BLOG_DATA_PATH = Path(__file__).parent.parent / "data" / "blog_posts.json"
+AUDIT_DIR = Path(__file__).parent.parent / "data" / "seo_audit"
+
+CHECKS = [
+    "keyword_in_title",
+    "keyword_in_url",
+    "keyword_in_first_100",
+    "keyword_density",
+    "seo_title_length",
+    "meta_description_length",
+    "content_length",
+    "internal_links",
+    "external_links",
+    "headings_structure",
+    "image_alt_tags",
+]
+ROW_FIELDS = ["slug", "title", "status", "fingerprint", "score", "grade"] + CHECKS
+
+AUDIT_WORKERS = int(os.getenv("SEO_AUDIT_WORKERS", "0")) or os.cpu_count() or 1
+POOL_MIN_POSTS = 200   # Below this, process start-up costs more than it saves
+CHUNK_SIZE = 100
+HISTORY_KEPT = 60      # Audit summaries kept in history.json
+CHECK_PASS_SCORE = 60  # A check "passes" at or above this score
+
+
+def _score_row(post: Dict[str, Any], fingerprint: str) -> Dict[str, Any]:
+    result = seo_scorer.calculate_score(post)
+    row = {
+        "slug": post.get("slug", ""),
+        "title": post.get("title", ""),
+        "status": post.get("status", ""),
+        "fingerprint": fingerprint,
+        "score": result.score,
+        "grade": result.grade,
+    }
+    for name in CHECKS:
+        check = result.checks.get(name)
+        row[name] = round(check.score) if check else None
+    return row
+
+
+def _score_chunk(items: List[tuple]) -> List[Dict[str, Any]]:
+    """Process-pool entry point: score (post, fingerprint) pairs."""
+    return [_score_row(post, fingerprint) for post, fingerprint in items]
+
+
+def _chunks(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SEOAudit:
+    """Runs and stores site-wide SEO audits."""
+
+    def __init__(
+        self,
+        posts_path: Path = BLOG_DATA_PATH,
+        audit_dir: Path = AUDIT_DIR,
+        workers: int = AUDIT_WORKERS,
+        pool_min_posts: int = POOL_MIN_POSTS,
+    ):
+        self.posts_path = Path(posts_path)
+        self.audit_dir = Path(audit_dir)
+        self.workers = workers
+        self.pool_min_posts = pool_min_posts
+        self._latest = json_file(self.audit_dir / "latest.json", default=dict)
+        self._history = json_file(self.audit_dir / "history.json", default=list)
+        self._run_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._run_lock.locked()
+
+    # -------------------------------------------------------------------------
+    # Reading
+    # -------------------------------------------------------------------------
+
+    def latest(self) -> Dict[str, Any]:
+        return self._latest.read()
+
+    def history(self) -> List[Dict[str, Any]]:
+        return self._history.read()
+
+    def rows(
+        self,
+        audit: Optional[Dict[str, Any]] = None,
+        max_score: Optional[int] = None,
+        failing_check: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Row view of an audit table (the latest by default), lowest scores first."""
+        audit = audit if audit is not None else self.latest()
+        columns = audit.get("columns") or {}
+        scores = columns.get("score", [])
+        selected = range(len(scores))
+        if max_score is not None:
+            selected = [i for i in selected if scores[i] <= max_score]
+        if failing_check:
+            check_scores = columns.get(failing_check, [])
+            selected = [i for i in selected if (check_scores[i] or 0) < CHECK_PASS_SCORE]
+        rows = [{name: columns[name][i] for name in columns} for i in selected]
+        rows.sort(key=lambda row: row["score"])
+        return rows
+
+    # -------------------------------------------------------------------------
+    # Running
+    # -------------------------------------------------------------------------
+
+    def _iter_posts(self) -> Iterable[Dict[str, Any]]:
+        for post in json_file(self.posts_path, default=list).read():
+            if post.get("slug") and post.get("status") != "archived":
+                yield post
+
+    def run(self, force: bool = False) -> Dict[str, Any]:
+        """Audit every post and store the table; `force` re-scores unchanged posts."""
+        with self._run_lock:
+            return self._run(force)
+
+    def _run(self, force: bool) -> Dict[str, Any]:
+        started = time.perf_counter()
+        previous = self.latest()
+        prev_columns = previous.get("columns") or {}
+        prev_index = {slug: i for i, slug in enumerate(prev_columns.get("slug", []))}
+        reuse = not force and previous.get("checks") == CHECKS
+
+        rows: List[Optional[Dict[str, Any]]] = []
+        to_score: List[tuple] = []
+        positions: List[int] = []
+        for post in self._iter_posts():
+            fingerprint = seo_scorer.fingerprint(post)
+            i = prev_index.get(post["slug"])
+            if reuse and i is not None and prev_columns["fingerprint"][i] == fingerprint:
+                row = {name: prev_columns[name][i] for name in ROW_FIELDS}
+                # Status doesn't affect the score but is shown on the dashboard
+                row["status"] = post.get("status", "")
+                rows.append(row)
+            else:
+                positions.append(len(rows))
+                rows.append(None)
+                to_score.append((post, fingerprint))
+
+        for position, row in zip(positions, self._score(to_score)):
+            rows[position] = row
+
+        columns = {name: [row[name] for row in rows] for name in ROW_FIELDS}
+        now = datetime.now(timezone.utc)
+        audit = {
+            "audit_id": now.strftime("%Y%m%dT%H%M%SZ"),
+            "created_at": now.isoformat(),
+            "checks": CHECKS,
+            "posts": len(rows),
+            "scored": len(to_score),
+            "reused": len(rows) - len(to_score),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "columns": columns,
+            "summary": self._summarize(columns),
+            "delta": self._delta(prev_columns, columns, previous.get("audit_id")),
+        }
+        self._latest.write(audit)
+
+        summary = {k: audit[k] for k in ("audit_id", "created_at", "posts", "scored", "duration_ms")}
+        summary.update(
+            average_score=audit["summary"]["average_score"],
+            grades=audit["summary"]["grades"],
+        )
+
+        def append_summary(history):
+            history.append(summary)
+            del history[:-HISTORY_KEPT]
+
+        self._history.update(append_summary)
+        logger.info(
+            f"[SEOAudit] Audited {audit['posts']} posts ({audit['scored']} scored, "
+            f"{audit['reused']} unchanged) in {audit['duration_ms']:.0f}ms"
+        )
+        return audit
+
+    def _score(self, items: List[tuple]) -> List[Dict[str, Any]]:
+        if len(items) < self.pool_min_posts or self.workers <= 1:
+            return _score_chunk(items)
+        # spawn: forking a process that runs flusher threads can copy held locks
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+            rows: List[Dict[str, Any]] = []
+            for chunk_rows in pool.map(_score_chunk, _chunks(items, CHUNK_SIZE)):
+                rows.extend(chunk_rows)
+            return rows
+
+    # -------------------------------------------------------------------------
+    # Column aggregates
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _summarize(columns: Dict[str, List[Any]]) -> Dict[str, Any]:
+        scores = columns["score"]
+        count = len(scores)
+        grades: Dict[str, int] = {}
+        for grade in columns["grade"]:
+            grades[grade] = grades.get(grade, 0) + 1
+        checks = {}
+        for name in CHECKS:
+            values = [v for v in columns[name] if v is not None]
+            checks[name] = {
+                "average": round(sum(values) / len(values), 1) if values else None,
+                "failing": sum(1 for v in values if v < CHECK_PASS_SCORE),
+            }
+        return {
+            "average_score": round(sum(scores) / count, 1) if count else None,
+            "min_score": min(scores) if count else None,
+            "max_score": max(scores) if count else None,
+            "grades": grades,
+            "checks": checks,
+        }
+
+    @staticmethod
+    def _delta(
+        prev: Dict[str, List[Any]],
+        current: Dict[str, List[Any]],
+        previous_audit_id: Optional[str],
+    ) -> Dict[str, Any]:
+        prev_slugs = prev.get("slug", [])
+        prev_index = {slug: i for i, slug in enumerate(prev_slugs)}
+        current_slugs = set(current["slug"])
+
+        changed = []
+        check_changes: Dict[str, Dict[str, List[str]]] = {}
+        for i, slug in enumerate(current["slug"]):
+            j = prev_index.get(slug)
+            if j is None:
+                continue
+            diff = current["score"][i] - prev["score"][j]
+            if diff:
+                changed.append({
+                    "slug": slug,
+                    "before": prev["score"][j],
+                    "after": current["score"][i],
+                    "change": diff,
+                    "grade_before": prev["grade"][j],
+                    "grade_after": current["grade"][i],
+                })
+            for name in CHECKS:
+                before = (prev.get(name) or [None] * len(prev_slugs))[j]
+                after = current[name][i]
+                if before is None or after is None:
+                    continue
+                if (before >= CHECK_PASS_SCORE) != (after >= CHECK_PASS_SCORE):
+                    key = "now_failing" if after < CHECK_PASS_SCORE else "now_passing"
+                    check_changes.setdefault(name, {}).setdefault(key, []).append(slug)
+
+        changed.sort(key=lambda c: c["change"])
+        return {
+            "previous_audit_id": previous_audit_id,
+            "added": [slug for slug in current["slug"] if slug not in prev_index],
+            "removed": [slug for slug in prev_slugs if slug not in current_slugs],
+            "improved": [c for c in reversed(changed) if c["change"] > 0],
+            "regressed": [c for c in changed if c["change"] < 0],
+            "checks": check_changes,
+        }
+
+
+seo_audit = SEOAudit()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Jasper CRM site-wide SEO audit")
+    parser.add_argument("--force", action="store_true", help="Re-score posts that haven't changed")
+    parser.add_argument("--workers", type=int, help="Process pool size (default: SEO_AUDIT_WORKERS or CPU count)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    audit = SEOAudit(workers=args.workers) if args.workers else seo_audit
+    result = audit.run(force=args.force)
+    delta = result["delta"]
+    print(
+        f"{result['posts']} posts, {result['scored']} scored in {result['duration_ms']:.0f}ms; "
+        f"average {result['summary']['average_score']}; "
+        f"{len(delta['improved'])} improved, {len(delta['regressed'])} regressed, "
+        f"{len(delta['added'])} added, {len(delta['removed'])} removed"
+    )
+
+
+if __name__ == "__main__":
+    main()
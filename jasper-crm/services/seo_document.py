@@ -0,0 +1,205 @@
+"""
+JASPER CRM - SEO Document Model
+
+One-pass parse of a post's markdown/HTML content into the pieces the SEO
+checks need, so SEOScorer scans the content once instead of re-running
+strip/count regexes in every check:
+
+- words: plain-text word stream (tags, heading markers, image markup,
+  bracketed notes and link URLs removed; link anchor text kept)
+- headings: (level, text) for markdown and HTML headings
+- links: (url, anchor) for HTML hrefs and markdown links; markdown images
+  count as links too (anchor = alt text), as they always have in SEOScorer
+- images: (src, alt) for <img> tags and markdown images
+- first_paragraph: plain text of the first body paragraph
+
+parse_document() memoizes by content hash, so scoring the same content
+again (dashboards, re-saves with unchanged content) skips the parse.
+"""
+
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import List, Optional, Tuple
+
+CACHE_SIZE = 512
+
+SITE_DOMAIN = "jasperfinance.org"
+
+# Alternatives are tried left to right at each position; whatever isn't
+# matched is plain text.
+_TOKEN_RE = re.compile(
+    r"(?P<md_heading>^(?P<hashes>#{1,6})[ \t]+(?P<heading_text>[^\n]*))"
+    r"|(?P<md_image>!\[(?P<image_alt>[^\]\n]*)\]\((?P<image_src>[^)\s]*)[^)\n]*\))"
+    r"|(?P<md_link>\[(?P<anchor>[^\]\n]*)\]\((?P<link_url>[^)\s]+)[^)\n]*\))"
+    r"|(?P<bracket>\[[^\]\n]*\])"
+    r"|(?P<comment>(?s:<!--.*?-->))"
+    r"|(?P<tag><(?P<tag_name>/?[A-Za-z][A-Za-z0-9]*)(?P<tag_attrs>[^>]*)>)",
+    re.MULTILINE,
+)
+_HREF_RE = re.compile(r"""href\s*=\s*["']([^"']*)""", re.IGNORECASE)
+_SRC_RE = re.compile(r"""src\s*=\s*["']([^"']*)""", re.IGNORECASE)
+_ALT_RE = re.compile(r"""alt\s*=\s*["']([^"']*)""", re.IGNORECASE)
+_HTML_HEADING_RE = re.compile(r"h([1-6])", re.IGNORECASE)
+_PARAGRAPH_SPLIT_RE = re.compile(r"\n[ \t]*\n")
+
+
+@dataclass
+class SEODocument:
+    """Parsed view of one piece of post content."""
+    words: List[str] = field(default_factory=list)
+    headings: List[Tuple[int, str]] = field(default_factory=list)
+    links: List[Tuple[str, str]] = field(default_factory=list)
+    images: List[Tuple[str, str]] = field(default_factory=list)
+    paragraphs: List[str] = field(default_factory=list)
+
+    @property
+    def word_count(self) -> int:
+        return len(self.words)
+
+    @cached_property
+    def text(self) -> str:
+        """Lowercased plain text, words separated by single spaces."""
+        return " ".join(self.words).lower()
+
+    @property
+    def first_paragraph(self) -> str:
+        return self.paragraphs[0] if self.paragraphs else ""
+
+    def intro(self, n_words: int = 100) -> str:
+        """Lowercased first `n_words` words."""
+        return " ".join(self.words[:n_words]).lower()
+
+    def count_phrase(self, phrase: str) -> int:
+        """Non-overlapping occurrences of `phrase` in the plain text (case-insensitive)."""
+        phrase = phrase.lower()
+        return self.text.count(phrase) if phrase else 0
+
+    def heading_count(self, level: int) -> int:
+        return sum(1 for lvl, _ in self.headings if lvl == level)
+
+    def internal_links(self) -> List[str]:
+        return [url for url, _ in self.links if is_internal_url(url)]
+
+    def external_links(self) -> List[str]:
+        return [url for url, _ in self.links if is_external_url(url)]
+
+
+def is_internal_url(url: str) -> bool:
+    """Site links: relative paths or absolute jasperfinance.org URLs."""
+    lowered = url.lower()
+    if lowered.startswith("/") and not lowered.startswith("//"):
+        return True
+    host = re.sub(r"^(?:https?:)?//", "", lowered).split("/", 1)[0]
+    return host == SITE_DOMAIN or host.endswith("." + SITE_DOMAIN)
+
+
+def is_external_url(url: str) -> bool:
+    lowered = url.lower()
+    return lowered.startswith(("http://", "https://")) and not is_internal_url(url)
+
+
+def _parse(content: str) -> SEODocument:
+    doc = SEODocument()
+    parts: List[str] = []      # Plain text, in document order
+    paragraph: List[str] = []  # Plain text of the current body paragraph
+    in_heading = False         # Inside <hN>...</hN>
+
+    def end_paragraph():
+        text = " ".join("".join(paragraph).split())
+        if text:
+            doc.paragraphs.append(text)
+        paragraph.clear()
+
+    def add_text(text: str):
+        parts.append(text)
+        if in_heading:
+            return
+        for i, chunk in enumerate(_PARAGRAPH_SPLIT_RE.split(text)):
+            if i:
+                end_paragraph()
+            paragraph.append(chunk)
+
+    pos = 0
+    for m in _TOKEN_RE.finditer(content):
+        if m.start() > pos:
+            add_text(content[pos:m.start()])
+        pos = m.end()
+        if m.group("md_heading") is not None:
+            end_paragraph()
+            text = " ".join(_parse(m.group("heading_text").rstrip().rstrip("#")).words)
+            doc.headings.append((len(m.group("hashes")), text))
+            parts.append(" " + text + " ")
+        elif m.group("md_image") is not None:
+            doc.images.append((m.group("image_src"), m.group("image_alt")))
+            doc.links.append((m.group("image_src"), m.group("image_alt")))
+            parts.append(" ")
+        elif m.group("md_link") is not None:
+            anchor = m.group("anchor")
+            doc.links.append((m.group("link_url"), anchor))
+            add_text(anchor)
+        elif m.group("bracket") is not None or m.group("comment") is not None:
+            parts.append(" ")
+        else:
+            name = m.group("tag_name").lower()
+            attrs = m.group("tag_attrs")
+            heading = _HTML_HEADING_RE.fullmatch(name.lstrip("/"))
+            if heading:
+                if name.startswith("/"):
+                    in_heading = False
+                else:
+                    end_paragraph()
+                    doc.headings.append((int(heading.group(1)), ""))
+                    in_heading = True
+            elif name == "img":
+                src = _SRC_RE.search(attrs)
+                alt = _ALT_RE.search(attrs)
+                doc.images.append((src.group(1) if src else "", alt.group(1) if alt else ""))
+            elif name in ("p", "/p", "br", "div", "/div", "li", "/li"):
+                end_paragraph()
+            for href in _HREF_RE.findall(attrs):
+                doc.links.append((href, ""))
+            parts.append(" ")
+    if pos < len(content):
+        add_text(content[pos:])
+    end_paragraph()
+
+    doc.words = "".join(parts).split()
+    return doc
+
+
+def plain_text(content: str) -> str:
+    """Content with markup removed (uncached; for short fragments)."""
+    return " ".join(_parse(content or "").words)
+
+
+_cache: "OrderedDict[str, SEODocument]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha1(content.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def parse_document(content: Optional[str], key: Optional[str] = None) -> SEODocument:
+    """
+    Parsed SEODocument for `content`, memoized by content hash.
+
+    Callers that already hashed the content can pass it as `key`.
+    """
+    content = content or ""
+    key = key or content_hash(content)
+    with _cache_lock:
+        doc = _cache.get(key)
+        if doc is not None:
+            _cache.move_to_end(key)
+            return doc
+    doc = _parse(content)
+    with _cache_lock:
+        _cache[key] = doc
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return doc
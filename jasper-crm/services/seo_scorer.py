@@ -9,12 +9,26 @@ Features:
 - Content structure analysis
 - Readability scoring
 - Internal/external link detection
+
+Content is parsed once per score into an SEODocument (see seo_document),
+which every check reads, and whole results are memoized by the hash of
+the fields they depend on.
 """
 
-import re
-import math
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, field
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Any, Optional
+from dataclasses import dataclass, field, replace
+
+from services.seo_document import SEODocument, content_hash, parse_document
+
+RESULT_CACHE_SIZE = 1024
+
+# Bump whenever scoring changes (checks, thresholds, weights, parsing) so
+# fingerprints - and the SEO audit rows reused by them - are invalidated
+SCORER_VERSION = 1
 
 
 @dataclass
@@ -70,20 +84,30 @@ class SEOScorer:
         if not focus_keyword:
             focus_keyword = self._extract_focus_keyword(post)
 
+        content = post.get("content", "") or ""
+        digest = content_hash(content)
+        key = self._result_key(post, focus_keyword, digest)
+        with _results_lock:
+            cached = _results.get(key)
+            if cached is not None:
+                _results.move_to_end(key)
+                return self._copy(cached)
+
+        doc = parse_document(content, key=digest)
         checks = {}
 
         # Run all checks
         checks["keyword_in_title"] = self.check_keyword_in_title(post, focus_keyword)
         checks["keyword_in_url"] = self.check_keyword_in_url(post, focus_keyword)
-        checks["keyword_in_first_100"] = self.check_keyword_in_intro(post, focus_keyword)
-        checks["keyword_density"] = self.check_keyword_density(post, focus_keyword)
+        checks["keyword_in_first_100"] = self.check_keyword_in_intro(post, focus_keyword, doc)
+        checks["keyword_density"] = self.check_keyword_density(post, focus_keyword, doc)
         checks["seo_title_length"] = self.check_title_length(post)
         checks["meta_description_length"] = self.check_meta_length(post)
-        checks["content_length"] = self.check_content_length(post)
-        checks["internal_links"] = self.check_internal_links(post)
-        checks["external_links"] = self.check_external_links(post)
-        checks["headings_structure"] = self.check_headings(post)
-        checks["image_alt_tags"] = self.check_image_alts(post)
+        checks["content_length"] = self.check_content_length(post, doc)
+        checks["internal_links"] = self.check_internal_links(post, doc)
+        checks["external_links"] = self.check_external_links(post, doc)
+        checks["headings_structure"] = self.check_headings(post, doc)
+        checks["image_alt_tags"] = self.check_image_alts(post, doc)
 
         # Calculate total score (weighted average)
         total_score = sum(c.score for c in checks.values()) / len(checks) if checks else 0
@@ -104,13 +128,53 @@ class SEOScorer:
         # Collect suggestions from failed checks
         suggestions = [c.suggestion for c in checks.values() if not c.passed]
 
-        return SEOResult(
+        result = SEOResult(
             score=score,
             grade=grade,
             checks=checks,
             suggestions=suggestions,
             focus_keyword=focus_keyword
         )
+        with _results_lock:
+            _results[key] = result
+            while len(_results) > RESULT_CACHE_SIZE:
+                _results.popitem(last=False)
+        return self._copy(result)
+
+    def score_posts(self, posts: Iterable[Dict[str, Any]]) -> Dict[str, SEOResult]:
+        """Score many posts (keyed by slug); each post's content is parsed at most once."""
+        return {post.get("slug", ""): self.calculate_score(post) for post in posts}
+
+    def fingerprint(self, post: Dict[str, Any], focus_keyword: Optional[str] = None) -> str:
+        """Hash of everything the score depends on; equal fingerprints mean equal results."""
+        focus_keyword = focus_keyword or self._extract_focus_keyword(post)
+        return self._result_key(post, focus_keyword, content_hash(post.get("content", "") or ""))
+
+    @staticmethod
+    def _result_key(post: Dict[str, Any], focus_keyword: str, digest: str) -> str:
+        """Hash of everything calculate_score reads from the post."""
+        seo = post.get("seo") or {}
+        fields = [
+            SCORER_VERSION,
+            digest,
+            focus_keyword,
+            post.get("title", ""),
+            post.get("slug", ""),
+            post.get("excerpt", ""),
+            seo.get("title", ""),
+            seo.get("description", ""),
+        ]
+        raw = json.dumps(fields, default=str).encode("utf-8", "surrogatepass")
+        return hashlib.sha1(raw).hexdigest()
+
+    @staticmethod
+    def _copy(result: SEOResult) -> SEOResult:
+        # Checks are never mutated; the containers are per caller
+        return replace(result, checks=dict(result.checks), suggestions=list(result.suggestions))
+
+    @staticmethod
+    def _document(post: Dict[str, Any], doc: Optional[SEODocument]) -> SEODocument:
+        return doc if doc is not None else parse_document(post.get("content", ""))
 
     def _extract_focus_keyword(self, post: Dict[str, Any]) -> str:
         """Extract focus keyword from post SEO data or title."""
@@ -170,16 +234,9 @@ class SEOScorer:
             details="Focus keyword not found in URL"
         )
 
-    def check_keyword_in_intro(self, post: Dict[str, Any], keyword: str) -> SEOCheck:
+    def check_keyword_in_intro(self, post: Dict[str, Any], keyword: str, doc: Optional[SEODocument] = None) -> SEOCheck:
         """Check if focus keyword appears in first 100 words."""
-        content = post.get("content", "")
-        # Strip HTML/markdown tags
-        text = re.sub(r'<[^>]+>', '', content)
-        text = re.sub(r'\[.*?\]', '', text)
-        text = re.sub(r'#+ ', '', text)
-
-        words = text.split()[:100]
-        first_100 = " ".join(words).lower()
+        first_100 = self._document(post, doc).intro(100)
         keyword = keyword.lower()
 
         if keyword in first_100:
@@ -198,14 +255,10 @@ class SEOScorer:
             details="Focus keyword not found in introduction"
         )
 
-    def check_keyword_density(self, post: Dict[str, Any], keyword: str) -> SEOCheck:
+    def check_keyword_density(self, post: Dict[str, Any], keyword: str, doc: Optional[SEODocument] = None) -> SEOCheck:
         """Check keyword density (optimal: 1-2%)."""
-        content = post.get("content", "")
-        # Strip HTML/markdown
-        text = re.sub(r'<[^>]+>', '', content).lower()
-        text = re.sub(r'\[.*?\]', '', text)
-
-        word_count = len(text.split())
+        doc = self._document(post, doc)
+        word_count = doc.word_count
         if word_count == 0:
             return SEOCheck(
                 name="Keyword Density",
@@ -217,7 +270,7 @@ class SEOScorer:
 
         # Count keyword occurrences (case-insensitive)
         keyword = keyword.lower()
-        keyword_count = len(re.findall(re.escape(keyword), text))
+        keyword_count = doc.count_phrase(keyword)
         density = (keyword_count * len(keyword.split())) / word_count * 100
 
         if 1.0 <= density <= 2.5:
@@ -339,15 +392,9 @@ class SEOScorer:
                 details=f"Meta description: {length} characters (too long)"
             )
 
-    def check_content_length(self, post: Dict[str, Any]) -> SEOCheck:
+    def check_content_length(self, post: Dict[str, Any], doc: Optional[SEODocument] = None) -> SEOCheck:
         """Check content length (optimal: 1500+ words)."""
-        content = post.get("content", "")
-        # Strip HTML/markdown
-        text = re.sub(r'<[^>]+>', '', content)
-        text = re.sub(r'\[.*?\]', '', text)
-        text = re.sub(r'#+ ', '', text)
-
-        word_count = len(text.split())
+        word_count = self._document(post, doc).word_count
 
         if word_count >= 2000:
             return SEOCheck(
@@ -390,20 +437,10 @@ class SEOScorer:
                 details=f"Content: {word_count:,} words (very short)"
             )
 
-    def check_internal_links(self, post: Dict[str, Any]) -> SEOCheck:
+    def check_internal_links(self, post: Dict[str, Any], doc: Optional[SEODocument] = None) -> SEOCheck:
         """Check for internal links."""
-        content = post.get("content", "")
-
         # Count internal links (jasperfinance.org or relative links)
-        internal_patterns = [
-            r'href=["\'](?:https?://)?(?:www\.)?jasperfinance\.org',
-            r'href=["\']/(?!http)',  # Relative links
-            r'\[.*?\]\(/[^)]+\)',  # Markdown relative links
-        ]
-
-        internal_count = 0
-        for pattern in internal_patterns:
-            internal_count += len(re.findall(pattern, content, re.IGNORECASE))
+        internal_count = len(self._document(post, doc).internal_links())
 
         if internal_count >= 2:
             return SEOCheck(
@@ -430,17 +467,10 @@ class SEOScorer:
                 details="No internal links found"
             )
 
-    def check_external_links(self, post: Dict[str, Any]) -> SEOCheck:
+    def check_external_links(self, post: Dict[str, Any], doc: Optional[SEODocument] = None) -> SEOCheck:
         """Check for external links."""
-        content = post.get("content", "")
-
         # Count external links (not jasperfinance.org)
-        all_links = re.findall(r'href=["\']https?://([^"\']+)', content, re.IGNORECASE)
-        external_count = sum(1 for link in all_links if "jasperfinance.org" not in link.lower())
-
-        # Also check markdown links
-        md_links = re.findall(r'\[.*?\]\((https?://[^)]+)\)', content)
-        external_count += sum(1 for link in md_links if "jasperfinance.org" not in link.lower())
+        external_count = len(self._document(post, doc).external_links())
 
         if external_count >= 1:
             return SEOCheck(
@@ -458,20 +488,12 @@ class SEOScorer:
             details="No external links found"
         )
 
-    def check_headings(self, post: Dict[str, Any]) -> SEOCheck:
+    def check_headings(self, post: Dict[str, Any], doc: Optional[SEODocument] = None) -> SEOCheck:
         """Check headings structure (H2, H3 usage)."""
-        content = post.get("content", "")
-
-        # Count HTML headings
-        h2_html = len(re.findall(r'<h2[^>]*>', content, re.IGNORECASE))
-        h3_html = len(re.findall(r'<h3[^>]*>', content, re.IGNORECASE))
-
-        # Count Markdown headings
-        h2_md = len(re.findall(r'^## ', content, re.MULTILINE))
-        h3_md = len(re.findall(r'^### ', content, re.MULTILINE))
-
-        h2_count = h2_html + h2_md
-        h3_count = h3_html + h3_md
+        # HTML and Markdown headings
+        doc = self._document(post, doc)
+        h2_count = doc.heading_count(2)
+        h3_count = doc.heading_count(3)
 
         if h2_count >= 2 and h3_count >= 1:
             return SEOCheck(
@@ -497,15 +519,11 @@ class SEOScorer:
             details="No proper heading structure found"
         )
 
-    def check_image_alts(self, post: Dict[str, Any]) -> SEOCheck:
+    def check_image_alts(self, post: Dict[str, Any], doc: Optional[SEODocument] = None) -> SEOCheck:
         """Check if images have alt tags."""
-        content = post.get("content", "")
-
-        # Find all images
-        img_tags = re.findall(r'<img[^>]*>', content, re.IGNORECASE)
-        md_images = re.findall(r'!\[([^\]]*)\]\([^)]+\)', content)
-
-        total_images = len(img_tags) + len(md_images)
+        # HTML and Markdown images, as (src, alt)
+        images = self._document(post, doc).images
+        total_images = len(images)
 
         if total_images == 0:
             return SEOCheck(
@@ -517,10 +535,7 @@ class SEOScorer:
             )
 
         # Count images with alt text
-        imgs_with_alt = len(re.findall(r'<img[^>]+alt=["\'][^"\']+["\']', content, re.IGNORECASE))
-        md_with_alt = sum(1 for alt in md_images if alt.strip())  # Markdown alt in brackets
-
-        images_with_alt = imgs_with_alt + md_with_alt
+        images_with_alt = sum(1 for _, alt in images if alt.strip())
         missing = total_images - images_with_alt
 
         if missing == 0:
@@ -567,5 +582,9 @@ class SEOScorer:
         }
 
 
+# Results shared by all SEOScorer instances (routes create their own)
+_results: "OrderedDict[str, SEOResult]" = OrderedDict()
+_results_lock = threading.Lock()
+
 # Singleton instance
 seo_scorer = SEOScorer()
@@ -9,18 +9,29 @@ Features:
 - Prevents duplicate work (anti-waste)
 - Tracks task history per article
 - Quality verification tracking
+
+Tasks live in the shared document store (collection "enhancement_tasks"),
+one document per task, so concurrent writers don't overwrite each other.
+The legacy enhancement_tasks.json is imported on first use.
 """
 
-import json
-import os
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Dict, List, Literal
 from enum import Enum
 
+from services.document_store import (
+    DocumentStore,
+    document_store,
+    migrate_file,
+    SOURCES_BY_FILENAME,
+)
+
 # Data storage
 DATA_DIR = Path("/opt/jasper-crm/data")
 TASKS_FILE = DATA_DIR / "enhancement_tasks.json"
+COLLECTION = "enhancement_tasks"
+EMPTY_STATS = {"total": 0, "completed": 0, "failed": 0}
 
 
 class TaskType(str, Enum):
@@ -41,27 +52,31 @@ class TaskStatus(str, Enum):
 class TaskTrackerService:
     """Tracks enhancement tasks with anti-waste logic."""
 
-    def __init__(self):
-        self._ensure_data_file()
-
-    def _ensure_data_file(self):
-        """Create data file if it doesn't exist."""
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-        if not TASKS_FILE.exists():
-            self._save_data({"tasks": [], "stats": {"total": 0, "completed": 0, "failed": 0}})
-
-    def _load_data(self) -> dict:
-        """Load tasks from file."""
-        try:
-            with open(TASKS_FILE, "r") as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {"tasks": [], "stats": {"total": 0, "completed": 0, "failed": 0}}
-
-    def _save_data(self, data: dict):
-        """Save tasks to file."""
-        with open(TASKS_FILE, "w") as f:
-            json.dump(data, f, indent=2, default=str)
+    def __init__(self, store: Optional[DocumentStore] = None, legacy_file: Optional[Path] = TASKS_FILE):
+        self.store = store or document_store
+        self.legacy_file = legacy_file
+        self._tasks = None
+
+    @property
+    def tasks(self):
+        """Task repository; imports the legacy JSON file on first use."""
+        if self._tasks is None:
+            if self.legacy_file is not None:
+                migrate_file(self.store, SOURCES_BY_FILENAME[TASKS_FILE.name], self.legacy_file)
+            for field in ("article_slug", "status", "created_at"):
+                self.store.ensure_index(field)
+            self._tasks = self.store.repository(COLLECTION, id_field="task_id")
+        return self._tasks
+
+    def _stats(self) -> dict:
+        return {**EMPTY_STATS, **self.tasks.meta().get("stats", {})}
+
+    def _bump_stats(self, field: str):
+        def apply(meta):
+            stats = {**EMPTY_STATS, **meta.get("stats", {})}
+            stats[field] += 1
+            return {**meta, "stats": stats}
+        self.tasks.update_meta(apply)
 
     # -------------------------------------------------------------------------
     # TASK CREATION
@@ -79,22 +94,23 @@ class TaskTrackerService:
 
         Anti-waste: Skips if same task completed in last 7 days.
         """
-        data = self._load_data()
+        with self.store.transaction():
+            return self._create_task(article_slug, task_type, triggered_by)
+
+    def _create_task(self, article_slug: str, task_type: TaskType, triggered_by: str) -> Optional[str]:
+        # Checks and insert share one transaction, so two workers can't both create it
+        existing = self.tasks.find({"article_slug": article_slug, "task_type": task_type})
 
         # Anti-waste check: Has this task been completed recently?
         seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
-        for task in data["tasks"]:
-            if (task["article_slug"] == article_slug and
-                task["task_type"] == task_type and
-                task["status"] == "completed" and
-                task.get("completed_at", "") > seven_days_ago):
+        for task in existing:
+            if (task["status"] == "completed" and
+                (task.get("completed_at") or "") > seven_days_ago):
                 return None  # Skip - already done recently
 
         # Check if task is already pending/running
-        for task in data["tasks"]:
-            if (task["article_slug"] == article_slug and
-                task["task_type"] == task_type and
-                task["status"] in ["pending", "running", "verifying"]):
+        for task in existing:
+            if task["status"] in ["pending", "running", "verifying"]:
                 return None  # Skip - already in progress
 
         # Create new task
@@ -114,9 +130,8 @@ class TaskTrackerService:
             "error": None
         }
 
-        data["tasks"].append(new_task)
-        data["stats"]["total"] += 1
-        self._save_data(data)
+        self.tasks.put(new_task)
+        self._bump_stats("total")
 
         return task_id
 
@@ -132,42 +147,35 @@ class TaskTrackerService:
         error: Optional[str] = None
     ) -> bool:
         """Update task status."""
-        data = self._load_data()
+        with self.store.transaction():
+            task = self.tasks.get(task_id)
+            if task is None:
+                return False
 
-        for task in data["tasks"]:
-            if task["task_id"] == task_id:
-                task["status"] = status
+            task["status"] = status
 
-                if status == "running":
-                    task["started_at"] = datetime.now().isoformat()
-                elif status in ["completed", "failed"]:
-                    task["completed_at"] = datetime.now().isoformat()
-                    if status == "completed":
-                        data["stats"]["completed"] += 1
-                    else:
-                        data["stats"]["failed"] += 1
+            if status == "running":
+                task["started_at"] = datetime.now().isoformat()
+            elif status in ["completed", "failed"]:
+                task["completed_at"] = datetime.now().isoformat()
+                self._bump_stats("completed" if status == "completed" else "failed")
 
-                if result:
-                    task["result"] = result
-                if error:
-                    task["error"] = error
+            if result:
+                task["result"] = result
+            if error:
+                task["error"] = error
 
-                self._save_data(data)
-                return True
-
-        return False
+            self.tasks.put(task)
+            return True
 
     def set_verification(self, task_id: str, verification: dict) -> bool:
         """Set verification results for a task."""
-        data = self._load_data()
-
-        for task in data["tasks"]:
-            if task["task_id"] == task_id:
-                task["verification"] = verification
-                self._save_data(data)
-                return True
+        def apply(task):
+            if task is None:
+                return None
+            return {**task, "verification": verification}
 
-        return False
+        return self.tasks.update(task_id, apply) is not None
 
     # -------------------------------------------------------------------------
     # QUERIES
@@ -175,37 +183,23 @@ class TaskTrackerService:
 
     def get_task(self, task_id: str) -> Optional[dict]:
         """Get a single task by ID."""
-        data = self._load_data()
-        for task in data["tasks"]:
-            if task["task_id"] == task_id:
-                return task
-        return None
+        return self.tasks.get(task_id)
 
     def get_tasks_for_article(self, article_slug: str) -> List[dict]:
         """Get all tasks for an article."""
-        data = self._load_data()
-        return [t for t in data["tasks"] if t["article_slug"] == article_slug]
+        return self.tasks.find({"article_slug": article_slug})
 
     def get_pending_tasks(self) -> List[dict]:
         """Get all pending tasks (queue)."""
-        data = self._load_data()
-        return [t for t in data["tasks"] if t["status"] == "pending"]
+        return self.tasks.find({"status": "pending"})
 
     def get_recent_tasks(self, limit: int = 50) -> List[dict]:
         """Get most recent tasks."""
-        data = self._load_data()
-        sorted_tasks = sorted(
-            data["tasks"],
-            key=lambda x: x.get("created_at", ""),
-            reverse=True
-        )
-        return sorted_tasks[:limit]
+        return self.tasks.find(order_by="created_at", descending=True, limit=limit)
 
     def get_failed_tasks(self, limit: int = 20) -> List[dict]:
         """Get recent failed tasks for retry."""
-        data = self._load_data()
-        failed = [t for t in data["tasks"] if t["status"] == "failed"]
-        return sorted(failed, key=lambda x: x.get("completed_at", ""), reverse=True)[:limit]
+        return self.tasks.find({"status": "failed"}, order_by="completed_at", descending=True, limit=limit)
 
     # -------------------------------------------------------------------------
     # ARTICLE STATUS
@@ -256,12 +250,11 @@ class TaskTrackerService:
 
     def get_daily_stats(self) -> dict:
         """Get stats for today."""
-        data = self._load_data()
         today = datetime.now().date().isoformat()
 
         today_tasks = [
-            t for t in data["tasks"]
-            if t.get("created_at", "")[:10] == today
+            t for t in self.tasks.find(order_by="created_at", descending=True)
+            if (t.get("created_at") or "")[:10] == today
         ]
 
         return {
@@ -275,15 +268,15 @@ class TaskTrackerService:
 
     def get_overall_stats(self) -> dict:
         """Get overall task statistics."""
-        data = self._load_data()
+        stats = self._stats()
         return {
-            "total_tasks": data["stats"]["total"],
-            "completed": data["stats"]["completed"],
-            "failed": data["stats"]["failed"],
-            "pending_queue": len([t for t in data["tasks"] if t["status"] == "pending"]),
+            "total_tasks": stats["total"],
+            "completed": stats["completed"],
+            "failed": stats["failed"],
+            "pending_queue": self.tasks.count({"status": "pending"}),
             "success_rate": (
-                round(data["stats"]["completed"] / data["stats"]["total"] * 100, 1)
-                if data["stats"]["total"] > 0 else 0
+                round(stats["completed"] / stats["total"] * 100, 1)
+                if stats["total"] > 0 else 0
             )
         }
 
@@ -293,16 +286,12 @@ class TaskTrackerService:
 
     def cleanup_old_tasks(self, days: int = 30):
         """Remove completed tasks older than X days."""
-        data = self._load_data()
         cutoff = (datetime.now() - timedelta(days=days)).isoformat()
 
-        data["tasks"] = [
-            t for t in data["tasks"]
-            if t["status"] not in ["completed", "failed"] or
-               t.get("completed_at", datetime.now().isoformat()) > cutoff
-        ]
-
-        self._save_data(data)
+        with self.store.transaction():
+            for task in self.tasks.find({"status": ["completed", "failed"]}):
+                if task.get("completed_at") and task["completed_at"] <= cutoff:
+                    self.tasks.delete(task["task_id"])
 
 
 # Singleton instance
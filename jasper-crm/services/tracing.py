@@ -0,0 +1,306 @@
+"""
+JASPER CRM - Request Span Tracing
+
+Opt-in, in-process tracing for finding where a slow request spends its
+time. No external backend: finished traces are kept in a ring buffer and
+served from /admin/traces, and slow traces are logged with their span
+breakdown.
+
+A request is traced when:
+- TRACING_ENABLED=true and it falls within TRACE_SAMPLE_RATE (default 1.0), or
+- it carries an `X-Trace: 1` header and TRACE_ON_DEMAND=true. Off by
+  default: such requests get a Server-Timing header with internal stage
+  timings, so only switch it on where clients are trusted.
+
+Spans are linked by the logging_service correlation ID. Instrumented:
+- db.query      SQLAlchemy cursor executes (instrument_sqlalchemy)
+- http.client   outbound httpx requests (instrument_httpx)
+- redis.*       CacheService operations
+- file.json     blog post JSON loads/saves
+- llm.call      every call recorded by llm_accounting
+
+Usage:
+    from services.tracing import span
+
+    with span("file.json", "load", path=str(path)):
+        data = json.load(f)
+
+When the current request isn't traced, `span` returns after one contextvar lookup.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """One timed operation within a trace."""
+    span_id: int
+    parent_id: Optional[int]
+    kind: str
+    name: str
+    start_ms: float
+    duration_ms: float = 0.0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+@dataclass
+class Trace:
+    """All spans recorded for one request."""
+    correlation_id: str
+    method: str
+    path: str
+    started_at: float
+    start: float = field(default_factory=time.perf_counter)
+    spans: List[Span] = field(default_factory=list)
+    status_code: Optional[int] = None
+    duration_ms: float = 0.0
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def totals_by_kind(self) -> Dict[str, Dict[str, float]]:
+        """Count and total time per span kind."""
+        totals: Dict[str, Dict[str, float]] = {}
+        for s in self.spans:
+            entry = totals.setdefault(s.kind, {"count": 0, "ms": 0.0})
+            entry["count"] += 1
+            entry["ms"] += s.duration_ms
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "correlation_id": self.correlation_id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 2),
+            "by_kind": {k: {"count": v["count"], "ms": round(v["ms"], 2)} for k, v in self.totals_by_kind().items()},
+            "spans": [
+                {
+                    "id": s.span_id,
+                    "parent": s.parent_id,
+                    "kind": s.kind,
+                    "name": s.name,
+                    "start_ms": round(s.start_ms, 2),
+                    "duration_ms": round(s.duration_ms, 2),
+                    "attrs": s.attrs,
+                    **({"error": s.error} if s.error else {}),
+                }
+                for s in self.spans
+            ],
+        }
+
+
+_trace_var: ContextVar[Optional[Trace]] = ContextVar("jasper_trace", default=None)
+# Innermost open span; a contextvar so concurrent tasks (e.g. AgenticBrain's
+# tool TaskGroup) each get their own parent chain
+_span_var: ContextVar[Optional[int]] = ContextVar("jasper_span", default=None)
+
+
+class Tracer:
+    """Starts/finishes request traces and keeps the most recent ones."""
+
+    MAX_SPANS = 2000  # Per trace; protects against runaway loops
+
+    def __init__(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None, keep: int = 200):
+        env = os.getenv("TRACING_ENABLED", "")
+        self.enabled = enabled if enabled is not None else env.lower() == "true"
+        # X-Trace requests are only honoured when asked for
+        self.allow_on_demand = os.getenv("TRACE_ON_DEMAND", "false").lower() == "true"
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+        self.slow_ms = float(os.getenv("TRACE_SLOW_MS", "1000"))
+        self._recent: "OrderedDict[str, Trace]" = OrderedDict()
+        self._keep = keep
+        self._lock = threading.Lock()
+
+    def should_trace(self, requested: bool) -> bool:
+        if requested and self.allow_on_demand:
+            return True
+        return self.enabled and (self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+
+    def start(self, correlation_id: str, method: str, path: str):
+        """Begin tracing the current context. Returns a token for finish()."""
+        trace = Trace(correlation_id=correlation_id, method=method, path=path, started_at=time.time())
+        return _trace_var.set(trace), _span_var.set(None)
+
+    def finish(self, token, status_code: int) -> Optional[Trace]:
+        trace = _trace_var.get()
+        trace_token, span_token = token
+        _trace_var.reset(trace_token)
+        _span_var.reset(span_token)
+        if trace is None:
+            return None
+        trace.status_code = status_code
+        trace.duration_ms = trace.elapsed_ms()
+        with self._lock:
+            self._recent[trace.correlation_id] = trace
+            self._recent.move_to_end(trace.correlation_id)
+            while len(self._recent) > self._keep:
+                self._recent.popitem(last=False)
+        if trace.duration_ms >= self.slow_ms:
+            breakdown = ", ".join(
+                f"{kind} {v['count']}x {v['ms']:.1f}ms" for kind, v in sorted(
+                    trace.totals_by_kind().items(), key=lambda kv: -kv[1]["ms"]
+                )
+            )
+            logger.warning(
+                f"[Tracing] Slow trace {trace.method} {trace.path} {trace.duration_ms:.1f}ms "
+                f"[{trace.correlation_id}]: {breakdown or 'no spans'}"
+            )
+        return trace
+
+    def get(self, correlation_id: str) -> Optional[Trace]:
+        with self._lock:
+            return self._recent.get(correlation_id)
+
+    def recent(self, limit: int = 50, min_ms: float = 0.0) -> List[Dict[str, Any]]:
+        with self._lock:
+            traces = list(self._recent.values())
+        traces = [t for t in reversed(traces) if t.duration_ms >= min_ms][:limit]
+        return [
+            {
+                "correlation_id": t.correlation_id,
+                "method": t.method,
+                "path": t.path,
+                "status_code": t.status_code,
+                "duration_ms": round(t.duration_ms, 2),
+                "spans": len(t.spans),
+            }
+            for t in traces
+        ]
+
+
+tracer = Tracer()
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace_var.get()
+
+
+@contextmanager
+def span(kind: str, name: str = "", **attrs):
+    """Time a block as a span of the current trace. No-op when untraced."""
+    trace = _trace_var.get()
+    if trace is None or len(trace.spans) >= Tracer.MAX_SPANS:
+        yield None
+        return
+
+    s = Span(
+        span_id=len(trace.spans) + 1,
+        parent_id=_span_var.get(),
+        kind=kind,
+        name=name,
+        start_ms=trace.elapsed_ms(),
+        attrs=attrs,
+    )
+    trace.spans.append(s)
+    token = _span_var.set(s.span_id)
+    started = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.error = type(e).__name__
+        raise
+    finally:
+        s.duration_ms = (time.perf_counter() - started) * 1000
+        _span_var.reset(token)
+
+
+def add_span(kind: str, name: str, duration_ms: float, **attrs):
+    """Record an already-finished operation (e.g. from a callback that measured it)."""
+    trace = _trace_var.get()
+    if trace is None or len(trace.spans) >= Tracer.MAX_SPANS:
+        return
+    trace.spans.append(Span(
+        span_id=len(trace.spans) + 1,
+        parent_id=_span_var.get(),
+        kind=kind,
+        name=name,
+        start_ms=trace.elapsed_ms() - duration_ms,
+        duration_ms=duration_ms,
+        attrs=attrs,
+    ))
+
+
+# -----------------------------------------------------------------------------
+# Library instrumentation
+# -----------------------------------------------------------------------------
+
+_instrumented = set()
+
+
+def instrument_sqlalchemy(engine):
+    """Record a db.query span for every cursor execute on `engine`."""
+    if ("sqlalchemy", id(engine)) in _instrumented:
+        return
+    from sqlalchemy import event as sa_event
+
+    @sa_event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _trace_var.get() is not None:
+            conn.info.setdefault("_jasper_span_start", []).append(time.perf_counter())
+
+    @sa_event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_jasper_span_start")
+        if _trace_var.get() is None or not starts:
+            return
+        duration_ms = (time.perf_counter() - starts.pop()) * 1000
+        add_span("db.query", statement.split(None, 1)[0].upper(), duration_ms, sql=statement[:200])
+
+    _instrumented.add(("sqlalchemy", id(engine)))
+
+
+def instrument_httpx():
+    """Record an http.client span around every outbound httpx request."""
+    if "httpx" in _instrumented:
+        return
+    import httpx
+
+    original_async_send = httpx.AsyncClient.send
+    original_send = httpx.Client.send
+
+    async def traced_async_send(self, request, *args, **kwargs):
+        if _trace_var.get() is None:
+            return await original_async_send(self, request, *args, **kwargs)
+        with span("http.client", f"{request.method} {request.url.host}", path=request.url.path) as s:
+            response = await original_async_send(self, request, *args, **kwargs)
+            if s is not None:
+                s.attrs["status"] = response.status_code
+            return response
+
+    def traced_send(self, request, *args, **kwargs):
+        if _trace_var.get() is None:
+            return original_send(self, request, *args, **kwargs)
+        with span("http.client", f"{request.method} {request.url.host}", path=request.url.path) as s:
+            response = original_send(self, request, *args, **kwargs)
+            if s is not None:
+                s.attrs["status"] = response.status_code
+            return response
+
+    httpx.AsyncClient.send = traced_async_send
+    httpx.Client.send = traced_send
+    _instrumented.add("httpx")
+
+
+def install_instrumentation():
+    """Hook tracing into the database engine and httpx. Safe to call more than once."""
+    try:
+        from db.database import engine
+        instrument_sqlalchemy(engine)
+    except Exception as e:
+        logger.warning(f"[Tracing] SQLAlchemy instrumentation unavailable: {e}")
+    instrument_httpx()
@@ -6,6 +6,7 @@ Provides shared test fixtures for the test suite.
 
 import os
 import sys
+import tempfile
 import pytest
 from typing import Generator
 
@@ -17,6 +18,8 @@ os.environ["DATABASE_URL"] = "sqlite:///./test.db"
 os.environ["JWT_SECRET"] = "test-jwt-secret-for-testing-only"
 os.environ["OPENROUTER_API_KEY"] = "test-api-key"
 os.environ["DEBUG"] = "true"
+os.environ["EVENT_QUEUE_BACKEND"] = "memory"
+os.environ["DOCUMENT_STORE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="jasper-test-"), "documents.db")
 
 from fastapi.testclient import TestClient
 from httpx import AsyncClient, ASGITransport
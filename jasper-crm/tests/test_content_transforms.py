@@ -0,0 +1,115 @@
+"""
+JASPER CRM - Content Transform Pipeline Tests
+
+Tests for batch post transforms committed in one write.
+"""
+
+import json
+
+import pytest
+
+from services.content_transforms import ContentTransformPipeline, register_builtin_transforms
+from services.json_file_store import json_file
+
+
+def _posts():
+    return [
+        {"slug": "ifc-solar", "title": "IFC Solar Financing Models", "category": "dfi-insights",
+         "tags": ["ifc", "solar"], "status": "published", "excerpt": "Solar deals", "content": "Body one."},
+        {"slug": "ifc-wind", "title": "IFC Wind Financing Models", "category": "dfi-insights",
+         "tags": ["ifc", "wind"], "status": "published", "excerpt": "Wind deals",
+         "content": "Body two.\n\n---\n\nTalk to us: [Contact](/contact)"},
+        {"slug": "draft", "title": "Draft Solar Models", "category": "dfi-insights",
+         "tags": ["ifc"], "status": "draft", "excerpt": "", "content": "Draft.", "heroImage": "/a.png"},
+    ]
+
+
+@pytest.fixture
+def posts_path(tmp_path):
+    path = tmp_path / "blog_posts.json"
+    path.write_text(json.dumps(_posts()))
+    return path
+
+
+@pytest.fixture
+def pipeline(posts_path):
+    return register_builtin_transforms(ContentTransformPipeline(posts_path))
+
+
+def _by_slug(posts_path):
+    return {p["slug"]: p for p in json.loads(posts_path.read_text())}
+
+
+class TestContentTransformPipeline:
+    """Tests for ContentTransformPipeline"""
+
+    async def test_links_and_cta_in_one_write(self, pipeline, posts_path):
+        version = json_file(posts_path).version()
+        result = await pipeline.run(["cta", "related_links"])
+
+        assert result["transforms"] == ["related_links", "cta"]
+        assert result["updated"] == 2
+        assert json_file(posts_path).version() != version
+        posts = _by_slug(posts_path)
+
+        solar = posts["ifc-solar"]["content"]
+        assert solar.index("## Related Articles") < solar.index("/contact")
+        assert "[IFC Wind Financing Models](/ifc-wind)" in solar
+        assert posts["ifc-solar"]["version"] == 1
+
+        # Existing CTA stays last; drafts are left alone
+        wind = posts["ifc-wind"]["content"]
+        assert wind.endswith("Talk to us: [Contact](/contact)")
+        assert wind.count("/contact") == 1
+        assert posts["draft"]["content"] == "Draft."
+
+        assert (await pipeline.run(["cta", "related_links"]))["updated"] == 0
+
+    async def test_dry_run_diffs(self, pipeline, posts_path):
+        before = posts_path.read_text()
+        result = await pipeline.run(["cta"], dry_run=True)
+
+        assert posts_path.read_text() == before
+        assert [d["slug"] for d in result["details"]] == ["ifc-solar"]
+        diff = result["details"][0]["diff"]["content"]
+        assert "+**[Discuss Your Project →](/contact)**" in diff
+
+    async def test_conflicting_edit_is_not_overwritten(self, posts_path):
+        pipeline = ContentTransformPipeline(posts_path)
+
+        def edit_during_pass(post):
+            if post["slug"] == "ifc-solar":
+                with json_file(posts_path).edit() as posts:
+                    posts[0]["content"] = "Edited meanwhile."
+            return {"content": post["content"] + "!"}
+
+        pipeline.register("bang", edit_during_pass)
+        result = await pipeline.run(slugs=["ifc-solar", "ifc-wind"])
+
+        assert result["conflicts"] == ["ifc-solar"]
+        posts = _by_slug(posts_path)
+        assert posts["ifc-solar"]["content"] == "Edited meanwhile."
+        assert posts["ifc-wind"]["content"].endswith("(/contact)!")
+
+    async def test_failing_transform_is_reported(self, posts_path):
+        pipeline = ContentTransformPipeline(posts_path)
+
+        async def flaky(post):
+            if post["slug"] == "ifc-wind":
+                raise RuntimeError("no sources")
+            return {"excerpt": "Updated"}
+
+        pipeline.register("flaky", flaky)
+        result = await pipeline.run()
+
+        assert result["errors"] == [{"slug": "ifc-wind", "transform": "flaky", "error": "no sources"}]
+        assert result["updated"] == 2
+        assert _by_slug(posts_path)["ifc-wind"]["excerpt"] == "Wind deals"
+
+    async def test_unknown_transform(self, pipeline):
+        with pytest.raises(ValueError):
+            await pipeline.run(["cta", "nope"])
+
+    def test_citations_are_opt_in(self, pipeline):
+        defaults = [t["name"] for t in pipeline.list_transforms() if t["default"]]
+        assert defaults == ["related_links", "image_urls", "cta"]
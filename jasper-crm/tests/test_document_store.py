@@ -0,0 +1,162 @@
+"""
+JASPER CRM - Document Store Tests
+
+Tests for the SQLite document store, legacy migration and the task tracker on top of it.
+"""
+
+import json
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def store(tmp_path):
+    from services.document_store import DocumentStore
+
+    store = DocumentStore(tmp_path / "documents.db")
+    yield store
+    store.close()
+
+
+class TestRepository:
+    """Tests for the repository API."""
+
+    def test_put_get_find(self, store):
+        """Test basic CRUD and equality/IN filters."""
+        repo = store.repository("tasks", id_field="task_id")
+        store.ensure_index("status")
+        repo.put_many([
+            {"task_id": "a", "status": "pending", "created_at": "2026-01-02"},
+            {"task_id": "b", "status": "failed", "created_at": "2026-01-03"},
+            {"task_id": "c", "status": "pending", "created_at": "2026-01-01"},
+        ])
+
+        assert repo.get("b")["status"] == "failed"
+        assert [t["task_id"] for t in repo.find({"status": "pending"})] == ["a", "c"]
+        assert [t["task_id"] for t in repo.find(order_by="created_at", descending=True, limit=2)] == ["b", "a"]
+        assert repo.count({"status": ["pending", "failed"]}) == 3
+        assert repo.delete("a") is True
+        assert repo.get("a") is None
+
+    def test_compare_and_set(self, store):
+        """Test that a stale expected_version is rejected."""
+        from services.document_store import VersionConflict
+
+        repo = store.repository("posts", id_field="slug")
+        assert repo.put({"slug": "p", "title": "v1"}, expected_version=0) == 1
+        assert repo.put({"slug": "p", "title": "v2"}, expected_version=1) == 2
+
+        with pytest.raises(VersionConflict):
+            repo.put({"slug": "p", "title": "stale"}, expected_version=1)
+        assert repo.get("p")["title"] == "v2"
+
+    def test_concurrent_updates_are_not_lost(self, store):
+        """Test that read-modify-write from many threads keeps every increment."""
+        repo = store.repository("counters")
+        repo.put({"id": "hits", "n": 0})
+
+        def worker():
+            for _ in range(50):
+                repo.update("hits", lambda doc: {**doc, "n": doc["n"] + 1})
+            store.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert repo.get("hits")["n"] == 200
+
+    def test_transaction_rolls_back(self, store):
+        """Test that an exception inside a transaction undoes its writes."""
+        repo = store.repository("things")
+        with pytest.raises(RuntimeError):
+            with store.transaction():
+                repo.put({"id": "x"})
+                raise RuntimeError("boom")
+        assert repo.get("x") is None
+
+    def test_rejects_unsafe_field_names(self, store):
+        """Test that filter field names can't inject SQL."""
+        with pytest.raises(ValueError):
+            store.repository("things").find({"a') OR 1=1 --": 1})
+
+
+class TestLegacyMigration:
+    """Tests for the one-shot migrator and read-compat export."""
+
+    @pytest.mark.parametrize("filename,payload", [
+        ("blog_posts.json", [{"slug": "a", "title": "A"}, {"slug": "b", "title": "B"}]),
+        ("blog_revisions.json", {"a": [{"revision_id": 1}], "b": []}),
+        ("enhancement_tasks.json", {"tasks": [{"task_id": "t1"}, {"task_id": "t2"}], "stats": {"total": 2}}),
+        ("orchestrator_state.json", {"last_run": "2026-01-01", "queue": [1, 2]}),
+        ("editor_accomplishments.json", [{"what": "x"}, {"what": "x"}]),
+    ])
+    def test_round_trip(self, store, tmp_path, filename, payload):
+        """Test that migrate + export reproduces each legacy file shape."""
+        from services.document_store import SOURCES_BY_FILENAME, migrate_file, export_collection
+
+        path = tmp_path / filename
+        path.write_text(json.dumps(payload))
+        source = SOURCES_BY_FILENAME[filename]
+
+        assert migrate_file(store, source, path) is not None
+        assert migrate_file(store, source, path) is None  # one-shot
+        assert export_collection(store, source) == payload
+
+    def test_write_export(self, store, tmp_path):
+        """Test that exports are written as the legacy JSON file."""
+        from services.document_store import SOURCES_BY_FILENAME, write_export
+
+        store.repository("blog_posts", id_field="slug").put({"slug": "a", "title": "A"})
+        out = write_export(store, SOURCES_BY_FILENAME["blog_posts.json"], tmp_path / "out" / "blog_posts.json")
+
+        assert json.loads(out.read_text()) == [{"slug": "a", "title": "A"}]
+
+    def test_migrate_all_uses_first_directory_with_file(self, store, tmp_path):
+        """Test that a copy in a later data dir doesn't replace the collection."""
+        from services.document_store import SOURCES_BY_FILENAME, migrate_all, export_collection
+
+        repo_dir, deploy_dir = tmp_path / "repo", tmp_path / "deploy"
+        repo_dir.mkdir()
+        deploy_dir.mkdir()
+        (repo_dir / "blog_posts.json").write_text(json.dumps([{"slug": "live", "title": "Live"}]))
+        (deploy_dir / "blog_posts.json").write_text(json.dumps([{"slug": "old", "title": "Old"}]))
+        (deploy_dir / "blog_revisions.json").write_text(json.dumps({"live": []}))
+
+        results = migrate_all(store, [repo_dir, deploy_dir])
+
+        assert set(results) == {str(repo_dir / "blog_posts.json"), str(deploy_dir / "blog_revisions.json")}
+        assert export_collection(store, SOURCES_BY_FILENAME["blog_posts.json"]) == [{"slug": "live", "title": "Live"}]
+
+
+class TestTaskTrackerOnStore:
+    """Tests for TaskTrackerService backed by the document store."""
+
+    def test_lifecycle_and_stats(self, store, tmp_path):
+        """Test create/update/stats and the anti-waste duplicate check."""
+        from services.task_tracker_service import TaskTrackerService, TaskType, TaskStatus
+
+        legacy = tmp_path / "enhancement_tasks.json"
+        legacy.write_text(json.dumps({
+            "tasks": [{"task_id": "old", "article_slug": "x", "task_type": "citations", "status": "failed",
+                       "created_at": "2025-01-01T00:00:00", "completed_at": "2025-01-01T00:00:00"}],
+            "stats": {"total": 1, "completed": 0, "failed": 1},
+        }))
+        tracker = TaskTrackerService(store=store, legacy_file=legacy)
+
+        task_id = tracker.create_task("my-article", TaskType.CITATIONS)
+        assert task_id
+        assert tracker.create_task("my-article", TaskType.CITATIONS) is None
+
+        assert tracker.update_status(task_id, TaskStatus.COMPLETED)
+        stats = tracker.get_overall_stats()
+        assert (stats["total_tasks"], stats["completed"], stats["failed"]) == (2, 1, 1)
+        assert tracker.get_article_enhancement_status("my-article")["has_citations"] is True
+        assert [t["task_id"] for t in tracker.get_failed_tasks()] == ["old"]
+
+        tracker.cleanup_old_tasks(days=30)
+        assert tracker.get_task("old") is None
+        assert tracker.get_task(task_id) is not None
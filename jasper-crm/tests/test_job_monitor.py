@@ -0,0 +1,121 @@
+"""
+JASPER CRM - Job Monitor Tests
+
+Tests for rolling-window job telemetry and snapshot persistence.
+"""
+
+import json
+
+import pytest
+
+
+class FakeClock:
+    def __init__(self, start=1_800_000_000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def monitor(tmp_path, clock):
+    from services.job_monitor import JobMonitor
+
+    monitor = JobMonitor(str(tmp_path), clock=clock, snapshot_interval=0)
+    monitor.alerts = []
+    monitor._trigger_alert = lambda job_type, rate: monitor.alerts.append((job_type, rate))
+    return monitor
+
+
+def _run(monitor, clock, job_id, duration_s, fail=False, job_type="pipeline"):
+    monitor.start_job(job_id, job_type)
+    clock.advance(duration_s)
+    if fail:
+        monitor.fail_job(job_id, "boom")
+    else:
+        monitor.complete_job(job_id, {"ok": True})
+
+
+class TestJobMonitor:
+    """Tests for JobMonitor."""
+
+    def test_metrics_and_percentiles(self, monitor, clock):
+        """Test totals, success rate and duration percentiles over a window."""
+        for i in range(18):
+            _run(monitor, clock, f"ok-{i}", 0.2)
+        _run(monitor, clock, "slow", 20)
+        _run(monitor, clock, "bad", 1, fail=True)
+
+        m = monitor.get_metrics(hours=1)["job_types"]["pipeline"]
+        assert (m["total"], m["completed"], m["failed"]) == (20, 19, 1)
+        assert m["success_rate"] == pytest.approx(0.95)
+        assert 100 <= m["p50_duration_ms"] <= 250
+        assert m["p99_duration_ms"] > 10_000
+        assert m["last_failure"]["error"] == "boom"
+
+    def test_window_excludes_old_outcomes(self, monitor, clock):
+        """Test that outcomes age out of shorter windows."""
+        _run(monitor, clock, "old", 1, fail=True)
+        clock.advance(3 * 3600)
+        _run(monitor, clock, "new", 1)
+
+        assert monitor.get_metrics(hours=1)["job_types"]["pipeline"]["total"] == 1
+        assert monitor.get_metrics(hours=1)["job_types"]["pipeline"]["last_failure"] is None
+        assert monitor.get_metrics(hours=24)["job_types"]["pipeline"]["total"] == 2
+
+    def test_alert_uses_rolling_window_with_cooldown(self, monitor, clock):
+        """Test that alerts fire on the windowed failure rate, once per cooldown."""
+        # Failures long ago don't count towards the current window
+        for i in range(10):
+            _run(monitor, clock, f"old-{i}", 1, fail=True)
+        monitor.alerts.clear()
+        clock.advance(2 * 3600)
+
+        for i in range(7):
+            _run(monitor, clock, f"ok-{i}", 1)
+        for i in range(2):
+            _run(monitor, clock, f"bad-{i}", 1, fail=True)
+        assert monitor.alerts == []  # 9 samples: not enough data
+
+        _run(monitor, clock, "bad-2", 1, fail=True)
+        assert len(monitor.alerts) == 1
+        assert monitor.alerts[0][1] == pytest.approx(3 / 10)
+
+        _run(monitor, clock, "bad-3", 1, fail=True)
+        assert len(monitor.alerts) == 1  # cooling down
+
+    def test_snapshot_round_trip(self, monitor, clock, tmp_path):
+        """Test that state survives a restart via the periodic snapshot."""
+        from services.job_monitor import JobMonitor
+
+        _run(monitor, clock, "a", 1)
+        monitor.start_job("still-running", "pipeline")
+        assert not (tmp_path / "job_monitor_state.json").exists()  # no per-event writes
+        monitor.save_snapshot()
+
+        restored = JobMonitor(str(tmp_path), clock=clock, snapshot_interval=0)
+        assert restored.get_metrics()["job_types"]["pipeline"]["completed"] == 1
+        assert restored.get_job("still-running")["status"] == "running"
+
+    def test_loads_legacy_state(self, tmp_path, clock):
+        """Test that the old jobs + metrics state file is folded into buckets."""
+        from datetime import datetime
+        from services.job_monitor import JobMonitor
+
+        ts = datetime.fromtimestamp(clock.now - 600).isoformat()
+        (tmp_path / "job_monitor_state.json").write_text(json.dumps({
+            "jobs": {"j1": {"id": "j1", "type": "t", "status": "completed", "started_at": ts}},
+            "metrics": {"t": [{"timestamp": ts, "status": "failed", "duration_ms": 5.0, "error": "x"}]},
+        }))
+
+        monitor = JobMonitor(str(tmp_path), clock=clock, snapshot_interval=0)
+        assert monitor.get_metrics()["job_types"]["t"]["failed"] == 1
+        assert monitor.get_job("j1")["id"] == "j1"
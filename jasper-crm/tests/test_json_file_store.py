@@ -0,0 +1,131 @@
+"""
+JASPER CRM - JSON File Persistence Tests
+
+Tests for atomic, locked, versioned and debounced JSON file writes.
+"""
+
+import json
+import multiprocessing
+import time
+
+import pytest
+
+
+def _increment_many(path, times):
+    from services.json_file_store import JsonFile
+
+    handle = JsonFile(path, default=dict)
+    for _ in range(times):
+        handle.update(lambda data: {**data, "n": data.get("n", 0) + 1})
+
+
+class TestJsonFile:
+    """Tests for JsonFile."""
+
+    def test_write_is_atomic_and_versioned(self, tmp_path):
+        """Test that writes replace the file whole and bump the version."""
+        from services.json_file_store import JsonFile
+
+        handle = JsonFile(tmp_path / "posts.json")
+        v1 = handle.write([{"slug": "a"}])
+        v2 = handle.write([{"slug": "a"}, {"slug": "b"}])
+
+        assert v1 != v2
+        assert json.loads((tmp_path / "posts.json").read_text()) == [{"slug": "a"}, {"slug": "b"}]
+        assert not [p for p in tmp_path.iterdir() if p.name.endswith(".tmp")]
+
+    def test_compare_and_swap(self, tmp_path):
+        """Test that a write based on a stale version is refused."""
+        from services.json_file_store import JsonFile, WriteConflict
+
+        handle = JsonFile(tmp_path / "posts.json")
+        handle.write([])
+        data, version = handle.read_versioned()
+        handle.write([{"slug": "someone-else"}])
+
+        with pytest.raises(WriteConflict):
+            handle.write(data + [{"slug": "mine"}], expected_version=version)
+        assert handle.read() == [{"slug": "someone-else"}]
+
+    def test_edit_skips_unchanged_and_failed_blocks(self, tmp_path):
+        """Test that edit() only writes when the block changed something and didn't raise."""
+        from services.json_file_store import JsonFile
+
+        handle = JsonFile(tmp_path / "posts.json")
+        handle.write([{"slug": "a"}])
+        version = handle.version()
+
+        with handle.edit() as posts:
+            assert posts == [{"slug": "a"}]
+        assert handle.version() == version
+
+        with pytest.raises(RuntimeError):
+            with handle.edit() as posts:
+                posts.clear()
+                raise RuntimeError("boom")
+        assert handle.read() == [{"slug": "a"}]
+
+    def test_deferred_updates_coalesce_into_one_write(self, tmp_path):
+        """Test that a burst of deferred updates is flushed as one write, replayed on the latest file."""
+        from services.json_file_store import JsonFile
+
+        path = tmp_path / "ratings.json"
+        handle = JsonFile(path, default=dict, debounce_s=0.05, max_delay_s=1.0)
+        handle.write({"votes": 0})
+        writes = []
+        original = handle._write_text
+        handle._write_text = lambda text: writes.append(text) or original(text)
+
+        for _ in range(20):
+            handle.update(lambda d: {**d, "votes": d["votes"] + 1}, defer=True)
+        assert handle.read() == {"votes": 20}
+
+        # Another process writes before the flush; its change must survive
+        path.write_text(json.dumps({"votes": 0, "other": True}))
+
+        deadline = time.time() + 2
+        while handle.pending and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert handle.pending == 0
+        assert len(writes) == 1
+        assert json.loads(path.read_text()) == {"votes": 20, "other": True}
+
+    def test_failing_deferred_update_is_dropped(self, tmp_path):
+        """Test that an update that fails at flush time doesn't block the others or later writes."""
+        from services.json_file_store import JsonFile
+
+        path = tmp_path / "posts.json"
+        handle = JsonFile(path, default=list, debounce_s=60, max_delay_s=60)
+        handle.write([{"slug": "a", "ratings": {"count": 1}}])
+
+        def add_view(posts):
+            posts[0]["views"] = posts[0].get("views", 0) + 1
+
+        def add_rating(posts):
+            posts[0]["tags"] = ["half-applied"]
+            posts[0]["ratings"]["count"] += 1  # Fails once the file's data changes shape
+
+        handle.update(add_view, defer=True)
+        handle.update(add_rating, defer=True)
+        handle.update(add_view, defer=True)
+        path.write_text(json.dumps([{"slug": "a", "ratings": None}]))
+
+        data, version = handle.read_versioned()
+
+        assert data == [{"slug": "a", "ratings": None, "views": 2}]
+        assert handle.pending == 0
+        handle.write([{"slug": "b"}], expected_version=version)
+        assert handle.read() == [{"slug": "b"}]
+
+    def test_concurrent_processes_lose_no_updates(self, tmp_path):
+        """Test that read-modify-write from several processes keeps every change."""
+        path = tmp_path / "counter.json"
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=_increment_many, args=(path, 25)) for _ in range(4)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        assert json.loads(path.read_text()) == {"n": 100}
@@ -0,0 +1,158 @@
+"""
+JASPER CRM - Keyword Catalog Tests
+
+Tests for the compiled, memory-mapped keyword catalog behind KeywordService.
+"""
+
+import os
+import csv
+
+import numpy as np
+import pytest
+
+from services.keyword_service import KeywordService
+from services.keyword_table import KeywordTable
+
+SOLAR_ROWS = [
+    {"keyword": "solar project finance", "volume": "500", "difficulty": "40", "intent": "commercial"},
+    {"keyword": "solar IPP south africa", "volume": "1200", "difficulty": "", "intent": ""},
+    {"keyword": "- section divider", "volume": "", "difficulty": "", "intent": ""},
+]
+WATER_ROWS = [
+    {"keyword": "water infrastructure funding", "volume": "300", "difficulty": "55", "intent": "informational"},
+    {"keyword": "Solar desalination", "volume": "", "difficulty": "70", "intent": ""},
+]
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["keyword", "volume", "difficulty", "intent"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def seo_folder(tmp_path):
+    folder = tmp_path / "seo"
+    folder.mkdir()
+    _write_csv(folder / "solar_project_keywords.csv", SOLAR_ROWS)
+    _write_csv(folder / "water_infrastructure_keywords.csv", WATER_ROWS)
+    _write_csv(folder / "MASTER_KEYWORDS_COMBINED.csv", SOLAR_ROWS + WATER_ROWS)
+    return folder
+
+
+@pytest.fixture
+def catalog_dir(tmp_path):
+    return tmp_path / "catalog"
+
+
+def _parsed(service):
+    records = []
+    for path in service._source_files():
+        records.extend(service._load_csv_file(path))
+    return records
+
+
+class TestKeywordCatalog:
+    """Tests for KeywordCatalog"""
+
+    def test_lazy_compile(self, seo_folder, catalog_dir):
+        service = KeywordService(seo_folder, catalog_dir)
+        assert not catalog_dir.exists()
+
+        assert service.keywords == _parsed(service)
+        assert len(service.keywords) == 4
+        assert (catalog_dir / "manifest.json").exists()
+
+    def test_reopen_maps_without_parsing(self, seo_folder, catalog_dir, monkeypatch):
+        KeywordService(seo_folder, catalog_dir).table
+        service = KeywordService(seo_folder, catalog_dir)
+        monkeypatch.setattr(service.catalog, "parse_fn", lambda path: pytest.fail("re-parsed CSVs"))
+
+        assert isinstance(service.table.volume, np.memmap)
+        assert [kw["keyword"] for kw in service.search(query="solar")] == [
+            "solar project finance", "solar IPP south africa", "Solar desalination",
+        ]
+
+    def test_touched_csv_is_not_recompiled(self, seo_folder, catalog_dir, monkeypatch):
+        KeywordService(seo_folder, catalog_dir).table
+        path = seo_folder / "water_infrastructure_keywords.csv"
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+        service = KeywordService(seo_folder, catalog_dir)
+        monkeypatch.setattr(service.catalog, "parse_fn", lambda path: pytest.fail("re-parsed CSVs"))
+        assert len(service.table) == 4
+        manifest = service.catalog._manifest.read()
+        assert manifest["sources"][str(path)]["mtime_ns"] == path.stat().st_mtime_ns
+
+    def test_edited_csv_is_recompiled(self, seo_folder, catalog_dir):
+        service = KeywordService(seo_folder, catalog_dir)
+        service.table
+        first_build = service.catalog._manifest.read()["build"]
+
+        _write_csv(seo_folder / "water_infrastructure_keywords.csv", WATER_ROWS + [
+            {"keyword": "borehole loans", "volume": "90", "difficulty": "20", "intent": ""},
+        ])
+        assert service.catalog.refresh()
+        assert service.catalog._manifest.read()["build"] != first_build
+        assert service.search(query="borehole")[0]["category"] == "water"
+        assert service.keywords == _parsed(service)
+
+    def test_new_csv_is_recompiled(self, seo_folder, catalog_dir):
+        KeywordService(seo_folder, catalog_dir).table
+        _write_csv(seo_folder / "mining_project_keywords.csv", [
+            {"keyword": "mining project finance", "volume": "700", "difficulty": "60", "intent": ""},
+        ])
+        service = KeywordService(seo_folder, catalog_dir)
+        assert service.get_categories() == {"solar": 2, "water": 2, "mining": 1}
+
+    def test_missing_folder_leaves_no_catalog(self, tmp_path, catalog_dir):
+        service = KeywordService(tmp_path / "missing", catalog_dir)
+        assert service.keywords == []
+        assert service.search(query="solar") == []
+        assert not catalog_dir.exists()
+
+    def test_enrichment_persists(self, seo_folder, catalog_dir):
+        service = KeywordService(seo_folder, catalog_dir)
+        service.table
+        service.catalog.record_enrichment("Solar IPP South Africa", {"search_intent": "transactional"})
+
+        kw = service.search(query="solar ipp")[0]
+        assert kw["enriched"] is True
+        assert kw["intent"] == "transactional"
+
+        reopened = KeywordService(seo_folder, catalog_dir)
+        assert reopened.search(intent="transactional")[0]["keyword"] == "solar IPP south africa"
+        assert reopened.get_stats()["enriched_count"] == 1
+        assert reopened.catalog.enrichment("solar ipp south africa")["result"] == {"search_intent": "transactional"}
+
+    async def test_enrich_keyword_records_result(self, seo_folder, catalog_dir):
+        class FakeRouter:
+            async def route(self, **kwargs):
+                return {"content": '```json\n{"keyword": "x", "search_intent": "commercial"}\n```'}
+
+        service = KeywordService(seo_folder, catalog_dir)
+        service.router = FakeRouter()
+        result = await service.enrich_keyword("Solar desalination")
+
+        assert result["search_intent"] == "commercial"
+        assert service.catalog.enrichment("solar desalination")["result"] == result
+        assert service.search(query="desalination")[0]["enriched"] is True
+
+
+def test_table_save_load_round_trip(tmp_path):
+    records = [
+        {"keyword": "Énergie solaire", "category": "solar", "source_file": "a.csv",
+         "volume": 10, "difficulty": 20, "intent": None, "enriched": False},
+        {"keyword": "grid loans", "category": "general", "source_file": "b.csv",
+         "volume": 300, "difficulty": 50, "intent": "commercial", "enriched": False},
+    ]
+    table = KeywordTable.from_records(records)
+    meta = table.save(tmp_path)
+    loaded = KeywordTable.load(tmp_path, meta)
+
+    assert loaded.records(range(len(loaded))) == records
+    assert loaded.rows_for("ÉNERGIE SOLAIRE") == [0]
+    assert list(loaded.select(query="solai")) == [0]
+    assert list(loaded.select(sort_by="volume")) == [1, 0]
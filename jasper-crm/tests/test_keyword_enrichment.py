@@ -0,0 +1,131 @@
+"""
+JASPER CRM - Keyword Enrichment Tests
+
+Tests for batched, concurrent keyword enrichment stored in the keyword catalog.
+"""
+
+import re
+import json
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.keyword_service import KeywordService
+
+LISTED_RE = re.compile(r"^\d+\. (.+)$", re.MULTILINE)
+
+
+class FakeRouter:
+    """Answers batch prompts with one object per listed keyword."""
+
+    def __init__(self, delay=0.01, drop=()):
+        self.delay = delay
+        self.drop = set(drop)
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def route(self, **kwargs):
+        self.calls.append(kwargs)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        keywords = LISTED_RE.findall(kwargs["prompt"])
+        items = [
+            {"keyword": keyword, "search_intent": "commercial", "estimated_difficulty": len(keyword)}
+            for keyword in keywords if keyword not in self.drop
+        ]
+        return {"content": "```json\n" + json.dumps(items) + "\n```"}
+
+
+@pytest.fixture
+def service(tmp_path):
+    seo = tmp_path / "seo"
+    seo.mkdir()
+    rows = "\n".join(f"solar keyword {i},{i * 10},40," for i in range(60))
+    (seo / "solar_project_keywords.csv").write_text("keyword,volume,difficulty,intent\n" + rows + "\n")
+    service = KeywordService(seo, tmp_path / "catalog")
+    service.router = FakeRouter()
+    return service
+
+
+class TestKeywordEnrichment:
+    """Tests for KeywordService.enrich_batch"""
+
+    async def test_batches_and_concurrency(self, service):
+        keywords = [f"solar keyword {i}" for i in range(60)]
+        results = await service.enrich_batch(keywords, limit=None, batch_size=10, concurrency=3)
+
+        assert [r["keyword"] for r in results] == keywords
+        assert len(service.router.calls) == 6
+        assert service.router.max_in_flight == 3
+        assert service.get_stats()["enriched_count"] == 60
+
+    async def test_fresh_results_are_skipped(self, service):
+        keywords = [f"solar keyword {i}" for i in range(5)]
+        await service.enrich_batch(keywords)
+        service.router.calls.clear()
+
+        results = await service.enrich_batch(keywords + ["Solar Keyword 7"])
+        assert len(service.router.calls) == 1
+        assert LISTED_RE.findall(service.router.calls[0]["prompt"]) == ["Solar Keyword 7"]
+        assert results[0]["search_intent"] == "commercial"
+
+        # Single-keyword enrichment reads the same store
+        assert await service.enrich_keyword("solar keyword 3") == results[3]
+        assert len(service.router.calls) == 1
+
+    async def test_stale_and_forced_results_are_redone(self, service):
+        await service.enrich_batch(["solar keyword 1", "solar keyword 2"])
+        old = (datetime.now(timezone.utc) - timedelta(days=200)).isoformat()
+        with service.catalog._enrichment.edit() as data:
+            data["solar keyword 1"]["enriched_at"] = old
+        service.router.calls.clear()
+
+        await service.enrich_batch(["solar keyword 1", "solar keyword 2"])
+        assert LISTED_RE.findall(service.router.calls[0]["prompt"]) == ["solar keyword 1"]
+        assert service.catalog.enrichment("solar keyword 1")["enriched_at"] != old
+
+        await service.enrich_batch(["solar keyword 1", "solar keyword 2"], force=True)
+        assert LISTED_RE.findall(service.router.calls[-1]["prompt"]) == ["solar keyword 1", "solar keyword 2"]
+
+    async def test_missing_keywords_fall_back_and_retry(self, service):
+        service.router.drop = {"solar keyword 2"}
+        results = await service.enrich_batch(["solar keyword 1", "solar keyword 2"])
+
+        assert results[1]["notes"] == "Could not analyze"
+        assert service.catalog.enrichment("solar keyword 2") is None
+
+        service.router.drop = set()
+        service.router.calls.clear()
+        await service.enrich_batch(["solar keyword 1", "solar keyword 2"])
+        assert LISTED_RE.findall(service.router.calls[0]["prompt"]) == ["solar keyword 2"]
+
+    async def test_failed_call_does_not_stop_other_batches(self, service):
+        router = service.router
+        original = router.route
+
+        async def flaky(**kwargs):
+            if "solar keyword 0\n" in kwargs["prompt"]:
+                raise RuntimeError("upstream timeout")
+            return await original(**kwargs)
+
+        router.route = flaky
+        results = await service.enrich_batch(
+            [f"solar keyword {i}" for i in range(20)], limit=None, batch_size=10,
+        )
+        assert [r.get("notes") for r in results[:10]] == ["Could not analyze"] * 10
+        assert all(r["search_intent"] == "commercial" for r in results[10:])
+
+    async def test_enrich_category(self, service):
+        summary = await service.enrich_category("solar")
+        assert summary == {"category": "solar", "keywords": 60, "skipped_fresh": 0, "enriched": 60}
+        assert len(service.router.calls) == 3
+
+        summary = await service.enrich_category("solar")
+        assert summary["skipped_fresh"] == 60
+        assert len(service.router.calls) == 3
@@ -0,0 +1,103 @@
+"""
+JASPER CRM - Keyword Matcher Tests
+
+Tests for the compiled multi-keyword matcher and batch relevance scoring.
+"""
+
+import re
+import random
+
+import pytest
+
+from services.keyword_matcher import KeywordMatcher
+from services.news_monitor import NewsMonitorService, NEWS_SOURCES, HIGH_VALUE_KEYWORDS
+
+
+def _occurrences(keywords, text):
+    """Reference: every start position of every keyword, by brute force."""
+    text = text.lower()
+    found = {}
+    for kw in {k.lower() for k in keywords}:
+        positions = [m.start() for m in re.finditer(f"(?={re.escape(kw)})", text)]
+        if positions:
+            found[kw] = positions
+    return found
+
+
+def _legacy_relevance(title, summary, source_keywords):
+    """The per-keyword substring scoring that match_keywords replaced."""
+    text = f"{title} {summary}".lower()
+    score, matched = 0.0, []
+    for kw in HIGH_VALUE_KEYWORDS:
+        if kw.lower() in text:
+            score += 10
+            matched.append(kw)
+    for kw in source_keywords:
+        if kw.lower() in text:
+            score += 5
+            matched.append(kw)
+    if sum(1 for dfi in ["ifc", "afdb", "idc", "dbsa", "world bank"] if dfi in text) > 1:
+        score += 15
+    if re.search(r'\$?\d+\s*(million|billion|m|bn)', text, re.I):
+        score += 20
+    return min(score, 100.0), matched
+
+
+class TestKeywordMatcher:
+    """Tests for KeywordMatcher"""
+
+    def test_overlapping_keywords(self):
+        matcher = KeywordMatcher(["fund", "fund launch", "launches", "world bank", "bank", "ban"])
+        assert matcher.find("World Bank fund launches") == {
+            "world bank": [0], "bank": [6], "ban": [6], "fund": [11], "fund launch": [11], "launches": [16],
+        }
+
+    def test_matches_brute_force(self):
+        keywords = sorted({kw.lower() for kw in HIGH_VALUE_KEYWORDS}
+                          | {kw.lower() for config in NEWS_SOURCES.values() for kw in config["keywords"]})
+        vocabulary = keywords + ["shipping", "refund", "the", "afr", "south", "bank", "ipps", "-"]
+        matcher = KeywordMatcher(keywords)
+        rng = random.Random(7)
+        for _ in range(300):
+            text = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(0, 12)))
+            text = text.replace(" ", rng.choice([" ", "", "  "]), rng.randint(0, 3))
+            assert matcher.find(text) == _occurrences(keywords, text), text
+
+    def test_find_batch(self):
+        matcher = KeywordMatcher(["solar", "ar"])
+        texts = ["Solar", "", "polar\x00solar", "none"]
+        assert matcher.find_batch(texts) == [
+            {"solar": [0], "ar": [3]}, {}, {"ar": [3, 9], "solar": [6]}, {},
+        ]
+        assert KeywordMatcher([]).find_batch(["anything"]) == [{}]
+
+
+class TestRelevanceScoring:
+    """Tests for NewsMonitorService.match_keywords"""
+
+    @pytest.fixture
+    def monitor(self, tmp_path):
+        return NewsMonitorService(state_dir=tmp_path)
+
+    @pytest.mark.parametrize("title,summary", [
+        ("IFC announces $100 million infrastructure financing", "World Bank and AfDB co-fund South Africa solar"),
+        ("Eskom REIPPP bid window opens", "IPP shipping renewable energy tariff deadline"),
+        ("Weather today", "Sunny"),
+        ("Fund launches for agri-processing", "DBSA and IDC open application window, R2bn budget"),
+    ])
+    def test_same_scores_as_substring_loop(self, monitor, title, summary):
+        for config in NEWS_SOURCES.values():
+            assert monitor._calculate_relevance(title, summary, config["keywords"]) == \
+                _legacy_relevance(title, summary, config["keywords"])
+
+    def test_batch_positions(self, monitor):
+        results = monitor.match_keywords(["Solar loan approved", "nothing here"], ["solar"])
+        assert results[0]["keywords"] == ["loan", "solar", "solar"]
+        assert results[0]["score"] == 25
+        assert results[0]["positions"] == {"solar": [0], "loan": [6]}
+        assert results[1] == {"score": 0.0, "keywords": [], "positions": {}}
+
+    def test_new_source_keywords_extend_matcher(self, monitor):
+        result = monitor.match_keywords(["Hydrogen valley project"], ["hydrogen"])[0]
+        assert result["keywords"] == ["hydrogen"]
+        assert "hydrogen" in monitor._matcher
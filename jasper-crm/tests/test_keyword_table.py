@@ -0,0 +1,119 @@
+"""
+JASPER CRM - Keyword Table Tests
+
+Tests for the columnar keyword table behind KeywordService.search.
+"""
+
+import random
+
+import pytest
+
+from services.keyword_table import KeywordTable
+
+WORDS = ["dfi", "funding", "solar", "project", "finance", "idc", "agri", "loan",
+         "water", "mining", "grant", "south africa", "ppp", "model", "Équity"]
+CATEGORIES = ["dfi_funding", "solar", "water", "mining", "general"]
+INTENTS = ["informational", "commercial", "transactional", None]
+
+
+def _records(n, seed=3):
+    rng = random.Random(seed)
+    return [
+        {
+            "keyword": " ".join(rng.sample(WORDS, rng.randint(1, 4))),
+            "category": rng.choice(CATEGORIES),
+            "source_file": f"{rng.choice(CATEGORIES)}.csv",
+            "volume": rng.choice([0, 10, 100, 500, 2000]),
+            "difficulty": rng.randint(1, 100),
+            "intent": rng.choice(INTENTS),
+            "enriched": False,
+        }
+        for i in range(n)
+    ]
+
+
+def _reference(records, query=None, category=None, intent=None, min_volume=None, max_difficulty=None):
+    """The list-filter search KeywordService used before the table."""
+    results = list(records)
+    if query:
+        results = [kw for kw in results if query.lower() in kw["keyword"].lower()]
+    if category:
+        results = [kw for kw in results if kw["category"] == category]
+    if intent:
+        results = [kw for kw in results if kw.get("intent") == intent]
+    if min_volume:
+        results = [kw for kw in results if kw.get("volume", 0) >= min_volume]
+    if max_difficulty:
+        results = [kw for kw in results if kw.get("difficulty", 100) <= max_difficulty]
+    return results
+
+
+@pytest.fixture(scope="module")
+def records():
+    return _records(5000)
+
+
+@pytest.fixture(scope="module")
+def table(records):
+    return KeywordTable.from_records(records)
+
+
+class TestKeywordTable:
+    """Tests for KeywordTable.select"""
+
+    @pytest.mark.parametrize("filters", [
+        {},
+        {"query": "solar"},
+        {"query": "SOLAR Project"},
+        {"query": "ar"},
+        {"query": "é"},
+        {"query": "r pro"},
+        {"query": "nothing like this"},
+        {"category": "water"},
+        {"category": "unknown"},
+        {"intent": "commercial"},
+        {"min_volume": 500},
+        {"max_difficulty": 30},
+        {"min_volume": 0, "max_difficulty": 0},
+        {"query": "fin", "category": "solar", "intent": "transactional", "min_volume": 100, "max_difficulty": 60},
+    ])
+    def test_matches_list_filters(self, table, records, filters):
+        rows = table.select(**filters)
+        assert table.records(rows) == _reference(records, **filters)
+
+    def test_limit(self, table, records):
+        rows = table.select(query="dfi", limit=7)
+        assert table.records(rows) == _reference(records, query="dfi")[:7]
+
+    def test_sort_by_volume(self, table, records):
+        expected = sorted(_reference(records, category="solar"), key=lambda kw: -kw["volume"])
+        assert table.records(table.select(category="solar", sort_by="volume")) == expected
+
+    def test_sort_by_difficulty(self, table, records):
+        expected = sorted(_reference(records, query="loan"), key=lambda kw: kw["difficulty"])
+        assert table.records(table.select(query="loan", sort_by="difficulty", limit=20)) == expected[:20]
+
+    def test_unknown_sort_key(self, table):
+        with pytest.raises(ValueError):
+            table.select(sort_by="keyword")
+
+    def test_record_round_trip(self, table, records):
+        assert table.record(0) == records[0]
+        assert table.record(len(records) - 1) == records[-1]
+
+    def test_category_counts(self, table, records):
+        counts = table.category_counts()
+        for category in CATEGORIES:
+            assert counts[category] == sum(1 for r in records if r["category"] == category)
+
+    def test_empty_table(self):
+        table = KeywordTable.from_records([])
+        assert table.records(table.select(query="solar")) == []
+        assert table.records(table.select(query="so")) == []
+        assert table.category_counts() == {}
+
+    def test_large_table(self):
+        records = _records(100_000, seed=11)
+        table = KeywordTable.from_records(records)
+        filters = {"query": "idc", "category": "dfi_funding", "min_volume": 100}
+        assert table.records(table.select(**filters, limit=50)) == _reference(records, **filters)[:50]
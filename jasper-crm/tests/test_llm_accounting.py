@@ -0,0 +1,276 @@
+"""
+JASPER CRM - LLM Accounting Tests
+
+Tests for token/cost recording, per-feature daily budgets and the
+APIMonitor usage log.
+"""
+
+import csv
+import json
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def accounting(tmp_path):
+    from services.llm_accounting import LLMAccounting
+
+    return LLMAccounting(usage_dir=tmp_path, budgets={"research": 0.01})
+
+
+class TestLLMAccounting:
+    """Tests for the unified accounting layer."""
+
+    def test_records_append_to_daily_log(self, accounting, tmp_path):
+        """Test that each call becomes one tagged row in the day's CSV."""
+        from services.llm_accounting import accounting_scope
+
+        with accounting_scope(feature="lead_scoring", lead_id="L1"):
+            accounting.record("deepseek/deepseek-chat", {"prompt_tokens": 1000, "completion_tokens": 500}, 0.25)
+        accounting.record("deepseek/deepseek-chat", {"prompt_tokens": 10, "completion_tokens": 5}, feature="chat")
+
+        [log] = list(tmp_path.glob("usage-*.csv"))
+        with open(log, newline="") as f:
+            rows = list(csv.DictReader(f))
+
+        assert [r["feature"] for r in rows] == ["lead_scoring", "chat"]
+        assert rows[0]["lead_id"] == "L1"
+        assert rows[0]["latency_ms"] == "250.0"
+        assert float(rows[0]["cost_usd"]) == pytest.approx((1000 * 0.28 + 500 * 0.42) / 1_000_000)
+
+    def test_totals_survive_restart(self, accounting, tmp_path):
+        """Test that today's spend is rebuilt from the log by a new instance."""
+        from services.llm_accounting import LLMAccounting
+
+        accounting.record("deepseek-chat", {"prompt_tokens": 1000, "completion_tokens": 1000}, feature="chat")
+
+        summary = LLMAccounting(usage_dir=tmp_path).get_daily_summary()
+
+        assert summary["features"]["chat"]["calls"] == 1
+        assert summary["features"]["chat"]["tokens"] == 2000
+
+    def test_over_budget_downgrades_then_throttles(self, accounting):
+        """Test that R1 drops to V3 over budget and all calls stop past the hard limit."""
+        assert accounting.check_budget("research", "deepseek/deepseek-r1").action == "allow"
+
+        # $0.011 of a $0.01 budget: soft limit
+        accounting.record("deepseek/deepseek-r1", {"completion_tokens": 5000}, feature="research")
+        decision = accounting.check_budget("research", "deepseek/deepseek-r1")
+        assert decision.action == "downgrade"
+        assert decision.model == "deepseek/deepseek-chat"
+        assert accounting.check_budget("research", "deepseek/deepseek-chat").allowed
+
+        # Past 1.25x the budget: hard limit
+        accounting.record("deepseek/deepseek-r1", {"completion_tokens": 5000}, feature="research")
+        assert not accounting.check_budget("research", "deepseek/deepseek-chat").allowed
+        assert accounting.check_budget("other", "deepseek/deepseek-r1").action == "allow"
+
+    async def test_ai_router_respects_budget(self, accounting, monkeypatch):
+        """Test that AIRouter refuses calls once the feature is throttled."""
+        import sys
+        from services.ai_router import AIRouter, AITask
+
+        monkeypatch.setattr(sys.modules["services.ai_router"], "llm_accounting", accounting)
+        accounting.record("deepseek/deepseek-r1", {"completion_tokens": 50000}, feature="research")
+
+        router = AIRouter()
+        router.api_key = "test-key"
+        result = await router.route(AITask.RESEARCH, "Find DFIs for solar in Kenya")
+
+        assert result["content"] is None
+        assert result["throttled"] is True
+        assert "research" in result["error"]
+
+    def test_budget_is_shared_across_workers(self, accounting, tmp_path):
+        """Test that spend recorded by another process counts against the budget."""
+        from services.llm_accounting import LLMAccounting
+
+        other_worker = LLMAccounting(usage_dir=tmp_path, budgets={"research": 0.01})
+        assert accounting.check_budget("research", "deepseek/deepseek-chat").action == "allow"
+
+        other_worker.record("deepseek/deepseek-r1", {"completion_tokens": 50000}, feature="research")
+
+        assert not accounting.check_budget("research", "deepseek/deepseek-chat").allowed
+        assert accounting.get_daily_summary()["features"]["research"]["calls"] == 1
+
+    async def test_failed_calls_are_recorded(self, accounting, monkeypatch):
+        """Test that error responses and exceptions are logged as failed calls."""
+        import sys
+        from services.llm_accounting import post_chat_completion
+
+        monkeypatch.setattr(sys.modules["services.llm_accounting"], "llm_accounting", accounting)
+
+        class Response:
+            def __init__(self, status_code):
+                self.status_code = status_code
+
+            def json(self):
+                return {"usage": {"prompt_tokens": 100, "completion_tokens": 20}}
+
+        class Client:
+            def __init__(self, *outcomes):
+                self.outcomes = list(outcomes)
+
+            async def post(self, url, **kwargs):
+                outcome = self.outcomes.pop(0)
+                if isinstance(outcome, Exception):
+                    raise outcome
+                return Response(outcome)
+
+        client = Client(200, 500, TimeoutError("read timeout"))
+        body = {"model": "deepseek/deepseek-chat"}
+        await post_chat_completion(client, "/chat/completions", "comms_reply", json=body)
+        await post_chat_completion(client, "/chat/completions", "comms_reply", json=body)
+        with pytest.raises(TimeoutError):
+            await post_chat_completion(client, "/chat/completions", "comms_reply", json=body)
+
+        [log] = list(accounting.usage_dir.glob("usage-*.csv"))
+        with open(log, newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert [r["success"] for r in rows] == ["True", "False", "False"]
+        assert [r["prompt_tokens"] for r in rows] == ["100", "0", "0"]
+        assert {r["feature"] for r in rows} == {"comms_reply"}
+
+    async def test_wrappers_enforce_budget(self, accounting, monkeypatch):
+        """Test that wrapped calls are downgraded over budget and refused past the hard limit."""
+        import sys
+        from services.llm_accounting import BudgetExceeded, post_chat_completion, generate_gemini_content
+
+        monkeypatch.setattr(sys.modules["services.llm_accounting"], "llm_accounting", accounting)
+        sent = []
+
+        class Response:
+            status_code = 200
+            usage_metadata = None
+
+            def json(self):
+                return {"usage": {"prompt_tokens": 10, "completion_tokens": 10}}
+
+        class Client:
+            async def post(self, url, **kwargs):
+                sent.append(kwargs["json"]["model"])
+                return Response()
+
+        class Models:
+            def generate_content(self, **kwargs):
+                sent.append(kwargs["model"])
+                return Response()
+
+        class GeminiClient:
+            models = Models()
+
+        accounting.record("deepseek/deepseek-r1", {"completion_tokens": 5000}, feature="research")
+        await post_chat_completion(Client(), "/chat/completions", "research", json={"model": "deepseek/deepseek-r1"})
+        assert sent == ["deepseek/deepseek-chat"]
+
+        accounting.record("deepseek/deepseek-r1", {"completion_tokens": 5000}, feature="research")
+        with pytest.raises(BudgetExceeded):
+            await post_chat_completion(Client(), "/chat/completions", "research", json={"model": "deepseek/deepseek-r1"})
+        with pytest.raises(BudgetExceeded):
+            generate_gemini_content(GeminiClient(), "research", model="gemini-2.0-flash", contents="hi")
+        assert sent == ["deepseek/deepseek-chat"]
+
+
+def _call_record(timestamp, tokens=100, cost=0.001):
+    return {
+        "timestamp": timestamp,
+        "model": "deepseek-chat",
+        "tokens": {"input": tokens, "output": 0, "cached": 0, "total": tokens},
+        "cost": {"input": cost, "output": 0, "total": cost},
+    }
+
+
+class TestUsageLog:
+    """Tests for APIMonitor's append-only usage log."""
+
+    def test_today_totals_are_incremental(self, tmp_path):
+        """Test that totals only read lines appended since the last read."""
+        from datetime import datetime
+        from services.api_monitor import UsageLog
+
+        log = UsageLog(tmp_path)
+        now = datetime.utcnow().isoformat()
+        log.append(_call_record(now))
+        assert log.day_totals() == {"calls": 1, "tokens": 100, "cost": 0.001}
+
+        offset = log._offset
+        log.append(_call_record(now, tokens=50))
+        totals = log.day_totals()
+
+        assert totals["calls"] == 2
+        assert totals["tokens"] == 150
+        assert log._offset > offset
+        # A half-written line is left for the next read
+        with open(log.segment_path(now[:10]), "ab") as f:
+            f.write(b'{"timestamp":')
+        assert log.day_totals()["calls"] == 2
+
+    def test_concurrent_appends_lose_nothing(self, tmp_path):
+        """Test that concurrent writers each land exactly one intact line."""
+        from datetime import datetime
+        from services.api_monitor import UsageLog
+
+        log = UsageLog(tmp_path)
+        now = datetime.utcnow().isoformat()
+        threads = [
+            threading.Thread(target=lambda: [log.append(_call_record(now)) for _ in range(50)])
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(log.read_day(now[:10])) == 400
+        assert log.day_totals()["calls"] == 400
+
+    def test_closed_day_gets_totals_file(self, tmp_path):
+        """Test that past days are summarized once and then read from their totals file."""
+        from services.api_monitor import UsageLog
+
+        log = UsageLog(tmp_path)
+        log.append(_call_record("2026-01-05T10:00:00"))
+        log.append(_call_record("2026-01-05T11:00:00"))
+
+        assert log.day_totals("2026-01-05")["calls"] == 2
+        assert json.loads(log.totals_path("2026-01-05").read_text())["calls"] == 2
+
+    def test_migrates_legacy_json_log(self, tmp_path):
+        """Test that the old single-file log is split into segments."""
+        from services.api_monitor import UsageLog
+
+        legacy = tmp_path / "api_usage_log.json"
+        legacy.write_text(json.dumps({
+            "calls": [_call_record("2026-01-05T10:00:00"), _call_record("2026-01-06T10:00:00")],
+            "daily_totals": {},
+        }))
+        log = UsageLog(tmp_path / "segments")
+        log.migrate_legacy(legacy)
+
+        assert not legacy.exists()
+        assert len(log.read_day("2026-01-05")) == 1
+        assert len(log.read_day("2026-01-06")) == 1
+
+    def test_concurrent_workers_migrate_once(self, tmp_path):
+        """Test that workers starting together migrate the legacy log exactly once."""
+        from services.api_monitor import UsageLog
+
+        legacy = tmp_path / "api_usage_log.json"
+        legacy.write_text(json.dumps({"calls": [_call_record("2026-01-05T10:00:00")] * 50}))
+        errors = []
+
+        def start_worker():
+            try:
+                UsageLog(tmp_path / "segments").migrate_legacy(legacy)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=start_worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        assert len(UsageLog(tmp_path / "segments").read_day("2026-01-05")) == 50
@@ -0,0 +1,106 @@
+"""
+JASPER CRM - Metrics Tests
+
+Tests for the Prometheus metrics collector.
+"""
+
+import random
+
+import pytest
+
+
+class TestMetricsCollector:
+    """Tests for MetricsCollector."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test fixed-bucket histogram export."""
+        from services.metrics_service import MetricsCollector
+
+        collector = MetricsCollector(multiproc_dir="")
+        for value in (0.003, 0.2, 0.2, 7, 50):
+            collector.observe_histogram("jasper_test_seconds", value, {"path": "/x"})
+
+        text = collector.get_metrics_text()
+
+        assert 'jasper_test_seconds_bucket{path="/x",le="0.005"} 1' in text
+        assert 'jasper_test_seconds_bucket{path="/x",le="0.25"} 3' in text
+        assert 'jasper_test_seconds_bucket{path="/x",le="10"} 4' in text
+        assert 'jasper_test_seconds_bucket{path="/x",le="+Inf"} 5' in text
+        assert 'jasper_test_seconds_count{path="/x"} 5' in text
+
+    def test_label_order_resolves_to_one_series(self):
+        """Test that the same labels in a different order share a child."""
+        from services.metrics_service import MetricsCollector
+
+        collector = MetricsCollector(multiproc_dir="")
+        collector.inc_counter("jasper_test_total", labels={"a": "1", "b": "2"})
+        collector.inc_counter("jasper_test_total", labels={"b": "2", "a": "1"})
+        collector.counter("jasper_test_total").labels(a="1", b="2").inc()
+
+        assert 'jasper_test_total{a="1",b="2"} 3.0' in collector.get_metrics_text()
+
+    def test_streaming_quantiles(self):
+        """Test that sketch quantiles stay within the relative accuracy."""
+        from services.metrics_service import QuantileSketch
+
+        rng = random.Random(7)
+        values = sorted(rng.lognormvariate(-2, 1) for _ in range(20000))
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+
+    def test_multiprocess_scrape_merges_workers(self, tmp_path):
+        """Test that a scrape sums counters and histograms across worker snapshots."""
+        import json
+        from services.metrics_service import MetricsCollector
+
+        other_worker = MetricsCollector(multiproc_dir="")
+        other_worker.inc_counter("jasper_test_total", 2)
+        other_worker.observe_histogram("jasper_test_seconds", 0.1)
+        other_worker.set_gauge("jasper_test_depth", 4)
+        (tmp_path / "metrics-99999.json").write_text(json.dumps(other_worker.snapshot()))
+
+        this_worker = MetricsCollector(multiproc_dir=str(tmp_path))
+        this_worker.inc_counter("jasper_test_total", 1)
+        this_worker.observe_histogram("jasper_test_seconds", 3)
+        this_worker.set_gauge("jasper_test_depth", 1)
+        text = this_worker.get_metrics_text()
+
+        assert "jasper_test_total 3.0" in text
+        assert 'jasper_test_seconds_bucket{le="0.1"} 1' in text
+        assert 'jasper_test_seconds_bucket{le="+Inf"} 2' in text
+        assert "jasper_test_depth 4" in text
+
+    def test_dead_worker_snapshots_are_dropped(self, tmp_path):
+        """Test that snapshots of exited or silent workers are deleted, not merged."""
+        import json
+        import subprocess
+        import sys
+        import time
+        from services.metrics_service import MetricsCollector
+
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        old_worker = MetricsCollector(multiproc_dir="")
+        old_worker.inc_counter("jasper_test_total", 5)
+        old_worker.set_gauge("jasper_test_depth", 9)
+        exited = {**old_worker.snapshot(), "pid": dead.pid}
+        silent = {**old_worker.snapshot(), "written_at": time.time() - 3600}
+        (tmp_path / f"metrics-{dead.pid}.json").write_text(json.dumps(exited))
+        (tmp_path / "metrics-1.json").write_text(json.dumps(silent))
+
+        this_worker = MetricsCollector(multiproc_dir=str(tmp_path))
+        assert [p.name for p in tmp_path.glob("metrics-*.json")] == []
+
+        (tmp_path / f"metrics-{dead.pid}.json").write_text(json.dumps(exited))
+        this_worker.inc_counter("jasper_test_total", 1)
+        this_worker.set_gauge("jasper_test_depth", 1)
+        text = this_worker.get_metrics_text()
+
+        assert "jasper_test_total 1.0" in text
+        assert "jasper_test_depth 1" in text
+        assert not (tmp_path / f"metrics-{dead.pid}.json").exists()
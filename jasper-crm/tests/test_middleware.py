@@ -0,0 +1,72 @@
+"""
+JASPER CRM - Middleware Tests
+
+Tests for RequestContextMiddleware.
+"""
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+
+@pytest.fixture
+def app():
+    from middleware.logging_middleware import RequestContextMiddleware
+    from services.logging_service import get_correlation_id
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"item_id": item_id, "correlation_id": get_correlation_id()}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk-{i}\n"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(RequestContextMiddleware, slow_threshold_ms=2000)
+    return app
+
+
+async def _get(app, path, **kwargs):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(path, **kwargs)
+
+
+class TestRequestContextMiddleware:
+    """Tests for the pure-ASGI request middleware."""
+
+    async def test_correlation_id_round_trip(self, app):
+        """Test that an incoming correlation ID reaches handlers and the response."""
+        response = await _get(app, "/items/42", headers={"X-Correlation-ID": "abc-123"})
+
+        assert response.headers["x-correlation-id"] == "abc-123"
+        assert response.json()["correlation_id"] == "abc-123"
+        assert response.headers["x-response-time"].endswith("ms")
+
+    async def test_generates_correlation_id(self, app):
+        """Test that a correlation ID is generated when none is sent."""
+        response = await _get(app, "/items/1")
+
+        assert len(response.headers["x-correlation-id"]) == 36
+
+    async def test_streaming_response_passes_through(self, app):
+        """Test that streamed bodies arrive intact with headers stamped."""
+        response = await _get(app, "/stream")
+
+        assert response.text == "chunk-0\nchunk-1\nchunk-2\n"
+        assert "x-correlation-id" in response.headers
+
+    async def test_records_metrics_by_route_template(self, app):
+        """Test that request metrics use the route template, not the raw path."""
+        from services.metrics_service import metrics_service
+
+        await _get(app, "/items/abc-def")
+
+        text = metrics_service.get_metrics()
+        assert 'jasper_http_requests_total{method="GET",path="/items/{item_id}",status="200"}' in text
@@ -0,0 +1,150 @@
+"""
+JASPER CRM - Near-Duplicate Detection Tests
+
+Tests for MinHash/LSH near-duplicate detection and the news monitor's
+one-generation-per-story clustering.
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from services.near_duplicates import NearDuplicateIndex, cluster, decode, encode, signature, similarity
+from services.news_monitor import NewsMonitorService, NewsItem, NewsCategory
+
+IFC_SOLAR = (
+    "IFC announces $100 million solar financing for South Africa",
+    "The International Finance Corporation today committed funding to a 200MW solar plant in the Northern Cape.",
+)
+IFC_SOLAR_SYNDICATED = (
+    "IFC Announces US$100m Solar Financing in South Africa",
+    "<p>The International Finance Corporation has committed funding to a 200 MW solar plant in Northern Cape.</p>",
+)
+AFDB_WATER = (
+    "AfDB approves water infrastructure loan for Kenya",
+    "The African Development Bank board approved a loan for rural water supply schemes in Kenya.",
+)
+
+
+def _item(item_id, text, relevance=80.0):
+    title, summary = text
+    return NewsItem(
+        id=item_id, title=title, summary=summary, link=f"https://example.org/{item_id}",
+        source="Test Feed", category=NewsCategory.DFI_ANNOUNCEMENT,
+        published_at=datetime.now(), relevance_score=relevance,
+    )
+
+
+class TestMinHash:
+    """Tests for signatures and the LSH index"""
+
+    def test_similarity(self):
+        original = signature("\n".join(IFC_SOLAR))
+        assert similarity(original, signature("\n".join(IFC_SOLAR_SYNDICATED))) > 0.5
+        assert similarity(original, signature("\n".join(AFDB_WATER))) < 0.2
+        assert signature("  <br> -- ") is None
+
+    def test_round_trip(self):
+        sig = signature("\n".join(IFC_SOLAR))
+        assert (decode(encode(sig)) == sig).all()
+        assert decode(encode(sig[:64])) is None
+
+    def test_index_query_and_remove(self):
+        index = NearDuplicateIndex()
+        index.add("ifc", signature("\n".join(IFC_SOLAR)))
+        index.add("afdb", signature("\n".join(AFDB_WATER)))
+
+        matches = index.query(signature("\n".join(IFC_SOLAR_SYNDICATED)))
+        assert [key for key, _ in matches] == ["ifc"]
+
+        index.remove("ifc")
+        assert index.query(signature("\n".join(IFC_SOLAR_SYNDICATED))) == []
+        assert len(index) == 1
+
+    def test_cluster_keeps_order(self):
+        entries = [
+            ("a", signature("\n".join(AFDB_WATER))),
+            ("b", signature("\n".join(IFC_SOLAR_SYNDICATED))),
+            ("c", None),
+            ("d", signature("\n".join(IFC_SOLAR))),
+        ]
+        assert cluster(entries) == [["a"], ["b", "d"], ["c"]]
+
+
+@pytest.fixture
+def posts_path(tmp_path):
+    path = tmp_path / "blog_posts.json"
+    path.write_text(json.dumps([]))
+    return path
+
+
+@pytest.fixture
+def monitor(tmp_path, posts_path, monkeypatch):
+    monitor = NewsMonitorService(state_dir=tmp_path / "state", posts_path=posts_path)
+    monitor.generated = []
+
+    async def generate(item):
+        monitor.generated.append(item.id)
+        return {"title": item.title, "content": "..."}
+
+    async def publish(content, item):
+        return f"post-{item.id}"
+
+    monkeypatch.setattr(monitor, "generate_content_for_news", generate)
+    monkeypatch.setattr(monitor, "publish_content", publish)
+    return monitor
+
+
+class TestNewsMonitorDuplicates:
+    """Tests for NewsMonitorService story grouping"""
+
+    def test_group_stories(self, monitor):
+        items = [_item("ifc", IFC_SOLAR, 90), _item("afdb", AFDB_WATER, 85), _item("esi", IFC_SOLAR_SYNDICATED, 70)]
+        stories, covered = monitor.group_stories(items)
+
+        assert [[item.id for item in story] for story in stories] == [["ifc", "esi"], ["afdb"]]
+        assert covered == []
+        assert items[2].duplicate_of == "ifc"
+
+    async def test_scan_cycle_generates_once_per_story(self, monitor, monkeypatch):
+        items = [_item("ifc", IFC_SOLAR, 90), _item("esi", IFC_SOLAR_SYNDICATED, 70), _item("afdb", AFDB_WATER, 85)]
+
+        async def scan():
+            return [item for item in items if not monitor.is_processed(item.id)]
+
+        monkeypatch.setattr(monitor, "scan_all_sources", scan)
+        summary = await monitor.run_scan_cycle(max_posts=3)
+
+        assert monitor.generated == ["ifc", "afdb"]
+        assert summary["stories_found"] == 2
+        assert summary["duplicates_skipped"] == 1
+        assert monitor.is_processed("esi")
+        recent = {item["id"]: item for item in monitor.get_recent_items()}
+        assert recent["esi"]["duplicate_of"] == "ifc"
+
+    async def test_processed_story_is_remembered(self, monitor, tmp_path, posts_path):
+        assert await monitor.process_news_item(_item("ifc", IFC_SOLAR))
+
+        reopened = NewsMonitorService(state_dir=tmp_path / "state", posts_path=posts_path)
+        duplicate = reopened.find_duplicate(_item("esi", IFC_SOLAR_SYNDICATED))
+        assert duplicate["kind"] == "news"
+        assert duplicate["id"] == "ifc"
+        assert duplicate["title"] == IFC_SOLAR[0]
+
+    async def test_existing_blog_post_is_not_rewritten(self, monitor, posts_path):
+        item = _item("esi", IFC_SOLAR_SYNDICATED)
+        assert await monitor.process_news_item(item)
+        monitor.generated.clear()
+
+        posts_path.write_text(json.dumps([
+            {"slug": "kenya-water-loan", "title": AFDB_WATER[0], "excerpt": AFDB_WATER[1]},
+        ]))
+        water = _item("afdb", AFDB_WATER)
+        assert not await monitor.process_news_item(water)
+        assert water.duplicate_of == "post:kenya-water-loan"
+        assert monitor.generated == []
+
+        stories, covered = monitor.group_stories([_item("ifc", IFC_SOLAR)])
+        assert stories == []
+        assert covered[0].duplicate_of == "esi"
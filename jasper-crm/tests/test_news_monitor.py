@@ -0,0 +1,179 @@
+"""
+JASPER CRM - News Monitor Tests
+
+Tests for incremental RSS polling (conditional GET, high-water mark,
+adaptive intervals) and the bounded processed-item filter.
+"""
+
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from services.bloom_filter import RollingBloomFilter
+from services.news_monitor import NewsMonitorService, NewsCategory, MIN_POLL_INTERVAL
+
+SOURCE = {
+    "name": "Test Feed",
+    "url": "https://feeds.example.org/rss",
+    "category": NewsCategory.DFI_ANNOUNCEMENT,
+    "keywords": ["infrastructure", "financing"],
+}
+
+
+def _rss(entries):
+    items = "".join(
+        f"<item><title>{title}</title><link>https://example.org/{guid}</link><guid>{guid}</guid>"
+        f"<description>{summary}</description><pubDate>{format_datetime(published)}</pubDate></item>"
+        for guid, title, summary, published in entries
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>{items}</channel></rss>'
+
+
+def _relevant(guid, hours_ago):
+    return (
+        guid,
+        f"IFC announces $100 million infrastructure financing {guid}",
+        "World Bank and AfDB co-fund South Africa solar investment",
+        datetime.utcnow() - timedelta(hours=hours_ago),
+    )
+
+
+class FakeFeed:
+    """Serves an RSS document with ETag support and counts requests."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.version = 1
+        self.requests = []
+
+    def handler(self, request):
+        self.requests.append(request)
+        etag = f'"v{self.version}"'
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304)
+        return httpx.Response(200, text=_rss(self.entries), headers={"ETag": etag})
+
+    def update(self, entries):
+        self.entries = entries
+        self.version += 1
+
+
+@pytest.fixture
+def feed():
+    return FakeFeed([_relevant("a", 30), _relevant("b", 20), ("c", "Weather today", "Sunny", datetime.utcnow())])
+
+
+@pytest.fixture
+def monitor(tmp_path, feed, monkeypatch):
+    monitor = NewsMonitorService(state_dir=tmp_path)
+    monitor.sources = {"test": SOURCE}
+    client = httpx.AsyncClient(transport=httpx.MockTransport(feed.handler))
+    monkeypatch.setattr(monitor, "_http", lambda: client)
+    return monitor
+
+
+class TestNewsMonitorPolling:
+    """Tests for NewsMonitorService.scan_all_sources"""
+
+    async def test_conditional_get(self, monitor, feed):
+        first = await monitor.scan_all_sources(force=True)
+        assert sorted(item.title[-1] for item in first) == ["a", "b"]
+
+        second = await monitor.scan_all_sources(force=True)
+        assert feed.requests[-1].headers["if-none-match"] == '"v1"'
+        assert [item.id for item in second] == [item.id for item in first]
+
+    async def test_only_new_entries_are_scored(self, monitor, feed, monkeypatch):
+        await monitor.scan_all_sources(force=True)
+        scored = []
+        original = monitor._score_entries
+        monkeypatch.setattr(
+            monitor, "_score_entries",
+            lambda entries, *a: scored.extend(entry["title"] for entry in entries) or original(entries, *a),
+        )
+
+        feed.update([_relevant("d", 1)] + feed.entries)
+        items = await monitor.scan_all_sources(force=True)
+        assert scored == [feed.entries[0][1]]
+        assert sorted(item.title[-1] for item in items) == ["a", "b", "d"]
+
+    async def test_sources_not_due_are_served_from_cache(self, monitor, feed):
+        await monitor.scan_all_sources()
+        assert len(feed.requests) == 1
+        items = await monitor.scan_all_sources()
+        assert len(feed.requests) == 1
+        assert len(items) == 2
+
+    async def test_adaptive_interval(self, monitor, feed):
+        feed.update([_relevant(str(i), hours_ago=10 + i * 2) for i in range(6)])
+        await monitor.scan_all_sources(force=True)
+        state = monitor._feeds["test"]
+        assert state["interval"] == pytest.approx(2 * 3600, rel=0.01)
+
+        await monitor.scan_all_sources(force=True)  # 304: back off
+        assert state["interval"] == pytest.approx(3 * 3600, rel=0.01)
+        assert monitor.get_status()["polling"]["test"]["interval_minutes"] == pytest.approx(180, rel=0.01)
+
+        feed.update([_relevant(f"new-{i}", hours_ago=i * 0.01) for i in range(6)])
+        await monitor.scan_all_sources(force=True)
+        assert state["interval"] == MIN_POLL_INTERVAL
+
+    async def test_state_persists(self, monitor, feed, tmp_path, monkeypatch):
+        items = await monitor.scan_all_sources(force=True)
+        monitor._mark_processed(items[0])
+
+        reopened = NewsMonitorService(state_dir=tmp_path)
+        reopened.sources = {"test": SOURCE}
+        monkeypatch.setattr(reopened, "_http", monitor._http)
+        remaining = await reopened.scan_all_sources(force=True)
+
+        assert feed.requests[-1].headers["if-none-match"] == '"v1"'
+        assert [item.id for item in remaining] == [items[1].id]
+        assert reopened.is_processed(items[0].id)
+        assert reopened.get_recent_items()[0]["id"] == items[0].id
+
+    async def test_expired_items_are_dropped(self, monitor, feed):
+        await monitor.scan_all_sources(force=True)
+        state = monitor._feeds["test"]
+        state["items"][0]["published_at"] = (datetime.now() - timedelta(days=8)).isoformat()
+
+        items = await monitor.scan_all_sources(force=True)
+        assert len(items) == 1
+        assert len(state["items"]) == 1
+
+
+class TestRollingBloomFilter:
+    """Tests for RollingBloomFilter"""
+
+    def test_membership_and_rotation(self):
+        bloom = RollingBloomFilter(capacity=100, error_rate=0.01)
+        for i in range(100):
+            assert bloom.add(f"id-{i}")
+        assert not bloom.add("id-5")
+        assert all(f"id-{i}" in bloom for i in range(100))
+
+        for i in range(100, 200):
+            bloom.add(f"id-{i}")
+        assert "id-0" in bloom          # Previous generation still remembered
+        for i in range(200, 300):
+            bloom.add(f"id-{i}")
+        assert sum(f"id-{i}" in bloom for i in range(100)) <= 5  # Oldest forgotten
+        assert 190 <= len(bloom) <= 200  # add() skips ids that collide
+
+    def test_false_positive_rate(self):
+        bloom = RollingBloomFilter(capacity=2000, error_rate=0.01)
+        for i in range(2000):
+            bloom.add(f"seen-{i}")
+        false_positives = sum(f"other-{i}" in bloom for i in range(5000))
+        assert false_positives < 5000 * 0.03
+
+    def test_round_trip(self):
+        bloom = RollingBloomFilter(capacity=50, error_rate=0.01)
+        for i in range(70):
+            bloom.add(str(i))
+        restored = RollingBloomFilter.from_dict(bloom.to_dict(), 50, 0.01)
+        assert all(str(i) in restored for i in range(70))
+        assert len(restored) == len(bloom)
+        assert len(RollingBloomFilter.from_dict(bloom.to_dict(), 60, 0.01)) == 0
@@ -0,0 +1,511 @@
+"""
+JASPER CRM - Orchestrator Tests
+
+Tests for AgenticBrain tool execution.
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+
+def _tool_call(name, **args):
+    return {"function": {"name": name, "arguments": json.dumps(args)}}
+
+
+class TestToolGraph:
+    """Tests for the tool dependency graph."""
+
+    def test_research_runs_before_lead_tools(self):
+        """Test that scoring and embedding wait for research."""
+        from orchestrator.agentic_brain import build_tool_graph
+
+        graph = build_tool_graph([
+            "research_agent_light", "score_lead", "embed_in_aleph", "notify_owner"
+        ])
+
+        assert graph[0] == []
+        assert graph[1] == [0]
+        assert graph[2] == [0]
+        # notify reads the score, so it waits for scoring (and research)
+        assert 1 in graph[3]
+        assert 2 not in graph[3]
+
+    def test_independent_tools_have_no_edges(self):
+        """Test that unrelated tools don't wait on each other."""
+        from orchestrator.agentic_brain import build_tool_graph
+
+        graph = build_tool_graph(["score_lead", "embed_in_aleph", "classify_intent"])
+
+        assert graph == [[], [], []]
+
+
+class TestToolExecution:
+    """Tests for concurrent tool execution."""
+
+    async def test_independent_tools_overlap(self):
+        """Test that independent tools finish in max, not sum, of their times."""
+        from orchestrator.agentic_brain import AgenticBrain
+
+        brain = AgenticBrain()
+
+        async def slow(lead_id):
+            await asyncio.sleep(0.2)
+            return {"ok": True}
+
+        brain._tool_executors = {"score_lead": slow, "embed_in_aleph": slow}
+
+        start = time.perf_counter()
+        results, timeline = await brain._execute_tool_calls([
+            _tool_call("score_lead", lead_id="L1"),
+            _tool_call("embed_in_aleph", lead_id="L1"),
+        ])
+        elapsed = time.perf_counter() - start
+
+        assert [r["success"] for r in results] == [True, True]
+        assert elapsed < 0.35
+        assert len(timeline["tools"]) == 2
+        assert timeline["tool_ms_sum"] > timeline["total_ms"]
+
+    async def test_tool_timeout(self):
+        """Test that a tool exceeding its timeout is reported as failed."""
+        from orchestrator import agentic_brain
+        from orchestrator.agentic_brain import AgenticBrain, ToolSpec
+
+        brain = AgenticBrain()
+
+        async def hang(message):
+            await asyncio.sleep(5)
+
+        brain._tool_executors = {"classify_intent": hang}
+        original = agentic_brain.TOOL_SPECS["classify_intent"]
+        agentic_brain.TOOL_SPECS["classify_intent"] = ToolSpec(timeout=0.05)
+        try:
+            results, _ = await brain._execute_tool_calls([
+                _tool_call("classify_intent", message="hi"),
+            ])
+        finally:
+            agentic_brain.TOOL_SPECS["classify_intent"] = original
+
+        assert results[0]["success"] is False
+        assert "Timed out" in results[0]["error"]
+
+    async def test_score_lead_saves_similar_deals(self):
+        """Test that scoring writes the similar deals it found, not just the score."""
+        from orchestrator.agentic_brain import AgenticBrain
+        from models.lead import Lead, LeadTier, SimilarDeal, Sector, FundingStage
+
+        lead = Lead(
+            name="Thandi", email="thandi@example.org", company="Karoo Solar",
+            sector=Sector.RENEWABLE_ENERGY, funding_stage=FundingStage.SEED,
+        )
+        updates = []
+
+        class Leads:
+            async def get(self, lead_id):
+                return lead
+
+            async def update(self, lead_id, fields):
+                updates.append(fields)
+
+        class Scoring:
+            async def score_lead(self, lead):
+                lead.score, lead.tier = 72, LeadTier.WARM
+                lead.similar_deals = [SimilarDeal(deal_name="Upington PV", company="SunCo", similarity_score=0.8)]
+                return lead
+
+        brain = AgenticBrain(lead_service=Leads(), scoring_service=Scoring())
+        result = await brain._exec_score_lead(lead.id)
+
+        assert result["score"] == 72
+        assert updates[0]["similar_deals"][0]["deal_name"] == "Upington PV"
+        assert set(updates[0]) == {"score", "tier", "similar_deals", "updated_at"}
+
+
+class TestEventQueue:
+    """Tests for the durable event queue."""
+
+    @pytest.fixture(params=["memory", "sql"])
+    def store(self, request, tmp_path, monkeypatch):
+        from orchestrator.event_queue import MemoryQueueStore, SQLQueueStore
+
+        if request.param == "memory":
+            return MemoryQueueStore()
+
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        import db.database
+        from db.tables import EventQueueTable, EventQueueKeyTable
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}")
+        EventQueueTable.__table__.create(bind=engine)
+        EventQueueKeyTable.__table__.create(bind=engine)
+        monkeypatch.setattr(db.database, "SessionLocal", sessionmaker(bind=engine))
+        return SQLQueueStore()
+
+    def test_idempotency_key_dedupes(self, store):
+        """Test that a repeated idempotency key is only queued once."""
+        first_id, outcome = store.enqueue("event", {"n": 1}, "lead:1", "wa:abc")
+        second_id, outcome_again = store.enqueue("event", {"n": 1}, "lead:1", "wa:abc")
+
+        assert outcome == "created"
+        assert outcome_again == "duplicate"
+        assert first_id == second_id
+        assert store.depth()["pending"] == 1
+
+    def test_per_key_ordering(self, store):
+        """Test that jobs for one lead are delivered one at a time, in order."""
+        store.enqueue("event", {"n": 1}, "lead:1")
+        store.enqueue("event", {"n": 2}, "lead:1")
+        store.enqueue("event", {"n": 3}, "lead:2")
+
+        first = store.claim("w1")
+        second = store.claim("w2")
+
+        assert first.payload == {"n": 1}
+        # lead:1's second job is blocked until the first is acked
+        assert second.payload == {"n": 3}
+        assert store.claim("w3") is None
+
+        store.ack(first.id)
+        assert store.claim("w3").payload == {"n": 2}
+
+    def test_failures_dead_letter(self, store):
+        """Test that a job is dead-lettered after max attempts."""
+        job_id, _ = store.enqueue("event", {"n": 1})
+
+        job = store.claim("w1")
+        assert store.fail(job.id, "boom", max_attempts=1) == "dead"
+        assert store.dead_letters()[0]["last_error"] == "boom"
+
+        assert store.requeue(job_id) is True
+        assert store.claim("w1").id == job_id
+
+    def test_coalesce_merges_pending_job(self, store):
+        """Test that jobs sharing a coalesce key merge while pending."""
+        from orchestrator.event_queue import CoalesceWindow
+
+        window = CoalesceWindow(debounce=0, max_wait=0)
+        merge = lambda old, new: {"n": old["n"] + new["n"]}
+
+        first_id, _ = store.enqueue("event", {"n": 1}, "lead:1", None, "msg:1", window, merge)
+        second_id, outcome = store.enqueue("event", {"n": 2}, "lead:1", None, "msg:1", window, merge)
+
+        assert outcome == "merged"
+        assert second_id == first_id
+        assert store.claim("w1").payload == {"n": 3}
+
+    def test_merged_redelivery_is_duplicate(self, store):
+        """Test that redelivering a webhook that was merged isn't queued again."""
+        from orchestrator.event_queue import CoalesceWindow
+
+        window = CoalesceWindow(debounce=0, max_wait=0)
+        merge = lambda old, new: {"n": old["n"] + new["n"]}
+
+        first_id, _ = store.enqueue("event", {"n": 1}, "lead:1", "wa:1", "msg:1", window, merge)
+        store.enqueue("event", {"n": 2}, "lead:1", "wa:2", "msg:1", window, merge)
+        again_id, outcome = store.enqueue("event", {"n": 2}, "lead:1", "wa:2", "msg:1", window, merge)
+
+        assert outcome == "duplicate"
+        assert again_id == first_id
+        assert store.claim("w1").payload == {"n": 3}
+
+    def test_concurrent_merges_are_not_lost(self, store):
+        """Test that a merge landing between another merge's read and write survives."""
+        from orchestrator.event_queue import CoalesceWindow, MemoryQueueStore
+
+        if isinstance(store, MemoryQueueStore):
+            pytest.skip("The memory store merges under its lock")
+
+        window = CoalesceWindow(debounce=0, max_wait=0)
+        racing = []
+
+        def merge(old, new):
+            if new["n"] == 2 and not racing:
+                racing.append(True)
+                store.enqueue("event", {"n": 4}, "lead:1", None, "msg:1", window, merge)
+            return {"n": old["n"] + new["n"]}
+
+        store.enqueue("event", {"n": 1}, "lead:1", None, "msg:1", window, merge)
+        store.enqueue("event", {"n": 2}, "lead:1", None, "msg:1", window, merge)
+
+        assert store.claim("w1").payload == {"n": 7}
+
+    async def test_waiting_burst_does_not_delay_later_events(self, store):
+        """Test that a message queued behind a debounced email open isn't held for its window."""
+        from orchestrator.event_queue import EventQueue, COALESCE_WINDOWS, CoalesceWindow
+        from orchestrator.events import EventType, Event, message_received_event
+
+        queue = EventQueue(
+            store=store,
+            coalesce_windows={**COALESCE_WINDOWS, EventType.MESSAGE_RECEIVED: CoalesceWindow(debounce=0, max_wait=0)},
+        )
+        opened = await queue.enqueue_event(Event(type=EventType.EMAIL_OPENED, lead_id="L1"))
+        assert store.claim("w1") is None  # Still inside the 300s window
+
+        await queue.enqueue_event(message_received_event("L1", "whatsapp", "Hi", "+27"))
+        first = store.claim("w1")
+        assert first.id == opened["job_id"]
+        store.ack(first.id)
+        assert Event(**store.claim("w1").payload).type == EventType.MESSAGE_RECEIVED
+
+    def test_only_consecutive_events_merge(self, store):
+        """Test that a burst isn't merged into a job with other jobs queued behind it."""
+        from orchestrator.event_queue import CoalesceWindow
+
+        window = CoalesceWindow(debounce=60, max_wait=300)
+        merge = lambda old, new: {"n": old["n"] + new["n"]}
+
+        first_id, _ = store.enqueue("event", {"n": 1}, "lead:1", None, "opened:1", window, merge)
+        store.enqueue("event", {"n": 10}, "lead:1")
+        third_id, outcome = store.enqueue("event", {"n": 2}, "lead:1", None, "opened:1", window, merge)
+
+        assert outcome == "created"
+        assert third_id != first_id
+        assert store.claim("w1").payload == {"n": 1}
+
+    async def test_workers_drain_queue(self):
+        """Test that enqueue returns immediately and workers process the job."""
+        from orchestrator.event_queue import EventQueue, MemoryQueueStore
+        from orchestrator.events import lead_created_event
+
+        queue = EventQueue(store=MemoryQueueStore(), workers=2, poll_interval=0.05)
+        handled = []
+        done = asyncio.Event()
+
+        async def handle_event(event):
+            await asyncio.sleep(0.05)
+            handled.append(event.lead_id)
+            done.set()
+
+        queue.register_event_handler(handle_event)
+        await queue.start()
+        try:
+            start = time.perf_counter()
+            await queue.enqueue_event(lead_created_event("L1", "website"))
+            assert time.perf_counter() - start < 0.05
+
+            await asyncio.wait_for(done.wait(), timeout=2)
+            # The ack lands just after the handler returns
+            for _ in range(20):
+                if queue.store.depth()["done"] == 1:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await queue.stop()
+
+        assert handled == ["L1"]
+        assert queue.store.depth()["done"] == 1
+
+    async def test_message_burst_is_coalesced(self):
+        """Test that a burst of messages from one lead becomes one event."""
+        from orchestrator.event_queue import EventQueue, MemoryQueueStore, CoalesceWindow
+        from orchestrator.events import EventType, Event, message_received_event
+
+        queue = EventQueue(
+            store=MemoryQueueStore(),
+            coalesce_windows={EventType.MESSAGE_RECEIVED: CoalesceWindow(debounce=0.05, max_wait=1.0)},
+        )
+
+        results = [
+            await queue.enqueue_event(message_received_event("L1", "whatsapp", text, "+27"))
+            for text in ["Hi", "Are you there?", "Need IDC funding"]
+        ]
+        await queue.enqueue_event(message_received_event("L2", "whatsapp", "Hello", "+28"))
+
+        assert [r["merged"] for r in results] == [False, True, True]
+        assert len({r["job_id"] for r in results}) == 1
+        # Held until the debounce window passes
+        assert queue.store.claim("w1") is None
+
+        await asyncio.sleep(0.06)
+        job = queue.store.claim("w1")
+        event = Event(**job.payload)
+
+        assert event.lead_id == "L1"
+        assert event.data["batched_count"] == 3
+        assert event.data["content"] == "Hi\nAre you there?\nNeed IDC funding"
+
+    async def test_failed_webhook_job_is_retried(self, monkeypatch):
+        """Test that a webhook handler's failure reaches the queue's retry path."""
+        from orchestrator.event_queue import EventQueue, MemoryQueueStore
+        from routes import webhooks
+
+        async def outreach(lead, channel):
+            raise RuntimeError("mail server down")
+
+        monkeypatch.setattr(webhooks.comms_agent, "initial_outreach", outreach)
+        queue = EventQueue(store=MemoryQueueStore(), max_attempts=2)
+        queue.register("contact_form_outreach", lambda payload: webhooks.send_contact_form_outreach(**payload))
+        await queue.enqueue("contact_form_outreach", {"lead": {"id": "L1", "email": "a@example.org"}})
+
+        await queue._process(queue.store.claim("w1"))
+        assert queue.store.depth()["pending"] == 1
+
+        job_id = next(iter(queue.store._rows))
+        queue.store._rows[job_id]["available_at"] = datetime.utcnow()  # Skip the retry backoff
+        await queue._process(queue.store.claim("w1"))
+        assert queue.store.dead_letters()[0]["last_error"] == "mail server down"
+
+
+class TestWhatsAppCoalescing:
+    """Tests for merged WhatsApp bursts and their replies."""
+
+    @pytest.fixture
+    def whatsapp(self, monkeypatch):
+        import db.leads
+        from orchestrator.event_queue import EventQueue, MemoryQueueStore, CoalesceWindow
+        from orchestrator.events import EventType
+        from routes import webhooks
+        from models.lead import Lead
+
+        lead = Lead(
+            name="Thandi", email="thandi@example.org", company="Karoo Solar",
+            sector="renewable_energy", funding_stage="seed", phone="+27820000000",
+        )
+        calls = {"replies": [], "sent": []}
+
+        async def get_lead_by_phone(phone):
+            return lead
+
+        async def generate_response(lead, message, channel):
+            calls["replies"].append(message)
+            return {"reply": "Thanks, we'll be in touch"}
+
+        async def send_whatsapp(phone, text):
+            calls["sent"].append(text)
+
+        queue = EventQueue(
+            store=MemoryQueueStore(),
+            coalesce_windows={EventType.MESSAGE_RECEIVED: CoalesceWindow(debounce=0, max_wait=0)},
+        )
+        queue.register("whatsapp_reply", lambda payload: webhooks.send_whatsapp_reply(**payload))
+        monkeypatch.setattr(db.leads, "get_lead_by_phone", get_lead_by_phone, raising=False)
+        monkeypatch.setattr(webhooks, "event_queue", queue)
+        monkeypatch.setattr(webhooks.comms_agent, "generate_response", generate_response)
+        monkeypatch.setattr(webhooks.comms_agent, "send_whatsapp", send_whatsapp)
+        return queue, lead, calls
+
+    async def test_burst_gets_one_reply(self, whatsapp):
+        """Test that a burst merged into one job is answered with one reply."""
+        from orchestrator.events import EventType
+        from routes import webhooks
+
+        queue, lead, calls = whatsapp
+        for i, text in enumerate(["Hi", "Are you there?", "Need IDC funding"]):
+            await queue.enqueue(
+                "whatsapp_message",
+                {"phone": lead.phone, "message": text, "message_id": f"m{i}", "contacts": []},
+                ordering_key=f"whatsapp:{lead.phone}",
+                idempotency_key=f"whatsapp:m{i}",
+                coalesce_key=f"whatsapp:{lead.phone}",
+                window=queue.coalesce_windows[EventType.MESSAGE_RECEIVED],
+                merge=webhooks.merge_whatsapp_payloads,
+            )
+
+        job = queue.store.claim("w1")
+        assert job.payload["message_ids"] == ["m0", "m1", "m2"]
+        await webhooks.process_whatsapp_message(**job.payload)
+        await queue._process(queue.store.claim("w1"))
+
+        assert calls["replies"] == ["Hi\nAre you there?\nNeed IDC funding"]
+        assert len(calls["sent"]) == 1
+
+    async def test_retry_does_not_resend_reply(self, whatsapp, monkeypatch):
+        """Test that a retry after a late failure doesn't send the reply or queue the event again."""
+        from routes import webhooks
+
+        queue, lead, calls = whatsapp
+        enqueue_event = queue.enqueue_event
+
+        async def flaky_enqueue_event(event, idempotency_key=None):
+            if not calls.get("failed"):
+                calls["failed"] = True
+                raise RuntimeError("database is locked")
+            return await enqueue_event(event, idempotency_key)
+
+        monkeypatch.setattr(queue, "enqueue_event", flaky_enqueue_event)
+        payload = {"phone": lead.phone, "message": "Hi", "message_id": "m0", "contacts": []}
+        with pytest.raises(RuntimeError):
+            await webhooks.process_whatsapp_message(**payload)
+        await webhooks.process_whatsapp_message(**payload)
+
+        kinds = [row["kind"] for row in queue.store._rows.values()]
+        assert sorted(kinds) == ["event", "whatsapp_reply"]
+        await queue._process(queue.store.claim("w1"))
+        assert len(calls["sent"]) == 1
+
+    async def test_webhook_fails_when_message_is_not_queued(self, whatsapp, monkeypatch):
+        """Test that Meta gets a 5xx, and so redelivers, when queueing fails."""
+        import httpx
+        from fastapi import FastAPI
+        from routes.webhooks import router
+
+        queue, lead, calls = whatsapp
+
+        async def enqueue(*args, **kwargs):
+            raise RuntimeError("database is locked")
+
+        monkeypatch.setattr(queue, "enqueue", enqueue)
+        app = FastAPI()
+        app.include_router(router)
+        body = {"entry": [{"changes": [{"value": {"messages": [
+            {"from": lead.phone, "id": "m0", "timestamp": "0", "type": "text", "text": {"body": "Hi"}}
+        ]}}]}]}
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/v1/webhooks/whatsapp", json=body)
+
+        assert response.status_code == 503
+
+
+class TestLeadContextCache:
+    """Tests for cached, incrementally built lead context."""
+
+    def test_history_stays_within_budget(self):
+        """Test that long conversations are compacted into a rolling summary."""
+        from services.lead_context_cache import LeadContextCache, estimate_tokens
+
+        cache = LeadContextCache(token_budget=200)
+        for i in range(500):
+            cache.append_event("L1", "message_received", {"content": f"message number {i} " * 5}, f"t{i}")
+
+        history = cache.render_history("L1")
+
+        assert estimate_tokens(history) < 400
+        assert history.startswith("Earlier activity since t0:")
+        assert "message number 499" in history
+
+    async def test_brain_reuses_snapshot_until_invalidated(self):
+        """Test that the brain only re-reads a lead after it changes."""
+        from orchestrator.agentic_brain import AgenticBrain
+        from orchestrator.events import message_received_event
+        from models.lead import Lead
+        from services.lead_context_cache import LeadContextCache
+
+        class FakeLeads:
+            calls = 0
+
+            async def get(self, lead_id):
+                FakeLeads.calls += 1
+                return Lead(
+                    id=lead_id, name="Thandi", email="t@example.com", company="Acme",
+                    sector="renewable_energy", funding_stage="seed",
+                )
+
+        brain = AgenticBrain(lead_service=FakeLeads())
+        brain.context_cache = LeadContextCache()
+        event = message_received_event("L1", "whatsapp", "Hello", "+27")
+
+        first = await brain._build_event_context(event)
+        second = await brain._build_event_context(event)
+        assert FakeLeads.calls == 1
+        assert second["lead_json"] is first["lead_json"]
+
+        brain.context_cache.invalidate("L1")
+        await brain._build_event_context(event)
+        assert FakeLeads.calls == 2
@@ -0,0 +1,141 @@
+"""
+JASPER CRM - Related Article Graph Tests
+
+Tests for precomputed related-article neighbours.
+"""
+
+import json
+import random
+
+import pytest
+
+CATEGORIES = ["dfi-insights", "Climate Finance", "project finance", ""]
+TAGS = ["ifc", "solar", "wind", "ppp", "debt", "equity", "africa", "grid"]
+TERMS = ["bankable", "models", "renewable", "tariffs", "structuring", "blended", "capital", "risks"]
+
+
+def _posts(n, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "slug": f"post-{i}",
+            "title": " ".join(rng.sample(TERMS, 3)).title(),
+            "category": rng.choice(CATEGORIES),
+            "tags": rng.sample(TAGS, rng.randint(0, 3)),
+            "status": "published" if i % 5 else "draft",
+            "excerpt": f"Excerpt {i}",
+        }
+        for i in range(n)
+    ]
+
+
+def _brute_force(service, posts, slug):
+    target = next(p for p in posts if p["slug"] == slug)
+    scored = [
+        (service.calculate_relevance(target, p), p["slug"])
+        for p in posts
+        if p["slug"] != slug and p["status"] == "published"
+    ]
+    return {s: score for score, s in scored if score > 0}
+
+
+@pytest.fixture
+def posts_path(tmp_path):
+    path = tmp_path / "blog_posts.json"
+    path.write_text(json.dumps(_posts(60)))
+    return path
+
+
+class TestRelatedArticleGraph:
+    """Tests for RelatedArticleGraph via LinkBuilderService."""
+
+    def test_matches_pairwise_relevance(self, posts_path):
+        """Test that graph neighbours equal the brute-force top scores."""
+        from services.link_builder_service import LinkBuilderService
+
+        service = LinkBuilderService(str(posts_path))
+        posts = json.loads(posts_path.read_text())
+        for slug in ("post-0", "post-1", "post-13"):
+            expected = _brute_force(service, posts, slug)
+            related = service.find_related_articles(slug, max_links=5)
+            top = sorted(expected.values(), reverse=True)[:5]
+            assert [r["score"] for r in related] == top
+            assert all(expected[r["slug"]] == r["score"] for r in related)
+
+    def test_incremental_update_on_edit(self, posts_path):
+        """Test that an edited post is re-encoded without rebuilding the graph."""
+        from services.link_builder_service import LinkBuilderService
+        from services.related_articles import related_article_graph
+
+        service = LinkBuilderService(str(posts_path))
+        service.find_related_articles("post-1")
+        graph = related_article_graph(posts_path, service.article_features)
+
+        posts = json.loads(posts_path.read_text())
+        posts[2].update(category="Unique Niche", tags=["zzz"], title="Zzzz Yyyy")
+        posts[3].update(category="Unique Niche", tags=["zzz"], title="Other")
+        posts_path.write_text(json.dumps(posts))
+
+        related = service.find_related_articles("post-2")
+        assert related[0]["slug"] == "post-3"
+        assert related[0]["category"] == "Unique Niche"
+        stats = graph.refresh()
+        assert stats == {"changed": 0, "removed": 0, "recomputed": 0}
+
+    def test_unrelated_writes_reencode_nothing(self, posts_path):
+        """Test that a view-count write doesn't re-encode posts or touch cached rows."""
+        from services.link_builder_service import LinkBuilderService
+        from services.related_articles import RelatedArticleGraph
+
+        service = LinkBuilderService(str(posts_path))
+        encoded = []
+        graph = RelatedArticleGraph(posts_path, lambda post: encoded.append(post["slug"]) or service.article_features(post))
+        expected = graph.related("post-1")
+        assert len(encoded) == 60
+
+        posts = json.loads(posts_path.read_text())
+        posts[1]["views"] = 1234
+        posts[7]["excerpt"] = "Edited excerpt"
+        posts_path.write_text(json.dumps(posts))
+
+        assert graph.refresh() == {"changed": 0, "removed": 0, "recomputed": 0}
+        assert len(encoded) == 60
+        assert graph.related("post-1") == expected
+
+    def test_patched_rows_match_rebuild(self, posts_path):
+        """Test that cached rows patched after edits equal rows built from scratch."""
+        from services.link_builder_service import LinkBuilderService
+        from services.related_articles import RelatedArticleGraph
+
+        service = LinkBuilderService(str(posts_path))
+        graph = RelatedArticleGraph(posts_path, service.article_features, top_k=4)
+        graph.refresh()
+        rng = random.Random(3)
+        for _ in range(5):
+            for slug in list(graph.features):
+                graph.related(slug, max_links=4)
+            posts = json.loads(posts_path.read_text())
+            for post in rng.sample(posts, 6):
+                post["tags"] = rng.sample(TAGS, rng.randint(0, 3))
+                post["category"] = rng.choice(CATEGORIES)
+                post["status"] = rng.choice(["published", "published", "draft"])
+            posts.remove(rng.choice(posts))
+            posts_path.write_text(json.dumps(posts))
+
+            stats = graph.refresh()
+            assert stats["recomputed"] < len(graph.features)
+            fresh = RelatedArticleGraph(posts_path, service.article_features, top_k=4)
+            assert graph.neighbors
+            for slug, row in graph.neighbors.items():
+                assert row == [[r["slug"], r["score"]] for r in fresh.related(slug, max_links=4)]
+
+    def test_removed_post_disappears(self, posts_path):
+        """Test that deleted posts are dropped from neighbour lists."""
+        from services.link_builder_service import LinkBuilderService
+
+        service = LinkBuilderService(str(posts_path))
+        first = service.find_related_articles("post-1", max_links=1)[0]["slug"]
+        posts = [p for p in json.loads(posts_path.read_text()) if p["slug"] != first]
+        posts_path.write_text(json.dumps(posts))
+
+        assert first not in [r["slug"] for r in service.find_related_articles("post-1", max_links=20)]
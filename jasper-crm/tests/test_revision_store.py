@@ -0,0 +1,128 @@
+"""
+JASPER CRM - Revision Store Tests
+
+Tests for delta-compressed, per-post blog revision history.
+"""
+
+import json
+
+
+def _snapshot(i, paragraphs=40):
+    content = "\n".join(f"Paragraph {p} about DFI funding." for p in range(paragraphs))
+    return {
+        "title": f"Title {i // 3}",
+        "content": content + f"\nEdit number {i}\n",
+        "tags": ["dfi", f"tag-{i % 4}"],
+        "seo": {"score": 50 + i},
+        "heroImage": None,
+    }
+
+
+class TestDelta:
+    """Tests for the field-level delta codec."""
+
+    def test_round_trip(self):
+        """Test that apply_delta(old, make_delta(old, new)) == new."""
+        from services.revision_store import make_delta, apply_delta
+
+        old = _snapshot(1)
+        new = dict(_snapshot(2), content_blocks=[{"type": "p", "text": "x" * 300}])
+        del new["heroImage"]
+
+        delta = make_delta(old, new)
+        assert "content" in delta["diff"]
+        assert apply_delta(old, delta) == new
+
+
+class TestRevisionStore:
+    """Tests for RevisionStore."""
+
+    def test_reconstructs_every_revision(self, tmp_path):
+        """Test that each kept revision reconstructs exactly, across rebases and pruning."""
+        from services.revision_store import RevisionStore
+
+        store = RevisionStore(tmp_path, max_revisions=25, rebase_every=10)
+        snapshots = {}
+        for i in range(1, 41):
+            rev = store.append("post", _snapshot(i), {"timestamp": str(i), "user_id": "u", "action": "updated"})
+            snapshots[rev["rev"]] = _snapshot(i)
+
+        history = store.history("post", limit=100)
+        assert [h["rev"] for h in history] == list(range(40, 15, -1))
+        assert "snapshot" not in history[0]
+        for rev in range(16, 41):
+            assert store.get("post", rev)["snapshot"] == snapshots[rev]
+        assert store.get("post", 3) is None
+
+    def test_storage_is_smaller_than_full_copies(self, tmp_path):
+        """Test that small edits to a long post don't store the post again."""
+        from services.revision_store import RevisionStore
+
+        store = RevisionStore(tmp_path, rebase_every=10)
+        full = 0
+        for i in range(1, 21):
+            snapshot = _snapshot(i, paragraphs=200)
+            full += len(json.dumps(snapshot))
+            store.append("long", snapshot, {"timestamp": "", "user_id": "u", "action": "updated"})
+
+        assert (tmp_path / "long.json").stat().st_size < full / 5
+
+    def test_segments_are_per_post(self, tmp_path):
+        """Test that each post's history lives in its own segment."""
+        from services.revision_store import RevisionStore
+
+        store = RevisionStore(tmp_path)
+        store.append("a", _snapshot(1), {"timestamp": "", "user_id": "u", "action": "created"})
+        store.append("b", _snapshot(2), {"timestamp": "", "user_id": "u", "action": "created"})
+
+        assert sorted(p.name for p in tmp_path.glob("*.json")) == ["a.json", "b.json"]
+        assert store.history("a")[0]["title"] == "Title 0"
+
+    def test_migrates_legacy_file(self, tmp_path):
+        """Test that blog_revisions.json is split into segments on first use."""
+        from services.revision_store import RevisionStore
+
+        legacy = tmp_path / "blog_revisions.json"
+        legacy.write_text(json.dumps({
+            "post": {
+                "current_revision": 3,
+                "revisions": [
+                    {"rev": r, "timestamp": "", "user_id": "u", "action": "updated", "snapshot": _snapshot(r)}
+                    for r in (1, 2, 3)
+                ],
+            }
+        }))
+        store = RevisionStore(tmp_path / "segments", legacy_path=legacy)
+
+        assert store.get("post", 2)["snapshot"] == _snapshot(2)
+        assert not legacy.exists()
+        assert (tmp_path / "blog_revisions.json.migrated").exists()
+
+        rev = store.append("post", _snapshot(4), {"timestamp": "", "user_id": "u", "action": "updated"})
+        assert rev["rev"] == 4
+
+    def test_delete_drops_history(self, tmp_path):
+        """Test that deleting a purged post's history removes its segment only."""
+        from services.revision_store import RevisionStore
+
+        store = RevisionStore(tmp_path)
+        store.append("a", _snapshot(1), {"timestamp": "", "user_id": "u", "action": "created"})
+        store.append("b", _snapshot(2), {"timestamp": "", "user_id": "u", "action": "created"})
+
+        store.delete("a")
+
+        assert store.history("a") == []
+        assert [p.name for p in tmp_path.glob("*.json")] == ["b.json"]
+
+    def test_unsafe_slugs_get_their_own_segment(self, tmp_path):
+        """Test that slugs escaping to the same filename keep separate histories."""
+        from services.revision_store import RevisionStore
+
+        store = RevisionStore(tmp_path)
+        store.append("a b", _snapshot(1), {"timestamp": "", "user_id": "u", "action": "created"})
+        store.append("a_b", _snapshot(4), {"timestamp": "", "user_id": "u", "action": "created"})
+
+        assert [rev["title"] for rev in store.history("a b")] == ["Title 0"]
+        store.delete("a b")
+        assert store.history("a b") == []
+        assert [rev["title"] for rev in store.history("a_b")] == ["Title 1"]
@@ -0,0 +1,113 @@
+"""
+JASPER CRM - Semantic Link Tests
+
+Tests for embedding-backed related posts and link suggestions
+(jasper-memory calls are faked).
+"""
+
+import json
+
+import pytest
+
+
+def _post(slug, title, category, tags, content, status="published"):
+    return {"slug": slug, "title": title, "category": category, "tags": tags, "content": content, "status": status}
+
+
+POSTS = [
+    _post("solar-ppa", "Solar PPA Structuring", "Climate Finance", ["solar"],
+          "## Offtake\n\nA solar PPA sets the tariff.\n\n## Risk\n\nCurtailment risk matters for blended finance."),
+    _post("blended-finance", "Blended Finance Basics", "DFI Insights", ["dfi"],
+          "## What it is\n\nConcessional capital de-risks private investment."),
+    _post("wind-ppa", "Wind Power Purchase Agreements", "Climate Finance", ["wind"],
+          "## Tariffs\n\nWind tariffs and offtake terms."),
+    _post("draft-post", "Draft", "Climate Finance", ["solar"], "Not yet.", status="draft"),
+]
+
+
+class FakeMemory:
+    def __init__(self):
+        self.calls = []
+        self.available = True
+
+    async def __call__(self, path, payload, timeout=120.0):
+        self.calls.append((path, payload))
+        if not self.available:
+            return None
+        if path == "/memory/groups/upsert":
+            return {"success": True}
+        if path == "/jasper/related-content":
+            return {"related": [{"group": "blended-finance", "score": 0.9}, {"group": "wind-ppa", "score": 0.2}]}
+        if path == "/jasper/group-targets":
+            return {"targets": [
+                [{"group": "wind-ppa", "score": 0.8}],
+                [{"group": "blended-finance", "score": 0.7}, {"group": "wind-ppa", "score": 0.6}],
+            ]}
+        return None
+
+
+@pytest.fixture
+def service(tmp_path):
+    from services.semantic_links import SemanticLinkService
+
+    posts_path = tmp_path / "blog_posts.json"
+    posts_path.write_text(json.dumps(POSTS))
+    service = SemanticLinkService(posts_path=posts_path, state_path=tmp_path / "semantic_index.json")
+    service._post = FakeMemory()
+    return service
+
+
+class TestSemanticLinks:
+    """Tests for SemanticLinkService."""
+
+    def test_chunks_follow_sections(self):
+        """Test that chunks are per heading section and prefixed with context."""
+        from services.semantic_links import chunk_post
+
+        chunks = chunk_post(POSTS[0])
+
+        assert [c["id"] for c in chunks] == ["solar-ppa#0", "solar-ppa#1"]
+        assert chunks[1]["text"].startswith("Solar PPA Structuring - Risk\n\n")
+
+    async def test_index_only_changed_posts(self, service, tmp_path):
+        """Test content-hash skipping, batching and removal of unpublished posts."""
+        stats = await service.index_all()
+        upserts = [p for path, p in service._post.calls if path == "/memory/groups/upsert"]
+        assert stats["indexed"] == 3 and len(upserts) == 1
+        assert set(upserts[0]["groups"]) == {"solar-ppa", "blended-finance", "wind-ppa"}
+
+        posts = json.loads(service.posts_path.read_text())
+        posts[1]["content"] += "\n\nMore."
+        posts[2]["status"] = "draft"
+        service.posts_path.write_text(json.dumps(posts))
+        service._post.calls.clear()
+
+        stats = await service.index_all()
+        groups = service._post.calls[0][1]["groups"]
+        assert groups["wind-ppa"] == [] and len(groups["blended-finance"]) == 1
+        assert (stats["indexed"], stats["removed"], stats["unchanged"]) == (1, 1, 1)
+        assert set(json.loads((tmp_path / "semantic_index.json").read_text())) == {"solar-ppa", "blended-finance"}
+
+    async def test_related_blends_vector_and_tag_scores(self, service):
+        """Test that semantic neighbours outrank tag-only matches when blended."""
+        related = await service.related_articles("solar-ppa")
+
+        assert [r["slug"] for r in related] == ["blended-finance", "wind-ppa"]
+        assert related[0]["vector_score"] == 0.9 and related[1]["tag_score"] > 0
+
+    async def test_related_falls_back_to_tags(self, service):
+        """Test that tag relevance alone is used when jasper-memory is down."""
+        service._post.available = False
+
+        related = await service.related_articles("solar-ppa")
+
+        assert [r["slug"] for r in related] == ["wind-ppa"]
+
+    async def test_link_suggestions_pick_anchor_in_paragraph(self, service):
+        """Test anchors come from the paragraph and each target is linked once."""
+        suggestions = await service.suggest_links("solar-ppa")
+
+        by_target = {s["target_slug"]: s for s in suggestions}
+        assert by_target["blended-finance"]["anchor"] == "blended finance"
+        assert by_target["blended-finance"]["url"] == "/insights/blended-finance"
+        assert "wind-ppa" not in by_target  # no wind phrase in either paragraph
@@ -51,6 +51,71 @@ class TestKeywordService:
         assert len(finance_keywords) >= 0  # May have none, that's ok
 
 
+class TestSEOScorer:
+    """Tests for the single-pass SEO document model and scorer."""
+
+    CONTENT = (
+        "Infrastructure finance is how [large projects](/blog/projects) get built. "
+        "See the [World Bank](https://worldbank.org/ppp) and "
+        "[our guide](https://www.jasperfinance.org/guide).\n\n"
+        "## Funding sources\n\n"
+        "![Toll road](/img/road.png)\n"
+        "<img src=\"/img/bridge.png\">\n\n"
+        "### Debt [1]\n\n"
+        "<h2 class=\"x\">Risks</h2><p>Infrastructure finance carries risk.</p>"
+    )
+
+    def test_document_model(self):
+        """Test that one parse yields words, headings, links and images."""
+        from services.seo_document import parse_document
+
+        doc = parse_document(self.CONTENT)
+
+        assert doc.first_paragraph.startswith("Infrastructure finance is how large projects get built.")
+        assert "blog/projects" not in doc.text
+        assert [(level, text) for level, text in doc.headings] == [
+            (2, "Funding sources"), (3, "Debt"), (2, ""),
+        ]
+        # Markdown images count as links, as they always have
+        assert doc.internal_links() == ["/blog/projects", "https://www.jasperfinance.org/guide", "/img/road.png"]
+        assert doc.external_links() == ["https://worldbank.org/ppp"]
+        assert doc.images == [("/img/road.png", "Toll road"), ("/img/bridge.png", "")]
+        assert doc.count_phrase("Infrastructure Finance") == 2
+
+    def test_checks_read_document(self):
+        """Test check results computed from the document model."""
+        from services.seo_scorer import SEOScorer
+
+        result = SEOScorer().calculate_score(
+            {"title": "Infrastructure finance basics", "slug": "infrastructure-finance", "content": self.CONTENT},
+            focus_keyword="infrastructure finance",
+        )
+
+        assert result.checks["keyword_in_first_100"].passed
+        assert result.checks["internal_links"].details == "Found 3 internal links"
+        assert result.checks["external_links"].passed
+        assert result.checks["headings_structure"].score == 100
+        assert result.checks["image_alt_tags"].details == "1 of 2 images missing alt tags"
+
+    def test_results_memoized_by_content(self, monkeypatch):
+        """Test that unchanged posts are not re-parsed or re-scored."""
+        import services.seo_document as seo_document
+        from services.seo_scorer import seo_scorer
+
+        calls = []
+        real_parse = seo_document._parse
+        monkeypatch.setattr(seo_document, "_parse", lambda content: calls.append(content) or real_parse(content))
+
+        post = {"title": "Memo test", "slug": "memo-test", "content": "Unique memo content body " * 20}
+        first = seo_scorer.calculate_score(post)
+        second = seo_scorer.calculate_score(dict(post))
+        edited = seo_scorer.calculate_score({**post, "title": "Memo test, edited"})
+
+        assert len(calls) == 1
+        assert second.score == first.score and second.checks is not first.checks
+        assert edited.checks["seo_title_length"] != first.checks["seo_title_length"]
+
+
 class TestSEORoutes:
     """Tests for SEO API endpoints."""
 
@@ -0,0 +1,90 @@
+"""
+JASPER CRM - SEO Audit Tests
+
+Tests for the incremental, columnar site-wide SEO audit.
+"""
+
+import json
+
+import pytest
+
+
+def _post(slug, content="Some content about project finance. " * 40, **fields):
+    return {"slug": slug, "title": f"Project finance guide {slug}", "status": "published", "content": content, **fields}
+
+
+@pytest.fixture
+def posts_path(tmp_path):
+    path = tmp_path / "blog_posts.json"
+    path.write_text(json.dumps([_post("a"), _post("b"), _post("gone", status="archived")]))
+    return path
+
+
+@pytest.fixture
+def audit(tmp_path, posts_path):
+    from services.seo_audit import SEOAudit
+
+    return SEOAudit(posts_path=posts_path, audit_dir=tmp_path / "audit", workers=1)
+
+
+class TestSEOAudit:
+    """Tests for SEOAudit."""
+
+    def test_columnar_table(self, audit):
+        """Test that the audit stores one column per field and check."""
+        from services.seo_audit import CHECKS
+
+        result = audit.run()
+        columns = result["columns"]
+
+        assert columns["slug"] == ["a", "b"]
+        assert all(len(columns[name]) == 2 for name in CHECKS)
+        assert result["summary"]["grades"]
+        assert audit.latest()["audit_id"] == result["audit_id"]
+        assert [row["slug"] for row in audit.rows()] and set(audit.rows()[0]) >= set(CHECKS)
+
+    def test_unchanged_posts_are_reused(self, audit, posts_path):
+        """Test that a second audit only re-scores edited and new posts."""
+        audit.run()
+        posts = json.loads(posts_path.read_text())
+        posts[0]["content"] += " [Source](https://example.com) [More](/blog/more) [Other](/blog/other)"
+        posts.append(_post("c"))
+        posts_path.write_text(json.dumps(posts))
+
+        result = audit.run()
+
+        assert (result["scored"], result["reused"]) == (2, 1)
+        delta = result["delta"]
+        assert delta["added"] == ["c"]
+        assert [c["slug"] for c in delta["improved"]] == ["a"]
+        assert delta["checks"]["external_links"]["now_passing"] == ["a"]
+        assert len(audit.history()) == 2
+
+    def test_scorer_change_rescores_everything(self, audit, monkeypatch):
+        """Test that bumping SCORER_VERSION invalidates reused rows."""
+        from services import seo_scorer
+
+        audit.run()
+        monkeypatch.setattr(seo_scorer, "SCORER_VERSION", seo_scorer.SCORER_VERSION + 1)
+
+        result = audit.run()
+
+        assert (result["scored"], result["reused"]) == (2, 0)
+
+    def test_removed_posts_in_delta(self, audit, posts_path):
+        """Test that posts missing from the blog are reported as removed."""
+        audit.run()
+        posts_path.write_text(json.dumps([_post("a")]))
+
+        assert audit.run()["delta"]["removed"] == ["b"]
+
+    def test_process_pool_matches_inline(self, tmp_path, posts_path):
+        """Test that scoring across worker processes gives the same table."""
+        from services.seo_audit import SEOAudit
+
+        inline = SEOAudit(posts_path=posts_path, audit_dir=tmp_path / "inline", workers=1).run()
+        pooled = SEOAudit(
+            posts_path=posts_path, audit_dir=tmp_path / "pooled", workers=2, pool_min_posts=1
+        ).run()
+
+        assert pooled["columns"] == inline["columns"]
@@ -0,0 +1,163 @@
+"""
+JASPER CRM - Tracing and Profiling Tests
+
+Tests for request span tracing and the sampling profiler.
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+
+@pytest.fixture
+def traced_app(tmp_path):
+    from sqlalchemy import create_engine, text
+    from middleware.logging_middleware import RequestContextMiddleware
+    from routes.diagnostics import router as diagnostics_router
+    from services.tracing import instrument_sqlalchemy, span
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'trace.db'}")
+    instrument_sqlalchemy(engine)
+
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        with span("file.json", "load"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    app.include_router(diagnostics_router)
+    app.add_middleware(RequestContextMiddleware)
+    return app
+
+
+async def _request(app, path, headers=None):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(path, headers=headers or {})
+
+
+class TestTracing:
+    """Tests for opt-in span tracing."""
+
+    async def test_on_demand_trace_records_nested_spans(self, traced_app, monkeypatch):
+        """Test that X-Trace: 1 captures spans linked by correlation ID."""
+        from services.tracing import tracer
+
+        monkeypatch.setattr(tracer, "allow_on_demand", True)
+        response = await _request(traced_app, "/work", {"X-Trace": "1", "X-Correlation-ID": "trace-me"})
+
+        assert "file-json;dur=" in response.headers["server-timing"]
+
+        trace = (await _request(traced_app, "/admin/traces/trace-me")).json()
+        kinds = {s["kind"]: s for s in trace["spans"]}
+        assert kinds["db.query"]["name"] == "SELECT"
+        assert kinds["db.query"]["parent"] == kinds["file.json"]["id"]
+        assert trace["by_kind"]["db.query"]["count"] == 1
+
+    async def test_untraced_requests_record_nothing(self, traced_app):
+        """Test that requests without tracing leave no trace behind."""
+        response = await _request(traced_app, "/work", {"X-Correlation-ID": "not-traced"})
+
+        assert "server-timing" not in response.headers
+        assert (await _request(traced_app, "/admin/traces/not-traced")).status_code == 404
+
+    async def test_on_demand_tracing_is_off_by_default(self, traced_app):
+        """Test that clients can't force a trace or read stage timings unless allowed."""
+        response = await _request(traced_app, "/work", {"X-Trace": "1", "X-Correlation-ID": "forced"})
+
+        assert "server-timing" not in response.headers
+        assert (await _request(traced_app, "/admin/traces/forced")).status_code == 404
+
+    async def test_proxied_requests_are_not_local(self, traced_app):
+        """Test that diagnostics reject requests forwarded for a remote client."""
+        response = await _request(traced_app, "/admin/traces", {"X-Forwarded-For": "127.0.0.1, 203.0.113.7"})
+
+        assert response.status_code == 403
+        assert (await _request(traced_app, "/admin/traces")).status_code == 200
+
+    async def test_concurrent_tasks_keep_their_own_parents(self):
+        """Test that spans opened by concurrent tasks nest under their own task's span."""
+        from services.tracing import Tracer, span
+
+        tracer = Tracer(enabled=True)
+        token = tracer.start("concurrent", "GET", "/brain")
+
+        async def tool(name):
+            with span("tool", name):
+                await asyncio.sleep(0.01)
+                with span("http.client", name):
+                    await asyncio.sleep(0.01)
+
+        with span("brain", "handle_event"):
+            async with asyncio.TaskGroup() as tg:
+                for name in ("research", "score_lead", "crm_lookup"):
+                    tg.create_task(tool(name))
+        with span("db.query", "UPDATE"):
+            pass
+        trace = tracer.finish(token, 200).to_dict()
+
+        ids = {(s["kind"], s["name"]): s["id"] for s in trace["spans"]}
+        for s in trace["spans"]:
+            if s["kind"] == "http.client":
+                assert s["parent"] == ids[("tool", s["name"])]
+            elif s["kind"] == "tool":
+                assert s["parent"] == ids[("brain", "handle_event")]
+        assert trace["spans"][-1]["parent"] is None  # Nothing left open after the TaskGroup
+
+    def test_span_is_noop_outside_a_trace(self):
+        """Test that span() yields None when nothing is being traced."""
+        from services.tracing import span
+
+        with span("redis", "GET") as s:
+            assert s is None
+
+
+class TestSamplingProfiler:
+    """Tests for the collapsed-stack sampling profiler."""
+
+    def test_collapsed_stacks_include_busy_function(self):
+        """Test that a busy thread's stack shows up in the profile."""
+        from services.profiler import SamplingProfiler
+
+        stop = threading.Event()
+
+        def busy_loop_for_profiler():
+            while not stop.is_set():
+                sum(range(1000))
+
+        worker = threading.Thread(target=busy_loop_for_profiler, name="busy")
+        worker.start()
+        try:
+            stacks = SamplingProfiler().profile(seconds=0.3, interval=0.005)
+        finally:
+            stop.set()
+            worker.join()
+
+        lines = stacks.splitlines()
+        busy = [line for line in lines if "busy_loop_for_profiler" in line]
+        assert busy
+        stack, count = busy[0].rsplit(" ", 1)
+        assert stack.startswith("busy;")
+        assert int(count) > 0
+
+    def test_one_profile_at_a_time(self):
+        """Test that a second concurrent profile is rejected."""
+        from services.profiler import SamplingProfiler
+
+        profiler = SamplingProfiler()
+        results = []
+        first = threading.Thread(target=lambda: results.append(profiler.profile(seconds=0.2)))
+        first.start()
+        time.sleep(0.05)
+        second = profiler.profile(seconds=0.1)
+        first.join()
+
+        assert second is None
+        assert results[0] is not None
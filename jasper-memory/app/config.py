@@ -49,6 +49,10 @@ COLLECTIONS = {
         "description": "Blog posts, articles, documentation",
         "dimension": 384,
     },
+    "jasper_blog_chunks": {
+        "description": "Blog post chunks for related content and internal links (group = post slug)",
+        "dimension": 384,
+    },
     "aleph_knowledge": {
         "description": "Aleph app knowledge base (future)",
         "dimension": 384,
@@ -11,6 +11,9 @@ from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import hashlib
+import json
+
+import numpy as np
 
 from .config import SERVICE_NAME, SERVICE_VERSION, API_KEYS, COLLECTIONS
 from .embeddings import embedding_service
@@ -83,6 +86,26 @@ class SearchRequest(BaseModel):
     filter: Optional[str] = None
 
 
+class UpsertGroupsRequest(BaseModel):
+    collection: str
+    # group -> [{id, text, metadata}]; an empty list just deletes the group
+    groups: Dict[str, List[Dict[str, Any]]]
+
+
+class RelatedGroupsRequest(BaseModel):
+    collection: str = "jasper_blog_chunks"
+    group: str
+    limit: int = Field(default=10, ge=1, le=100)
+    chunk_limit: int = Field(default=100, ge=1, le=1000)
+
+
+class GroupTargetsRequest(BaseModel):
+    collection: str = "jasper_blog_chunks"
+    texts: List[str] = Field(..., min_items=1, max_items=200)
+    exclude_group: Optional[str] = None
+    limit: int = Field(default=3, ge=1, le=20)
+
+
 class SearchByVectorRequest(BaseModel):
     collection: str
     embedding: List[float]
@@ -282,6 +305,38 @@ async def search_by_vector(
     }
 
 
+@app.post("/memory/groups/upsert")
+async def upsert_groups(request: UpsertGroupsRequest, app_name: str = Depends(verify_api_key)):
+    """
+    Replace the items of one or more groups (e.g. all chunks of a blog post).
+
+    Texts from every group are embedded in a single batch.
+    """
+    deleted = vector_store.delete_groups(request.collection, list(request.groups))
+
+    items = []
+    for group, group_items in request.groups.items():
+        for item in group_items:
+            metadata = item.get("metadata", {}).copy()
+            metadata["_app"] = app_name
+            metadata["_inserted_at"] = datetime.utcnow().isoformat()
+            items.append({"id": item["id"], "text": item["text"], "metadata": metadata, "group": group})
+
+    if items:
+        embeddings = embedding_service.embed_texts([item["text"] for item in items])
+        for item, embedding in zip(items, embeddings):
+            item["embedding"] = embedding
+        vector_store.insert_batch(request.collection, items)
+
+    return {
+        "success": True,
+        "collection": request.collection,
+        "groups": len(request.groups),
+        "inserted": len(items),
+        "deleted": deleted,
+    }
+
+
 @app.get("/memory/{collection}/{id}")
 async def get_memory_item(
     collection: str,
@@ -362,6 +417,55 @@ async def find_similar_projects(
     }
 
 
+# --- Related content (JASPER CRM blog) ---
+
+@app.post("/jasper/related-content")
+async def related_content(request: RelatedGroupsRequest, app_name: str = Depends(verify_api_key)):
+    """
+    Groups (posts) most similar to a group, by ANN search with the
+    centroid of its chunk vectors. Nothing is re-embedded.
+    """
+    items = vector_store.group_vectors(request.collection, request.group)
+    if not items:
+        raise HTTPException(status_code=404, detail="Group not indexed")
+
+    centroid = np.mean([item["vector"] for item in items], axis=0)
+    norm = np.linalg.norm(centroid)
+    if norm > 0:
+        centroid = centroid / norm
+
+    hits = vector_store.search_many(
+        request.collection,
+        [centroid.tolist()],
+        limit=request.chunk_limit,
+        filter_expr=f"group != {json.dumps(request.group)}",
+    )[0]
+
+    # Best chunk per group
+    best: Dict[str, Dict[str, Any]] = {}
+    for hit in hits:
+        group = hit.get("group")
+        if group and (group not in best or hit["score"] > best[group]["score"]):
+            best[group] = {"group": group, "score": hit["score"], "chunk_id": hit["id"]}
+
+    related = sorted(best.values(), key=lambda r: r["score"], reverse=True)[:request.limit]
+    return {"group": request.group, "related": related}
+
+
+@app.post("/jasper/group-targets")
+async def group_targets(request: GroupTargetsRequest, app_name: str = Depends(verify_api_key)):
+    """
+    For each text (e.g. a paragraph), the closest chunks in other groups.
+    Texts are embedded in one batch and searched in one call.
+    """
+    embeddings = embedding_service.embed_texts(request.texts)
+    filter_expr = f"group != {json.dumps(request.exclude_group)}" if request.exclude_group else None
+    results = vector_store.search_many(
+        request.collection, embeddings, limit=request.limit, filter_expr=filter_expr
+    )
+    return {"targets": results}
+
+
 # --- Startup ---
 
 @app.on_event("startup")
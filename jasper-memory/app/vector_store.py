@@ -109,7 +109,7 @@ class VectorStore:
 
         Args:
             collection: Collection name
-            items: List of {id, embedding, metadata, text?}
+            items: List of {id, embedding, metadata, text?, group?}
 
         Returns:
             Number of items inserted
@@ -128,6 +128,8 @@ class VectorStore:
             }
             if "text" in item:
                 entry["text"] = item["text"][:10000]
+            if item.get("group"):
+                entry["group"] = item["group"]  # Filterable, unlike JSON metadata
             data.append(entry)
 
         self._client.insert(
@@ -182,6 +184,81 @@ class VectorStore:
 
         return matches
 
+    def search_many(
+        self,
+        collection: str,
+        query_embeddings: List[List[float]],
+        limit: int = 10,
+        filter_expr: Optional[str] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Batched ANN search: one result list per query vector, in one call.
+
+        Matches include the item's group.
+        """
+        if collection not in COLLECTIONS:
+            raise ValueError(f"Unknown collection: {collection}")
+        if not query_embeddings:
+            return []
+
+        results = self._client.search(
+            collection_name=collection,
+            data=query_embeddings,
+            limit=limit,
+            output_fields=["metadata", "group"],
+            filter=filter_expr or "",
+        )
+
+        all_matches = []
+        for hits in results:
+            matches = []
+            for hit in hits:
+                metadata = json.loads(hit["entity"].get("metadata", "{}"))
+                string_id = metadata.pop("_string_id", str(hit["id"]))
+                matches.append({
+                    "id": string_id,
+                    "group": hit["entity"].get("group"),
+                    "score": hit["distance"],
+                    "metadata": metadata,
+                })
+            all_matches.append(matches)
+        return all_matches
+
+    def group_vectors(self, collection: str, group: str) -> List[Dict[str, Any]]:
+        """All items of a group with their vectors."""
+        if collection not in COLLECTIONS:
+            raise ValueError(f"Unknown collection: {collection}")
+
+        results = self._client.query(
+            collection_name=collection,
+            filter=f"group == {json.dumps(group)}",
+            output_fields=["vector", "metadata"],
+        )
+        items = []
+        for item in results:
+            metadata = json.loads(item.get("metadata", "{}"))
+            items.append({
+                "id": metadata.pop("_string_id", str(item["id"])),
+                "vector": list(item["vector"]),
+                "metadata": metadata,
+            })
+        return items
+
+    def delete_groups(self, collection: str, groups: List[str]) -> int:
+        """Delete every item belonging to the given groups."""
+        if collection not in COLLECTIONS:
+            raise ValueError(f"Unknown collection: {collection}")
+        if not groups:
+            return 0
+
+        result = self._client.delete(
+            collection_name=collection,
+            filter=f"group in {json.dumps(list(groups))}",
+        )
+        if isinstance(result, dict):
+            return result.get("delete_count", 0)
+        return len(result) if result else 0
+
     def get(self, collection: str, id: str) -> Optional[Dict[str, Any]]:
         """
         Get a specific item by string ID.